@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark do cliente de IA: cliente síncrono x AsyncOpenAI com limite de concorrência
+
+Dispara completions simultâneas contra um servidor local compatível com a OpenAI
+e mede o tempo total e o maior atraso do event loop (uma task "batimento" que
+deveria acordar a cada 10 ms). O modo síncrono repete o comportamento anterior
+(openai.OpenAI dentro da corrotina), que bloqueia o loop durante cada chamada.
+
+Uso:
+    python benchmarks/ai_client_benchmark.py
+"""
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_openai_api
+from stub_graph_api import StubGraphAPI
+
+CALLS = 50
+HEARTBEAT = 0.01
+
+
+async def measure(call) -> tuple:
+    """Executa CALLS chamadas simultâneas; retorna (segundos, maior atraso do loop em ms)"""
+    max_lag = 0.0
+    running = True
+
+    async def heartbeat():
+        nonlocal max_lag
+        while running:
+            start = time.perf_counter()
+            await asyncio.sleep(HEARTBEAT)
+            max_lag = max(max_lag, time.perf_counter() - start - HEARTBEAT)
+
+    beat = asyncio.create_task(heartbeat())
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await asyncio.gather(*(call(i) for i in range(CALLS)))
+    elapsed = time.perf_counter() - start
+    running = False
+    await beat
+    return elapsed, max_lag * 1000
+
+
+async def main(base_url: str):
+    os.environ["OPENAI_API_KEY"] = "benchmark-key"
+    os.environ["OPENAI_BASE_URL"] = f"{base_url}/v1"
+    os.environ["OPENAI_MAX_CONCURRENCY"] = "16"
+    os.environ["OPENAI_QUEUE_TIMEOUT"] = "0.5"
+    import openai
+    from src.infrastructure.external_services.ai_service_impl import AIServiceImpl
+
+    sync_client = openai.OpenAI(api_key="benchmark-key", base_url=f"{base_url}/v1")
+
+    async def sync_call(index: int):
+        # Comportamento anterior (já sem o await inválido): bloqueia o event loop
+        sync_client.chat.completions.create(
+            model="gpt-3.5-turbo",
+            messages=[{"role": "user", "content": f"Mensagem {index}"}]
+        )
+
+    service = AIServiceImpl()
+
+    async def async_call(index: int):
+        await service.generate_response(f"Mensagem {index}", [])
+
+    print("📊 Benchmark do cliente de IA")
+    print(f"   {CALLS} chamadas simultâneas, latência do servidor {fake_openai_api.LATENCY * 1000:.0f} ms\n")
+
+    # Aquece conexões e imports antes de medir
+    await sync_call(-1)
+    await async_call(-1)
+
+    elapsed, lag = await measure(sync_call)
+    print(f"   Síncrono         : {elapsed:6.2f}s, atraso máximo do loop {lag:7.1f} ms")
+
+    elapsed, lag = await measure(async_call)
+    stats = service.stats()
+    print(f"   Assíncrono (cap) : {elapsed:6.2f}s, atraso máximo do loop {lag:7.1f} ms")
+    print(f"   Simultâneas no servidor: {fake_openai_api.max_in_flight} (limite {os.environ['OPENAI_MAX_CONCURRENCY']})")
+    print(f"   Respostas automáticas por saturação: {stats['saturated']}")
+    await service.aclose()
+
+
+if __name__ == "__main__":
+    logging.disable(logging.WARNING)
+    with StubGraphAPI(fake_openai_api.app) as stub:
+        asyncio.run(main(stub.base_url))
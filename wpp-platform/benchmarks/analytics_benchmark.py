@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Benchmark do analytics: linhas carregadas em Python x agregação no banco
+
+Cria um banco SQLite temporário com MESSAGES mensagens espalhadas por DAYS
+dias. O fluxo anterior carregava todas as linhas (usuários, conversas e
+mensagens) e contava em Python; como isso com 1M de entidades leva minutos e
+gigabytes, ele é medido sobre uma amostra de SAMPLE mensagens e extrapolado. O
+novo usa o AnalyticsRepositoryImpl (COUNT/FILTER/GROUP BY) sobre o banco todo.
+A memória é o pico medido pelo tracemalloc durante cada chamada.
+
+Uso:
+    python benchmarks/analytics_benchmark.py
+"""
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.infrastructure.database.engine_config import create_async_database_engine
+from src.infrastructure.database.models import Base, ConversationModel, MessageModel, UserModel
+from src.infrastructure.repositories.analytics_repository_impl import AnalyticsRepositoryImpl
+from src.infrastructure.repositories.counters import reconcile_counters
+from src.infrastructure.repositories.message_repository_impl import MessageRepositoryImpl
+
+MESSAGES = 1_000_000
+USERS = 10_000
+DAYS = 30
+SAMPLE = 100_000
+CHUNK = 100_000
+
+
+def create_database(path: str) -> datetime:
+    """Banco com USERS usuários (uma conversa cada) e MESSAGES mensagens nos últimos DAYS dias"""
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    end = datetime.combine(datetime.utcnow().date(), datetime.min.time()) + timedelta(days=1)
+    start = end - timedelta(days=DAYS)
+    step = (end - start) / MESSAGES
+    users = [uuid.uuid4() for _ in range(USERS)]
+    conversations = [uuid.uuid4() for _ in range(USERS)]
+    with engine.begin() as connection:
+        connection.execute(insert(UserModel), [
+            {"id": user_id, "phone_number": f"55859{index:08d}", "name": f"Contato {index}",
+             "created_at": start + (end - start) * index / USERS}
+            for index, user_id in enumerate(users)
+        ])
+        connection.execute(insert(ConversationModel), [
+            {"id": conversation_id, "user_id": user_id, "status": ("active", "pending", "closed")[index % 3],
+             "created_at": start}
+            for index, (conversation_id, user_id) in enumerate(zip(conversations, users))
+        ])
+        for offset in range(0, MESSAGES, CHUNK):
+            connection.execute(insert(MessageModel), [
+                {
+                    "id": uuid.uuid4(),
+                    "conversation_id": conversations[index % USERS],
+                    "user_id": users[index % USERS],
+                    "whatsapp_message_id": f"wamid.{index}",
+                    "content": f"Mensagem {index}",
+                    "direction": "incoming" if index % 2 else "outgoing",
+                    "created_at": start + step * index
+                }
+                for index in range(offset, min(offset + CHUNK, MESSAGES))
+            ])
+    engine.dispose()
+    return end
+
+
+async def profiled(call) -> tuple:
+    """(ms, pico de memória em MB, resultado) da chamada"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = await call()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed * 1000, peak / 1024 / 1024, result
+
+
+async def in_python(session) -> Counter:
+    """Fluxo anterior: carrega as mensagens (amostra) e conta por dia e direção em Python"""
+    messages = await MessageRepositoryImpl(session).find_all(skip=0, limit=SAMPLE)
+    return Counter((message.created_at.date(), message.content.direction.value) for message in messages)
+
+
+async def in_sql(session, end: datetime) -> dict:
+    """Fluxo novo: os quatro endpoints de analytics agregados no banco"""
+    repository = AnalyticsRepositoryImpl(session)
+    start = end - timedelta(days=DAYS)
+    return {
+        "overview": await repository.get_overview(today=end - timedelta(days=1)),
+        "trends": await repository.get_message_trends(start, end),
+        "activity": await repository.get_user_activity(start, end),
+        "metrics": await repository.get_conversation_metrics()
+    }
+
+
+async def main(path: str, end: datetime):
+    engine = create_async_database_engine(f"sqlite+aiosqlite:///{path}")
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+    async with sessions() as session:
+        await reconcile_counters(session)
+
+    print("📊 Benchmark de analytics (SQLite)")
+    print(f"   {MESSAGES} mensagens, {USERS} usuários, {DAYS} dias\n")
+
+    async with sessions() as session:
+        python_ms, python_mb, _ = await profiled(lambda: in_python(session))
+    scale = MESSAGES / SAMPLE
+    print(
+        f"   Python (amostra de {SAMPLE}): {python_ms:9.0f} ms, pico {python_mb:7.1f} MB"
+        f"  -> 1M estimado: {python_ms * scale / 1000:.1f} s, {python_mb * scale:.0f} MB"
+    )
+
+    async with sessions() as session:
+        sql_ms, sql_mb, result = await profiled(lambda: in_sql(session, end))
+    print(f"   SQL (banco todo, 4 consultas): {sql_ms:9.0f} ms, pico {sql_mb:7.1f} MB")
+    print(
+        f"\n   Conferência: {result['overview'].total_messages} mensagens, "
+        f"{sum(trend.total_messages for trend in result['trends'])} nos {len(result['trends'])} dias"
+    )
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.disable(logging.WARNING)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "analytics.db")
+        end = create_database(path)
+        asyncio.run(main(path, end))
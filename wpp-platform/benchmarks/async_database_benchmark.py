@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Benchmark do atraso do event loop sob carga: Session síncrona x AsyncSession
+
+Cria um banco SQLite temporário com ROWS mensagens e dispara REQUESTS consultas
+simultâneas de contagem por conversa (varredura da tabela). Enquanto isso uma
+task mede o atraso do event loop: quanto um `asyncio.sleep` curto demora a mais
+do que o pedido, que é o que um webhook recebido no mesmo momento esperaria.
+Antes, os repositórios declaravam `async def` mas chamavam a Session síncrona;
+agora usam AsyncSession (aiosqlite/asyncpg) e o loop segue livre.
+
+Uso:
+    python benchmarks/async_database_benchmark.py
+"""
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.infrastructure.database.models import Base, ConversationModel, MessageModel, UserModel
+from src.infrastructure.repositories.message_repository_impl import MessageRepositoryImpl
+
+ROWS = 200_000
+REQUESTS = 40
+TICK = 0.005
+
+
+def create_database(path: str) -> uuid.UUID:
+    """Cria o banco com ROWS mensagens em uma conversa; retorna o ID da conversa"""
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    user_id, conversation_id = uuid.uuid4(), uuid.uuid4()
+    with engine.begin() as connection:
+        connection.execute(insert(UserModel), [{"id": user_id, "phone_number": "5585999999999", "name": "Cliente"}])
+        connection.execute(insert(ConversationModel), [{"id": conversation_id, "user_id": user_id}])
+        connection.execute(insert(MessageModel), [
+            {
+                "id": uuid.uuid4(),
+                "conversation_id": conversation_id,
+                "user_id": user_id,
+                "whatsapp_message_id": f"wamid.{index}",
+                "content": f"Mensagem {index}",
+                "direction": "incoming"
+            }
+            for index in range(ROWS)
+        ])
+    engine.dispose()
+    return conversation_id
+
+
+async def measure_lag(query) -> dict:
+    """Roda REQUESTS consultas simultâneas e mede o atraso do event loop"""
+    lags = []
+    running = True
+
+    async def ticker():
+        while running:
+            start = time.perf_counter()
+            await asyncio.sleep(TICK)
+            lags.append(time.perf_counter() - start - TICK)
+
+    monitor = asyncio.ensure_future(ticker())
+    await asyncio.sleep(TICK * 4)
+    start = time.perf_counter()
+    await asyncio.gather(*(query() for _ in range(REQUESTS)))
+    elapsed = time.perf_counter() - start
+    running = False
+    await monitor
+
+    lags.sort()
+    return {
+        "elapsed": elapsed,
+        "max_lag": lags[-1],
+        "p99_lag": lags[int(len(lags) * 0.99) - 1] if len(lags) > 1 else lags[-1],
+        "median_lag": statistics.median(lags)
+    }
+
+
+async def main(path: str, conversation_id: uuid.UUID):
+    # Antes: método async com a Session síncrona, como faziam os repositórios
+    sync_sessions = sessionmaker(bind=create_engine(f"sqlite:///{path}"))
+
+    async def sync_count():
+        with sync_sessions() as db:
+            return db.query(MessageModel).filter(MessageModel.conversation_id == conversation_id).count()
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async_sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def async_count():
+        async with async_sessions() as db:
+            return await MessageRepositoryImpl(db).count_by_conversation_id(conversation_id)
+
+    await async_count()
+
+    print("📊 Benchmark do event loop com consultas ao banco (SQLite)")
+    print(f"   {ROWS} mensagens, {REQUESTS} consultas simultâneas de contagem\n")
+    for label, query in (("Session síncrona", sync_count), ("AsyncSession    ", async_count)):
+        result = await measure_lag(query)
+        print(
+            f"   {label}: {result['elapsed']:5.2f}s no total, atraso do loop "
+            f"máx {result['max_lag'] * 1000:7.1f} ms, p99 {result['p99_lag'] * 1000:7.1f} ms, "
+            f"mediana {result['median_lag'] * 1000:5.1f} ms"
+        )
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.disable(logging.WARNING)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "benchmark.db")
+        conversation_id = create_database(path)
+        asyncio.run(main(path, conversation_id))
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark do processamento de mensagens pendentes: uma por vez x lotes com vários workers
+
+Cria um banco SQLite temporário com MESSAGES mensagens não processadas. O fluxo
+anterior lia todas as pendentes e processava cada uma com análise e commit
+próprios; o novo reivindica páginas (BEGIN IMMEDIATE no SQLite, FOR UPDATE SKIP
+LOCKED no PostgreSQL), analisa a página de uma vez e marca tudo em um único
+UPDATE. Confere também que nenhum worker processou a mesma mensagem duas vezes.
+
+Uso:
+    python benchmarks/batch_processing_benchmark.py
+"""
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.application.use_cases.message_use_cases import ProcessUnprocessedMessagesBatchUseCase
+from src.domain.services.message_processing_service import DefaultMessageProcessingService
+from src.infrastructure.database.models import Base, ConversationModel, MessageModel, UserModel
+from src.infrastructure.repositories.message_repository_impl import MessageRepositoryImpl
+
+MESSAGES = 5_000
+WORKERS = 4
+BATCH_SIZE = 200
+
+TEMPLATES = [
+    "Oi, bom dia! Qual o horário de funcionamento da loja {}?",
+    "Meu pedido {} chegou com defeito, quero devolução",
+    "Quanto custa o plano anual? Meu email é cliente{}@exemplo.com",
+    "Obrigado, o atendimento do pedido {} foi ótimo!",
+    "Não consigo acessar a conta {}, preciso falar com atendente",
+]
+
+
+def create_database(path: str):
+    """Cria o banco com MESSAGES mensagens pendentes"""
+    engine = create_engine(f"sqlite:///{path}", connect_args={"timeout": 30})
+    Base.metadata.create_all(engine)
+    user_id, conversation_id = uuid.uuid4(), uuid.uuid4()
+    with engine.begin() as connection:
+        connection.execute(insert(UserModel), [{"id": user_id, "phone_number": "5585999999999", "name": "Cliente"}])
+        connection.execute(insert(ConversationModel), [{"id": conversation_id, "user_id": user_id}])
+        connection.execute(insert(MessageModel), [
+            {
+                "id": uuid.uuid4(),
+                "conversation_id": conversation_id,
+                "user_id": user_id,
+                "whatsapp_message_id": f"wamid.{index}",
+                "content": TEMPLATES[index % len(TEMPLATES)].format(index),
+                "message_type": "text",
+                "direction": "incoming",
+                "is_processed": False
+            }
+            for index in range(MESSAGES)
+        ])
+    return engine
+
+
+def async_sessions(path: str):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}", connect_args={"timeout": 30})
+    return engine, async_sessionmaker(engine, expire_on_commit=False)
+
+
+async def one_at_a_time(path: str) -> int:
+    """Fluxo anterior: lista todas as pendentes e salva cada uma com commit próprio"""
+    service = DefaultMessageProcessingService()
+    engine, sessions = async_sessions(path)
+    async with sessions() as session:
+        repository = MessageRepositoryImpl(session)
+        messages = await repository.find_unprocessed_messages()
+        for message in messages:
+            await service.analyze_sentiment(message.content.text)
+            await service.extract_intent(message.content.text)
+            message.is_processed = True
+            await repository.save(message)
+    await engine.dispose()
+    return len(messages)
+
+
+async def batch_workers(path: str) -> list:
+    """WORKERS workers, cada um com sua sessão, drenando a fila em páginas"""
+    engine, sessions = async_sessions(path)
+
+    async def drain():
+        async with sessions() as session:
+            use_case = ProcessUnprocessedMessagesBatchUseCase(
+                MessageRepositoryImpl(session), DefaultMessageProcessingService()
+            )
+            result = await use_case.execute(batch_size=BATCH_SIZE, max_batches=MESSAGES)
+            return [item.message_id for item in result.results]
+
+    results = await asyncio.gather(*(drain() for _ in range(WORKERS)))
+    await engine.dispose()
+    return [message_id for worker in results for message_id in worker]
+
+
+def pending(engine) -> int:
+    with engine.connect() as connection:
+        return connection.scalar(select(func.count()).where(MessageModel.is_processed == False))
+
+
+def main():
+    print("📊 Benchmark do processamento de mensagens pendentes (SQLite)")
+    print(f"   {MESSAGES} mensagens, {WORKERS} workers, páginas de {BATCH_SIZE}\n")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "sequential.db")
+        engine = create_database(path)
+        start = time.perf_counter()
+        count = asyncio.run(one_at_a_time(path))
+        before = time.perf_counter() - start
+        print(f"   Uma por vez          : {before:6.2f}s ({count / before:8.0f} mensagens/s), pendentes: {pending(engine)}")
+        engine.dispose()
+
+        path = os.path.join(directory, "batch.db")
+        engine = create_database(path)
+        start = time.perf_counter()
+        processed = asyncio.run(batch_workers(path))
+        after = time.perf_counter() - start
+        duplicated = sum(1 for times in Counter(processed).values() if times > 1)
+        print(f"   Lotes, {WORKERS} workers     : {after:6.2f}s ({len(processed) / after:8.0f} mensagens/s), pendentes: {pending(engine)}")
+        print(f"\n   Processadas: {len(processed)}, em duplicidade: {duplicated}")
+        print(f"   Redução: {before / after:.1f}x")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.disable(logging.WARNING)
+    main()
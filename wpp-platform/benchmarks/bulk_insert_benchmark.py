@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark de inserção em lote: save por linha x save_many
+
+Simula a importação de um histórico: MESSAGES mensagens de USERS contatos. O
+fluxo anterior grava cada mensagem com MessageRepositoryImpl.save (um commit
+por linha); como isso levaria minutos para o volume todo, mede-se uma amostra
+de SAMPLE mensagens e a taxa é extrapolada. O novo resolve os contatos com
+find_or_create_many (um comando por bloco) e grava as mensagens com save_many.
+O SQLite roda localmente em um arquivo temporário; para o PostgreSQL (COPY),
+defina BENCHMARK_POSTGRES_URL (postgresql+asyncpg://...) com um banco descartável.
+
+Uso:
+    python benchmarks/bulk_insert_benchmark.py
+    BENCHMARK_POSTGRES_URL=postgresql+asyncpg://... python benchmarks/bulk_insert_benchmark.py
+"""
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.domain.entities.conversation import Conversation
+from src.domain.entities.message import Message
+from src.domain.entities.user import User
+from src.domain.value_objects.message_content import MessageContent
+from src.domain.value_objects.phone_number import PhoneNumber
+from src.infrastructure.database.engine_config import create_async_database_engine
+from src.infrastructure.database.models import Base, ConversationModel, MessageModel, UserModel
+from src.infrastructure.repositories.conversation_repository_impl import ConversationRepositoryImpl
+from src.infrastructure.repositories.message_repository_impl import MessageRepositoryImpl
+from src.infrastructure.repositories.user_repository_impl import UserRepositoryImpl
+
+MESSAGES = 100_000
+USERS = 2_000
+SAMPLE = 2_000
+
+
+def history(conversations: dict, count: int) -> list:
+    """`count` mensagens distribuídas entre as conversas dos contatos"""
+    users = list(conversations.items())
+    messages = []
+    for index in range(count):
+        user_id, conversation_id = users[index % len(users)]
+        messages.append(Message.create_new(
+            conversation_id=conversation_id,
+            user_id=user_id,
+            whatsapp_message_id=f"wamid.import.{index}",
+            content=MessageContent(text=f"Mensagem importada {index}")
+        ))
+    return messages
+
+
+async def reset(engine):
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+        for model in (MessageModel, ConversationModel, UserModel):
+            await connection.execute(delete(model))
+
+
+async def measure(engine) -> dict:
+    sessions = async_sessionmaker(engine, expire_on_commit=False, autoflush=False)
+    contacts = [
+        User.create_new(phone_number=PhoneNumber(f"55859{index:08d}"), name=f"Contato {index}")
+        for index in range(USERS)
+    ]
+
+    await reset(engine)
+    async with sessions() as session:
+        users = await UserRepositoryImpl(session).find_or_create_many(contacts[:USERS // 2])
+
+        # Metade dos contatos já existe: o mesmo comando devolve os existentes e cria o resto
+        start = time.perf_counter()
+        users = await UserRepositoryImpl(session).find_or_create_many(contacts)
+        users_elapsed = time.perf_counter() - start
+
+        conversations = [Conversation.create_new(user_id=user.id) for user in users.values()]
+        await ConversationRepositoryImpl(session).save_many(conversations)
+        by_user = {conversation.user_id: conversation.id for conversation in conversations}
+
+        repository = MessageRepositoryImpl(session)
+        start = time.perf_counter()
+        for message in history(by_user, SAMPLE):
+            await repository.save(message)
+        one_by_one = SAMPLE / (time.perf_counter() - start)
+
+        await session.execute(delete(MessageModel))
+        await session.commit()
+
+        start = time.perf_counter()
+        await repository.save_many(history(by_user, MESSAGES))
+        bulk = MESSAGES / (time.perf_counter() - start)
+        stored = await session.scalar(select(func.count()).select_from(MessageModel))
+
+    return {
+        "users": len(users),
+        "users_per_second": len(users) / users_elapsed,
+        "one_by_one": one_by_one,
+        "bulk": bulk,
+        "stored": stored
+    }
+
+
+async def report(label: str, engine):
+    result = await measure(engine)
+    await engine.dispose()
+    print(f"   {label}")
+    print(f"     find_or_create_many: {result['users']} contatos, {result['users_per_second']:9.0f} contatos/s")
+    print(f"     save por linha     : {result['one_by_one']:9.0f} mensagens/s (amostra de {SAMPLE})")
+    print(f"     save_many          : {result['bulk']:9.0f} mensagens/s ({result['stored']} gravadas)")
+    print(f"     Ganho: {result['bulk'] / result['one_by_one']:.0f}x\n")
+
+
+async def main():
+    print("📊 Benchmark de inserção em lote")
+    print(f"   {MESSAGES} mensagens de {USERS} contatos\n")
+
+    with tempfile.TemporaryDirectory() as directory:
+        await report("SQLite (local)", create_async_database_engine(f"sqlite+aiosqlite:///{directory}/bulk.db"))
+
+    postgres_url = os.getenv("BENCHMARK_POSTGRES_URL")
+    if postgres_url:
+        await report("PostgreSQL (COPY)", create_async_database_engine(postgres_url))
+    else:
+        print("   PostgreSQL: defina BENCHMARK_POSTGRES_URL para incluir")
+
+
+if __name__ == "__main__":
+    logging.disable(logging.WARNING)
+    asyncio.run(main())
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark da listagem de conversas: N+1 x consulta única com agregados
+
+Cria um banco SQLite temporário com CONVERSATIONS conversas (cada uma de um
+usuário, com MESSAGES_PER_CONVERSATION mensagens) e monta uma página de
+PAGE_SIZE como o GET /conversations. O fluxo anterior busca a página e depois
+o usuário de cada conversa (1 + PAGE_SIZE consultas, sem as contagens); o novo
+usa find_summaries_page, que traz usuário, message_count, unread_count e
+last_message_at na mesma consulta. Os comandos são contados pelos eventos do engine.
+
+Uso:
+    python benchmarks/conversation_listing_benchmark.py
+"""
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.infrastructure.database.models import Base, ConversationModel, MessageModel, UserModel
+from src.infrastructure.repositories.conversation_repository_impl import ConversationRepositoryImpl
+from src.infrastructure.repositories.user_repository_impl import UserRepositoryImpl
+
+CONVERSATIONS = 5_000
+MESSAGES_PER_CONVERSATION = 20
+PAGE_SIZE = 1_000
+REPEAT = 5
+
+
+def create_database(path: str):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    start = datetime(2024, 1, 1)
+    users = [uuid.uuid4() for _ in range(CONVERSATIONS)]
+    conversations = [uuid.uuid4() for _ in range(CONVERSATIONS)]
+    with engine.begin() as connection:
+        connection.execute(insert(UserModel), [
+            {"id": user_id, "phone_number": f"55859{index:08d}", "name": f"Contato {index}"}
+            for index, user_id in enumerate(users)
+        ])
+        connection.execute(insert(ConversationModel), [
+            {"id": conversation_id, "user_id": user_id, "created_at": start + timedelta(seconds=index)}
+            for index, (conversation_id, user_id) in enumerate(zip(conversations, users))
+        ])
+        connection.execute(insert(MessageModel), [
+            {
+                "id": uuid.uuid4(),
+                "conversation_id": conversation_id,
+                "user_id": user_id,
+                "whatsapp_message_id": f"wamid.{index}.{sequence}",
+                "content": f"Mensagem {sequence}",
+                "direction": "incoming" if sequence % 2 else "outgoing",
+                "is_processed": sequence % 4 == 1,
+                "created_at": start + timedelta(seconds=index, milliseconds=sequence)
+            }
+            for index, (conversation_id, user_id) in enumerate(zip(conversations, users))
+            for sequence in range(MESSAGES_PER_CONVERSATION)
+        ])
+    engine.dispose()
+
+
+async def n_plus_one(session) -> list:
+    """Fluxo anterior: página de conversas e um find_by_id por usuário"""
+    conversations = (await ConversationRepositoryImpl(session).find_page(limit=PAGE_SIZE)).items
+    users = UserRepositoryImpl(session)
+    return [(conversation, await users.find_by_id(conversation.user_id)) for conversation in conversations]
+
+
+async def single_query(session) -> list:
+    """Fluxo novo: usuário e contagens na mesma consulta"""
+    return (await ConversationRepositoryImpl(session).find_summaries_page(limit=PAGE_SIZE)).items
+
+
+async def measure(path: str, call) -> tuple:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    statements = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(1))
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    best = float("inf")
+    for _ in range(REPEAT):
+        statements.clear()
+        async with sessions() as session:
+            start = time.perf_counter()
+            await call(session)
+            best = min(best, time.perf_counter() - start)
+    await engine.dispose()
+    return best * 1000, len(statements)
+
+
+async def main(path: str):
+    print("📊 Benchmark da listagem de conversas (SQLite)")
+    print(f"   Página de {PAGE_SIZE} de {CONVERSATIONS} conversas, {MESSAGES_PER_CONVERSATION} mensagens cada\n")
+
+    before_ms, before_statements = await measure(path, n_plus_one)
+    after_ms, after_statements = await measure(path, single_query)
+    print(f"   N+1 (sem contagens)     : {before_statements:5d} consultas, {before_ms:8.2f} ms")
+    print(f"   find_summaries_page     : {after_statements:5d} consultas, {after_ms:8.2f} ms")
+    print(f"\n   Ganho: {before_ms / after_ms:.1f}x")
+
+
+if __name__ == "__main__":
+    logging.disable(logging.WARNING)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "conversations.db")
+        create_database(path)
+        asyncio.run(main(path))
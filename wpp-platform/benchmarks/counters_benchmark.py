@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos contadores desnormalizados: COUNT(*) na leitura x contadores na escrita
+
+Cria um banco SQLite temporário com CONVERSATIONS conversas e uma quantidade
+crescente de mensagens por conversa. A leitura compara uma página de
+PAGE_SIZE conversas com as contagens agregadas das mensagens (GROUP BY sobre
+as conversas da página) com a mesma página lendo as colunas de contadores. A
+escrita mede o save de mensagem, que agora inclui dois UPDATEs de contadores
+na mesma transação; no fim a reconciliação confere que nada divergiu.
+
+Uso:
+    python benchmarks/counters_benchmark.py
+"""
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.domain.entities.message import Message
+from src.domain.value_objects.message_content import MessageContent
+from src.infrastructure.database.engine_config import create_async_database_engine
+from src.infrastructure.database.models import Base, ConversationModel, MessageModel, UserModel
+from src.infrastructure.repositories.counters import reconcile_counters
+from src.infrastructure.repositories.message_repository_impl import MessageRepositoryImpl
+
+CONVERSATIONS = 2_000
+MESSAGES_PER_CONVERSATION = [10, 100, 500]
+PAGE_SIZE = 500
+WRITES = 500
+REPEAT = 3
+
+
+def create_database(path: str, per_conversation: int) -> list:
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    start = datetime(2024, 1, 1)
+    users = [uuid.uuid4() for _ in range(CONVERSATIONS)]
+    conversations = [uuid.uuid4() for _ in range(CONVERSATIONS)]
+    with engine.begin() as connection:
+        connection.execute(insert(UserModel), [
+            {"id": user_id, "phone_number": f"55859{index:08d}", "name": f"Contato {index}"}
+            for index, user_id in enumerate(users)
+        ])
+        connection.execute(insert(ConversationModel), [
+            {"id": conversation_id, "user_id": user_id, "created_at": start + timedelta(seconds=index)}
+            for index, (conversation_id, user_id) in enumerate(zip(conversations, users))
+        ])
+        for index, (conversation_id, user_id) in enumerate(zip(conversations, users)):
+            connection.execute(insert(MessageModel), [
+                {
+                    "id": uuid.uuid4(),
+                    "conversation_id": conversation_id,
+                    "user_id": user_id,
+                    "whatsapp_message_id": f"wamid.{index}.{sequence}",
+                    "content": f"Mensagem {sequence}",
+                    "direction": "incoming" if sequence % 2 else "outgoing",
+                    "created_at": start + timedelta(seconds=index, milliseconds=sequence)
+                }
+                for sequence in range(per_conversation)
+            ])
+    engine.dispose()
+    return list(zip(conversations, users))
+
+
+def aggregated_page():
+    """Página com as contagens calculadas na leitura (GROUP BY nas mensagens da página)"""
+    page = (
+        select(ConversationModel.id)
+        .order_by(ConversationModel.created_at, ConversationModel.id).limit(PAGE_SIZE).cte()
+    )
+    return (
+        select(MessageModel.conversation_id, func.count(), func.max(MessageModel.created_at))
+        .where(MessageModel.conversation_id.in_(select(page.c.id)))
+        .group_by(MessageModel.conversation_id)
+    )
+
+
+def counters_page():
+    """A mesma página lendo as colunas de contadores"""
+    return (
+        select(ConversationModel.id, ConversationModel.message_count, ConversationModel.last_message_at)
+        .order_by(ConversationModel.created_at, ConversationModel.id).limit(PAGE_SIZE)
+    )
+
+
+async def timed(call) -> float:
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        await call()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+async def measure(path: str, pairs: list) -> dict:
+    engine = create_async_database_engine(f"sqlite+aiosqlite:///{path}")
+    sessions = async_sessionmaker(engine, expire_on_commit=False, autoflush=False)
+    async with sessions() as session:
+        await reconcile_counters(session)
+        aggregated_ms = await timed(lambda: session.execute(aggregated_page()))
+        counters_ms = await timed(lambda: session.execute(counters_page()))
+
+        messages = MessageRepositoryImpl(session)
+        start = time.perf_counter()
+        for sequence in range(WRITES):
+            conversation_id, user_id = pairs[sequence % len(pairs)]
+            await messages.save(Message.create_new(
+                conversation_id=conversation_id,
+                user_id=user_id,
+                whatsapp_message_id=f"wamid.write.{sequence}",
+                content=MessageContent(text=f"Nova mensagem {sequence}")
+            ))
+        write_ms = (time.perf_counter() - start) / WRITES * 1000
+        drift = await reconcile_counters(session)
+    await engine.dispose()
+    return {"aggregated": aggregated_ms, "counters": counters_ms, "write": write_ms, "drift": drift}
+
+
+async def main():
+    print("📊 Benchmark dos contadores (SQLite)")
+    print(f"   {CONVERSATIONS} conversas, página de {PAGE_SIZE}, {WRITES} saves, melhor de {REPEAT}\n")
+    print(f"   {'msgs/conversa':>13} | {'COUNT(*)':>10} | {'contadores':>10} | {'save':>9} | divergências")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for per_conversation in MESSAGES_PER_CONVERSATION:
+            path = os.path.join(directory, f"counters_{per_conversation}.db")
+            pairs = create_database(path, per_conversation)
+            result = await measure(path, pairs)
+            print(
+                f"   {per_conversation:>13} | {result['aggregated']:8.2f}ms | {result['counters']:8.2f}ms | "
+                f"{result['write']:7.2f}ms | {result['drift']['conversations'] + result['drift']['users']}"
+            )
+
+
+if __name__ == "__main__":
+    logging.disable(logging.WARNING)
+    asyncio.run(main())
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark de escrita no banco: engine padrão x engine configurado (pool + PRAGMAs)
+
+WRITERS tarefas simultâneas salvam WRITES_PER_WRITER mensagens cada uma pelo
+MessageRepositoryImpl (um commit por mensagem, como no recebimento de webhooks).
+No SQLite o engine padrão usa NullPool e o journal padrão (DELETE, synchronous
+FULL); o configurado usa pool, WAL, synchronous=NORMAL, mmap e busy_timeout. O
+SQLite roda localmente em um arquivo temporário; para o PostgreSQL, defina
+BENCHMARK_POSTGRES_URL (postgresql+asyncpg://...) com um banco descartável.
+
+Uso:
+    python benchmarks/database_write_benchmark.py
+    BENCHMARK_POSTGRES_URL=postgresql+asyncpg://... python benchmarks/database_write_benchmark.py
+"""
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import delete, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.domain.entities.message import Message
+from src.domain.value_objects.message_content import MessageContent
+from src.infrastructure.database.engine_config import create_async_database_engine, pool_stats
+from src.infrastructure.database.models import Base, ConversationModel, MessageModel, UserModel
+from src.infrastructure.repositories.message_repository_impl import MessageRepositoryImpl
+
+WRITERS = 8
+WRITES_PER_WRITER = 250
+
+
+async def prepare(engine) -> tuple:
+    """Cria o schema limpo com um usuário e uma conversa"""
+    user_id, conversation_id = uuid.uuid4(), uuid.uuid4()
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+        for model in (MessageModel, ConversationModel, UserModel):
+            await connection.execute(delete(model))
+        await connection.execute(insert(UserModel), [{"id": user_id, "phone_number": "5585999999999", "name": "Cliente"}])
+        await connection.execute(insert(ConversationModel), [{"id": conversation_id, "user_id": user_id}])
+    return user_id, conversation_id
+
+
+async def measure(engine) -> float:
+    """Mensagens gravadas por segundo com WRITERS tarefas simultâneas"""
+    user_id, conversation_id = await prepare(engine)
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def writer(index: int):
+        async with sessions() as session:
+            repository = MessageRepositoryImpl(session)
+            for sequence in range(WRITES_PER_WRITER):
+                await repository.save(Message.create_new(
+                    conversation_id=conversation_id,
+                    user_id=user_id,
+                    whatsapp_message_id=f"wamid.{index}.{sequence}",
+                    content=MessageContent(text=f"Mensagem {sequence} do escritor {index}")
+                ))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(writer(index) for index in range(WRITERS)))
+    return WRITERS * WRITES_PER_WRITER / (time.perf_counter() - start)
+
+
+async def compare(label: str, default, tuned):
+    """Mede o engine padrão e o configurado do mesmo backend"""
+    print(f"   {label}")
+    before = await measure(default)
+    await default.dispose()
+    print(f"     Engine padrão     : {before:8.0f} escritas/s")
+
+    after = await measure(tuned)
+    stats = pool_stats(tuned)
+    await tuned.dispose()
+    print(f"     Engine configurado: {after:8.0f} escritas/s ({after / before:.1f}x)")
+    print(
+        f"     Pool: {stats['checkouts']} checkouts, {stats['connections_opened']} conexões abertas, "
+        f"espera média {stats['wait_avg_ms']} ms, máx {stats['wait_max_ms']} ms\n"
+    )
+
+
+async def main():
+    print("📊 Benchmark de escrita no banco")
+    print(f"   {WRITERS} escritores x {WRITES_PER_WRITER} mensagens, um commit por mensagem\n")
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Um arquivo por engine: o modo WAL fica gravado no banco e afetaria o engine padrão
+        await compare(
+            "SQLite (local)",
+            create_async_engine(f"sqlite+aiosqlite:///{directory}/default.db", connect_args={"timeout": 30}),
+            create_async_database_engine(f"sqlite+aiosqlite:///{directory}/tuned.db")
+        )
+
+    postgres_url = os.getenv("BENCHMARK_POSTGRES_URL")
+    if postgres_url:
+        await compare("PostgreSQL", create_async_engine(postgres_url), create_async_database_engine(postgres_url))
+    else:
+        print("   PostgreSQL: defina BENCHMARK_POSTGRES_URL para incluir")
+
+
+if __name__ == "__main__":
+    logging.disable(logging.WARNING)
+    asyncio.run(main())
@@ -0,0 +1,59 @@
+"""
+Servidor local compatível com a API de chat completions da OpenAI
+
+Responde com latência configurável (LATENCY, em segundos) e conta as chamadas
+simultâneas, para os benchmarks e testes manuais do AIServiceImpl. Execute com
+StubGraphAPI(app) ou aponte OPENAI_BASE_URL para ele.
+"""
+import asyncio
+import json
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+
+app = FastAPI()
+
+LATENCY = 0.2
+in_flight = 0
+max_in_flight = 0
+requests = 0
+prompt_chars = 0
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    """Devolve uma completion fixa; JSON quando o prompt pede JSON"""
+    global in_flight, max_in_flight, requests, prompt_chars
+    body = await request.json()
+    requests += 1
+    prompt_chars += sum(len(message["content"]) for message in body["messages"])
+    in_flight += 1
+    max_in_flight = max(max_in_flight, in_flight)
+    try:
+        await asyncio.sleep(LATENCY)
+    finally:
+        in_flight -= 1
+
+    system_prompt = body["messages"][0]["content"]
+    if "JSON" in system_prompt:
+        content = json.dumps({
+            "sentiment": "neutral", "confidence": 0.9, "sentiment_confidence": 0.9,
+            "emotions": [], "intent": "question", "intent_confidence": 0.9,
+            "entities": [], "should_escalate": False, "escalation_reason": None
+        })
+    else:
+        content = "Olá! Posso ajudar com horários, preços e suporte."
+
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "fake"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop"
+        }],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+    }
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark das regras de palavras-chave do DefaultMessageProcessingService
+
+Compara as varreduras anteriores (`keyword in text` em cada lista, repetidas por
+escalação, sentimento, emoções e intenção) com o KeywordMatcher, que encontra
+todas as palavras em uma passada. Confere também que os resultados são iguais.
+
+Uso:
+    python benchmarks/keyword_matcher_benchmark.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.domain.services.keyword_matcher import KeywordMatcher
+from src.domain.services.message_processing_service import DefaultMessageProcessingService
+
+MESSAGES = 20_000
+
+OPENINGS = ["Oi", "Olá", "Bom dia", "Boa tarde", "Boa noite", "Ei", "Prezados", ""]
+BODIES = [
+    "qual o horário de funcionamento da loja {n}?",
+    "meu pedido {n} chegou com defeito e estou muito irritado",
+    "quanto custa o plano anual para {n} usuários?",
+    "o atendimento foi ótimo, parabéns pela equipe, muito bom mesmo",
+    "não consigo acessar minha conta, já tentei {n} vezes e dá erro",
+    "quero cancelar a assinatura {n}, o serviço é péssimo e terrível",
+    "preciso de ajuda humana para trocar o produto {n}",
+    "vocês entregam no bairro {n}? onde fica a loja mais próxima?",
+    "estou frustrado, a reclamação {n} não resolve nada",
+    "obrigado pela ajuda, fiquei muito feliz com a solução",
+    "como faço para emitir a segunda via do boleto {n}",
+    "tchau, até logo e valeu pelo suporte",
+]
+CLOSINGS = ["", "Obrigado.", "Aguardo retorno.", "Valeu!", "Até mais."]
+
+
+def build_corpus() -> list:
+    rng = random.Random(7)
+    return [
+        " ".join(part for part in (
+            rng.choice(OPENINGS),
+            rng.choice(BODIES).format(n=rng.randint(1, 99999)),
+            rng.choice(CLOSINGS)
+        ) if part)
+        for _ in range(MESSAGES)
+    ]
+
+
+class LegacyRules:
+    """Regras como eram antes: uma varredura por palavra em cada classificador"""
+
+    def __init__(self, service: DefaultMessageProcessingService):
+        self.s = service
+
+    def classify(self, text: str) -> tuple:
+        lower = text.lower()
+        escalate = any(k in lower for k in self.s.escalation_keywords) or \
+            sum(1 for k in self.s.negative_keywords if k in lower) >= 2
+
+        lower = text.lower()
+        positive = sum(1 for w in self.s.positive_words if w in lower)
+        negative = sum(1 for w in self.s.negative_words if w in lower)
+        emotions = [e for e, ks in self.s.emotion_keywords.items() if any(k in lower for k in ks)]
+
+        lower = text.lower()
+        intent = "other"
+        for name, patterns in self.s.intent_patterns.items():
+            if sum(1 for p in patterns if p in lower) > 0:
+                intent = name
+                break
+        return escalate, positive, negative, emotions, intent
+
+
+def matcher_classify(service: DefaultMessageProcessingService, text: str) -> tuple:
+    hits = service.keyword_matcher.match(text)
+    escalate = hits.has("escalation") or hits.count("negative") >= 2
+    emotions = [e for e in service.emotion_keywords if hits.has(f"emotion:{e}")]
+    intent = next((name for name in service.intent_patterns if hits.count(f"intent:{name}")), "other")
+    return escalate, hits.count("sentiment:positive"), hits.count("sentiment:negative"), emotions, intent
+
+
+def extra_vocabulary(size: int) -> list:
+    """Palavras sintéticas (nomes de produtos/planos) para medir o crescimento do vocabulário"""
+    rng = random.Random(size)
+    syllables = ["ba", "ce", "di", "fo", "gu", "la", "me", "ni", "po", "ru", "sa", "te", "vi", "xo", "za"]
+    return sorted({"".join(rng.choice(syllables) for _ in range(rng.randint(3, 5))) for _ in range(size)})
+
+
+def main():
+    service = DefaultMessageProcessingService()
+    legacy = LegacyRules(service)
+    corpus = build_corpus()
+
+    start = time.perf_counter()
+    expected = [legacy.classify(text) for text in corpus]
+    before = time.perf_counter() - start
+
+    service.keyword_matcher.match.cache_clear()
+    start = time.perf_counter()
+    results = [matcher_classify(service, text) for text in corpus]
+    after = time.perf_counter() - start
+
+    assert results == expected, "KeywordMatcher divergiu das regras anteriores"
+
+    print("📊 Microbenchmark de palavras-chave")
+    print(f"   {MESSAGES} mensagens em português, {service.keyword_matcher.keyword_count} palavras-chave\n")
+    print(f"   Varreduras por lista : {before / MESSAGES * 1e6:7.1f} µs/mensagem")
+    print(f"   KeywordMatcher       : {after / MESSAGES * 1e6:7.1f} µs/mensagem ({before / after:.1f}x)")
+    print("   Resultados idênticos ✅")
+
+    print("\n   Todas as ocorrências com vocabulário maior:")
+    base = list(service.keyword_matcher._categories_by_keyword)
+    sample = corpus[:5_000]
+    for extra in (0, 500, 2_000):
+        vocabulary = base + extra_vocabulary(extra)
+        matcher = KeywordMatcher({"all": vocabulary}, cache_size=0)
+
+        start = time.perf_counter()
+        for text in sample:
+            lower = text.lower()
+            [keyword for keyword in vocabulary if keyword in lower]
+        scans = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for text in sample:
+            matcher.match(text)
+        single = time.perf_counter() - start
+
+        print(
+            f"   {len(vocabulary):5d} palavras: varreduras {scans / len(sample) * 1e6:7.1f} µs, "
+            f"matcher {single / len(sample) * 1e6:5.1f} µs ({scans / single:.0f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos filtros das listagens: filtro em Python x filtro no SQL
+
+Cria bancos SQLite temporários de tamanhos crescentes, cada um com OUTGOING
+mensagens de saída (outgoing) espalhadas entre as de entrada, e busca uma
+página de PAGE_SIZE mensagens de saída. Filtrando em Python, como os
+controllers faziam, é preciso ler páginas sem filtro até juntar PAGE_SIZE
+mensagens de saída; com o MessageFilter o WHERE vai para o banco e o índice
+(direction, created_at, id) entrega a página direto.
+
+Uso:
+    python benchmarks/listing_filters_benchmark.py
+"""
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.domain.repositories.filters import MessageFilter
+from src.domain.value_objects.message_content import MessageDirection
+from src.infrastructure.database.models import Base, ConversationModel, MessageModel, UserModel
+from src.infrastructure.repositories.message_repository_impl import MessageRepositoryImpl
+
+SIZES = [10_000, 100_000, 300_000]
+PAGE_SIZE = 100
+OUTGOING = 2 * PAGE_SIZE
+REPEAT = 3
+
+
+def create_database(path: str, rows: int):
+    """Banco com `rows` mensagens, OUTGOING delas de saída em intervalos iguais"""
+    every = rows // OUTGOING
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    user_id, conversation_id = uuid.uuid4(), uuid.uuid4()
+    start = datetime(2024, 1, 1)
+    with engine.begin() as connection:
+        connection.execute(insert(UserModel), [{"id": user_id, "phone_number": "5585999999999", "name": "Cliente"}])
+        connection.execute(insert(ConversationModel), [{"id": conversation_id, "user_id": user_id}])
+        connection.execute(insert(MessageModel), [
+            {
+                "id": uuid.uuid4(),
+                "conversation_id": conversation_id,
+                "user_id": user_id,
+                "whatsapp_message_id": f"wamid.{index}",
+                "content": f"Mensagem {index}",
+                "direction": "outgoing" if index % every == every - 1 else "incoming",
+                "created_at": start + timedelta(seconds=index)
+            }
+            for index in range(rows)
+        ])
+    engine.dispose()
+
+
+async def timed(call) -> tuple:
+    best, result = float("inf"), None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result = await call()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+async def filter_in_python(repository) -> list:
+    """Lê páginas sem filtro até juntar PAGE_SIZE mensagens de saída"""
+    found, cursor = [], None
+    while len(found) < PAGE_SIZE:
+        page = await repository.find_page(cursor=cursor, limit=PAGE_SIZE)
+        found += [m for m in page.items if m.content.direction == MessageDirection.OUTGOING]
+        cursor = page.next_cursor
+        if not cursor:
+            break
+    return found[:PAGE_SIZE]
+
+
+async def measure(path: str) -> tuple:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    filters = MessageFilter(direction=MessageDirection.OUTGOING)
+    async with sessions() as session:
+        repository = MessageRepositoryImpl(session)
+        python_ms, in_python = await timed(lambda: filter_in_python(repository))
+        sql_ms, page = await timed(lambda: repository.find_page(limit=PAGE_SIZE, filters=filters))
+        assert [m.id for m in in_python] == [m.id for m in page.items], "páginas diferentes"
+    await engine.dispose()
+    return python_ms, sql_ms
+
+
+async def main():
+    print("📊 Benchmark dos filtros das listagens (SQLite)")
+    print(f"   Página de {PAGE_SIZE} mensagens de saída ({OUTGOING} no banco), melhor de {REPEAT}\n")
+    print(f"   {'mensagens':>10} | {'Python':>10} | {'SQL':>10}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in SIZES:
+            path = os.path.join(directory, f"filters_{rows}.db")
+            create_database(path, rows)
+            python_ms, sql_ms = await measure(path)
+            print(f"   {rows:>10} | {python_ms:8.2f}ms | {sql_ms:8.2f}ms")
+
+
+if __name__ == "__main__":
+    logging.disable(logging.WARNING)
+    asyncio.run(main())
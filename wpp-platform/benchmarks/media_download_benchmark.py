@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark de memória do download de mídia: resposta em memória x streaming para disco
+
+Baixa várias mídias grandes simultaneamente de um stub local e mede o pico de
+memória alocada (tracemalloc). O modo "em memória" repete o comportamento
+anterior (`response.content`); o modo streaming usa download_media_to_file,
+que grava blocos em arquivo temporário e confere tamanho e SHA-256.
+
+Uso:
+    python benchmarks/media_download_benchmark.py
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stub_graph_api import StubGraphAPI, MEDIA_CHUNK
+
+MEDIA_SIZE = 50 * 1024 * 1024
+DOWNLOADS = 8
+
+
+def expected_sha256(size: int) -> str:
+    digest = hashlib.sha256()
+    remaining = size
+    while remaining > 0:
+        chunk = MEDIA_CHUNK[:remaining]
+        remaining -= len(chunk)
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+async def measure(download) -> tuple:
+    """Executa DOWNLOADS downloads simultâneos; retorna (pico em MB, segundos)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    await asyncio.gather(*(download() for _ in range(DOWNLOADS)))
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / (1024 * 1024), elapsed
+
+
+async def main(base_url: str):
+    os.environ["WHATSAPP_TOKEN"] = "benchmark-token"
+    from src.infrastructure.external_services.whatsapp_service_impl import WhatsAppServiceImpl
+
+    service = WhatsAppServiceImpl()
+    media_url = f"{base_url}/media/{MEDIA_SIZE}"
+    sha256 = expected_sha256(MEDIA_SIZE)
+
+    async def in_memory():
+        # Comportamento anterior: o corpo inteiro fica em memória
+        response = await service.client.get(media_url)
+        response.raise_for_status()
+        assert len(response.content) == MEDIA_SIZE
+
+    async def streaming():
+        download = await service.download_media_to_file(
+            media_url, expected_size=MEDIA_SIZE, expected_sha256=sha256
+        )
+        os.remove(download.path)
+
+    print("📊 Benchmark de memória do download de mídia")
+    print(f"   {DOWNLOADS} downloads simultâneos de {MEDIA_SIZE // (1024 * 1024)} MB\n")
+
+    await service.start()
+    try:
+        before_peak, before_time = await measure(in_memory)
+        print(f"   Em memória: pico {before_peak:8.1f} MB em {before_time:5.1f}s")
+        after_peak, after_time = await measure(streaming)
+        print(f"   Streaming : pico {after_peak:8.1f} MB em {after_time:5.1f}s")
+    finally:
+        await service.aclose()
+
+    print(f"\n   Redução do pico: {before_peak / after_peak:.0f}x")
+
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)
+    with StubGraphAPI() as stub:
+        asyncio.run(main(stub.base_url))
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark da análise de mensagem: três chamadas sequenciais x uma chamada combinada
+
+Para cada mensagem o fluxo pede sentimento, intenção e decisão de escalação. No
+modo anterior eram três round trips ao modelo (a escalação repetia a análise de
+sentimento); no modo combinado há uma única chamada estruturada, em cache por
+mensagem. Mede tempo, número de chamadas e caracteres de prompt enviados
+(aproximação do custo em tokens) contra o servidor OpenAI local.
+
+Uso:
+    python benchmarks/nlu_benchmark.py
+"""
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_openai_api
+from stub_graph_api import StubGraphAPI
+
+TEMPLATES = [
+    "Oi, bom dia! Qual o horário de funcionamento da loja {}?",
+    "Meu pedido {} chegou com defeito, quero devolução",
+    "Quanto custa o plano anual para {} usuários?",
+    "Obrigado, o atendimento do pedido {} foi ótimo!",
+    "Não consigo acessar a conta {}, preciso falar com atendente",
+]
+# Mensagens distintas: o ganho medido vem da chamada única, não do cache entre mensagens
+MESSAGES = [template.format(index) for index in range(4) for template in TEMPLATES]
+
+SENTIMENT_PROMPT = "Analise o sentimento do texto e retorne apenas um JSON com: sentiment (positive/negative/neutral), confidence (0-1), emotions (lista de emoções detectadas)"
+INTENT_PROMPT = """
+                        Analise o texto e identifique a intenção do usuário. 
+                        Retorne apenas um JSON com: intent (greeting/question/complaint/compliment/goodbye/other), 
+                        entities (lista de entidades mencionadas), confidence (0-1)
+                        """
+
+
+async def measure(analyze) -> tuple:
+    """Processa MESSAGES em sequência; retorna (segundos, chamadas, caracteres de prompt)"""
+    requests, chars = fake_openai_api.requests, fake_openai_api.prompt_chars
+    start = time.perf_counter()
+    for text in MESSAGES:
+        await analyze(text)
+    return (
+        time.perf_counter() - start,
+        fake_openai_api.requests - requests,
+        fake_openai_api.prompt_chars - chars
+    )
+
+
+async def main(base_url: str):
+    os.environ["OPENAI_API_KEY"] = "benchmark-key"
+    os.environ["OPENAI_BASE_URL"] = f"{base_url}/v1"
+    from src.infrastructure.external_services.ai_service_impl import AIServiceImpl
+
+    service = AIServiceImpl()
+
+    async def separate_calls(text: str):
+        # Comportamento anterior: sentimento, intenção e sentimento de novo na escalação
+        for prompt in (SENTIMENT_PROMPT, INTENT_PROMPT, SENTIMENT_PROMPT):
+            await service._complete(
+                messages=[{"role": "system", "content": prompt}, {"role": "user", "content": text}],
+                max_tokens=150,
+                temperature=0.3
+            )
+
+    async def combined_call(text: str):
+        await service.analyze_sentiment(text)
+        await service.extract_intent(text)
+        await service.should_escalate_to_human([], text)
+
+    print("📊 Benchmark da análise de mensagem (NLU)")
+    print(f"   {len(MESSAGES)} mensagens, latência do servidor {fake_openai_api.LATENCY * 1000:.0f} ms\n")
+
+    before = await measure(separate_calls)
+    print(f"   Três chamadas   : {before[0]:6.2f}s, {before[1]:3d} chamadas, {before[2]:6d} caracteres de prompt")
+    after = await measure(combined_call)
+    print(f"   Chamada única   : {after[0]:6.2f}s, {after[1]:3d} chamadas, {after[2]:6d} caracteres de prompt")
+    print(f"\n   Redução: {before[0] / after[0]:.1f}x no tempo, {before[1] / after[1]:.1f}x nas chamadas")
+    await service.aclose()
+
+
+if __name__ == "__main__":
+    logging.disable(logging.WARNING)
+    with StubGraphAPI(fake_openai_api.app) as stub:
+        asyncio.run(main(stub.base_url))
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Benchmark da paginação: OFFSET x cursor (created_at, id)
+
+Cria um banco SQLite temporário com ROWS mensagens e mede quanto custa buscar
+uma página de PAGE_SIZE em profundidades crescentes. Com OFFSET o banco lê e
+descarta todas as linhas anteriores; com o cursor ele vai direto pelo índice
+(created_at, id) até a chave do último item entregue.
+
+Mede também o mesmo percurso pela API real (GET /messages do
+production_server, via TestClient): `skip` x o cursor do header X-Next-Cursor.
+
+Uso:
+    python benchmarks/pagination_benchmark.py
+"""
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import production_server
+from src.domain.repositories.pagination import encode_cursor
+from src.infrastructure.database.async_database import get_async_db
+from src.infrastructure.database.models import Base, ConversationModel, MessageModel, UserModel
+from src.infrastructure.repositories.message_repository_impl import MessageRepositoryImpl
+from src.presentation.controllers.auth_controller import get_current_user
+
+ROWS = 500_000
+PAGE_SIZE = 100
+DEPTHS = [0, 10_000, 100_000, 250_000, 499_000]
+REPEAT = 5
+
+
+def create_database(path: str) -> list:
+    """Cria o banco com ROWS mensagens; retorna as chaves (created_at, id) em ordem"""
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    user_id, conversation_id = uuid.uuid4(), uuid.uuid4()
+    start = datetime(2024, 1, 1)
+    keys = sorted((start + timedelta(seconds=index // 3), uuid.uuid4()) for index in range(ROWS))
+    with engine.begin() as connection:
+        connection.execute(insert(UserModel), [{"id": user_id, "phone_number": "5585999999999", "name": "Cliente"}])
+        connection.execute(insert(ConversationModel), [{"id": conversation_id, "user_id": user_id}])
+        connection.execute(insert(MessageModel), [
+            {
+                "id": message_id,
+                "conversation_id": conversation_id,
+                "user_id": user_id,
+                "whatsapp_message_id": f"wamid.{index}",
+                "content": f"Mensagem {index}",
+                "direction": "incoming",
+                "created_at": created_at
+            }
+            for index, (created_at, message_id) in enumerate(keys)
+        ])
+    engine.dispose()
+    return keys
+
+
+async def timed(call) -> tuple:
+    best, result = float("inf"), None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result = await call()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+async def main(path: str, keys: list):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+    print("📊 Benchmark de paginação (SQLite)")
+    print(f"   {ROWS} mensagens, páginas de {PAGE_SIZE}, melhor de {REPEAT}\n")
+    print(f"   {'profundidade':>12} | {'OFFSET':>10} | {'cursor':>10}")
+
+    async with sessions() as session:
+        repository = MessageRepositoryImpl(session)
+        for depth in DEPTHS:
+            offset_ms, by_offset = await timed(lambda: repository.find_all(skip=depth, limit=PAGE_SIZE))
+            cursor = encode_cursor(*keys[depth - 1]) if depth else None
+            cursor_ms, page = await timed(lambda: repository.find_page(cursor=cursor, limit=PAGE_SIZE))
+            assert [m.id for m in by_offset] == [m.id for m in page.items], "páginas diferentes"
+            print(f"   {depth:>12} | {offset_ms:8.2f}ms | {cursor_ms:8.2f}ms")
+
+    await engine.dispose()
+
+
+def api(path: str, keys: list):
+    """GET /messages na aplicação real: `skip` x cursor"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def db():
+        async with sessions() as session:
+            yield session
+
+    app = production_server.app
+    app.dependency_overrides[get_async_db] = db
+    app.dependency_overrides[get_current_user] = lambda: None
+    # Sem `with`: os eventos de startup (fila de webhooks, Graph API) não rodam
+    client = TestClient(app)
+
+    def timed_get(params: dict) -> tuple:
+        best, response = float("inf"), None
+        for _ in range(REPEAT):
+            start = time.perf_counter()
+            response = client.get("/messages/", params=params)
+            best = min(best, time.perf_counter() - start)
+        assert response.status_code == 200, response.text
+        return best * 1000, [message["id"] for message in response.json()]
+
+    print(f"\n   GET /messages (production_server)")
+    print(f"   {'profundidade':>12} | {'skip':>10} | {'cursor':>10}")
+    for depth in DEPTHS:
+        offset_ms, by_offset = timed_get({"skip": depth, "limit": PAGE_SIZE})
+        params = {"limit": PAGE_SIZE, **({"cursor": encode_cursor(*keys[depth - 1])} if depth else {})}
+        cursor_ms, by_cursor = timed_get(params)
+        # skip=0 cai no caminho do cursor; a partir daí as duas páginas devem coincidir
+        assert by_offset == by_cursor, "páginas diferentes"
+        print(f"   {depth:>12} | {offset_ms:8.2f}ms | {cursor_ms:8.2f}ms")
+
+    app.dependency_overrides.clear()
+    asyncio.run(engine.dispose())
+
+
+if __name__ == "__main__":
+    logging.disable(logging.WARNING)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "pagination.db")
+        keys = create_database(path)
+        asyncio.run(main(path, keys))
+        api(path, keys)
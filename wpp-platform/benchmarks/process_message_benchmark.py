@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Benchmark do ProcessIncomingMessageUseCase: etapas em sequência x plano paralelo
+
+Usa repositórios e serviço de processamento falsos com latência injetada (LATENCY,
+em segundos por etapa). O fluxo anterior aguardava cada etapa em sequência; o plano
+roda em paralelo o que não depende entre si. Também mostra o rastreamento de uma
+execução e o valor padrão quando uma etapa estoura o tempo limite.
+
+Uso:
+    python benchmarks/process_message_benchmark.py
+"""
+import asyncio
+import logging
+import os
+import sys
+import time
+from types import SimpleNamespace
+from uuid import uuid4
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.application.use_cases.message_use_cases import ProcessIncomingMessageUseCase
+
+LATENCY = {
+    "find_by_whatsapp_id": 0.010,
+    "find_by_id": 0.010,
+    "find_by_conversation_id": 0.015,
+    "save": 0.005,
+    "analyze_sentiment": 0.040,
+    "extract_intent": 0.040,
+    "should_escalate_to_human": 0.030,
+    "generate_ai_response": 0.080,
+}
+RUNS = 50
+
+
+class FakeMessage:
+    def __init__(self, whatsapp_message_id: str):
+        self.id = uuid4()
+        self.conversation_id = uuid4()
+        self.whatsapp_message_id = whatsapp_message_id
+        self.content = SimpleNamespace(text="Oi, qual o horário de funcionamento?")
+        self.processed = False
+
+    def mark_as_processed(self):
+        self.processed = True
+
+
+class FakeMessageRepository:
+    def __init__(self):
+        self.messages = {}
+
+    async def find_by_whatsapp_id(self, whatsapp_message_id):
+        await asyncio.sleep(LATENCY["find_by_whatsapp_id"])
+        return self.messages.setdefault(whatsapp_message_id, FakeMessage(whatsapp_message_id))
+
+    async def find_by_conversation_id(self, conversation_id, skip=0, limit=50):
+        await asyncio.sleep(LATENCY["find_by_conversation_id"])
+        return []
+
+    async def save(self, message):
+        await asyncio.sleep(LATENCY["save"])
+        return message
+
+
+class FakeConversationRepository:
+    async def find_by_id(self, conversation_id):
+        await asyncio.sleep(LATENCY["find_by_id"])
+        return SimpleNamespace(id=conversation_id)
+
+
+class FakeProcessingService:
+    async def analyze_sentiment(self, text):
+        await asyncio.sleep(LATENCY["analyze_sentiment"])
+        return {"sentiment": "neutral", "confidence": 0.5, "emotions": []}
+
+    async def extract_intent(self, text):
+        await asyncio.sleep(LATENCY["extract_intent"])
+        return {"intent": "question", "confidence": 0.6, "entities": []}
+
+    async def should_escalate_to_human(self, message, conversation, history):
+        await asyncio.sleep(LATENCY["should_escalate_to_human"])
+        return False
+
+    async def generate_ai_response(self, message, conversation, history):
+        await asyncio.sleep(LATENCY["generate_ai_response"])
+        return "Funcionamos das 8h às 18h."
+
+
+async def sequential_execute(message_repository, conversation_repository, service, dto):
+    """Fluxo anterior do use case: cada etapa aguardada em sequência"""
+    message = await message_repository.find_by_whatsapp_id(dto.whatsapp_message_id)
+    conversation = await conversation_repository.find_by_id(message.conversation_id)
+    history = await message_repository.find_by_conversation_id(conversation.id, limit=10)
+    await service.analyze_sentiment(message.content.text)
+    await service.extract_intent(message.content.text)
+    should_escalate = await service.should_escalate_to_human(message, conversation, history)
+    if not should_escalate:
+        await service.generate_ai_response(message, conversation, history)
+    message.mark_as_processed()
+    await message_repository.save(message)
+
+
+async def measure(execute) -> float:
+    """Latência média (s) de RUNS execuções"""
+    start = time.perf_counter()
+    for index in range(RUNS):
+        await execute(SimpleNamespace(whatsapp_message_id=f"wamid.{index}"))
+    return (time.perf_counter() - start) / RUNS
+
+
+async def main():
+    message_repository = FakeMessageRepository()
+    conversation_repository = FakeConversationRepository()
+    service = FakeProcessingService()
+    use_case = ProcessIncomingMessageUseCase(message_repository, conversation_repository, None, service)
+
+    print("📊 Benchmark do processamento de mensagem recebida")
+    print(f"   {RUNS} execuções, latências falsas: " + ", ".join(
+        f"{name}={seconds * 1000:.0f}ms" for name, seconds in LATENCY.items()
+    ) + "\n")
+
+    before = await measure(
+        lambda dto: sequential_execute(message_repository, conversation_repository, service, dto)
+    )
+    after = await measure(use_case.execute)
+    print(f"   Sequencial    : {before * 1000:6.1f} ms por mensagem")
+    print(f"   Plano paralelo: {after * 1000:6.1f} ms por mensagem")
+    print(f"   Redução: {before / after:.1f}x\n")
+
+    print("   Rastreamento da última execução:")
+    for step in use_case.last_trace.steps:
+        print(f"     {step.name:<16} início {step.started_at * 1000:6.1f} ms  duração {step.duration * 1000:6.1f} ms  {step.status}")
+
+    # Sentimento lento: o plano segue com o valor padrão em vez de atrasar a resposta
+    LATENCY["analyze_sentiment"] = 1.0
+    slow = ProcessIncomingMessageUseCase(
+        message_repository, conversation_repository, None, service, step_timeouts={"sentiment": 0.05}
+    )
+    result = await slow.execute(SimpleNamespace(whatsapp_message_id="wamid.slow"))
+    print(f"\n   Sentimento com 1s e limite de 50 ms: {slow.last_trace.total * 1000:.1f} ms, "
+          f"sentiment={result.sentiment}, ai_response={result.ai_response!r}")
+
+
+if __name__ == "__main__":
+    logging.disable(logging.WARNING)
+    asyncio.run(main())
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark do cache de respostas da IA em tráfego de perguntas frequentes
+
+Simula mensagens em que a maior parte são variações das mesmas perguntas
+(horário, preço, contato) e o restante é texto único. Compara sem cache, só a
+camada exata e a camada exata + similaridade por trigramas, contra o servidor
+OpenAI local.
+
+Uso:
+    python benchmarks/response_cache_benchmark.py
+"""
+import asyncio
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_openai_api
+from stub_graph_api import StubGraphAPI
+
+MESSAGES = 300
+FAQ_SHARE = 0.7
+FAQ_VARIANTS = [
+    "Qual o horário de funcionamento?",
+    "qual o horario de funcionamento",
+    "Qual é o horário de funcionamento?",
+    "Qual o horário de funcionamento de vocês?",
+    "Quanto custa o plano básico?",
+    "quanto custa o plano basico??",
+    "Quanto custa o plano básico de vocês?",
+    "Qual o telefone de contato?",
+    "qual o telefone para contato",
+    "Qual o endereço da loja?",
+    "Qual o endereço da loja de vocês?",
+]
+
+
+def build_traffic() -> list:
+    rng = random.Random(42)
+    return [
+        rng.choice(FAQ_VARIANTS) if rng.random() < FAQ_SHARE else f"Tenho uma dúvida sobre o pedido {index}"
+        for index in range(MESSAGES)
+    ]
+
+
+async def main(base_url: str):
+    os.environ["OPENAI_API_KEY"] = "benchmark-key"
+    os.environ["OPENAI_BASE_URL"] = f"{base_url}/v1"
+    fake_openai_api.LATENCY = 0.05
+    from src.infrastructure.external_services.ai_service_impl import AIServiceImpl
+    from src.infrastructure.external_services.response_cache import ResponseCache
+
+    traffic = build_traffic()
+    history = [{"direction": "incoming", "content": "Oi"}, {"direction": "outgoing", "content": "Olá! Como posso ajudar?"}]
+    scenarios = [
+        ("Sem cache", ResponseCache(max_size=0), []),
+        ("Exato", ResponseCache(similarity_threshold=None), []),
+        ("Exato + similar (0.6)", ResponseCache(similarity_threshold=0.6), []),
+        # Com histórico a chave inclui as últimas mensagens (aqui iguais em todas as conversas)
+        ("Exato, com histórico", ResponseCache(similarity_threshold=None), history),
+    ]
+
+    print("📊 Benchmark do cache de respostas")
+    print(f"   {MESSAGES} mensagens, {FAQ_SHARE:.0%} perguntas frequentes, latência {fake_openai_api.LATENCY * 1000:.0f} ms\n")
+
+    for name, cache, conversation_history in scenarios:
+        service = AIServiceImpl(response_cache=cache)
+        requests = fake_openai_api.requests
+        start = time.perf_counter()
+        for text in traffic:
+            await service.generate_response(text, conversation_history)
+        elapsed = time.perf_counter() - start
+        stats = cache.stats()
+        print(
+            f"   {name:<22}: {elapsed:6.2f}s, {fake_openai_api.requests - requests:3d} chamadas, "
+            f"acerto {stats['hit_ratio']:.0%} (exato {stats['exact_hits']}, similar {stats['similar_hits']}), "
+            f"{stats['saved_latency_seconds']:.1f}s economizados"
+        )
+        await service.aclose()
+
+
+if __name__ == "__main__":
+    logging.disable(logging.WARNING)
+    with StubGraphAPI(fake_openai_api.app) as stub:
+        asyncio.run(main(stub.base_url))
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos tempos de resposta: percentis por sketch x latências ordenadas
+
+Cria um banco SQLite temporário com MESSAGES mensagens em DAYS dias, recalcula
+os sketches por hora (rebuild_response_times) e compara os percentis de
+/analytics/response-times em 30 dias lidos dos sketches com o cálculo exato
+(ler as mensagens, parear recebida/enviada e ordenar as latências). Mede
+também o custo do rastreamento na gravação: save_many de um lote de mensagens
+contra o INSERT puro das mesmas linhas.
+
+Uso:
+    python benchmarks/response_times_benchmark.py
+"""
+import asyncio
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.domain.entities.message import Message
+from src.domain.value_objects.message_content import MessageContent, MessageDirection
+from src.infrastructure.database.engine_config import create_async_database_engine
+from src.infrastructure.database.models import Base, ConversationModel, MessageModel, UserModel
+from src.infrastructure.repositories.analytics_repository_impl import (
+    RESPONSE_TIME_PERCENTILES, AnalyticsRepositoryImpl
+)
+from src.infrastructure.repositories.message_repository_impl import MessageRepositoryImpl
+from src.infrastructure.repositories.response_times import rebuild_response_times, replies
+
+MESSAGES = 500_000
+USERS = 10_000
+DAYS = 30
+CHUNK = 100_000
+BATCH = 1_000
+REPEAT = 3
+
+
+def message_rows(start: datetime, step: timedelta, first: int, count: int, users: list, conversations: list) -> list:
+    rows = []
+    for index in range(first, first + count):
+        rows.append({
+            "id": uuid.uuid4(),
+            "conversation_id": conversations[index % USERS],
+            "user_id": users[index % USERS],
+            "whatsapp_message_id": f"wamid.{index}",
+            "content": f"Mensagem {index}",
+            "direction": "outgoing" if random.random() < 0.4 else "incoming",
+            "created_at": start + step * (index - first)
+        })
+    return rows
+
+
+def create_database(path: str, now: datetime):
+    """Banco com USERS usuários (uma conversa cada) e MESSAGES mensagens nos DAYS dias até `now`"""
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    start = now - timedelta(days=DAYS)
+    users = [uuid.uuid4() for _ in range(USERS)]
+    conversations = [uuid.uuid4() for _ in range(USERS)]
+    with engine.begin() as connection:
+        connection.execute(insert(UserModel), [
+            {"id": user_id, "phone_number": f"55859{index:08d}", "name": f"Contato {index}", "created_at": start}
+            for index, user_id in enumerate(users)
+        ])
+        connection.execute(insert(ConversationModel), [
+            {"id": conversation_id, "user_id": user_id, "status": "active", "created_at": start}
+            for conversation_id, user_id in zip(conversations, users)
+        ])
+        step = (now - start) / MESSAGES
+        for offset in range(0, MESSAGES, CHUNK):
+            connection.execute(
+                insert(MessageModel),
+                message_rows(start + step * offset, step, offset, min(CHUNK, MESSAGES - offset), users, conversations)
+            )
+    engine.dispose()
+    return users, conversations
+
+
+async def exact_percentiles(session, start: datetime, end: datetime) -> dict:
+    """O cálculo sem sketch: todas as mensagens do período, pareadas e ordenadas"""
+    rows = (await session.execute(
+        select(MessageModel.conversation_id, MessageModel.direction, MessageModel.created_at)
+        .where(MessageModel.created_at >= start, MessageModel.created_at < end)
+    )).all()
+    latencies = sorted(seconds for _, _, seconds in replies(
+        ({"conversation_id": conversation_id, "direction": direction, "created_at": created_at}
+         for conversation_id, direction, created_at in rows),
+        {}
+    ))
+    return {q: latencies[int(q * (len(latencies) - 1))] for q in RESPONSE_TIME_PERCENTILES}
+
+
+async def timed(call) -> float:
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        await call()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+async def main(path: str, now: datetime, users: list, conversations: list):
+    engine = create_async_database_engine(f"sqlite+aiosqlite:///{path}")
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    end = now.replace(minute=0, second=0) + timedelta(hours=1)
+    start = end - timedelta(days=DAYS)
+
+    print("📊 Benchmark dos tempos de resposta (SQLite)")
+    print(f"   {MESSAGES} mensagens, {USERS} conversas, {DAYS} dias, melhor de {REPEAT}\n")
+
+    async with sessions() as session:
+        started = time.perf_counter()
+        result = await rebuild_response_times(session)
+        rebuild_s = time.perf_counter() - started
+    print(f"   Carga do histórico:             {rebuild_s:9.1f} s ({result['replies']} respostas)")
+
+    async with sessions() as session:
+        exact = await exact_percentiles(session, start, end)
+        exact_ms = await timed(lambda: exact_percentiles(session, start, end))
+        stats = await AnalyticsRepositoryImpl(session).get_response_times(start, end)
+        sketch_ms = await timed(lambda: AnalyticsRepositoryImpl(session).get_response_times(start, end))
+    print(f"   Percentis exatos (ordenando):   {exact_ms:9.1f} ms")
+    print(f"   Percentis pelos sketches:       {sketch_ms:9.1f} ms")
+    for q in RESPONSE_TIME_PERCENTILES:
+        estimate = stats.percentiles[f"p{int(q * 100)}"]
+        print(f"      p{int(q * 100):<3} exato {exact[q]:8.1f} s, sketch {estimate:8.1f} s "
+              f"({abs(estimate - exact[q]) / exact[q]:.2%})")
+
+    # Gravação de um lote: INSERT puro x save_many (contadores + tempos de resposta)
+    step = timedelta(seconds=1)
+    async with sessions() as session:
+        rows = message_rows(now, step, MESSAGES, BATCH, users, conversations)
+        started = time.perf_counter()
+        await session.execute(insert(MessageModel), rows)
+        await session.commit()
+        insert_ms = (time.perf_counter() - started) * 1000
+
+    async with sessions() as session:
+        messages = [
+            Message(
+                id=row["id"],
+                conversation_id=row["conversation_id"],
+                user_id=row["user_id"],
+                whatsapp_message_id=row["whatsapp_message_id"],
+                content=MessageContent(text=row["content"], direction=MessageDirection(row["direction"])),
+                is_processed=False,
+                created_at=row["created_at"]
+            )
+            for row in message_rows(now + step * BATCH, step, MESSAGES + BATCH, BATCH, users, conversations)
+        ]
+        started = time.perf_counter()
+        await MessageRepositoryImpl(session).save_many(messages)
+        save_ms = (time.perf_counter() - started) * 1000
+    print(f"\n   Lote de {BATCH} mensagens: INSERT puro {insert_ms:.1f} ms, save_many {save_ms:.1f} ms")
+    print(f"\n   Percentis {exact_ms / sketch_ms:.0f}x mais rápidos")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.disable(logging.WARNING)
+    random.seed(42)
+    now = datetime.utcnow().replace(second=0, microsecond=0)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "response_times.db")
+        users, conversations = create_database(path, now)
+        asyncio.run(main(path, now, users, conversations))
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Benchmark das tabelas de rollup: agregação ao vivo x buckets pré-agregados
+
+Cria um banco SQLite temporário com MESSAGES mensagens espalhadas por DAYS
+dias e mede as consultas de /analytics/message-trends e /analytics/user-activity
+(30 dias) antes da primeira rodada do job (tudo agregado ao vivo sobre
+messages) e depois dela (rollups diários + só as linhas depois do mark). Mede
+também a primeira rodada (carga do histórico) e uma rodada incremental com um
+minuto de mensagens novas, que é o custo do job em regime.
+
+Uso:
+    python benchmarks/rollups_benchmark.py
+"""
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from config import settings
+from src.infrastructure.database.engine_config import create_async_database_engine
+from src.infrastructure.database.models import Base, ConversationModel, MessageModel, UserModel
+from src.infrastructure.repositories.analytics_repository_impl import AnalyticsRepositoryImpl
+from src.infrastructure.repositories.rollups import refresh_rollups
+
+MESSAGES = 1_000_000
+USERS = 10_000
+DAYS = 30
+CHUNK = 100_000
+NEW_PER_MINUTE = 1_000
+REPEAT = 3
+
+
+def message_rows(start: datetime, step: timedelta, first: int, count: int, users: list, conversations: list) -> list:
+    return [
+        {
+            "id": uuid.uuid4(),
+            "conversation_id": conversations[index % USERS],
+            "user_id": users[index % USERS],
+            "whatsapp_message_id": f"wamid.{index}",
+            "content": f"Mensagem {index}",
+            "direction": "incoming" if index % 2 else "outgoing",
+            "created_at": start + step * (index - first)
+        }
+        for index in range(first, first + count)
+    ]
+
+
+def create_database(path: str, now: datetime):
+    """Banco com USERS usuários (uma conversa cada) e MESSAGES mensagens nos DAYS dias até `now`"""
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    start = now - timedelta(days=DAYS)
+    users = [uuid.uuid4() for _ in range(USERS)]
+    conversations = [uuid.uuid4() for _ in range(USERS)]
+    with engine.begin() as connection:
+        connection.execute(insert(UserModel), [
+            {"id": user_id, "phone_number": f"55859{index:08d}", "name": f"Contato {index}",
+             "created_at": start + (now - start) * index / USERS}
+            for index, user_id in enumerate(users)
+        ])
+        connection.execute(insert(ConversationModel), [
+            {"id": conversation_id, "user_id": user_id, "status": ("active", "pending", "closed")[index % 3],
+             "created_at": start}
+            for index, (conversation_id, user_id) in enumerate(zip(conversations, users))
+        ])
+        step = (now - start) / MESSAGES
+        for offset in range(0, MESSAGES, CHUNK):
+            connection.execute(
+                insert(MessageModel),
+                message_rows(start + step * offset, step, offset, min(CHUNK, MESSAGES - offset), users, conversations)
+            )
+    engine.dispose()
+    return users, conversations
+
+
+async def timed(call) -> float:
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        await call()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+async def main(path: str, now: datetime, users: list, conversations: list):
+    engine = create_async_database_engine(f"sqlite+aiosqlite:///{path}")
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    start = datetime.combine((now - timedelta(days=DAYS - 1)).date(), datetime.min.time())
+    end = datetime.combine(now.date(), datetime.min.time()) + timedelta(days=1)
+
+    async def dashboard(session):
+        repository = AnalyticsRepositoryImpl(session)
+        await repository.get_message_trends(start, end)
+        await repository.get_user_activity(start, end)
+
+    print("📊 Benchmark dos rollups do analytics (SQLite)")
+    print(f"   {MESSAGES} mensagens, {USERS} usuários, {DAYS} dias, melhor de {REPEAT}\n")
+
+    async with sessions() as session:
+        live_ms = await timed(lambda: dashboard(session))
+    print(f"   Ao vivo (sem rollups):          {live_ms:9.1f} ms")
+
+    async with sessions() as session:
+        started = time.perf_counter()
+        result = await refresh_rollups(session, now=now + timedelta(seconds=settings.ANALYTICS_ROLLUP_LAG_SECONDS))
+        backfill_s = time.perf_counter() - started
+    print(f"   Primeira rodada do job:         {backfill_s:9.1f} s ({result['windows']} janelas)")
+
+    async with sessions() as session:
+        rollup_ms = await timed(lambda: dashboard(session))
+    print(f"   Rollups + trecho após o mark:   {rollup_ms:9.1f} ms")
+
+    # Um minuto de mensagens novas e a rodada incremental que as processa
+    async with sessions() as session:
+        await session.execute(insert(MessageModel), message_rows(
+            now, timedelta(minutes=1) / NEW_PER_MINUTE, MESSAGES, NEW_PER_MINUTE, users, conversations
+        ))
+        await session.commit()
+        started = time.perf_counter()
+        result = await refresh_rollups(
+            session, now=now + timedelta(minutes=1, seconds=settings.ANALYTICS_ROLLUP_LAG_SECONDS)
+        )
+        incremental_ms = (time.perf_counter() - started) * 1000
+    print(f"   Rodada incremental ({NEW_PER_MINUTE} msgs): {incremental_ms:7.1f} ms ({result['windows']} janela)")
+    print(f"\n   Leitura {live_ms / rollup_ms:.0f}x mais rápida")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.disable(logging.WARNING)
+    now = datetime.utcnow().replace(second=0, microsecond=0)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "rollups.db")
+        users, conversations = create_database(path, now)
+        asyncio.run(main(path, now, users, conversations))
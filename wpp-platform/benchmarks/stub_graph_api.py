@@ -0,0 +1,70 @@
+"""
+Servidor local que imita a Graph API do WhatsApp para os benchmarks
+"""
+import socket
+import threading
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+app = FastAPI()
+
+MEDIA_CHUNK = bytes(range(256)) * 256  # 64 KB
+
+
+@app.post("/{phone_number_id}/messages")
+async def send_message(phone_number_id: str, request: Request):
+    """Aceita qualquer envio e devolve um ID de mensagem"""
+    await request.json()
+    return {
+        "messaging_product": "whatsapp",
+        "messages": [{"id": f"wamid.{uuid.uuid4().hex}"}]
+    }
+
+
+@app.get("/media/{size}")
+async def download_media(size: int):
+    """Devolve `size` bytes determinísticos em streaming, como o CDN de mídia"""
+    async def body():
+        remaining = size
+        while remaining > 0:
+            chunk = MEDIA_CHUNK[:remaining]
+            remaining -= len(chunk)
+            yield chunk
+
+    return StreamingResponse(
+        body(),
+        media_type="application/octet-stream",
+        headers={"Content-Length": str(size)}
+    )
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class StubGraphAPI:
+    """Executa o servidor stub em uma thread; use como context manager"""
+
+    def __init__(self, stub_app: FastAPI = app):
+        self.port = _free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        self._server = uvicorn.Server(uvicorn.Config(
+            stub_app, host="127.0.0.1", port=self.port, log_level="error"
+        ))
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    def __enter__(self) -> "StubGraphAPI":
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.should_exit = True
+        self._thread.join()
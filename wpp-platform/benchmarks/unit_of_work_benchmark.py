@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Benchmark das idas ao banco no caminho de envio: commit por save x unidade de trabalho
+
+Roda o SendMessageUseCase real: cada iteração envia duas mensagens para um
+número novo, a primeira criando usuário e conversa e a segunda reaproveitando
+os dois. Três modos, todos com contadores, espera por resposta e sketches:
+
+- Antes: cada save busca a linha pelo ID, confirma a própria transação e lê a
+  linha de novo (o refresh), como os repositórios faziam;
+- Commit por save: os repositórios atuais (INSERT direto das entidades novas),
+  sem unidade de trabalho (NoUnitOfWork, que não agrupa nada);
+- Unidade de trabalho: SqlAlchemyUnitOfWork, um commit por envio.
+
+Os comandos enviados ao banco (SELECT, INSERT, UPDATE, COMMIT) são contados
+pelos eventos do engine.
+
+Uso:
+    python benchmarks/unit_of_work_benchmark.py
+"""
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.application.dtos.message_dto import SendMessageDTO
+from src.application.use_cases.message_use_cases import SendMessageUseCase
+from src.domain.repositories.unit_of_work import UnitOfWork
+from src.infrastructure.database.engine_config import create_async_database_engine
+from src.infrastructure.database.models import Base
+from src.infrastructure.repositories.conversation_repository_impl import ConversationRepositoryImpl
+from src.infrastructure.repositories.message_repository_impl import MessageRepositoryImpl
+from src.infrastructure.repositories.unit_of_work_impl import SqlAlchemyUnitOfWork
+from src.infrastructure.repositories.user_repository_impl import UserRepositoryImpl
+
+ITERATIONS = 500
+
+
+class RoundTrips:
+    """Conta comandos e commits enviados pelo engine"""
+
+    def __init__(self, engine):
+        self.statements = 0
+        self.commits = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+        event.listen(engine.sync_engine, "commit", self._on_commit)
+
+    def _on_execute(self, *args):
+        self.statements += 1
+
+    def _on_commit(self, *args):
+        self.commits += 1
+
+
+class NoUnitOfWork(UnitOfWork):
+    """Comportamento anterior: o bloco não agrupa nada e cada save confirma sozinho"""
+
+    async def begin(self) -> None:
+        pass
+
+    async def commit(self) -> None:
+        pass
+
+    async def rollback(self) -> None:
+        pass
+
+
+def legacy(repository_class):
+    """Repositório com o save anterior: SELECT pelo ID antes e refresh depois do commit"""
+    class LegacyRepository(repository_class):
+        async def save(self, entity):
+            entity.is_new = False
+            saved = await super().save(entity)
+            await self._get_by_id(saved.id)
+            return saved
+    return LegacyRepository
+
+
+MODES = {
+    "before": (legacy(MessageRepositoryImpl), legacy(ConversationRepositoryImpl), legacy(UserRepositoryImpl), False),
+    "per_save": (MessageRepositoryImpl, ConversationRepositoryImpl, UserRepositoryImpl, False),
+    "unit_of_work": (MessageRepositoryImpl, ConversationRepositoryImpl, UserRepositoryImpl, True),
+}
+
+
+async def send_path(session, sequence: int, mode: str):
+    """Dois envios para o mesmo número novo pelo use case real"""
+    messages, conversations, users, use_unit_of_work = MODES[mode]
+    use_case = SendMessageUseCase(
+        messages(session),
+        conversations(session),
+        users(session),
+        SqlAlchemyUnitOfWork(session) if use_unit_of_work else NoUnitOfWork()
+    )
+    for text in ("Olá! Recebemos seu pedido.", "Ele sai para entrega hoje."):
+        await use_case.execute(SendMessageDTO(phone_number=f"55859{sequence:08d}", message=text))
+
+
+async def measure(directory: str, mode: str):
+    engine = create_async_database_engine(f"sqlite+aiosqlite:///{directory}/{mode}.db")
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+
+    counter = RoundTrips(engine)
+    sessions = async_sessionmaker(engine, expire_on_commit=False, autoflush=False)
+    start = time.perf_counter()
+    for sequence in range(ITERATIONS):
+        async with sessions() as session:
+            await send_path(session, sequence, mode)
+    elapsed = time.perf_counter() - start
+    await engine.dispose()
+
+    return {
+        "statements": counter.statements / ITERATIONS,
+        "commits": counter.commits / ITERATIONS,
+        "ms": elapsed / ITERATIONS * 1000
+    }
+
+
+async def main():
+    print("📊 Benchmark do caminho de envio (SQLite)")
+    print(f"   {ITERATIONS} números novos, 2 envios cada (SendMessageUseCase)\n")
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = {mode: await measure(directory, mode) for mode in MODES}
+
+    labels = {"before": "Antes (refresh)    ", "per_save": "Commit por save    ", "unit_of_work": "Unidade de trabalho"}
+    for mode, result in results.items():
+        print(
+            f"   {labels[mode]}: {result['statements'] + result['commits']:4.1f} idas ao banco "
+            f"({result['statements']:.1f} comandos + {result['commits']:.1f} commits), {result['ms']:6.2f} ms por número"
+        )
+    before, after = results["before"], results["unit_of_work"]
+    print(
+        f"\n   Idas ao banco: {(before['statements'] + before['commits']) / (after['statements'] + after['commits']):.1f}x menos, "
+        f"commits: {before['commits'] / after['commits']:.1f}x menos"
+    )
+
+
+if __name__ == "__main__":
+    logging.disable(logging.WARNING)
+    asyncio.run(main())
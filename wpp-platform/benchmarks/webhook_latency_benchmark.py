@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark de latência do webhook: processamento inline x fila em segundo plano
+
+Mede o p50/p99 da resposta do POST /webhook enquanto a latência simulada da IA
+cresce. No modo inline (comportamento anterior) a resposta espera a IA e o envio;
+no modo com fila a resposta só espera a gravação do payload. As mensagens
+respondidas são gravadas em um banco SQLite temporário.
+
+Uso:
+    python benchmarks/webhook_latency_benchmark.py
+"""
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+QUEUE_DIR = tempfile.mkdtemp(prefix="webhook-bench-")
+os.environ["WEBHOOK_QUEUE_PATH"] = os.path.join(QUEUE_DIR, "webhook_queue.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(QUEUE_DIR, 'bench.db')}"
+os.environ.setdefault("WEBHOOK_WORKERS", "8")
+
+import httpx
+
+import production_server
+from src.infrastructure.database.models import Base
+
+AI_LATENCIES = [0.0, 0.1, 0.5, 1.0, 2.0]
+REQUESTS = 200
+CONCURRENCY = 20
+
+
+def build_payload(index: int, scenario: str) -> dict:
+    """Payload no formato enviado pelo Meta"""
+    return {
+        "object": "whatsapp_business_account",
+        "entry": [{
+            "changes": [{
+                "value": {
+                    "messages": [{
+                        "id": f"wamid.bench{scenario}.{index}",
+                        "from": f"55859870{index % 10000:05d}",
+                        "type": "text",
+                        "timestamp": str(int(time.time())),
+                        "text": {"body": "Qual o horário de funcionamento?"}
+                    }]
+                }
+            }]
+        }]
+    }
+
+
+def percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_load(send, scenario: str) -> list:
+    """Dispara REQUESTS chamadas com CONCURRENCY simultâneas e retorna as latências"""
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    latencies = []
+
+    async def one(index: int):
+        async with semaphore:
+            start = time.perf_counter()
+            await send(build_payload(index, scenario))
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one(i) for i in range(REQUESTS)))
+    return latencies
+
+
+async def main():
+    print("📊 Benchmark de latência do webhook")
+    print(f"   {REQUESTS} requisições, {CONCURRENCY} simultâneas, {os.environ['WEBHOOK_WORKERS']} workers\n")
+
+    async with production_server.async_engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    await production_server.start_webhook_workers()
+    client = httpx.AsyncClient(app=production_server.app, base_url="http://bench")
+
+    async def queued(payload):
+        response = await client.post("/webhook", json=payload)
+        response.raise_for_status()
+
+    async def inline(payload):
+        # Comportamento anterior: a resposta aguardava todo o processamento
+        await production_server.process_incoming_message(payload)
+
+    print(f"{'latência IA':>12} | {'inline p50':>11} {'inline p99':>11} | {'fila p50':>9} {'fila p99':>9}")
+    print("-" * 62)
+    try:
+        for ai_latency in AI_LATENCIES:
+            async def fake_ai(content, phone_number, _delay=ai_latency):
+                await asyncio.sleep(_delay)
+                return "Resposta simulada"
+
+            production_server.process_with_ai = fake_ai
+
+            # IDs novos por cenário: reentregas seriam descartadas pela deduplicação
+            inline_latencies = await run_load(inline, f"{ai_latency}.inline")
+            queued_latencies = await run_load(queued, f"{ai_latency}.fila")
+
+            print(
+                f"{ai_latency * 1000:>10.0f}ms | "
+                f"{statistics.median(inline_latencies) * 1000:>9.1f}ms {percentile(inline_latencies, 99) * 1000:>9.1f}ms | "
+                f"{statistics.median(queued_latencies) * 1000:>7.1f}ms {percentile(queued_latencies, 99) * 1000:>7.1f}ms"
+            )
+
+            # Aguarda os workers drenarem a fila antes do próximo cenário
+            while production_server.webhook_queue.stats()["pending"] or production_server.webhook_queue.stats()["processing"]:
+                await asyncio.sleep(0.1)
+    finally:
+        await client.aclose()
+        await production_server.stop_webhook_workers()
+        await production_server.async_engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)
+    asyncio.run(main())
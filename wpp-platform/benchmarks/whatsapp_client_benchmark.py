@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark de envios/segundo: cliente HTTP por chamada x cliente compartilhado
+
+Dispara envios contra um stub local da Graph API. O modo "por chamada" repete o
+comportamento anterior do WhatsAppServiceImpl (um httpx.AsyncClient novo a cada
+envio, com nova conexão TCP); o modo "compartilhado" usa o pool com keep-alive.
+Em produção, com TLS, a diferença é maior, pois cada conexão nova também paga o
+handshake TLS.
+
+Uso:
+    python benchmarks/whatsapp_client_benchmark.py
+"""
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from stub_graph_api import StubGraphAPI
+
+SENDS = 2000
+CONCURRENCY = 50
+
+
+async def run(send) -> float:
+    """Executa SENDS envios com CONCURRENCY simultâneos e retorna envios/segundo"""
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def one(index: int):
+        async with semaphore:
+            await send(f"55859870{index:05d}", "Olá! Como posso ajudar?")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(SENDS)))
+    return SENDS / (time.perf_counter() - start)
+
+
+async def main(base_url: str):
+    os.environ["WHATSAPP_API_BASE_URL"] = base_url
+    os.environ["WHATSAPP_PHONE_NUMBER_ID"] = "123456"
+    os.environ["WHATSAPP_TOKEN"] = "benchmark-token"
+    # Mede só o cliente HTTP, sem o limitador de envio
+    os.environ["WHATSAPP_SEND_RATE"] = os.environ["WHATSAPP_SEND_BURST"] = "1000000"
+    from src.infrastructure.external_services.whatsapp_service_impl import WhatsAppServiceImpl
+
+    service = WhatsAppServiceImpl()
+
+    async def per_call_client(phone_number, message):
+        # Comportamento anterior: um cliente (e uma conexão) por envio
+        payload = {
+            "messaging_product": "whatsapp",
+            "to": phone_number,
+            "type": "text",
+            "text": {"body": message}
+        }
+        async with httpx.AsyncClient() as client:
+            response = await client.post(
+                f"{service.base_url}/{service.phone_number_id}/messages",
+                headers=service.headers,
+                json=payload
+            )
+            response.raise_for_status()
+            return response.json()
+
+    print("📊 Benchmark do cliente HTTP do WhatsApp")
+    print(f"   {SENDS} envios, {CONCURRENCY} simultâneos, stub em {base_url}\n")
+
+    before = await run(per_call_client)
+    print(f"   Cliente por chamada : {before:8.0f} envios/s")
+
+    await service.start()
+    try:
+        after = await run(service.send_message)
+    finally:
+        await service.aclose()
+    print(f"   Cliente compartilhado: {after:8.0f} envios/s")
+    print(f"\n   Ganho: {after / before:.1f}x")
+
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)
+    with StubGraphAPI() as stub:
+        asyncio.run(main(stub.base_url))
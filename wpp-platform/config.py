@@ -9,15 +9,81 @@ class Settings:
     WHATSAPP_PHONE_NUMBER_ID: str = os.getenv("WHATSAPP_PHONE_NUMBER_ID", "")
     WHATSAPP_WEBHOOK_VERIFY_TOKEN: str = os.getenv("WHATSAPP_WEBHOOK_VERIFY_TOKEN", "")
     WHATSAPP_BUSINESS_ACCOUNT_ID: str = os.getenv("WHATSAPP_BUSINESS_ACCOUNT_ID", "")
+    WHATSAPP_API_BASE_URL: str = os.getenv("WHATSAPP_API_BASE_URL", "https://graph.facebook.com/v18.0")
+    
+    # Cliente HTTP do WhatsApp (pool de conexões compartilhado)
+    WHATSAPP_HTTP2: bool = os.getenv("WHATSAPP_HTTP2", "True").lower() == "true"
+    WHATSAPP_MAX_CONNECTIONS: int = int(os.getenv("WHATSAPP_MAX_CONNECTIONS", "100"))
+    WHATSAPP_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("WHATSAPP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    WHATSAPP_KEEPALIVE_EXPIRY: float = float(os.getenv("WHATSAPP_KEEPALIVE_EXPIRY", "30"))
+    WHATSAPP_TIMEOUT: float = float(os.getenv("WHATSAPP_TIMEOUT", "30"))
+    WHATSAPP_CONNECT_TIMEOUT: float = float(os.getenv("WHATSAPP_CONNECT_TIMEOUT", "5"))
+    WHATSAPP_POOL_TIMEOUT: float = float(os.getenv("WHATSAPP_POOL_TIMEOUT", "10"))
+    
+    # Limite de envio (token bucket por phone_number_id e por destinatário)
+    WHATSAPP_SEND_RATE: float = float(os.getenv("WHATSAPP_SEND_RATE", "80"))
+    WHATSAPP_SEND_BURST: float = float(os.getenv("WHATSAPP_SEND_BURST", "80"))
+    WHATSAPP_SEND_RATE_OVERRIDES: str = os.getenv("WHATSAPP_SEND_RATE_OVERRIDES", "")
+    WHATSAPP_RECIPIENT_RATE: float = float(os.getenv("WHATSAPP_RECIPIENT_RATE", "1"))
+    WHATSAPP_RECIPIENT_BURST: float = float(os.getenv("WHATSAPP_RECIPIENT_BURST", "5"))
+    
+    # Download de mídia (streaming para disco)
+    WHATSAPP_MAX_CONCURRENT_DOWNLOADS: int = int(os.getenv("WHATSAPP_MAX_CONCURRENT_DOWNLOADS", "4"))
+    WHATSAPP_MEDIA_CHUNK_SIZE: int = int(os.getenv("WHATSAPP_MEDIA_CHUNK_SIZE", "65536"))
+    WHATSAPP_MEDIA_MAX_SIZE: int = int(os.getenv("WHATSAPP_MEDIA_MAX_SIZE", str(100 * 1024 * 1024)))
+    MEDIA_DOWNLOAD_DIR: str = os.getenv("MEDIA_DOWNLOAD_DIR", "")
     
     # Database
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./whatsapp_platform.db")
+    # Opcional: por padrão é o DATABASE_URL com o driver assíncrono (asyncpg/aiosqlite)
+    ASYNC_DATABASE_URL: str = os.getenv("ASYNC_DATABASE_URL", "")
+    DATABASE_POOL_SIZE: int = int(os.getenv("DATABASE_POOL_SIZE", "10"))
+    DATABASE_MAX_OVERFLOW: int = int(os.getenv("DATABASE_MAX_OVERFLOW", "20"))
+    DATABASE_POOL_TIMEOUT: float = float(os.getenv("DATABASE_POOL_TIMEOUT", "30"))
+    DATABASE_POOL_RECYCLE: int = int(os.getenv("DATABASE_POOL_RECYCLE", "1800"))
+    DATABASE_POOL_PRE_PING: bool = os.getenv("DATABASE_POOL_PRE_PING", "True").lower() == "true"
+    # Linhas por comando nas inserções em lote (save_many)
+    DATABASE_BULK_CHUNK_SIZE: int = int(os.getenv("DATABASE_BULK_CHUNK_SIZE", "1000"))
+    
+    # SQLite (PRAGMAs aplicados em cada conexão)
+    SQLITE_JOURNAL_MODE: str = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_MMAP_SIZE: int = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    SQLITE_BUSY_TIMEOUT_MS: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    
+    # Webhook
+    WEBHOOK_QUEUE_PATH: str = os.getenv("WEBHOOK_QUEUE_PATH", "./webhook_queue.db")
+    WEBHOOK_WORKERS: int = int(os.getenv("WEBHOOK_WORKERS", "4"))
+    WEBHOOK_MAX_ATTEMPTS: int = int(os.getenv("WEBHOOK_MAX_ATTEMPTS", "5"))
+    MESSAGE_SHARDS: int = int(os.getenv("MESSAGE_SHARDS", "16"))
+    DEDUP_CACHE_SIZE: int = int(os.getenv("DEDUP_CACHE_SIZE", "100000"))
+    DEDUP_TTL_SECONDS: int = int(os.getenv("DEDUP_TTL_SECONDS", "86400"))
+    
+    # Analytics: tabelas de rollup (minuto/hora/dia) atualizadas pelo job de catch-up
+    ANALYTICS_ROLLUP_INTERVAL_SECONDS: float = float(os.getenv("ANALYTICS_ROLLUP_INTERVAL_SECONDS", "60"))
+    # Linhas mais novas que isso ficam para a próxima rodada (transações ainda abertas)
+    ANALYTICS_ROLLUP_LAG_SECONDS: int = int(os.getenv("ANALYTICS_ROLLUP_LAG_SECONDS", "120"))
+    # Buckets por minuto (e o conjunto de usuários ativos por dia) mais antigos que isso são apagados
+    ANALYTICS_ROLLUP_RETENTION_DAYS: int = int(os.getenv("ANALYTICS_ROLLUP_RETENTION_DAYS", "7"))
     
     # Redis
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379")
     
     # OpenAI
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
+    OPENAI_BASE_URL: str = os.getenv("OPENAI_BASE_URL", "")
+    OPENAI_MODEL: str = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+    OPENAI_MAX_CONCURRENCY: int = int(os.getenv("OPENAI_MAX_CONCURRENCY", "16"))
+    OPENAI_QUEUE_TIMEOUT: float = float(os.getenv("OPENAI_QUEUE_TIMEOUT", "0.5"))
+    OPENAI_TIMEOUT: float = float(os.getenv("OPENAI_TIMEOUT", "20"))
+    OPENAI_MAX_RETRIES: int = int(os.getenv("OPENAI_MAX_RETRIES", "1"))
+    NLU_CACHE_SIZE: int = int(os.getenv("NLU_CACHE_SIZE", "10000"))
+    RESPONSE_CACHE_SIZE: int = int(os.getenv("RESPONSE_CACHE_SIZE", "5000"))
+    RESPONSE_CACHE_TTL_SECONDS: int = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600"))
+    # 0 desativa a camada por similaridade (só o texto exato é reaproveitado)
+    RESPONSE_CACHE_SIMILARITY: float = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0"))
+    # Mensagens recentes da conversa que entram na chave do cache (0: sem cache com histórico)
+    RESPONSE_CACHE_HISTORY_MESSAGES: int = int(os.getenv("RESPONSE_CACHE_HISTORY_MESSAGES", "2"))
     
     # Security
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-change-this-in-production")
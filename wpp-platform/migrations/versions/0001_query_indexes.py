@@ -0,0 +1,59 @@
+"""Índices compostos e parcial para as consultas mais frequentes
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+
+As tabelas continuam sendo criadas pelo init_db (create_all), que já cria estes
+índices em bancos novos; a migração cobre os bancos existentes e ignora índices
+que já estão lá. No PostgreSQL os índices são criados com CONCURRENTLY, sem
+bloquear escritas em messages/conversations.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+messages = sa.table("messages", sa.column("is_processed", sa.Boolean))
+unprocessed = messages.c.is_processed == sa.false()
+
+# nome, tabela, colunas, predicado do índice parcial
+INDEXES = [
+    ("ix_messages_conversation_id_created_at", "messages", ["conversation_id", "created_at"], None),
+    ("ix_messages_unprocessed_created_at", "messages", ["created_at"], unprocessed),
+    ("ix_conversations_user_id_status", "conversations", ["user_id", "status"], None),
+    ("ix_conversations_agent_id_status", "conversations", ["agent_id", "status"], None),
+]
+
+
+def _existing_indexes(table: str) -> set:
+    if op.get_context().as_sql:
+        # Modo offline (--sql): sem conexão para inspecionar
+        return set()
+    return {index["name"] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            if name in _existing_indexes(table):
+                continue
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_where=where,
+                sqlite_where=where,
+                postgresql_concurrently=True
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            if name in _existing_indexes(table) or op.get_context().as_sql:
+                op.drop_index(name, table_name=table, postgresql_concurrently=True)
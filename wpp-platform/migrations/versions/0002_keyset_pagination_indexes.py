@@ -0,0 +1,45 @@
+"""Índices (created_at, id) para a paginação por cursor
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+
+As listagens paginadas por cursor filtram e ordenam por (created_at, id); com
+estes índices cada página lê só as linhas que devolve, em qualquer profundidade.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+# nome, tabela, colunas
+INDEXES = [
+    ("ix_messages_created_at_id", "messages", ["created_at", "id"]),
+    ("ix_conversations_created_at_id", "conversations", ["created_at", "id"]),
+    ("ix_users_created_at_id", "users", ["created_at", "id"]),
+]
+
+
+def _existing_indexes(table: str) -> set:
+    if op.get_context().as_sql:
+        # Modo offline (--sql): sem conexão para inspecionar
+        return set()
+    return {index["name"] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            if name not in _existing_indexes(table):
+                op.create_index(name, table, columns, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            if name in _existing_indexes(table) or op.get_context().as_sql:
+                op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,66 @@
+"""Índices para os filtros das listagens
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+
+Os filtros agora viram WHERE no banco. Direção das mensagens e status das
+conversas ganham índices que já seguem a ordem do cursor (created_at, id). No
+PostgreSQL a busca de usuários por trecho (ILIKE '%...%') usa índices GIN
+trigram (extensão pg_trgm) em nome, email e telefone.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+# nome, tabela, colunas
+INDEXES = [
+    ("ix_messages_direction_created_at_id", "messages", ["direction", "created_at", "id"]),
+    ("ix_conversations_status_created_at_id", "conversations", ["status", "created_at", "id"]),
+]
+
+# Só PostgreSQL: nome, coluna de users
+TRIGRAM_INDEXES = [
+    ("ix_users_name_trgm", "name"),
+    ("ix_users_email_trgm", "email"),
+    ("ix_users_phone_number_trgm", "phone_number"),
+]
+
+
+def _existing_indexes(table: str) -> set:
+    if op.get_context().as_sql:
+        # Modo offline (--sql): sem conexão para inspecionar
+        return set()
+    return {index["name"] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade() -> None:
+    is_postgresql = op.get_context().dialect.name == "postgresql"
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            if name not in _existing_indexes(table):
+                op.create_index(name, table, columns, postgresql_concurrently=True)
+
+        if is_postgresql:
+            op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            for name, column in TRIGRAM_INDEXES:
+                op.execute(
+                    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON users USING gin ({column} gin_trgm_ops)"
+                )
+
+
+def downgrade() -> None:
+    is_postgresql = op.get_context().dialect.name == "postgresql"
+    with op.get_context().autocommit_block():
+        if is_postgresql:
+            for name, _ in reversed(TRIGRAM_INDEXES):
+                op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+        for name, table, _ in reversed(INDEXES):
+            if name in _existing_indexes(table) or op.get_context().as_sql:
+                op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,83 @@
+"""Contadores desnormalizados em conversas e usuários
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+
+conversations ganha message_count, unread_count e last_message_at; users ganha
+conversation_count e total_messages. Os repositórios mantêm os valores a cada
+gravação; aqui eles são preenchidos a partir das tabelas existentes (o mesmo
+cálculo do reconcile_counters). O índice (user_id, created_at) em messages
+atende o total por usuário.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+# tabela, coluna
+COUNTER_COLUMNS = [
+    ("conversations", sa.Column("message_count", sa.Integer(), nullable=False, server_default="0")),
+    ("conversations", sa.Column("unread_count", sa.Integer(), nullable=False, server_default="0")),
+    ("conversations", sa.Column("last_message_at", sa.DateTime(timezone=True))),
+    ("users", sa.Column("conversation_count", sa.Integer(), nullable=False, server_default="0")),
+    ("users", sa.Column("total_messages", sa.Integer(), nullable=False, server_default="0")),
+]
+
+INDEX = ("ix_messages_user_id_created_at", "messages", ["user_id", "created_at"])
+
+BACKFILL = [
+    """
+    UPDATE conversations SET
+        message_count = (SELECT count(*) FROM messages WHERE messages.conversation_id = conversations.id),
+        unread_count = (
+            SELECT count(*) FROM messages
+            WHERE messages.conversation_id = conversations.id
+              AND messages.direction = 'incoming' AND messages.is_processed = false
+        ),
+        last_message_at = (SELECT max(created_at) FROM messages WHERE messages.conversation_id = conversations.id)
+    """,
+    """
+    UPDATE users SET
+        conversation_count = (SELECT count(*) FROM conversations WHERE conversations.user_id = users.id),
+        total_messages = (SELECT count(*) FROM messages WHERE messages.user_id = users.id)
+    """,
+]
+
+
+def _existing(kind: str, table: str) -> set:
+    if op.get_context().as_sql:
+        # Modo offline (--sql): sem conexão para inspecionar
+        return set()
+    inspector = sa.inspect(op.get_bind())
+    items = inspector.get_columns(table) if kind == "columns" else inspector.get_indexes(table)
+    return {item["name"] for item in items}
+
+
+def upgrade() -> None:
+    for table, column in COUNTER_COLUMNS:
+        if column.name not in _existing("columns", table):
+            op.add_column(table, column)
+
+    name, table, columns = INDEX
+    with op.get_context().autocommit_block():
+        if name not in _existing("indexes", table):
+            op.create_index(name, table, columns, postgresql_concurrently=True)
+
+    for statement in BACKFILL:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    name, table, _ = INDEX
+    with op.get_context().autocommit_block():
+        if name in _existing("indexes", table) or op.get_context().as_sql:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
+
+    for table, column in reversed(COUNTER_COLUMNS):
+        with op.batch_alter_table(table) as batch:
+            batch.drop_column(column.name)
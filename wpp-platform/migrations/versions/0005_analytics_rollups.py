@@ -0,0 +1,60 @@
+"""Tabelas de rollup do analytics
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+
+analytics_rollups guarda contagens por minuto, hora e dia; analytics_active_users
+o conjunto (dia, usuário) dos ativos; analytics_rollup_state o high-water mark
+do job. As tabelas nascem vazias: a primeira rodada do refresh_rollups parte do
+registro mais antigo e preenche o histórico, uma janela de um dia por vez.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def _existing_tables() -> set:
+    if op.get_context().as_sql:
+        # Modo offline (--sql): sem conexão para inspecionar
+        return set()
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def upgrade() -> None:
+    existing = _existing_tables()
+
+    if "analytics_rollups" not in existing:
+        op.create_table(
+            "analytics_rollups",
+            sa.Column("granularity", sa.String(10), primary_key=True),
+            sa.Column("metric", sa.String(40), primary_key=True),
+            sa.Column("bucket", sa.DateTime(timezone=True), primary_key=True),
+            sa.Column("value", sa.Integer(), nullable=False, server_default="0"),
+        )
+
+    if "analytics_active_users" not in existing:
+        op.create_table(
+            "analytics_active_users",
+            sa.Column("day", sa.Date(), primary_key=True),
+            sa.Column("user_id", sa.Uuid(), primary_key=True),
+            sa.Column("is_returning", sa.Boolean(), nullable=False, server_default=sa.false()),
+        )
+
+    if "analytics_rollup_state" not in existing:
+        op.create_table(
+            "analytics_rollup_state",
+            sa.Column("name", sa.String(40), primary_key=True),
+            sa.Column("high_water_mark", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+
+
+def downgrade() -> None:
+    for table in ("analytics_rollup_state", "analytics_active_users", "analytics_rollups"):
+        op.drop_table(table)
@@ -0,0 +1,65 @@
+"""Tempos de resposta: espera por conversa e sketches por hora
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+
+conversations ganha awaiting_reply_since (primeira mensagem recebida ainda
+sem resposta); response_time_bins guarda o DDSketch de cada hora como linhas
+(hora, bin, contagem) e response_time_hours os totais exatos da hora. O
+repositório de mensagens mantém tudo a cada gravação; o histórico anterior é
+calculado com `python -m src.infrastructure.database.rebuild_response_times`.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+COLUMN = ("conversations", sa.Column("awaiting_reply_since", sa.DateTime(timezone=True)))
+
+
+def _existing(kind: str, table: str = "") -> set:
+    if op.get_context().as_sql:
+        # Modo offline (--sql): sem conexão para inspecionar
+        return set()
+    inspector = sa.inspect(op.get_bind())
+    if kind == "tables":
+        return set(inspector.get_table_names())
+    return {column["name"] for column in inspector.get_columns(table)}
+
+
+def upgrade() -> None:
+    table, column = COLUMN
+    if column.name not in _existing("columns", table):
+        op.add_column(table, column)
+
+    tables = _existing("tables")
+    if "response_time_bins" not in tables:
+        op.create_table(
+            "response_time_bins",
+            sa.Column("bucket", sa.DateTime(timezone=True), primary_key=True),
+            sa.Column("bin", sa.Integer(), primary_key=True),
+            sa.Column("count", sa.Integer(), nullable=False, server_default="0"),
+        )
+    if "response_time_hours" not in tables:
+        op.create_table(
+            "response_time_hours",
+            sa.Column("bucket", sa.DateTime(timezone=True), primary_key=True),
+            sa.Column("count", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("total_seconds", sa.Float(), nullable=False, server_default="0"),
+            sa.Column("min_seconds", sa.Float(), nullable=False),
+            sa.Column("max_seconds", sa.Float(), nullable=False),
+        )
+
+
+def downgrade() -> None:
+    for table in ("response_time_hours", "response_time_bins"):
+        op.drop_table(table)
+
+    table, column = COLUMN
+    with op.batch_alter_table(table) as batch:
+        batch.drop_column(column.name)
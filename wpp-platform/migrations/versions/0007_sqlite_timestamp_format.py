@@ -0,0 +1,59 @@
+"""Um só formato de timestamp no SQLite
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+
+No SQLite o DEFAULT CURRENT_TIMESTAMP grava 'AAAA-MM-DD HH:MM:SS', enquanto o
+SQLAlchemy grava os valores vindos do Python com microssegundos; como texto o
+primeiro ordena antes do segundo no mesmo segundo e a paginação por cursor
+(created_at, id) pulava linhas. Aqui as linhas antigas ganham a fração
+'.000000' e o DEFAULT de created_at passa a gerar o mesmo formato
+(models.utcnow). No PostgreSQL os timestamps são nativos e nada muda.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+SQLITE_NOW = sa.text("(strftime('%Y-%m-%d %H:%M:%f', 'now') || '000')")
+
+# tabela, colunas gravadas com CURRENT_TIMESTAMP (ou copiadas delas)
+TIMESTAMP_COLUMNS = [
+    ("users", ["created_at", "updated_at"]),
+    ("conversations", ["created_at", "updated_at", "last_message_at"]),
+    ("messages", ["created_at"]),
+]
+
+
+def _is_sqlite() -> bool:
+    return op.get_context().dialect.name == "sqlite"
+
+
+def upgrade() -> None:
+    if not _is_sqlite():
+        return
+
+    for table, columns in TIMESTAMP_COLUMNS:
+        for column in columns:
+            op.execute(f"UPDATE {table} SET {column} = {column} || '.000000' WHERE length({column}) = 19")
+        # O SQLite não altera o DEFAULT de uma coluna: o batch recria a tabela
+        with op.batch_alter_table(table) as batch:
+            batch.alter_column(
+                "created_at", existing_type=sa.DateTime(timezone=True), server_default=SQLITE_NOW
+            )
+
+
+def downgrade() -> None:
+    if not _is_sqlite():
+        return
+
+    for table, _ in TIMESTAMP_COLUMNS:
+        with op.batch_alter_table(table) as batch:
+            batch.alter_column(
+                "created_at", existing_type=sa.DateTime(timezone=True), server_default=sa.func.now()
+            )
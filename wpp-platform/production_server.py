@@ -13,6 +13,7 @@ import sys
 import os
 import json
 import asyncio
+from uuid import UUID
 
 # Adicionar o diretório raiz ao path
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
@@ -24,6 +25,22 @@ from src.presentation.controllers.conversations_controller import router as conv
 from src.presentation.controllers.messages_controller import router as messages_router
 from src.presentation.controllers.analytics_controller import router as analytics_router
 from src.presentation.controllers.settings_controller import router as settings_router
+from src.infrastructure.messaging.webhook_queue import DurableWebhookQueue
+from src.infrastructure.messaging.webhook_worker import WebhookWorkerPool
+from src.infrastructure.messaging.message_dispatcher import ShardedMessageDispatcher
+from src.infrastructure.messaging.message_deduplicator import MessageDeduplicator
+from src.infrastructure.database.async_database import AsyncSessionLocal, async_engine
+from src.infrastructure.database.database import engine
+from src.infrastructure.database.engine_config import pool_stats
+from src.infrastructure.database.refresh_rollups import refresh_periodically
+from src.infrastructure.repositories.message_repository_impl import MessageRepositoryImpl
+from src.infrastructure.repositories.conversation_repository_impl import ConversationRepositoryImpl
+from src.infrastructure.repositories.user_repository_impl import UserRepositoryImpl
+from src.infrastructure.repositories.unit_of_work_impl import SqlAlchemyUnitOfWork
+from src.application.dtos.message_dto import MessageResponseDTO, ReceiveMessageDTO
+from src.application.use_cases.message_use_cases import ReceiveMessageUseCase
+from src.domain.value_objects.message_content import MessageType
+from src.presentation.dependencies import get_ai_service, get_whatsapp_service
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
@@ -46,6 +63,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Security
@@ -59,6 +77,90 @@ app.include_router(messages_router)
 app.include_router(analytics_router)
 app.include_router(settings_router)
 
+# Cliente HTTP compartilhado do WhatsApp
+@app.on_event("startup")
+async def start_whatsapp_client():
+    """Abre o pool de conexões com a Graph API"""
+    await get_whatsapp_service().start()
+
+@app.on_event("shutdown")
+async def stop_whatsapp_client():
+    """Fecha o pool de conexões com a Graph API"""
+    await get_whatsapp_service().aclose()
+
+@app.on_event("shutdown")
+async def stop_ai_client():
+    """Fecha o pool de conexões com a API da OpenAI (o cliente compartilhado do settings_router)"""
+    await get_ai_service().aclose()
+
+# Fila de webhooks processada em segundo plano
+webhook_queue = DurableWebhookQueue(settings.WEBHOOK_QUEUE_PATH, max_attempts=settings.WEBHOOK_MAX_ATTEMPTS)
+webhook_workers: Optional[WebhookWorkerPool] = None
+message_dispatcher: Optional[ShardedMessageDispatcher] = None
+
+async def message_already_answered(message_id: str) -> bool:
+    """
+    Consulta o índice único de mensagens quando o ID não está no cache.
+
+    Só conta como duplicada a mensagem já respondida (is_processed): uma linha
+    gravada cuja resposta falhou ainda precisa ser processada na nova tentativa.
+    """
+    async with AsyncSessionLocal() as db:
+        return await MessageRepositoryImpl(db).exists_by_whatsapp_id(message_id, is_processed=True)
+
+message_deduplicator = MessageDeduplicator(
+    max_size=settings.DEDUP_CACHE_SIZE,
+    ttl_seconds=settings.DEDUP_TTL_SECONDS,
+    fallback=message_already_answered
+)
+
+@app.on_event("startup")
+async def start_webhook_workers():
+    """Abre a fila de webhooks e inicia os workers"""
+    global webhook_workers, message_dispatcher
+    webhook_queue.open()
+    message_dispatcher = ShardedMessageDispatcher(shards=settings.MESSAGE_SHARDS)
+    await message_dispatcher.start()
+    webhook_workers = WebhookWorkerPool(
+        webhook_queue,
+        process_incoming_message,
+        concurrency=settings.WEBHOOK_WORKERS,
+        ordering_keys=webhook_senders
+    )
+    await webhook_workers.start()
+
+@app.on_event("shutdown")
+async def stop_webhook_workers():
+    """Interrompe os workers e fecha a fila de webhooks"""
+    if webhook_workers:
+        await webhook_workers.stop()
+    if message_dispatcher:
+        await message_dispatcher.stop()
+    webhook_queue.close()
+
+# Catch-up das tabelas de rollup do analytics
+rollup_task: Optional[asyncio.Task] = None
+
+@app.on_event("startup")
+async def start_rollup_refresh():
+    """Inicia o job periódico dos rollups"""
+    global rollup_task
+    rollup_task = asyncio.create_task(
+        refresh_periodically(settings.ANALYTICS_ROLLUP_INTERVAL_SECONDS), name="analytics-rollups"
+    )
+
+@app.on_event("shutdown")
+async def stop_rollup_refresh():
+    """Interrompe o job dos rollups"""
+    if rollup_task:
+        rollup_task.cancel()
+        await asyncio.gather(rollup_task, return_exceptions=True)
+
+@app.on_event("shutdown")
+async def stop_database():
+    """Fecha as conexões do engine assíncrono"""
+    await async_engine.dispose()
+
 # Função de autenticação simples (para compatibilidade)
 async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     if credentials.credentials != "admin-token-example":
@@ -139,36 +241,83 @@ async def receive_webhook(request: Request):
     """Recebe webhooks do WhatsApp - ATENDIMENTO AUTOMÁTICO"""
     try:
         webhook_data = await request.json()
-        logger.info(f"📨 Webhook recebido: {webhook_data}")
-        
-        # Processar mensagem recebida
-        await process_incoming_message(webhook_data)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Payload inválido")
+    
+    if not isinstance(webhook_data, dict) or not isinstance(webhook_data.get("entry", []), list):
+        raise HTTPException(status_code=400, detail="Payload inválido")
+    
+    try:
+        # Persistir e responder imediatamente; o processamento ocorre nos workers
+        item_id = await webhook_workers.submit(webhook_data)
+        logger.info(f"📨 Webhook recebido e enfileirado: {item_id}")
         
-        return {"status": "success", "message": "Mensagem processada"}
+        return {"status": "success", "message": "Webhook recebido"}
         
     except Exception as e:
-        logger.error(f"❌ Erro ao processar webhook: {e}")
+        logger.error(f"❌ Erro ao enfileirar webhook: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def webhook_senders(webhook_data: Dict[str, Any]) -> List[str]:
+    """Números que enviaram as mensagens do webhook (chaves de ordenação da fila)"""
+    return [
+        message.get("from", "")
+        for entry in webhook_data.get("entry", [])
+        for change in entry.get("changes", [])
+        for message in change.get("value", {}).get("messages", [])
+    ]
+
 async def process_incoming_message(webhook_data: Dict[str, Any]):
-    """Processa mensagem recebida do WhatsApp"""
+    """
+    Processa mensagem recebida do WhatsApp.
+
+    A fila só entrega este webhook depois que os anteriores dos mesmos números
+    foram concluídos (webhook_senders são as chaves de ordenação), inclusive
+    após novas tentativas. Dentro do webhook, cada mensagem vai para o shard do
+    seu cliente: mesmo número em ordem, números diferentes em paralelo. Falhas
+    são propagadas para o worker, que devolve o webhook para a fila (nack) e o
+    reprocessa até WEBHOOK_MAX_ATTEMPTS.
+    """
     try:
-        # Extrair dados da mensagem
+        # Extrair dados da mensagem e distribuir por cliente:
+        # mesmo número mantém a ordem, números diferentes rodam em paralelo
+        pending = []
         if "entry" in webhook_data:
             for entry in webhook_data["entry"]:
                 if "changes" in entry:
                     for change in entry["changes"]:
                         if "value" in change and "messages" in change["value"]:
                             for message in change["value"]["messages"]:
-                                await handle_whatsapp_message(message, change["value"])
+                                pending.append(message_dispatcher.dispatch(
+                                    message.get("from", ""),
+                                    lambda message=message, value=change["value"]: handle_new_message(message, value)
+                                ))
         
+        await asyncio.gather(*pending)
         logger.info("✅ Mensagem processada com sucesso")
         
     except Exception as e:
         logger.error(f"❌ Erro ao processar mensagem: {e}")
+        raise
+
+async def handle_new_message(message: Dict[str, Any], value: Dict[str, Any]):
+    """Descarta reentregas e processa a mensagem (roda no shard do cliente)"""
+    if await message_deduplicator.is_duplicate(message.get("id")):
+        logger.info(f"🔁 Mensagem duplicada ignorada: {message.get('id')}")
+        return
+    await handle_whatsapp_message(message, value)
 
 async def handle_whatsapp_message(message: Dict[str, Any], value: Dict[str, Any]):
-    """Processa uma mensagem individual do WhatsApp"""
+    """
+    Processa uma mensagem individual do WhatsApp.
+
+    A mensagem é gravada antes da IA e do envio: o índice único de
+    whatsapp_message_id é o controle de idempotência. Mensagem já marcada como
+    processada não é respondida de novo. Depois do envio o ID nunca sai do
+    cache de deduplicação, mesmo que a marcação falhe: a nova tentativa do
+    worker é descartada em vez de repetir a resposta.
+    """
+    sent = False
     try:
         # Extrair informações da mensagem
         message_id = message.get("id")
@@ -193,17 +342,62 @@ async def handle_whatsapp_message(message: Dict[str, Any], value: Dict[str, Any]
         
         logger.info(f"📱 Mensagem recebida de {from_number}: {content}")
         
+        # Gravar antes de responder (reentrega de mensagem já gravada devolve a linha existente)
+        stored = await store_incoming_message(message, content)
+        if stored.is_processed:
+            logger.info(f"🔁 Mensagem já respondida: {message_id}")
+            return
+        
         # Processar com IA
         ai_response = await process_with_ai(content, from_number)
         
         # Enviar resposta automática
         if ai_response:
             await send_whatsapp_message(from_number, ai_response)
+        sent = True
         
         logger.info(f"✅ Resposta enviada para {from_number}")
         
+        await mark_message_processed(stored.id)
+        
     except Exception as e:
+        if not sent:
+            # Permite que a nova tentativa (ou uma reentrega do Meta) processe a mensagem
+            message_deduplicator.forget(message.get("id"))
         logger.error(f"❌ Erro ao processar mensagem individual: {e}")
+        raise
+
+async def store_incoming_message(message: Dict[str, Any], content: str) -> MessageResponseDTO:
+    """Grava a mensagem recebida (usuário e conversa ativa são criados se preciso)"""
+    message_type = message.get("type")
+    if message_type in {member.value for member in MessageType}:
+        payload = message.get(message_type, {})
+        text = payload.get("body", "") if message_type == "text" else payload.get("caption", "")
+        metadata = None if message_type == "text" else payload
+    else:
+        # Tipos sem equivalente no domínio ficam como texto, com o rótulo do tipo
+        message_type, text, metadata = "text", content, message.get(message_type)
+    
+    async with AsyncSessionLocal() as db:
+        use_case = ReceiveMessageUseCase(
+            MessageRepositoryImpl(db),
+            ConversationRepositoryImpl(db),
+            UserRepositoryImpl(db),
+            SqlAlchemyUnitOfWork(db)
+        )
+        return await use_case.execute(ReceiveMessageDTO(
+            phone_number=message.get("from", ""),
+            whatsapp_message_id=message.get("id"),
+            content=text,
+            message_type=message_type,
+            metadata=metadata
+        ))
+
+async def mark_message_processed(message_id: UUID):
+    """Marca a mensagem recebida como respondida"""
+    async with AsyncSessionLocal() as db:
+        async with SqlAlchemyUnitOfWork(db):
+            await MessageRepositoryImpl(db).mark_as_processed_bulk([message_id])
 
 async def process_with_ai(content: str, phone_number: str) -> Optional[str]:
     """Processa mensagem com IA para gerar resposta"""
@@ -253,6 +447,7 @@ async def send_whatsapp_message(phone_number: str, message: str):
         
     except Exception as e:
         logger.error(f"❌ Erro ao enviar mensagem: {e}")
+        raise
 
 # Rotas de gestão de conversas
 @app.get("/conversations")
@@ -394,6 +589,18 @@ async def get_analytics(
         "timestamp": datetime.now().isoformat()
     }
 
+@app.get("/metrics")
+async def get_metrics():
+    """Métricas internas de processamento"""
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "webhook": webhook_workers.stats() if webhook_workers else None,
+        "dispatcher": message_dispatcher.stats() if message_dispatcher else None,
+        "deduplication": message_deduplicator.stats(),
+        "whatsapp_send": get_whatsapp_service().rate_limiter.stats(),
+        "database_pool": {"sync": pool_stats(engine), "async": pool_stats(async_engine)}
+    }
+
 @app.get("/architecture")
 async def get_architecture_info():
     """Informações sobre a arquitetura"""
@@ -27,6 +27,17 @@ class SendMessageDTO:
     message_type: str = "text"
 
 
+@dataclass
+class ReceiveMessageDTO:
+    """DTO para registro de mensagem recebida pelo webhook"""
+    phone_number: str
+    whatsapp_message_id: str
+    content: str
+    message_type: str = "text"
+    metadata: Optional[Dict[str, Any]] = None
+    is_processed: bool = False
+
+
 @dataclass
 class MessageResponseDTO:
     """DTO de resposta para mensagem"""
@@ -67,6 +78,7 @@ class MessageListDTO:
     total: int
     skip: int
     limit: int
+    next_cursor: Optional[str] = None
 
 
 @dataclass
@@ -77,3 +89,11 @@ class ProcessMessageDTO:
     ai_response: Optional[str] = None
     sentiment: Optional[Dict[str, Any]] = None
     intent: Optional[Dict[str, Any]] = None
+
+
+@dataclass
+class BatchProcessResultDTO:
+    """DTO para o resultado do processamento em lote"""
+    processed: int
+    batches: int
+    results: list[ProcessMessageDTO]
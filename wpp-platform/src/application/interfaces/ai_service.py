@@ -2,7 +2,7 @@
 Interface para serviço de IA
 """
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 
 
 class AIService(ABC):
@@ -20,6 +20,11 @@ class AIService(ABC):
         """Gera uma resposta usando IA"""
         pass
     
+    @abstractmethod
+    async def analyze_message(self, text: str) -> Dict[str, Any]:
+        """Analisa sentimento, intenção, entidades e escalação de uma vez"""
+        pass
+    
     @abstractmethod
     async def analyze_sentiment(self, text: str) -> Dict[str, Any]:
         """Analisa o sentimento do texto"""
@@ -2,7 +2,21 @@
 Interface para serviço do WhatsApp
 """
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional
+from dataclasses import dataclass
+from typing import Dict, Any, AsyncContextManager, AsyncIterator, List, Optional
+
+
+class MediaIntegrityError(ValueError):
+    """Tamanho ou hash da mídia baixada não confere com o esperado"""
+
+
+@dataclass
+class MediaDownload:
+    """Mídia gravada em disco"""
+    path: str
+    size: int
+    sha256: str
+    mime_type: Optional[str] = None
 
 
 class WhatsAppService(ABC):
@@ -54,3 +68,24 @@ class WhatsAppService(ABC):
     async def download_media(self, media_url: str) -> bytes:
         """Baixa uma mídia do WhatsApp"""
         pass
+    
+    @abstractmethod
+    def open_media(
+        self,
+        media_url: str,
+        expected_size: Optional[int] = None,
+        expected_sha256: Optional[str] = None
+    ) -> AsyncContextManager[AsyncIterator[bytes]]:
+        """Abre o download de uma mídia em blocos, verificando tamanho e hash; libera a conexão ao sair do bloco"""
+        pass
+    
+    @abstractmethod
+    async def download_media_to_file(
+        self,
+        media_url: str,
+        destination: Optional[str] = None,
+        expected_size: Optional[int] = None,
+        expected_sha256: Optional[str] = None
+    ) -> MediaDownload:
+        """Baixa uma mídia direto para um arquivo, sem mantê-la em memória"""
+        pass
@@ -0,0 +1,164 @@
+"""
+Plano de execução com dependências entre etapas assíncronas
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+StepFunction = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+_NO_FALLBACK = object()
+
+
+class StepTimeoutError(asyncio.TimeoutError):
+    """Etapa obrigatória que passou do tempo limite"""
+
+    def __init__(self, step: str, timeout: float):
+        super().__init__(f"Etapa '{step}' excedeu {timeout:.2f}s")
+        self.step = step
+        self.timeout = timeout
+
+
+@dataclass
+class _Step:
+    name: str
+    function: StepFunction
+    depends_on: Sequence[str]
+    timeout: Optional[float]
+    fallback: Any
+
+
+@dataclass
+class StepTrace:
+    """Tempo de uma etapa, relativo ao início do plano"""
+    name: str
+    started_at: float = 0.0
+    duration: float = 0.0
+    status: str = "pending"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "started_at_ms": round(self.started_at * 1000, 2),
+            "duration_ms": round(self.duration * 1000, 2),
+            "status": self.status
+        }
+
+
+@dataclass
+class ExecutionTrace:
+    """Rastreamento de uma execução do plano"""
+    plan: str
+    steps: List[StepTrace] = field(default_factory=list)
+    total: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "plan": self.plan,
+            "total_ms": round(self.total * 1000, 2),
+            "steps": [step.to_dict() for step in self.steps]
+        }
+
+    def __str__(self) -> str:
+        steps = ", ".join(
+            f"{step.name}={step.duration * 1000:.1f}ms@{step.started_at * 1000:.1f}({step.status})"
+            for step in self.steps
+        )
+        return f"{self.plan} {self.total * 1000:.1f}ms [{steps}]"
+
+
+class ExecutionPlan:
+    """
+    Executa etapas assíncronas respeitando as dependências declaradas.
+
+    Cada etapa vira uma task que espera apenas as etapas de que depende, então
+    etapas independentes rodam em paralelo. A função da etapa recebe o dicionário
+    com os resultados já produzidos. Com `timeout`, a etapa é cancelada ao passar
+    do limite: se houver `fallback` o valor é usado no lugar do resultado, senão
+    o plano falha com StepTimeoutError. Qualquer erro cancela as demais etapas e
+    é propagado como foi levantado.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._steps: Dict[str, _Step] = {}
+
+    def step(
+        self,
+        name: str,
+        function: StepFunction,
+        depends_on: Sequence[str] = (),
+        timeout: Optional[float] = None,
+        fallback: Any = _NO_FALLBACK
+    ) -> "ExecutionPlan":
+        """Adiciona uma etapa; as dependências precisam ter sido adicionadas antes"""
+        if name in self._steps:
+            raise ValueError(f"Etapa '{name}' já existe no plano")
+        missing = [dependency for dependency in depends_on if dependency not in self._steps]
+        if missing:
+            raise ValueError(f"Etapa '{name}' depende de etapas desconhecidas: {missing}")
+
+        self._steps[name] = _Step(name, function, tuple(depends_on), timeout, fallback)
+        return self
+
+    async def run(self) -> Tuple[Dict[str, Any], ExecutionTrace]:
+        """Executa o plano e retorna os resultados por etapa e o rastreamento"""
+        results: Dict[str, Any] = {}
+        trace = ExecutionTrace(self.name, [StepTrace(name) for name in self._steps])
+        traces = {step_trace.name: step_trace for step_trace in trace.steps}
+        tasks: Dict[str, asyncio.Task] = {}
+        started = time.perf_counter()
+
+        async def run_step(step: _Step) -> None:
+            if step.depends_on:
+                await asyncio.gather(*(tasks[dependency] for dependency in step.depends_on))
+
+            step_trace = traces[step.name]
+            step_started = time.perf_counter()
+            step_trace.started_at = step_started - started
+            step_trace.status = "running"
+            try:
+                results[step.name] = await asyncio.wait_for(step.function(results), step.timeout)
+                step_trace.status = "ok"
+            except asyncio.TimeoutError:
+                if step.timeout is None:
+                    step_trace.status = "error"
+                    raise
+                if step.fallback is _NO_FALLBACK:
+                    step_trace.status = "timeout"
+                    raise StepTimeoutError(step.name, step.timeout)
+                logger.warning(f"⏱️ Etapa '{step.name}' excedeu {step.timeout:.2f}s, usando valor padrão")
+                results[step.name] = step.fallback
+                step_trace.status = "fallback"
+            except asyncio.CancelledError:
+                step_trace.status = "cancelled"
+                raise
+            except Exception:
+                step_trace.status = "error"
+                raise
+            finally:
+                step_trace.duration = time.perf_counter() - step_started
+
+        # Dependências sempre aparecem antes, então as tasks já existem quando são aguardadas
+        for step in self._steps.values():
+            tasks[step.name] = asyncio.ensure_future(run_step(step))
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        finally:
+            trace.total = time.perf_counter() - started
+            for step_trace in trace.steps:
+                if step_trace.status == "pending":
+                    step_trace.status = "cancelled"
+            logger.debug(f"🧭 {trace}")
+
+        return results, trace
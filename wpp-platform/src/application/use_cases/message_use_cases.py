@@ -1,23 +1,70 @@
 """
 Use Cases para mensagens
 """
-from typing import List, Optional
-from uuid import UUID
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID, uuid4
 
 from ...domain.entities.message import Message
 from ...domain.entities.conversation import Conversation
+from ...domain.entities.user import User
+from ...domain.repositories.analytics_repository import AnalyticsRepository
+from ...domain.repositories.filters import MessageFilter
 from ...domain.repositories.message_repository import MessageRepository
 from ...domain.repositories.conversation_repository import ConversationRepository
 from ...domain.repositories.user_repository import UserRepository
+from ...domain.repositories.unit_of_work import UnitOfWork
 from ...domain.services.message_processing_service import MessageProcessingService
 from ...domain.value_objects.message_content import MessageContent, MessageType, MessageDirection
+from ...domain.value_objects.phone_number import PhoneNumber
 from ..dtos.message_dto import (
     CreateMessageDTO, 
     SendMessageDTO, 
+    ReceiveMessageDTO,
     MessageResponseDTO, 
     MessageListDTO,
-    ProcessMessageDTO
+    ProcessMessageDTO,
+    BatchProcessResultDTO
 )
+from .execution_plan import ExecutionPlan, ExecutionTrace
+
+# Tempo limite (segundos) de cada etapa do processamento de mensagem recebida
+DEFAULT_STEP_TIMEOUTS: Dict[str, float] = {
+    "message": 5.0,
+    "conversation": 5.0,
+    "message_history": 5.0,
+    "sentiment": 3.0,
+    "intent": 3.0,
+    "should_escalate": 3.0,
+    "ai_response": 20.0
+}
+
+
+async def find_or_create_conversation(
+    user_repository: UserRepository,
+    conversation_repository: ConversationRepository,
+    phone_number: str
+) -> Tuple[User, Conversation]:
+    """Busca (ou cria) o usuário do número e a sua conversa ativa"""
+    phone = PhoneNumber(phone_number)
+    user = await user_repository.find_by_phone_number(phone)
+    
+    if not user:
+        user = User.create_new(
+            phone_number=phone,
+            name=f"Usuário {phone.value}"
+        )
+        user = await user_repository.save(user)
+    
+    conversation = await conversation_repository.find_active_by_user_id(user.id)
+    
+    if not conversation:
+        # Conversa aberta por uma mensagem já nasce ativa
+        conversation = Conversation.create_new(user_id=user.id)
+        conversation.activate()
+        conversation = await conversation_repository.save(conversation)
+    
+    return user, conversation
 
 
 class CreateMessageUseCase:
@@ -62,116 +109,198 @@ class ProcessIncomingMessageUseCase:
         message_repository: MessageRepository,
         conversation_repository: ConversationRepository,
         user_repository: UserRepository,
-        message_processing_service: MessageProcessingService
+        message_processing_service: MessageProcessingService,
+        step_timeouts: Optional[Dict[str, float]] = None,
+        analytics_repository: Optional[AnalyticsRepository] = None
     ):
         self._message_repository = message_repository
         self._conversation_repository = conversation_repository
         self._user_repository = user_repository
         self._message_processing_service = message_processing_service
+        self._step_timeouts = {**DEFAULT_STEP_TIMEOUTS, **(step_timeouts or {})}
+        self._analytics_repository = analytics_repository
+        self.last_trace: Optional[ExecutionTrace] = None
     
     async def execute(self, dto: CreateMessageDTO) -> ProcessMessageDTO:
         """Executa o processamento de mensagem recebida"""
-        # Busca a mensagem
-        message = await self._message_repository.find_by_whatsapp_id(dto.whatsapp_message_id)
-        if not message:
-            raise ValueError("Mensagem não encontrada")
-        
-        # Busca a conversa
-        conversation = await self._conversation_repository.find_by_id(message.conversation_id)
-        if not conversation:
-            raise ValueError("Conversa não encontrada")
-        
-        # Busca histórico de mensagens
-        message_history = await self._message_repository.find_by_conversation_id(
-            conversation.id, limit=10
-        )
-        
-        # Analisa sentimento e intenção
-        sentiment = await self._message_processing_service.analyze_sentiment(message.content.text)
-        intent = await self._message_processing_service.extract_intent(message.content.text)
-        
-        # Verifica se deve escalar
-        should_escalate = await self._message_processing_service.should_escalate_to_human(
-            message, conversation, message_history
-        )
-        
-        # Gera resposta com IA se não escalar
-        ai_response = None
-        if not should_escalate:
-            ai_response = await self._message_processing_service.generate_ai_response(
-                message, conversation, message_history
-            )
-        
+        results, self.last_trace = await self._build_plan(dto).run()
+        message = results["message"]
+
         # Marca como processada
         message.mark_as_processed()
         await self._message_repository.save(message)
-        
+
+        if results["should_escalate"] and self._analytics_repository:
+            await self._analytics_repository.record_escalations(datetime.utcnow())
+
         return ProcessMessageDTO(
             message_id=message.id,
-            should_escalate=should_escalate,
-            ai_response=ai_response,
-            sentiment=sentiment,
-            intent=intent
+            should_escalate=results["should_escalate"],
+            ai_response=results["ai_response"],
+            sentiment=results["sentiment"],
+            intent=results["intent"]
+        )
+
+    def _build_plan(self, dto: CreateMessageDTO) -> ExecutionPlan:
+        """
+        Monta o plano de processamento.
+
+        Conversa, histórico, sentimento e intenção dependem apenas da mensagem e
+        rodam em paralelo; a escalação espera conversa e histórico, e a resposta
+        da IA só é gerada depois dela. Sentimento, intenção e resposta da IA têm
+        valor padrão ao estourar o tempo; escalação, na dúvida, escala.
+        """
+        service = self._message_processing_service
+        timeouts = self._step_timeouts
+
+        async def find_message(results):
+            message = await self._message_repository.find_by_whatsapp_id(dto.whatsapp_message_id)
+            if not message:
+                raise ValueError("Mensagem não encontrada")
+            return message
+
+        async def find_conversation(results):
+            conversation = await self._conversation_repository.find_by_id(results["message"].conversation_id)
+            if not conversation:
+                raise ValueError("Conversa não encontrada")
+            return conversation
+
+        async def find_history(results):
+            return await self._message_repository.find_by_conversation_id(
+                results["message"].conversation_id, limit=10
+            )
+
+        async def analyze_sentiment(results):
+            return await service.analyze_sentiment(results["message"].content.text)
+
+        async def extract_intent(results):
+            return await service.extract_intent(results["message"].content.text)
+
+        async def should_escalate(results):
+            return await service.should_escalate_to_human(
+                results["message"], results["conversation"], results["message_history"]
+            )
+
+        async def generate_ai_response(results):
+            if results["should_escalate"]:
+                return None
+            return await service.generate_ai_response(
+                results["message"], results["conversation"], results["message_history"]
+            )
+
+        return (
+            ExecutionPlan("process_incoming_message")
+            .step("message", find_message, timeout=timeouts.get("message"))
+            .step("conversation", find_conversation, ["message"], timeouts.get("conversation"))
+            .step("message_history", find_history, ["message"], timeouts.get("message_history"))
+            .step("sentiment", analyze_sentiment, ["message"], timeouts.get("sentiment"), fallback=None)
+            .step("intent", extract_intent, ["message"], timeouts.get("intent"), fallback=None)
+            .step(
+                "should_escalate", should_escalate, ["message", "conversation", "message_history"],
+                timeouts.get("should_escalate"), fallback=True
+            )
+            .step(
+                "ai_response", generate_ai_response, ["message", "conversation", "message_history", "should_escalate"],
+                timeouts.get("ai_response"), fallback=None
+            )
         )
 
 
 class SendMessageUseCase:
     """
     Use Case para enviar mensagem
+
+    Usuário, conversa e mensagem são gravados na mesma unidade de trabalho:
+    um único commit no fim, em vez de um por repositório.
     """
     
     def __init__(
         self,
         message_repository: MessageRepository,
         conversation_repository: ConversationRepository,
-        user_repository: UserRepository
+        user_repository: UserRepository,
+        unit_of_work: UnitOfWork
     ):
         self._message_repository = message_repository
         self._conversation_repository = conversation_repository
         self._user_repository = user_repository
+        self._unit_of_work = unit_of_work
     
     async def execute(self, dto: SendMessageDTO) -> MessageResponseDTO:
         """Executa o envio de mensagem"""
-        from ...domain.value_objects.phone_number import PhoneNumber
-        
-        # Busca ou cria usuário
-        phone_number = PhoneNumber(dto.phone_number)
-        user = await self._user_repository.find_by_phone_number(phone_number)
-        
-        if not user:
-            from ...domain.entities.user import User
-            user = User.create_new(
-                phone_number=phone_number,
-                name=f"Usuário {phone_number.to_display_format()}"
+        async with self._unit_of_work:
+            user, conversation = await find_or_create_conversation(
+                self._user_repository, self._conversation_repository, dto.phone_number
             )
-            user = await self._user_repository.save(user)
         
-        # Busca ou cria conversa ativa
-        conversation = await self._conversation_repository.find_active_by_user_id(user.id)
+            # Cria mensagem de saída
+            content = MessageContent(
+                text=dto.message,
+                message_type=MessageType(dto.message_type),
+                direction=MessageDirection.OUTGOING
+            )
         
-        if not conversation:
-            conversation = Conversation.create_new(
+            message = Message.create_new(
+                conversation_id=conversation.id,
                 user_id=user.id,
-                whatsapp_conversation_id=f"{phone_number.to_whatsapp_format()}_{int(datetime.utcnow().timestamp())}"
+                whatsapp_message_id=f"outgoing_{uuid4().hex}",
+                content=content
             )
-            conversation = await self._conversation_repository.save(conversation)
         
-        # Cria mensagem de saída
-        content = MessageContent(
-            text=dto.message,
-            message_type=MessageType(dto.message_type),
-            direction=MessageDirection.OUTGOING
-        )
+            # Salva mensagem
+            saved_message = await self._message_repository.save(message)
         
-        message = Message.create_new(
-            conversation_id=conversation.id,
-            user_id=user.id,
-            whatsapp_message_id=f"outgoing_{int(datetime.utcnow().timestamp())}",
-            content=content
-        )
+        return MessageResponseDTO.from_entity(saved_message)
+
+
+class ReceiveMessageUseCase:
+    """
+    Use Case para registrar mensagem recebida pelo webhook
+
+    Grava usuário, conversa e mensagem em uma única unidade de trabalho, antes
+    da resposta: o índice único de `whatsapp_message_id` é o controle de
+    idempotência. Reentregas de uma mensagem já gravada não gravam de novo e
+    devolvem a linha existente (com `is_processed`, se já foi respondida).
+    """
+    
+    def __init__(
+        self,
+        message_repository: MessageRepository,
+        conversation_repository: ConversationRepository,
+        user_repository: UserRepository,
+        unit_of_work: UnitOfWork
+    ):
+        self._message_repository = message_repository
+        self._conversation_repository = conversation_repository
+        self._user_repository = user_repository
+        self._unit_of_work = unit_of_work
+    
+    async def execute(self, dto: ReceiveMessageDTO) -> MessageResponseDTO:
+        """Executa o registro da mensagem recebida"""
+        existing = await self._message_repository.find_by_whatsapp_id(dto.whatsapp_message_id)
+        if existing:
+            return MessageResponseDTO.from_entity(existing)
         
-        # Salva mensagem
-        saved_message = await self._message_repository.save(message)
+        async with self._unit_of_work:
+            user, conversation = await find_or_create_conversation(
+                self._user_repository, self._conversation_repository, dto.phone_number
+            )
+            
+            message = Message.create_new(
+                conversation_id=conversation.id,
+                user_id=user.id,
+                whatsapp_message_id=dto.whatsapp_message_id,
+                content=MessageContent(
+                    text=dto.content,
+                    message_type=MessageType(dto.message_type),
+                    direction=MessageDirection.INCOMING,
+                    metadata=dto.metadata
+                )
+            )
+            if dto.is_processed:
+                message.mark_as_processed()
+            
+            saved_message = await self._message_repository.save(message)
         
         return MessageResponseDTO.from_entity(saved_message)
 
@@ -188,12 +317,20 @@ class GetMessagesByConversationUseCase:
         self, 
         conversation_id: UUID, 
         skip: int = 0, 
-        limit: int = 50
+        limit: int = 50,
+        cursor: Optional[str] = None
     ) -> MessageListDTO:
-        """Executa a busca de mensagens por conversa"""
-        messages = await self._message_repository.find_by_conversation_id(
-            conversation_id, skip=skip, limit=limit
-        )
+        """Executa a busca de mensagens por conversa (por cursor, ou por offset se `skip` for informado)"""
+        next_cursor = None
+        if skip:
+            messages = await self._message_repository.find_by_conversation_id(
+                conversation_id, skip=skip, limit=limit
+            )
+        else:
+            page = await self._message_repository.find_page(
+                cursor=cursor, limit=limit, filters=MessageFilter(conversation_id=conversation_id)
+            )
+            messages, next_cursor = page.items, page.next_cursor
         
         message_dtos = [MessageResponseDTO.from_entity(message) for message in messages]
         
@@ -201,7 +338,8 @@ class GetMessagesByConversationUseCase:
             messages=message_dtos,
             total=len(message_dtos),
             skip=skip,
-            limit=limit
+            limit=limit,
+            next_cursor=next_cursor
         )
 
 
@@ -218,3 +356,63 @@ class GetUnprocessedMessagesUseCase:
         messages = await self._message_repository.find_unprocessed_messages()
         
         return [MessageResponseDTO.from_entity(message) for message in messages]
+
+
+class ProcessUnprocessedMessagesBatchUseCase:
+    """
+    Use Case para processar em lote as mensagens pendentes
+
+    Cada página é reivindicada no repositório (outros workers pulam as mesmas
+    linhas), analisada em uma única chamada de NLU e marcada como processada em
+    um único UPDATE. Vários workers podem drenar a fila ao mesmo tempo.
+
+    Este caminho é só de NLU: registra sentimento, intenção e escalações, mas
+    não gera nem envia resposta. As respostas continuam com o webhook e com
+    /messages/process/{id}; use o lote para mensagens que já foram respondidas
+    ou que não precisam de resposta (importações, reprocessamento de métricas).
+    """
+    
+    def __init__(
+        self,
+        message_repository: MessageRepository,
+        message_processing_service: MessageProcessingService,
+        analytics_repository: Optional[AnalyticsRepository] = None
+    ):
+        self._message_repository = message_repository
+        self._message_processing_service = message_processing_service
+        self._analytics_repository = analytics_repository
+    
+    async def execute(self, batch_size: int = 100, max_batches: int = 1) -> BatchProcessResultDTO:
+        """Processa até `max_batches` páginas de `batch_size` mensagens"""
+        results: List[ProcessMessageDTO] = []
+        batches = 0
+        
+        while batches < max_batches:
+            async with self._message_repository.claim_unprocessed_batch(batch_size) as messages:
+                if not messages:
+                    break
+                
+                analyses = await self._message_processing_service.analyze_batch(
+                    [message.content.text for message in messages]
+                )
+                await self._message_repository.mark_as_processed_bulk([message.id for message in messages])
+            
+            batches += 1
+            processed = [
+                ProcessMessageDTO(
+                    message_id=message.id,
+                    should_escalate=analysis.get("should_escalate", False),
+                    sentiment=analysis["sentiment"],
+                    intent=analysis["intent"]
+                )
+                for message, analysis in zip(messages, analyses)
+            ]
+            results.extend(processed)
+            
+            escalations = sum(result.should_escalate for result in processed)
+            if escalations and self._analytics_repository:
+                await self._analytics_repository.record_escalations(datetime.utcnow(), escalations)
+            if len(messages) < batch_size:
+                break
+        
+        return BatchProcessResultDTO(processed=len(results), batches=batches, results=results)
@@ -1,7 +1,7 @@
 """
 Entidade Conversation - Representa uma conversa do WhatsApp
 """
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Optional
 from uuid import UUID, uuid4
@@ -20,6 +20,11 @@ class Conversation:
     created_at: datetime
     updated_at: Optional[datetime] = None
     last_message_at: Optional[datetime] = None
+    # Contadores mantidos pelo repositório (somente leitura na entidade)
+    message_count: int = 0
+    unread_count: int = 0
+    # Criada por create_new e ainda não gravada: o repositório faz o INSERT direto, sem SELECT
+    is_new: bool = field(default=False, repr=False, compare=False)
     
     def __post_init__(self):
         """Validações da entidade Conversation"""
@@ -39,7 +44,8 @@ class Conversation:
             id=uuid4(),
             user_id=user_id,
             status=ConversationStatus("pending"),
-            created_at=now
+            created_at=now,
+            is_new=True
         )
     
     def update_status(self, new_status: str) -> None:
@@ -1,7 +1,7 @@
 """
 Entidade Message - Representa uma mensagem do WhatsApp
 """
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Optional
 from uuid import UUID, uuid4
@@ -21,6 +21,8 @@ class Message:
     content: MessageContent
     is_processed: bool
     created_at: datetime
+    # Criada por create_new e ainda não gravada: o repositório faz o INSERT direto, sem SELECT
+    is_new: bool = field(default=False, repr=False, compare=False)
     
     def __post_init__(self):
         """Validações da entidade Message"""
@@ -45,7 +47,8 @@ class Message:
             whatsapp_message_id=whatsapp_message_id.strip(),
             content=content,
             is_processed=False,
-            created_at=datetime.utcnow()
+            created_at=datetime.utcnow(),
+            is_new=True
         )
     
     def mark_as_processed(self) -> None:
@@ -1,7 +1,7 @@
 """
 Entidade User - Representa um usuário do sistema
 """
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Optional, List
 from uuid import UUID, uuid4
@@ -21,6 +21,11 @@ class User:
     is_active: bool
     created_at: datetime
     updated_at: Optional[datetime] = None
+    # Contadores mantidos pelo repositório (somente leitura na entidade)
+    conversation_count: int = 0
+    total_messages: int = 0
+    # Criado por create_new e ainda não gravado: o repositório faz o INSERT direto, sem SELECT
+    is_new: bool = field(default=False, repr=False, compare=False)
     
     def __post_init__(self):
         """Validações da entidade User"""
@@ -54,7 +59,8 @@ class User:
             name=name.strip(),
             email=email.strip() if email else None,
             is_active=True,
-            created_at=now
+            created_at=now,
+            is_new=True
         )
     
     def update_name(self, new_name: str) -> None:
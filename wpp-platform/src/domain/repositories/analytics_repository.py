@@ -0,0 +1,67 @@
+"""
+Interface do repositório de analytics
+"""
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import List, Optional, Sequence
+
+from .summaries import (
+    AnalyticsOverview,
+    ConversationMetrics,
+    MessageTrend,
+    ResponseTimeStats,
+    RollupPoint,
+    UserActivity
+)
+
+
+class AnalyticsRepository(ABC):
+    """
+    Interface para as consultas agregadas do painel de analytics
+    """
+    
+    @abstractmethod
+    async def get_overview(self, today: datetime) -> AnalyticsOverview:
+        """Totais de usuários, conversas e mensagens; messages_today conta a partir de `today`"""
+        pass
+    
+    @abstractmethod
+    async def get_message_trends(self, start: datetime, end: datetime) -> List[MessageTrend]:
+        """Mensagens por dia e direção em [start, end); só os dias com mensagens"""
+        pass
+    
+    @abstractmethod
+    async def get_user_activity(self, start: datetime, end: datetime) -> List[UserActivity]:
+        """Usuários novos, ativos e recorrentes por dia em [start, end); só os dias com atividade"""
+        pass
+    
+    @abstractmethod
+    async def get_conversation_metrics(self) -> ConversationMetrics:
+        """Conversas por status, duração média e mensagens por conversa"""
+        pass
+    
+    @abstractmethod
+    async def get_response_times(self, start: datetime, end: datetime) -> ResponseTimeStats:
+        """Tempos de resposta (primeira recebida sem resposta até a enviada) respondidos em [start, end)"""
+        pass
+    
+    @abstractmethod
+    async def get_rollup_series(
+        self,
+        metrics: Sequence[str],
+        granularity: str,
+        start: datetime,
+        end: datetime
+    ) -> List[RollupPoint]:
+        """Valores pré-agregados das métricas por minuto, hora ou dia em [start, end)"""
+        pass
+    
+    @abstractmethod
+    async def get_high_water_mark(self) -> Optional[datetime]:
+        """Instante até o qual os rollups estão completos (None antes da primeira rodada)"""
+        pass
+    
+    @abstractmethod
+    async def record_escalations(self, at: datetime, count: int = 1) -> None:
+        """Registra escalações para atendimento humano ocorridas em `at`"""
+        pass
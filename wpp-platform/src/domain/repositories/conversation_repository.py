@@ -2,11 +2,14 @@
 Interface do repositório de conversas
 """
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import List, Optional, Sequence
 from uuid import UUID
 
 from ..entities.conversation import Conversation
 from ..value_objects.conversation_status import ConversationStatus
+from .filters import ConversationFilter
+from .pagination import Page
+from .summaries import ConversationStats, ConversationSummary
 
 
 class ConversationRepository(ABC):
@@ -19,6 +22,11 @@ class ConversationRepository(ABC):
         """Salva uma conversa"""
         pass
     
+    @abstractmethod
+    async def save_many(self, conversations: Sequence[Conversation]) -> int:
+        """Insere várias conversas novas de uma vez; retorna quantas foram gravadas"""
+        pass
+    
     @abstractmethod
     async def find_by_id(self, conversation_id: UUID) -> Optional[Conversation]:
         """Busca conversa por ID"""
@@ -49,14 +57,49 @@ class ConversationRepository(ABC):
         """Busca conversas por status"""
         pass
     
+    @abstractmethod
+    async def find_page(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        filters: Optional[ConversationFilter] = None
+    ) -> Page[Conversation]:
+        """Lista conversas por cursor (created_at, id), com filtros opcionais"""
+        pass
+    
+    @abstractmethod
+    async def find_summaries_page(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        filters: Optional[ConversationFilter] = None
+    ) -> Page[ConversationSummary]:
+        """Como find_page, com o usuário e as contagens de mensagens de cada conversa"""
+        pass
+    
+    @abstractmethod
+    async def find_summaries(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        filters: Optional[ConversationFilter] = None
+    ) -> List[ConversationSummary]:
+        """Como find_all, com o usuário e as contagens de mensagens de cada conversa"""
+        pass
+    
     @abstractmethod
     async def find_by_agent_id(self, agent_id: UUID) -> List[Conversation]:
         """Busca conversas de um agente"""
         pass
     
     @abstractmethod
-    async def find_all(self, skip: int = 0, limit: int = 100) -> List[Conversation]:
-        """Lista todas as conversas"""
+    async def find_all(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        filters: Optional[ConversationFilter] = None
+    ) -> List[Conversation]:
+        """Lista conversas por offset, com filtros opcionais"""
         pass
     
     @abstractmethod
@@ -68,3 +111,8 @@ class ConversationRepository(ABC):
     async def count_by_user_id(self, user_id: UUID) -> int:
         """Conta conversas de um usuário"""
         pass
+    
+    @abstractmethod
+    async def get_stats(self) -> ConversationStats:
+        """Conversas por status e total de mensagens (somando os contadores)"""
+        pass
@@ -0,0 +1,33 @@
+"""
+Filtros das listagens dos repositórios (convertidos em WHERE pela infraestrutura)
+"""
+from dataclasses import dataclass
+from typing import Optional
+from uuid import UUID
+
+from ..value_objects.conversation_status import ConversationStatus
+from ..value_objects.message_content import MessageDirection
+
+
+@dataclass(frozen=True)
+class MessageFilter:
+    """Filtros de mensagens; campos None não filtram"""
+    conversation_id: Optional[UUID] = None
+    user_id: Optional[UUID] = None
+    direction: Optional[MessageDirection] = None
+    is_processed: Optional[bool] = None
+
+
+@dataclass(frozen=True)
+class ConversationFilter:
+    """Filtros de conversas; campos None não filtram"""
+    status: Optional[ConversationStatus] = None
+    user_id: Optional[UUID] = None
+    agent_id: Optional[UUID] = None
+
+
+@dataclass(frozen=True)
+class UserFilter:
+    """Filtros de usuários; `search` procura no nome, email e telefone"""
+    search: Optional[str] = None
+    is_active: Optional[bool] = None
@@ -2,10 +2,12 @@
 Interface do repositório de mensagens
 """
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import AsyncContextManager, List, Optional, Sequence
 from uuid import UUID
 
 from ..entities.message import Message
+from .filters import MessageFilter
+from .pagination import Page
 from ..value_objects.message_content import MessageDirection
 
 
@@ -19,6 +21,11 @@ class MessageRepository(ABC):
         """Salva uma mensagem"""
         pass
     
+    @abstractmethod
+    async def save_many(self, messages: Sequence[Message]) -> int:
+        """Insere várias mensagens novas de uma vez; retorna quantas foram gravadas"""
+        pass
+    
     @abstractmethod
     async def find_by_id(self, message_id: UUID) -> Optional[Message]:
         """Busca mensagem por ID"""
@@ -39,6 +46,26 @@ class MessageRepository(ABC):
         """Busca mensagens de uma conversa"""
         pass
     
+    @abstractmethod
+    async def find_all(
+        self,
+        skip: int = 0,
+        limit: int = 50,
+        filters: Optional[MessageFilter] = None
+    ) -> List[Message]:
+        """Lista mensagens por offset, com filtros opcionais"""
+        pass
+    
+    @abstractmethod
+    async def find_page(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+        filters: Optional[MessageFilter] = None
+    ) -> Page[Message]:
+        """Lista mensagens por cursor (created_at, id), com filtros opcionais"""
+        pass
+    
     @abstractmethod
     async def find_by_user_id(
         self, 
@@ -54,6 +81,22 @@ class MessageRepository(ABC):
         """Busca mensagens não processadas"""
         pass
     
+    @abstractmethod
+    def claim_unprocessed_batch(self, limit: int) -> AsyncContextManager[List[Message]]:
+        """
+        Reivindica até `limit` mensagens não processadas para este worker.
+
+        As mensagens ficam travadas até o fim do bloco `async with`: outros workers
+        pulam essas linhas. Ao sair sem erro a transação é confirmada; com erro, é
+        desfeita e as mensagens voltam para a fila.
+        """
+        pass
+    
+    @abstractmethod
+    async def mark_as_processed_bulk(self, message_ids: Sequence[UUID]) -> int:
+        """Marca as mensagens como processadas em um único UPDATE; retorna quantas"""
+        pass
+    
     @abstractmethod
     async def find_by_direction(
         self, 
@@ -75,6 +118,6 @@ class MessageRepository(ABC):
         pass
     
     @abstractmethod
-    async def exists_by_whatsapp_id(self, whatsapp_message_id: str) -> bool:
-        """Verifica se mensagem existe pelo ID do WhatsApp"""
+    async def exists_by_whatsapp_id(self, whatsapp_message_id: str, is_processed: Optional[bool] = None) -> bool:
+        """Verifica se mensagem existe pelo ID do WhatsApp (opcionalmente, só se já processada ou não)"""
         pass
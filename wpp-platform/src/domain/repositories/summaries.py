@@ -0,0 +1,98 @@
+"""
+Visões de leitura das listagens e analytics (entidades + dados agregados pelo repositório)
+"""
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Dict, Optional
+
+from ..entities.conversation import Conversation
+from ..entities.user import User
+
+
+@dataclass
+class ConversationSummary:
+    """Conversa com o usuário, para listagens (as contagens estão na conversa)"""
+    conversation: Conversation
+    user: Optional[User] = None
+
+
+@dataclass
+class ConversationStats:
+    """Totais das conversas: quantidade por status e mensagens"""
+    by_status: Dict[str, int] = field(default_factory=dict)
+    total_messages: int = 0
+
+    @property
+    def total_conversations(self) -> int:
+        return sum(self.by_status.values())
+
+
+@dataclass
+class UserStats:
+    """Totais dos usuários"""
+    total_users: int = 0
+    active_users: int = 0
+    total_conversations: int = 0
+    total_messages: int = 0
+
+
+@dataclass
+class AnalyticsOverview:
+    """Números do painel de analytics"""
+    total_users: int = 0
+    active_users: int = 0
+    total_conversations: int = 0
+    active_conversations: int = 0
+    total_messages: int = 0
+    messages_today: int = 0
+
+
+@dataclass
+class MessageTrend:
+    """Mensagens de um dia, por direção"""
+    day: date
+    inbound_messages: int = 0
+    outbound_messages: int = 0
+
+    @property
+    def total_messages(self) -> int:
+        return self.inbound_messages + self.outbound_messages
+
+
+@dataclass
+class UserActivity:
+    """Usuários de um dia: novos, que enviaram mensagens e, destes, os que já existiam"""
+    day: date
+    new_users: int = 0
+    active_users: int = 0
+    returning_users: int = 0
+
+
+@dataclass
+class ConversationMetrics:
+    """Conversas por status, duração média (minutos) e mensagens por conversa"""
+    by_status: Dict[str, int] = field(default_factory=dict)
+    avg_duration_minutes: float = 0.0
+    avg_messages_per_conversation: float = 0.0
+
+    @property
+    def total_conversations(self) -> int:
+        return sum(self.by_status.values())
+
+
+@dataclass
+class RollupPoint:
+    """Valor de uma métrica pré-agregada em um bucket (minuto, hora ou dia)"""
+    bucket: datetime
+    metric: str
+    value: int
+
+
+@dataclass
+class ResponseTimeStats:
+    """Tempos de resposta (segundos) de um intervalo: totais exatos e percentis estimados"""
+    count: int = 0
+    avg_seconds: float = 0.0
+    min_seconds: float = 0.0
+    max_seconds: float = 0.0
+    percentiles: Dict[str, float] = field(default_factory=dict)
@@ -0,0 +1,39 @@
+"""
+Interface da unidade de trabalho (transação de um use case)
+"""
+from abc import ABC, abstractmethod
+
+
+class UnitOfWork(ABC):
+    """
+    Agrupa as gravações dos repositórios em uma única transação.
+
+    Dentro do bloco `async with` os repositórios apenas enviam as alterações ao
+    banco, sem confirmar; ao sair sem erro há um único commit, e com erro tudo
+    é desfeito. Blocos aninhados participam da transação do bloco externo.
+    """
+    
+    async def __aenter__(self) -> "UnitOfWork":
+        await self.begin()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, traceback) -> None:
+        if exc_type is None:
+            await self.commit()
+        else:
+            await self.rollback()
+    
+    @abstractmethod
+    async def begin(self) -> None:
+        """Abre (ou entra em) uma unidade de trabalho"""
+        pass
+    
+    @abstractmethod
+    async def commit(self) -> None:
+        """Confirma a transação ao fechar o bloco mais externo"""
+        pass
+    
+    @abstractmethod
+    async def rollback(self) -> None:
+        """Desfaz a transação"""
+        pass
@@ -2,11 +2,14 @@
 Interface do repositório de usuários
 """
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import Dict, List, Optional, Sequence
 from uuid import UUID
 
 from ..entities.user import User
 from ..value_objects.phone_number import PhoneNumber
+from .filters import UserFilter
+from .pagination import Page
+from .summaries import UserStats
 
 
 class UserRepository(ABC):
@@ -19,6 +22,16 @@ class UserRepository(ABC):
         """Salva um usuário"""
         pass
     
+    @abstractmethod
+    async def save_many(self, users: Sequence[User]) -> int:
+        """Insere vários usuários novos de uma vez; retorna quantos foram gravados"""
+        pass
+    
+    @abstractmethod
+    async def find_or_create_many(self, users: Sequence[User]) -> Dict[str, User]:
+        """Busca ou cria usuários pelo telefone; retorna os usuários indexados pelo telefone"""
+        pass
+    
     @abstractmethod
     async def find_by_id(self, user_id: UUID) -> Optional[User]:
         """Busca usuário por ID"""
@@ -30,8 +43,23 @@ class UserRepository(ABC):
         pass
     
     @abstractmethod
-    async def find_all(self, skip: int = 0, limit: int = 100) -> List[User]:
-        """Lista todos os usuários"""
+    async def find_all(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        filters: Optional[UserFilter] = None
+    ) -> List[User]:
+        """Lista usuários por offset, com filtros opcionais"""
+        pass
+    
+    @abstractmethod
+    async def find_page(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        filters: Optional[UserFilter] = None
+    ) -> Page[User]:
+        """Lista usuários por cursor (created_at, id), com filtros opcionais"""
         pass
     
     @abstractmethod
@@ -48,3 +76,8 @@ class UserRepository(ABC):
     async def exists_by_phone_number(self, phone_number: PhoneNumber) -> bool:
         """Verifica se usuário existe pelo número de telefone"""
         pass
+    
+    @abstractmethod
+    async def get_stats(self) -> UserStats:
+        """Usuários, ativos e totais de conversas e mensagens (somando os contadores)"""
+        pass
@@ -0,0 +1,115 @@
+"""
+Domain Service para extração de entidades (email, telefone, valores, documentos, pedidos e datas)
+"""
+import re
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+
+
+@dataclass(frozen=True)
+class ExtractedEntity:
+    """Entidade encontrada no texto, com a posição original"""
+    type: str
+    value: str
+    start: int
+    end: int
+
+    def __str__(self) -> str:
+        return f"{self.type}:{self.value}"
+
+
+# Uma única regex com grupos nomeados; na mesma posição vence a primeira alternativa.
+# Email e pedido só são tentados no início de uma palavra e os padrões numéricos só
+# a partir de um dígito, "(" ou "+", o que evita retestar cada posição do texto.
+_ENTITY_PATTERN = re.compile(
+    r"(?<![A-Za-z0-9._%+-])(?P<email>[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,})"
+    r"|(?P<money>R\$\s?\d{1,3}(?:\.\d{3})+(?:,\d{1,2})?|R\$\s?\d+(?:,\d{1,2})?)"
+    r"|\b(?P<order>(?i:pedido|protocolo|order)\s*(?:(?i:n)[º°o]?\.?\s*|#\s*)?(?P<order_number>\d{3,}))"
+    r"|(?<![\w.])#(?P<hash_number>\d{3,})(?!\d)"
+    r"|(?<![\d/])(?=[\d(+])(?:"
+    r"(?P<cnpj>\d{2}\.\d{3}\.\d{3}/\d{4}-\d{2})"
+    r"|(?P<cpf>\d{3}\.\d{3}\.\d{3}-\d{2})"
+    r"|(?P<date>\d{1,2}/\d{1,2}(?:/(?:\d{4}|\d{2}))?)(?!/)"
+    r"|(?P<digits>\d{14}|\d{11})"
+    r"|(?<!\+)(?P<phone>(?:\+?55\s?)?(?:\(\d{2}\)|\d{2})\s?9?\d{4}[-\s]?\d{4})"
+    r")(?!\d)"
+)
+
+_NON_DIGITS = re.compile(r"\D")
+
+
+def _valid_cpf(digits: str) -> bool:
+    if len(digits) != 11 or digits == digits[0] * 11:
+        return False
+    for size in (9, 10):
+        total = sum(int(digit) * weight for digit, weight in zip(digits, range(size + 1, 1, -1)))
+        if (total * 10 % 11) % 10 != int(digits[size]):
+            return False
+    return True
+
+
+def _valid_cnpj(digits: str) -> bool:
+    if len(digits) != 14 or digits == digits[0] * 14:
+        return False
+    for size, weights in ((12, (5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2)), (13, (6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2))):
+        remainder = sum(int(digit) * weight for digit, weight in zip(digits, weights)) % 11
+        if (0 if remainder < 2 else 11 - remainder) != int(digits[size]):
+            return False
+    return True
+
+
+class EntityExtractor:
+    """
+    Extrai entidades com uma única passada da regex pré-compilada.
+
+    Sequências de 11 ou 14 dígitos sem formatação são classificadas pelo dígito
+    verificador: CPF/CNPJ quando válido; com 11 dígitos e inválido, telefone.
+    O texto deve ser o original (sem lower): o padrão de valores procura "R$".
+    """
+
+    def extract(self, text: str) -> List[ExtractedEntity]:
+        """Retorna as entidades do texto na ordem em que aparecem"""
+        entities = []
+        for match in _ENTITY_PATTERN.finditer(text):
+            entity = self._to_entity(match)
+            if entity is not None:
+                entities.append(entity)
+        return entities
+
+    def extract_batch(self, texts: Iterable[str]) -> List[List[ExtractedEntity]]:
+        """Extrai as entidades de vários textos"""
+        extract = self.extract
+        return [extract(text) for text in texts]
+
+    @staticmethod
+    def _to_entity(match: "re.Match") -> Optional[ExtractedEntity]:
+        kind = match.lastgroup
+        if kind in ("order", "hash_number"):
+            group = "order_number" if kind == "order" else kind
+            return ExtractedEntity("order", match.group(group), match.start(group), match.end(group))
+
+        value = match.group(kind)
+        start, end = match.start(kind), match.end(kind)
+
+        if kind == "digits":
+            if len(value) == 14:
+                return ExtractedEntity("cnpj", value, start, end) if _valid_cnpj(value) else None
+            kind = "cpf" if _valid_cpf(value) else "phone"
+        elif kind == "phone":
+            # Normaliza separadores para comparar telefones
+            value = _NON_DIGITS.sub("", value)
+
+        return ExtractedEntity(kind, value, start, end)
+
+
+entity_extractor = EntityExtractor()
+
+
+def extract_entities(text: str) -> List[ExtractedEntity]:
+    """Atalho para o extrator compartilhado do módulo"""
+    return entity_extractor.extract(text)
+
+
+def extract_entities_batch(texts: Iterable[str]) -> List[List[ExtractedEntity]]:
+    """Atalho para a extração em lote do extrator compartilhado"""
+    return entity_extractor.extract_batch(texts)
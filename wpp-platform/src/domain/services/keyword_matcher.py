@@ -0,0 +1,110 @@
+"""
+Domain Service para busca de várias palavras-chave em uma única passada
+"""
+import re
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Mapping
+
+
+class KeywordHits:
+    """
+    Palavras-chave encontradas em um texto, agrupadas por categoria
+    """
+
+    def __init__(
+        self,
+        keywords: FrozenSet[str],
+        counts: Dict[str, int],
+        categories: Mapping[str, FrozenSet[str]]
+    ):
+        self.keywords = keywords
+        self._counts = counts
+        self._categories = categories
+
+    def has(self, category: str) -> bool:
+        """Indica se alguma palavra da categoria apareceu"""
+        return category in self._counts
+
+    def count(self, category: str) -> int:
+        """Quantidade de palavras distintas da categoria encontradas"""
+        return self._counts.get(category, 0)
+
+    def matches(self, category: str) -> FrozenSet[str]:
+        """Palavras da categoria encontradas"""
+        return self.keywords & self._categories.get(category, frozenset())
+
+
+class KeywordMatcher:
+    """
+    Encontra todas as palavras-chave presentes em um texto com uma única regex.
+
+    A regex é montada a partir de uma trie das palavras (prefixos comuns são
+    compartilhados) e envolvida em um lookahead, então cada posição do texto é
+    testada uma única vez e ocorrências sobrepostas também são encontradas. Em
+    cada posição casa a palavra mais longa; as palavras que são prefixo dela são
+    acrescentadas a partir de uma tabela pré-calculada. O resultado é o mesmo de
+    `keyword in text.lower()` para cada palavra.
+    """
+
+    def __init__(self, categories: Mapping[str, Iterable[str]], cache_size: int = 1024):
+        self._categories: Dict[str, FrozenSet[str]] = {
+            category: frozenset(keyword.lower() for keyword in keywords)
+            for category, keywords in categories.items()
+        }
+
+        keywords = sorted(set().union(*self._categories.values()))
+        self._categories_by_keyword: Dict[str, tuple] = {
+            keyword: tuple(category for category, words in self._categories.items() if keyword in words)
+            for keyword in keywords
+        }
+        self._prefixes: Dict[str, FrozenSet[str]] = {
+            keyword: frozenset(other for other in keywords if keyword.startswith(other))
+            for keyword in keywords
+        }
+        self.keyword_count = len(keywords)
+
+        if keywords:
+            # O lookahead inicial com as primeiras letras permite descartar posições rapidamente
+            first_chars = "".join(sorted({re.escape(keyword[0]) for keyword in keywords}))
+            self._pattern = re.compile(f"(?=[{first_chars}])(?=({self._trie_pattern(keywords)}))")
+        else:
+            self._pattern = None
+        self.match = lru_cache(maxsize=cache_size)(self._match)
+
+    def _match(self, text: str) -> KeywordHits:
+        """Retorna todas as palavras-chave presentes no texto (categorias via KeywordHits)"""
+        found: FrozenSet[str] = frozenset()
+        counts: Dict[str, int] = {}
+        if self._pattern is not None:
+            longest = self._pattern.findall(text.lower())
+            if longest:
+                prefixes = self._prefixes
+                found = frozenset().union(*[prefixes[keyword] for keyword in longest])
+                for keyword in found:
+                    for category in self._categories_by_keyword[keyword]:
+                        counts[category] = counts.get(category, 0) + 1
+
+        return KeywordHits(found, counts, self._categories)
+
+    @staticmethod
+    def _trie_pattern(keywords: List[str]) -> str:
+        """Converte as palavras em uma regex de trie, preferindo a mais longa"""
+        trie: Dict = {}
+        for keyword in keywords:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[""] = {}
+
+        def build(node: Dict) -> str:
+            is_end = "" in node
+            branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+            if not branches:
+                return ""
+            body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+            if is_end:
+                # O ramo mais longo é tentado primeiro; o fim da palavra é o opcional
+                return f"{body}?" if len(branches) > 1 else f"(?:{body})?"
+            return body
+
+        return build(trie)
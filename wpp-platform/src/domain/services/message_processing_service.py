@@ -9,6 +9,8 @@ from ..entities.message import Message
 from ..entities.conversation import Conversation
 from ..entities.user import User
 from ..value_objects.message_content import MessageContent, MessageDirection, MessageType
+from .keyword_matcher import KeywordHits, KeywordMatcher
+from .entity_extractor import extract_entities, extract_entities_batch
 
 
 class MessageProcessingService(ABC):
@@ -53,6 +55,18 @@ class MessageProcessingService(ABC):
         Gera uma resposta usando IA
         """
         pass
+    
+    async def analyze_batch(self, message_contents: List[str]) -> List[Dict[str, Any]]:
+        """
+        Analisa sentimento e intenção de várias mensagens, na mesma ordem
+        """
+        return [
+            {
+                "sentiment": await self.analyze_sentiment(text),
+                "intent": await self.extract_intent(text)
+            }
+            for text in message_contents
+        ]
 
 
 class DefaultMessageProcessingService(MessageProcessingService):
@@ -71,6 +85,46 @@ class DefaultMessageProcessingService(MessageProcessingService):
             "péssimo", "terrível", "horrível", "odiei", "detesto",
             "raiva", "irritado", "frustrado", "insatisfeito"
         ]
+        
+        self.positive_words = ["obrigado", "valeu", "thanks", "ótimo", "bom", "excelente", "perfeito"]
+        self.negative_words = ["ruim", "péssimo", "terrível", "horrível", "problema", "erro"]
+        
+        self.emotion_keywords = {
+            "happy": ["feliz", "alegre", "contente", "satisfeito"],
+            "angry": ["raiva", "irritado", "furioso", "bravo"],
+            "sad": ["triste", "deprimido", "chateado", "melancólico"],
+            "excited": ["animado", "empolgado", "entusiasmado"],
+            "frustrated": ["frustrado", "irritado", "incomodado"]
+        }
+        
+        self.intent_patterns = {
+            "greeting": ["oi", "olá", "bom dia", "boa tarde", "boa noite", "hello", "hi"],
+            "question": ["como", "quando", "onde", "por que", "qual", "quanto", "?"],
+            "complaint": ["reclamação", "problema", "erro", "falha", "defeito"],
+            "compliment": ["parabéns", "excelente", "ótimo", "perfeito", "muito bom"],
+            "goodbye": ["tchau", "até logo", "bye", "até mais", "falou"],
+            "help": ["ajuda", "help", "suporte", "dúvida", "não sei"]
+        }
+        
+        # Todas as listas em um único matcher: cada classificador lê o mesmo conjunto de acertos
+        self.keyword_matcher = KeywordMatcher({
+            "escalation": self.escalation_keywords,
+            "negative": self.negative_keywords,
+            "sentiment:positive": self.positive_words,
+            "sentiment:negative": self.negative_words,
+            **{f"emotion:{emotion}": keywords for emotion, keywords in self.emotion_keywords.items()},
+            **{f"intent:{intent}": patterns for intent, patterns in self.intent_patterns.items()}
+        })
+        
+        self.canned_responses = {
+            "greeting": "Olá! 👋 Como posso ajudá-lo hoje?",
+            "question": "Ótima pergunta! Deixe-me ajudá-lo com isso.",
+            "complaint": "Entendo sua preocupação. Vou fazer o possível para resolver isso.",
+            "compliment": "Muito obrigado pelo feedback positivo! 😊",
+            "goodbye": "Até logo! Foi um prazer conversar com você. 👋",
+            "help": "Claro! Estou aqui para ajudar. Qual é sua dúvida?",
+            "other": "Entendi. Como posso ajudá-lo melhor?"
+        }
     
     async def should_escalate_to_human(
         self, 
@@ -81,15 +135,7 @@ class DefaultMessageProcessingService(MessageProcessingService):
         """
         Determina se deve escalar para humano baseado em regras de negócio
         """
-        message_text = message.content.text.lower()
-        
-        # Verifica palavras-chave de escalação
-        if any(keyword in message_text for keyword in self.escalation_keywords):
-            return True
-        
-        # Verifica palavras negativas
-        negative_count = sum(1 for keyword in self.negative_keywords if keyword in message_text)
-        if negative_count >= 2:
+        if self._escalate_from_hits(self.keyword_matcher.match(message.content.text)):
             return True
         
         # Verifica se muitas mensagens sem resolução
@@ -102,17 +148,25 @@ class DefaultMessageProcessingService(MessageProcessingService):
         
         return False
     
+    def _escalate_from_hits(self, hits: KeywordHits) -> bool:
+        """Regras de escalação que dependem apenas do texto da mensagem"""
+        # Verifica palavras-chave de escalação
+        if hits.has("escalation"):
+            return True
+        
+        # Verifica palavras negativas
+        return hits.count("negative") >= 2
+    
     async def analyze_sentiment(self, message_content: str) -> Dict[str, Any]:
         """
         Análise simples de sentimento baseada em palavras-chave
         """
-        text_lower = message_content.lower()
-        
-        positive_words = ["obrigado", "valeu", "thanks", "ótimo", "bom", "excelente", "perfeito"]
-        negative_words = ["ruim", "péssimo", "terrível", "horrível", "problema", "erro"]
-        
-        positive_count = sum(1 for word in positive_words if word in text_lower)
-        negative_count = sum(1 for word in negative_words if word in text_lower)
+        return self._sentiment_from_hits(self.keyword_matcher.match(message_content))
+    
+    def _sentiment_from_hits(self, hits: KeywordHits) -> Dict[str, Any]:
+        """Classifica o sentimento a partir das palavras-chave encontradas"""
+        positive_count = hits.count("sentiment:positive")
+        negative_count = hits.count("sentiment:negative")
         
         if positive_count > negative_count:
             sentiment = "positive"
@@ -127,47 +181,24 @@ class DefaultMessageProcessingService(MessageProcessingService):
         return {
             "sentiment": sentiment,
             "confidence": confidence,
-            "emotions": self._extract_emotions(text_lower)
-        }
-    
-    def _extract_emotions(self, text: str) -> List[str]:
-        """Extrai emoções do texto"""
-        emotions = []
-        
-        emotion_keywords = {
-            "happy": ["feliz", "alegre", "contente", "satisfeito"],
-            "angry": ["raiva", "irritado", "furioso", "bravo"],
-            "sad": ["triste", "deprimido", "chateado", "melancólico"],
-            "excited": ["animado", "empolgado", "entusiasmado"],
-            "frustrated": ["frustrado", "irritado", "incomodado"]
+            "emotions": [emotion for emotion in self.emotion_keywords if hits.has(f"emotion:{emotion}")]
         }
-        
-        for emotion, keywords in emotion_keywords.items():
-            if any(keyword in text for keyword in keywords):
-                emotions.append(emotion)
-        
-        return emotions
     
     async def extract_intent(self, message_content: str) -> Dict[str, Any]:
         """
         Extrai intenção da mensagem baseada em padrões
         """
-        text_lower = message_content.lower()
-        
-        intent_patterns = {
-            "greeting": ["oi", "olá", "bom dia", "boa tarde", "boa noite", "hello", "hi"],
-            "question": ["como", "quando", "onde", "por que", "qual", "quanto", "?"],
-            "complaint": ["reclamação", "problema", "erro", "falha", "defeito"],
-            "compliment": ["parabéns", "excelente", "ótimo", "perfeito", "muito bom"],
-            "goodbye": ["tchau", "até logo", "bye", "até mais", "falou"],
-            "help": ["ajuda", "help", "suporte", "dúvida", "não sei"]
-        }
-        
+        return self._intent_from_hits(
+            self.keyword_matcher.match(message_content), self._extract_entities(message_content)
+        )
+    
+    def _intent_from_hits(self, hits: KeywordHits, entities: List[str]) -> Dict[str, Any]:
+        """Classifica a intenção a partir das palavras-chave encontradas"""
         detected_intent = "other"
         confidence = 0.5
         
-        for intent, patterns in intent_patterns.items():
-            matches = sum(1 for pattern in patterns if pattern in text_lower)
+        for intent in self.intent_patterns:
+            matches = hits.count(f"intent:{intent}")
             if matches > 0:
                 detected_intent = intent
                 confidence = min(0.9, 0.5 + (matches * 0.1))
@@ -176,32 +207,29 @@ class DefaultMessageProcessingService(MessageProcessingService):
         return {
             "intent": detected_intent,
             "confidence": confidence,
-            "entities": self._extract_entities(text_lower)
+            "entities": entities
         }
     
+    async def analyze_batch(self, message_contents: List[str]) -> List[Dict[str, Any]]:
+        """
+        Sentimento e intenção de uma página de mensagens: uma busca de palavras-chave
+        por texto, compartilhada pelos classificadores, e a extração de entidades em
+        lote. Inclui as regras de escalação que dependem só do texto.
+        """
+        entities = extract_entities_batch(message_contents)
+        results = []
+        for text, text_entities in zip(message_contents, entities):
+            hits = self.keyword_matcher.match(text)
+            results.append({
+                "sentiment": self._sentiment_from_hits(hits),
+                "intent": self._intent_from_hits(hits, [str(entity) for entity in text_entities]),
+                "should_escalate": self._escalate_from_hits(hits)
+            })
+        return results
+    
     def _extract_entities(self, text: str) -> List[str]:
-        """Extrai entidades do texto"""
-        entities = []
-        
-        # Padrões simples para extrair entidades
-        import re
-        
-        # Emails
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        emails = re.findall(email_pattern, text)
-        entities.extend([f"email:{email}" for email in emails])
-        
-        # Números de telefone
-        phone_pattern = r'\b\d{2,3}\s?\d{4,5}\s?\d{4}\b'
-        phones = re.findall(phone_pattern, text)
-        entities.extend([f"phone:{phone}" for phone in phones])
-        
-        # Valores monetários
-        money_pattern = r'R\$\s?\d+[,.]?\d*'
-        money = re.findall(money_pattern, text)
-        entities.extend([f"money:{m}" for m in money])
-        
-        return entities
+        """Extrai entidades do texto (no formato "tipo:valor")"""
+        return [str(entity) for entity in extract_entities(text)]
     
     async def generate_ai_response(
         self, 
@@ -213,17 +241,13 @@ class DefaultMessageProcessingService(MessageProcessingService):
         Gera resposta usando IA (implementação simplificada)
         """
         # Implementação básica - em produção seria integrada com OpenAI
-        intent_result = await self.extract_intent(message.content.text)
+        return await self.generate_canned_response(message.content.text)
+    
+    async def generate_canned_response(self, message_text: str) -> str:
+        """
+        Resposta pronta baseada na intenção detectada por palavras-chave
+        """
+        intent_result = await self.extract_intent(message_text)
         intent = intent_result["intent"]
         
-        responses = {
-            "greeting": "Olá! 👋 Como posso ajudá-lo hoje?",
-            "question": "Ótima pergunta! Deixe-me ajudá-lo com isso.",
-            "complaint": "Entendo sua preocupação. Vou fazer o possível para resolver isso.",
-            "compliment": "Muito obrigado pelo feedback positivo! 😊",
-            "goodbye": "Até logo! Foi um prazer conversar com você. 👋",
-            "help": "Claro! Estou aqui para ajudar. Qual é sua dúvida?",
-            "other": "Entendi. Como posso ajudá-lo melhor?"
-        }
-        
-        return responses.get(intent, responses["other"])
+        return self.canned_responses.get(intent, self.canned_responses["other"])
@@ -2,14 +2,65 @@
 Value Object para conteúdo de mensagem
 """
 from dataclasses import dataclass
+from enum import Enum
+from typing import Optional
+
+
+class MessageType(Enum):
+    """Tipos de mensagem do WhatsApp (valor gravado em messages.message_type)"""
+    TEXT = "text"
+    IMAGE = "image"
+    AUDIO = "audio"
+    VIDEO = "video"
+    DOCUMENT = "document"
+    STICKER = "sticker"
+    LOCATION = "location"
+
+
+class MessageDirection(Enum):
+    """Direção da mensagem (valor gravado em messages.direction)"""
+    INCOMING = "incoming"
+    OUTGOING = "outgoing"
+
+
+MEDIA_TYPES = {MessageType.IMAGE, MessageType.AUDIO, MessageType.VIDEO, MessageType.DOCUMENT, MessageType.STICKER}
+
+# Texto exibido para mídia sem legenda
+MEDIA_LABELS = {
+    MessageType.IMAGE: "[Imagem]",
+    MessageType.AUDIO: "[Áudio]",
+    MessageType.VIDEO: "[Vídeo]",
+    MessageType.DOCUMENT: "[Documento]",
+    MessageType.STICKER: "[Figurinha]",
+    MessageType.LOCATION: "[Localização]",
+}
+
 
 @dataclass(frozen=True)
 class MessageContent:
     """Value Object para conteúdo de mensagem"""
-    value: str
-    
+    text: str
+    message_type: MessageType = MessageType.TEXT
+    direction: MessageDirection = MessageDirection.INCOMING
+    metadata: Optional[dict] = None
+
     def __post_init__(self):
-        if not self.value or not self.value.strip():
+        if self.message_type == MessageType.TEXT and (not self.text or not self.text.strip()):
             raise ValueError("Conteúdo da mensagem não pode ser vazio")
-        if len(self.value.strip()) > 4096:
-            raise ValueError("Conteúdo da mensagem deve ter no máximo 4096 caracteres")
\ No newline at end of file
+        if len((self.text or "").strip()) > 4096:
+            raise ValueError("Conteúdo da mensagem deve ter no máximo 4096 caracteres")
+
+    def is_text_message(self) -> bool:
+        """Verifica se é uma mensagem de texto"""
+        return self.message_type == MessageType.TEXT
+
+    def is_media_message(self) -> bool:
+        """Verifica se é uma mensagem de mídia"""
+        return self.message_type in MEDIA_TYPES
+
+    def get_display_text(self) -> str:
+        """Texto para exibição: o próprio texto ou, na mídia, o rótulo do tipo e a legenda"""
+        if self.is_text_message():
+            return self.text
+        label = MEDIA_LABELS[self.message_type]
+        return f"{label} {self.text}" if self.text else label
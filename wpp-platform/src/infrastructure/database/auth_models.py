@@ -2,8 +2,7 @@
 Modelos de autenticação
 """
 from sqlalchemy import Column, String, Boolean, DateTime, Text
-from sqlalchemy.sql import func
-from src.infrastructure.database.models import Base
+from src.infrastructure.database.models import Base, utcnow
 import uuid
 
 class AuthUser(Base):
@@ -16,8 +15,8 @@ class AuthUser(Base):
     name = Column(String(255), nullable=False)
     is_active = Column(Boolean, default=True)
     is_admin = Column(Boolean, default=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=utcnow())
+    updated_at = Column(DateTime(timezone=True), onupdate=utcnow())
     last_login = Column(DateTime(timezone=True))
     
     def to_dict(self):
@@ -1,12 +1,13 @@
 """
 Configuração do banco de dados
 """
-from sqlalchemy import create_engine, MetaData
+from sqlalchemy import MetaData
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from config import settings
+from .engine_config import create_database_engine
 
-engine = create_engine(settings.DATABASE_URL)
+engine = create_database_engine(settings.DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -0,0 +1,169 @@
+"""
+Configuração dos engines: pool de conexões, ajustes do SQLite e métricas do pool
+"""
+import threading
+import time
+from typing import Any, Dict
+from weakref import WeakKeyDictionary
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from config import settings
+
+
+class PoolMetrics:
+    """Contadores de checkouts e do tempo de espera por conexão"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connections_opened = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_checkout(self, wait: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+
+    def record_connect(self) -> None:
+        with self._lock:
+            self.connections_opened += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "connections_opened": self.connections_opened,
+                "wait_avg_ms": round(self.wait_total / attempts * 1000, 3) if attempts else 0.0,
+                "wait_max_ms": round(self.wait_max * 1000, 3)
+            }
+
+
+class _TimedPoolMixin:
+    """Mede quanto cada checkout esperou por uma conexão livre"""
+
+    metrics: PoolMetrics
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            self.metrics.record_checkout(time.perf_counter() - start, timed_out=True)
+            raise
+        self.metrics.record_checkout(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        # dispose() recria o pool; as métricas continuam as mesmas
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+_engine_metrics: "WeakKeyDictionary[Engine, PoolMetrics]" = WeakKeyDictionary()
+
+
+def _is_sqlite_memory(url) -> bool:
+    return url.database in (None, "", ":memory:") or "mode=memory" in str(url)
+
+
+def engine_options(database_url: str, use_async: bool = False) -> Dict[str, Any]:
+    """Argumentos do create_engine para a URL, a partir das configurações"""
+    url = make_url(database_url)
+    options: Dict[str, Any] = {}
+
+    if url.get_backend_name() == "sqlite":
+        options["connect_args"] = {
+            "check_same_thread": False,
+            "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000
+        }
+        if _is_sqlite_memory(url):
+            # Banco em memória existe só na própria conexão: mantém o pool padrão
+            return options
+    else:
+        options["pool_recycle"] = settings.DATABASE_POOL_RECYCLE
+        options["pool_pre_ping"] = settings.DATABASE_POOL_PRE_PING
+
+    options.update(
+        poolclass=TimedAsyncQueuePool if use_async else TimedQueuePool,
+        pool_size=settings.DATABASE_POOL_SIZE,
+        max_overflow=settings.DATABASE_MAX_OVERFLOW,
+        pool_timeout=settings.DATABASE_POOL_TIMEOUT
+    )
+    return options
+
+
+def _configure(engine: Engine) -> None:
+    """Métricas do pool e PRAGMAs do SQLite em cada conexão nova"""
+    metrics = PoolMetrics()
+    if isinstance(engine.pool, _TimedPoolMixin):
+        engine.pool.metrics = metrics
+    _engine_metrics[engine] = metrics
+
+    is_sqlite = engine.dialect.name == "sqlite"
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        metrics.record_connect()
+        if not is_sqlite:
+            return
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+            cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+            cursor.execute(f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}")
+            cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}")
+        finally:
+            cursor.close()
+
+
+def create_database_engine(database_url: str, **kwargs) -> Engine:
+    """Engine síncrono configurado"""
+    engine = create_engine(database_url, **{**engine_options(database_url), **kwargs})
+    _configure(engine)
+    return engine
+
+
+def create_async_database_engine(database_url: str, **kwargs) -> AsyncEngine:
+    """Engine assíncrono configurado"""
+    engine = create_async_engine(database_url, **{**engine_options(database_url, use_async=True), **kwargs})
+    _configure(engine.sync_engine)
+    return engine
+
+
+def pool_stats(engine) -> Dict[str, Any]:
+    """Estado atual do pool e métricas acumuladas do engine"""
+    sync_engine = engine.sync_engine if isinstance(engine, AsyncEngine) else engine
+    pool = sync_engine.pool
+    stats: Dict[str, Any] = {"pool": pool.__class__.__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+            idle=pool.checkedin()
+        )
+    metrics = _engine_metrics.get(sync_engine)
+    if metrics is not None:
+        stats.update(metrics.stats())
+    return stats
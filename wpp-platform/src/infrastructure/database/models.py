@@ -1,97 +1,223 @@
 """
 Modelos SQLAlchemy para a camada de infraestrutura
 """
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, JSON, UUID
+from sqlalchemy import Column, Integer, Float, String, Date, DateTime, Text, Boolean, ForeignKey, Index, JSON, UUID, Uuid
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from sqlalchemy.dialects.postgresql import UUID as PostgresUUID
+from sqlalchemy.sql.expression import FunctionElement
 import uuid
 
 Base = declarative_base()
 
 
+class utcnow(FunctionElement):
+    """
+    Agora (UTC) gerado pelo banco, para server_default e onupdate.
+
+    No SQLite datas são texto e comparadas como texto: o CURRENT_TIMESTAMP
+    ('AAAA-MM-DD HH:MM:SS') ordena antes de '... .000000', o formato em que o
+    SQLAlchemy grava os valores vindos do Python, e o cursor de paginação
+    pularia linhas. Lá o valor sai no mesmo formato, com microssegundos.
+    """
+    type = DateTime(timezone=True)
+    inherit_cache = True
+
+
+@compiles(utcnow)
+def _utcnow(element, compiler, **kw):
+    return compiler.process(func.now(), **kw)
+
+
+@compiles(utcnow, "sqlite")
+def _sqlite_utcnow(element, compiler, **kw):
+    return "(strftime('%Y-%m-%d %H:%M:%f', 'now') || '000')"
+
+
 class UserModel(Base):
     """Modelo SQLAlchemy para usuários"""
     __tablename__ = "users"
+    # Valores gerados pelo banco voltam no INSERT/UPDATE (RETURNING), sem refresh
+    __mapper_args__ = {"eager_defaults": True}
     
-    id = Column(PostgresUUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4, index=True)
     phone_number = Column(String(20), unique=True, index=True, nullable=False)
     name = Column(String(100), nullable=False)
     email = Column(String(100))
     is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=utcnow())
+    updated_at = Column(DateTime(timezone=True), onupdate=utcnow())
+    # Contadores mantidos pelos repositórios (counters.py)
+    conversation_count = Column(Integer, nullable=False, default=0, server_default="0")
+    total_messages = Column(Integer, nullable=False, default=0, server_default="0")
     
     # Relacionamentos
     conversations = relationship("ConversationModel", back_populates="user")
     messages = relationship("MessageModel", back_populates="user")
+    
+    __table_args__ = (
+        # find_page: paginação por cursor (created_at, id)
+        Index("ix_users_created_at_id", "created_at", "id"),
+    )
 
 
 class ConversationModel(Base):
     """Modelo SQLAlchemy para conversas"""
     __tablename__ = "conversations"
+    # Valores gerados pelo banco voltam no INSERT/UPDATE (RETURNING), sem refresh
+    __mapper_args__ = {"eager_defaults": True}
     
-    id = Column(PostgresUUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
-    user_id = Column(PostgresUUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4, index=True)
+    user_id = Column(Uuid, ForeignKey("users.id"), nullable=False)
     whatsapp_conversation_id = Column(String(100), unique=True, index=True)
     status = Column(String(20), default="active")
     status_reason = Column(String(200))
-    agent_id = Column(PostgresUUID(as_uuid=True))
+    agent_id = Column(Uuid)
     context = Column(JSON)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=utcnow())
+    updated_at = Column(DateTime(timezone=True), onupdate=utcnow())
+    # Contadores mantidos pelos repositórios (counters.py)
+    message_count = Column(Integer, nullable=False, default=0, server_default="0")
+    unread_count = Column(Integer, nullable=False, default=0, server_default="0")
+    last_message_at = Column(DateTime(timezone=True))
+    # Primeira mensagem recebida ainda sem resposta (response_times.py)
+    awaiting_reply_since = Column(DateTime(timezone=True))
     
     # Relacionamentos
     user = relationship("UserModel", back_populates="conversations")
     messages = relationship("MessageModel", back_populates="conversation")
+    
+    __table_args__ = (
+        # find_active_by_user_id / find_by_user_id / count_by_user_id
+        Index("ix_conversations_user_id_status", "user_id", "status"),
+        # find_by_agent_id e filas de atendimento por status
+        Index("ix_conversations_agent_id_status", "agent_id", "status"),
+        # find_page: paginação por cursor (created_at, id)
+        Index("ix_conversations_created_at_id", "created_at", "id"),
+        # Listagem filtrada só por status
+        Index("ix_conversations_status_created_at_id", "status", "created_at", "id"),
+    )
 
 
 class MessageModel(Base):
     """Modelo SQLAlchemy para mensagens"""
     __tablename__ = "messages"
+    # Valores gerados pelo banco voltam no INSERT/UPDATE (RETURNING), sem refresh
+    __mapper_args__ = {"eager_defaults": True}
     
-    id = Column(PostgresUUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
-    conversation_id = Column(PostgresUUID(as_uuid=True), ForeignKey("conversations.id"), nullable=False)
-    user_id = Column(PostgresUUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4, index=True)
+    conversation_id = Column(Uuid, ForeignKey("conversations.id"), nullable=False)
+    user_id = Column(Uuid, ForeignKey("users.id"), nullable=False)
     whatsapp_message_id = Column(String(100), unique=True, index=True)
     content = Column(Text, nullable=False)
     message_type = Column(String(20), default="text")
     direction = Column(String(10), nullable=False)
     is_processed = Column(Boolean, default=False)
     message_metadata = Column(JSON)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=utcnow())
     
     # Relacionamentos
     conversation = relationship("ConversationModel", back_populates="messages")
     user = relationship("UserModel", back_populates="messages")
+    
+    __table_args__ = (
+        # find_by_conversation_id / count_by_conversation_id: filtro por conversa em ordem de envio
+        Index("ix_messages_conversation_id_created_at", "conversation_id", "created_at"),
+        # find_by_user_id e reconciliação de users.total_messages
+        Index("ix_messages_user_id_created_at", "user_id", "created_at"),
+        # find_page / find_all: paginação por cursor (created_at, id)
+        Index("ix_messages_created_at_id", "created_at", "id"),
+        # Listagem filtrada por direção (sem conversa)
+        Index("ix_messages_direction_created_at_id", "direction", "created_at", "id"),
+        # find_unprocessed_messages / claim_unprocessed_batch: só as pendentes, na ordem de chegada
+        Index(
+            "ix_messages_unprocessed_created_at",
+            "created_at",
+            postgresql_where=is_processed == False,
+            sqlite_where=is_processed == False
+        ),
+    )
 
 
 class BotResponseModel(Base):
     """Modelo SQLAlchemy para respostas automáticas"""
     __tablename__ = "bot_responses"
     
-    id = Column(PostgresUUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4, index=True)
     trigger_keywords = Column(JSON)
     response_text = Column(Text, nullable=False)
     response_type = Column(String(20), default="text")
     is_active = Column(Boolean, default=True)
     priority = Column(Integer, default=0)
     response_metadata = Column(JSON)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=utcnow())
+    updated_at = Column(DateTime(timezone=True), onupdate=utcnow())
 
 
 class AgentModel(Base):
     """Modelo SQLAlchemy para agentes"""
     __tablename__ = "agents"
     
-    id = Column(PostgresUUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4, index=True)
     name = Column(String(100), nullable=False)
     email = Column(String(100), unique=True, index=True)
     phone_number = Column(String(20))
     is_active = Column(Boolean, default=True)
     max_conversations = Column(Integer, default=10)
     current_conversations = Column(Integer, default=0)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=utcnow())
+    updated_at = Column(DateTime(timezone=True), onupdate=utcnow())
+
+
+class AnalyticsRollupModel(Base):
+    """Contagens pré-agregadas por bucket de tempo (mantidas por rollups.py)"""
+    __tablename__ = "analytics_rollups"
+    
+    # minute, hour ou day
+    granularity = Column(String(10), primary_key=True)
+    # messages_incoming, new_users, conversations_active, escalations...
+    metric = Column(String(40), primary_key=True)
+    # Início do bucket (UTC)
+    bucket = Column(DateTime(timezone=True), primary_key=True)
+    value = Column(Integer, nullable=False, default=0, server_default="0")
+
+
+class AnalyticsActiveUserModel(Base):
+    """Usuários que enviaram mensagem em cada dia (base dos ativos/recorrentes, que não somam entre buckets)"""
+    __tablename__ = "analytics_active_users"
+    
+    day = Column(Date, primary_key=True)
+    user_id = Column(Uuid, primary_key=True)
+    # Usuário criado antes do dia
+    is_returning = Column(Boolean, nullable=False, default=False)
+
+
+class AnalyticsRollupStateModel(Base):
+    """High-water mark do job de rollup: tudo antes dele já está nos buckets"""
+    __tablename__ = "analytics_rollup_state"
+    
+    name = Column(String(40), primary_key=True)
+    high_water_mark = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=utcnow(), onupdate=utcnow())
+
+
+class ResponseTimeBinModel(Base):
+    """Sketch (DDSketch) dos tempos de resposta de cada hora: contagem por bin"""
+    __tablename__ = "response_time_bins"
+    
+    # Hora da resposta (UTC)
+    bucket = Column(DateTime(timezone=True), primary_key=True)
+    bin = Column(Integer, primary_key=True)
+    count = Column(Integer, nullable=False, default=0, server_default="0")
+
+
+class ResponseTimeHourModel(Base):
+    """Totais exatos dos tempos de resposta de cada hora (média, mínimo e máximo)"""
+    __tablename__ = "response_time_hours"
+    
+    bucket = Column(DateTime(timezone=True), primary_key=True)
+    count = Column(Integer, nullable=False, default=0, server_default="0")
+    total_seconds = Column(Float, nullable=False, default=0, server_default="0")
+    min_seconds = Column(Float, nullable=False)
+    max_seconds = Column(Float, nullable=False)
@@ -0,0 +1,41 @@
+"""
+Recalcula os tempos de resposta a partir das mensagens gravadas
+
+Refaz os sketches por hora (response_time_bins/response_time_hours) e a
+espera pendente de cada conversa. Necessário uma vez depois da migração 0006
+em bancos com histórico, ou após importações que não passaram pelo
+repositório; rode sem gravações de mensagens em paralelo.
+
+Uso:
+    python -m src.infrastructure.database.rebuild_response_times
+"""
+import asyncio
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
+
+from src.infrastructure.database.async_database import AsyncSessionLocal, async_engine
+from src.infrastructure.repositories.response_times import rebuild_response_times
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def run() -> dict:
+    """Recalcula os tempos de resposta e registra quantas respostas e esperas foram encontradas"""
+    try:
+        async with AsyncSessionLocal() as session:
+            result = await rebuild_response_times(session)
+    finally:
+        # Sem o dispose as conexões do aiosqlite seguram o processo aberto
+        await async_engine.dispose()
+    logger.info(
+        f"Tempos de resposta recalculados: {result['replies']} respostas, "
+        f"{result['awaiting']} conversas aguardando resposta"
+    )
+    return result
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
@@ -0,0 +1,40 @@
+"""
+Reconciliação dos contadores de conversas e usuários
+
+Recalcula message_count, unread_count, last_message_at, conversation_count e
+total_messages a partir das mensagens e conversas gravadas. Pode rodar a
+qualquer momento (cron, após importações ou SQL manual); só reescreve as
+linhas em que o contador divergiu.
+
+Uso:
+    python -m src.infrastructure.database.reconcile_counters
+"""
+import asyncio
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
+
+from src.infrastructure.database.async_database import AsyncSessionLocal, async_engine
+from src.infrastructure.repositories.counters import reconcile_counters
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def run() -> dict:
+    """Reconcilia os contadores e registra quantas linhas foram corrigidas"""
+    try:
+        async with AsyncSessionLocal() as session:
+            fixed = await reconcile_counters(session)
+    finally:
+        # Sem o dispose as conexões do aiosqlite seguram o processo aberto
+        await async_engine.dispose()
+    logger.info(
+        f"Contadores reconciliados: {fixed['conversations']} conversas e {fixed['users']} usuários corrigidos"
+    )
+    return fixed
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
@@ -0,0 +1,62 @@
+"""
+Job de catch-up das tabelas de rollup do analytics
+
+Processa as mensagens, usuários e conversas gravados desde o high-water mark e
+atualiza os buckets por minuto, hora e dia (ver repositories/rollups.py). O
+servidor de produção roda o job a cada ANALYTICS_ROLLUP_INTERVAL_SECONDS; pela
+linha de comando serve para a primeira carga ou para refazer um período.
+
+Uso:
+    python -m src.infrastructure.database.refresh_rollups
+    python -m src.infrastructure.database.refresh_rollups --since 2024-01-01
+"""
+import argparse
+import asyncio
+import sys
+import os
+from datetime import datetime
+from typing import Optional
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
+
+from src.infrastructure.database.async_database import AsyncSessionLocal, async_engine
+from src.infrastructure.repositories.rollups import refresh_rollups
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def refresh(since: Optional[datetime] = None) -> dict:
+    """Uma rodada do catch-up em uma sessão própria"""
+    async with AsyncSessionLocal() as session:
+        result = await refresh_rollups(session, since=since)
+    if result["windows"]:
+        logger.info(f"Rollups atualizados até {result['high_water_mark']} ({result['windows']} janelas)")
+    return result
+
+
+async def refresh_periodically(interval: float) -> None:
+    """Roda o catch-up a cada `interval` segundos até ser cancelado; falhas ficam para a próxima rodada"""
+    while True:
+        try:
+            await refresh()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Erro ao atualizar rollups: {e}")
+        await asyncio.sleep(interval)
+
+
+async def run(since: Optional[datetime] = None) -> dict:
+    """Rodada avulsa pela linha de comando"""
+    try:
+        return await refresh(since)
+    finally:
+        # Sem o dispose as conexões do aiosqlite seguram o processo aberto
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Atualiza as tabelas de rollup do analytics")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="refaz os buckets a partir desta data (UTC)")
+    asyncio.run(run(parser.parse_args().since))
@@ -1,25 +1,164 @@
 """
 Implementação do serviço de IA
 """
+import asyncio
+import hashlib
+import httpx
 import openai
-from typing import Dict, List, Optional, Any
+from collections import OrderedDict
+from pydantic import ValidationError
+from typing import Dict, List, Optional, Any, Tuple
 from config import settings
 import logging
 import json
+import time
 
 from ...application.interfaces.ai_service import AIService
+from ...domain.services.message_processing_service import DefaultMessageProcessingService
+from .message_analysis import ANALYSIS_PROMPT, MessageAnalysis
+from .response_cache import ResponseCache
 
 logger = logging.getLogger(__name__)
 
+ESCALATION_KEYWORDS = [
+    "falar com humano", "atendente", "supervisor", "reclamação",
+    "problema sério", "não resolve", "cancelar", "devolução"
+]
+
+
+class AIServiceSaturatedError(Exception):
+    """Todas as vagas de chamadas simultâneas à IA estão ocupadas"""
+
 
 class AIServiceImpl(AIService):
     """
     Implementação do serviço de IA usando OpenAI
+    
+    Sentimento, intenção e escalação vêm de uma única chamada estruturada
+    (analyze_message), guardada em cache por mensagem; analyze_sentiment,
+    extract_intent e should_escalate_to_human são visões desse resultado.
+    
+    Usa o cliente assíncrono com pool de conexões compartilhado. No máximo
+    OPENAI_MAX_CONCURRENCY chamadas ficam em andamento; quando não há vaga em
+    OPENAI_QUEUE_TIMEOUT segundos (ou a chamada estoura o timeout), a resposta
+    vem das regras do DefaultMessageProcessingService.
     """
     
-    def __init__(self):
-        openai.api_key = settings.OPENAI_API_KEY
-        self.client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+    def __init__(
+        self,
+        client: Optional[openai.AsyncOpenAI] = None,
+        fallback: Optional[DefaultMessageProcessingService] = None,
+        response_cache: Optional[ResponseCache] = None
+    ):
+        self.model = settings.OPENAI_MODEL
+        self.timeout = settings.OPENAI_TIMEOUT
+        self.fallback = fallback or DefaultMessageProcessingService()
+        self._client = client
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.in_flight = 0
+        self.saturated = 0
+        self.timeouts = 0
+        self._analysis_cache: "OrderedDict[str, asyncio.Task]" = OrderedDict()
+        self.analysis_hits = 0
+        self.analysis_misses = 0
+        self.response_cache = response_cache or ResponseCache(
+            max_size=settings.RESPONSE_CACHE_SIZE,
+            ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+            similarity_threshold=settings.RESPONSE_CACHE_SIMILARITY or None
+        )
+    
+    async def start(self) -> None:
+        """Cria o cliente compartilhado (chamado no startup da aplicação)"""
+        if self._client is None:
+            self._client = self._build_client()
+    
+    async def aclose(self) -> None:
+        """Fecha o cliente e suas conexões (chamado no shutdown da aplicação)"""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+    
+    @property
+    def client(self) -> openai.AsyncOpenAI:
+        """Cliente assíncrono compartilhado entre as chamadas"""
+        if self._client is None:
+            self._client = self._build_client()
+        return self._client
+    
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        """Limita as chamadas simultâneas à IA"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(settings.OPENAI_MAX_CONCURRENCY)
+        return self._semaphore
+    
+    def _build_client(self) -> openai.AsyncOpenAI:
+        """Constrói o cliente com pool de conexões do tamanho do limite de concorrência"""
+        return openai.AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            base_url=settings.OPENAI_BASE_URL or None,
+            max_retries=settings.OPENAI_MAX_RETRIES,
+            timeout=self.timeout,
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=settings.OPENAI_MAX_CONCURRENCY,
+                    max_keepalive_connections=settings.OPENAI_MAX_CONCURRENCY
+                ),
+                timeout=self.timeout
+            )
+        )
+    
+    def stats(self) -> Dict[str, Any]:
+        """Contadores de concorrência, da análise combinada e do cache de respostas"""
+        return {
+            "in_flight": self.in_flight,
+            "saturated": self.saturated,
+            "timeouts": self.timeouts,
+            "analysis_cache_size": len(self._analysis_cache),
+            "analysis_hits": self.analysis_hits,
+            "analysis_misses": self.analysis_misses,
+            "response_cache": self.response_cache.stats()
+        }
+    
+    async def _complete(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        temperature: float,
+        timeout: Optional[float] = None,
+        **options: Any
+    ) -> str:
+        """Executa uma completion respeitando o limite de concorrência e o timeout"""
+        queue_timeout = settings.OPENAI_QUEUE_TIMEOUT
+        if self.semaphore.locked():
+            if queue_timeout <= 0:
+                self.saturated += 1
+                raise AIServiceSaturatedError()
+            try:
+                await asyncio.wait_for(self.semaphore.acquire(), queue_timeout)
+            except asyncio.TimeoutError:
+                self.saturated += 1
+                raise AIServiceSaturatedError()
+        else:
+            await self.semaphore.acquire()
+        
+        self.in_flight += 1
+        try:
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                timeout=timeout or self.timeout,
+                **options
+            )
+            return response.choices[0].message.content
+        except openai.APITimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self.semaphore.release()
     
     async def generate_response(
         self, 
@@ -41,18 +180,57 @@ class AIServiceImpl(AIService):
         # Adicionar mensagem atual
         messages.append({"role": "user", "content": user_message})
         
+        # Perguntas frequentes são respondidas pelo cache, também no meio de uma
+        # conversa: a chave inclui o digest das últimas mensagens, então a mesma
+        # pergunta só reaproveita a resposta depois do mesmo trecho de conversa
+        prompt_hash = self.prompt_hash(system_prompt)
+        history = self._history_key(conversation_history)
+        cacheable = history is not None
+        if cacheable:
+            cached = self.response_cache.get(user_message, prompt_hash, history)
+            if cached is not None:
+                return cached
+        
         try:
-            response = await self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=messages,
-                max_tokens=500,
-                temperature=0.7
-            )
-            return response.choices[0].message.content.strip()
+            start = time.perf_counter()
+            response = await self._complete(messages, max_tokens=500, temperature=0.7)
+            answer = response.strip()
+            if cacheable:
+                self.response_cache.put(user_message, prompt_hash, answer, time.perf_counter() - start, history)
+            return answer
+        except (AIServiceSaturatedError, openai.APITimeoutError):
+            logger.warning("⚠️ IA indisponível no momento; usando resposta automática")
+            return await self.fallback.generate_canned_response(user_message)
         except Exception as e:
             logger.error(f"Erro ao gerar resposta com IA: {e}")
             return "Desculpe, ocorreu um erro ao processar sua mensagem. Tente novamente."
     
+    @staticmethod
+    def prompt_hash(system_prompt: str) -> str:
+        """Hash do prompt do sistema usado na chave do cache de respostas"""
+        return hashlib.sha1(system_prompt.encode("utf-8")).hexdigest()
+    
+    def _history_key(self, conversation_history: List[Dict]) -> Optional[str]:
+        """
+        Parte da chave do cache que vem do histórico: digest das últimas
+        RESPONSE_CACHE_HISTORY_MESSAGES mensagens ("" sem histórico), ou None
+        quando o histórico existe e o cache em conversas está desligado (0).
+        """
+        if not conversation_history:
+            return ""
+        window = settings.RESPONSE_CACHE_HISTORY_MESSAGES
+        if window <= 0:
+            return None
+        return self.response_cache.history_digest(
+            (msg["direction"], msg["content"]) for msg in conversation_history[-window:]
+        )
+    
+    def invalidate_responses(self, context: Optional[Dict] = None, all_prompts: bool = False) -> int:
+        """Descarta respostas em cache do prompt (com o contexto dado) ou de todos os prompts"""
+        if all_prompts:
+            return self.response_cache.invalidate()
+        return self.response_cache.invalidate(self.prompt_hash(self._build_system_prompt(context)))
+    
     def _build_system_prompt(self, context: Optional[Dict] = None) -> str:
         """Constrói o prompt do sistema para a IA"""
         base_prompt = """
@@ -83,53 +261,20 @@ class AIServiceImpl(AIService):
         
         return base_prompt
     
+    async def analyze_message(self, text: str) -> Dict[str, Any]:
+        """Sentimento, emoções, intenção, entidades e escalação em uma única chamada"""
+        analysis = await self._analysis(text)
+        return analysis.model_dump()
+    
     async def analyze_sentiment(self, text: str) -> Dict[str, Any]:
         """Analisa o sentimento do texto"""
-        try:
-            response = await self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": "Analise o sentimento do texto e retorne apenas um JSON com: sentiment (positive/negative/neutral), confidence (0-1), emotions (lista de emoções detectadas)"
-                    },
-                    {"role": "user", "content": text}
-                ],
-                max_tokens=100,
-                temperature=0.3
-            )
-            
-            result = json.loads(response.choices[0].message.content)
-            return result
-        except Exception as e:
-            logger.error(f"Erro ao analisar sentimento: {e}")
-            return {"sentiment": "neutral", "confidence": 0.5, "emotions": []}
+        analysis = await self._analysis(text)
+        return analysis.sentiment_view()
     
     async def extract_intent(self, text: str) -> Dict[str, Any]:
         """Extrai a intenção do usuário"""
-        try:
-            response = await self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": """
-                        Analise o texto e identifique a intenção do usuário. 
-                        Retorne apenas um JSON com: intent (greeting/question/complaint/compliment/goodbye/other), 
-                        entities (lista de entidades mencionadas), confidence (0-1)
-                        """
-                    },
-                    {"role": "user", "content": text}
-                ],
-                max_tokens=150,
-                temperature=0.3
-            )
-            
-            result = json.loads(response.choices[0].message.content)
-            return result
-        except Exception as e:
-            logger.error(f"Erro ao extrair intenção: {e}")
-            return {"intent": "other", "entities": [], "confidence": 0.5}
+        analysis = await self._analysis(text)
+        return analysis.intent_view()
     
     async def should_escalate_to_human(
         self, 
@@ -138,21 +283,18 @@ class AIServiceImpl(AIService):
     ) -> bool:
         """Determina se a conversa deve ser escalada para um humano"""
         try:
-            # Analisar sentimento
-            sentiment = await self.analyze_sentiment(current_message)
+            analysis = await self._analysis(current_message)
+            
+            if analysis.should_escalate:
+                return True
             
             # Se sentimento muito negativo, escalar
-            if sentiment["sentiment"] == "negative" and sentiment["confidence"] > 0.8:
+            if analysis.sentiment == "negative" and analysis.sentiment_confidence > 0.8:
                 return True
             
             # Verificar palavras-chave que indicam necessidade de humano
-            escalation_keywords = [
-                "falar com humano", "atendente", "supervisor", "reclamação",
-                "problema sério", "não resolve", "cancelar", "devolução"
-            ]
-            
             message_lower = current_message.lower()
-            if any(keyword in message_lower for keyword in escalation_keywords):
+            if any(keyword in message_lower for keyword in ESCALATION_KEYWORDS):
                 return True
             
             # Se muitas mensagens sem resolução, escalar
@@ -163,3 +305,80 @@ class AIServiceImpl(AIService):
         except Exception as e:
             logger.error(f"Erro ao determinar escalação: {e}")
             return False
+    
+    async def _analysis(self, text: str) -> MessageAnalysis:
+        """
+        Análise combinada com cache LRU por mensagem.
+        
+        Chamadas simultâneas para o mesmo texto compartilham a mesma requisição,
+        que roda em uma task própria: o cancelamento de um chamador (timeout de
+        uma etapa do plano, por exemplo) não cancela a requisição dos demais.
+        Resultados de fallback (IA saturada ou com erro) e falhas não ficam em cache.
+        """
+        key = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        cached = self._analysis_cache.get(key)
+        if cached is not None:
+            self._analysis_cache.move_to_end(key)
+            self.analysis_hits += 1
+            return await asyncio.shield(cached)
+        
+        self.analysis_misses += 1
+        task = asyncio.create_task(self._request_cached_analysis(key, text))
+        self._analysis_cache[key] = task
+        while len(self._analysis_cache) > settings.NLU_CACHE_SIZE:
+            self._analysis_cache.popitem(last=False)
+        return await asyncio.shield(task)
+    
+    async def _request_cached_analysis(self, key: str, text: str) -> MessageAnalysis:
+        """Requisição compartilhada; sai do cache se falhar ou não puder ser guardada"""
+        try:
+            analysis, cacheable = await self._request_analysis(text)
+        except BaseException:
+            self._forget_analysis(key)
+            raise
+        if not cacheable:
+            self._forget_analysis(key)
+        return analysis
+    
+    def _forget_analysis(self, key: str) -> None:
+        # Só remove a entrada da própria task (a chave pode já ter sido reocupada)
+        if self._analysis_cache.get(key) is asyncio.current_task():
+            self._analysis_cache.pop(key)
+    
+    async def _request_analysis(self, text: str) -> Tuple[MessageAnalysis, bool]:
+        """Faz a chamada estruturada; devolve (análise, pode ir para o cache)"""
+        try:
+            response = await self._complete(
+                messages=[
+                    {"role": "system", "content": ANALYSIS_PROMPT},
+                    {"role": "user", "content": text}
+                ],
+                max_tokens=250,
+                temperature=0.0,
+                response_format={"type": "json_object"}
+            )
+            return MessageAnalysis.parse_completion(response), True
+        except (AIServiceSaturatedError, openai.APITimeoutError):
+            pass
+        except ValidationError as e:
+            logger.error(f"Resposta de análise fora do schema: {e}")
+        except Exception as e:
+            logger.error(f"Erro ao analisar mensagem: {e}")
+        
+        return await self._fallback_analysis(text), False
+    
+    async def _fallback_analysis(self, text: str) -> MessageAnalysis:
+        """Análise por palavras-chave do DefaultMessageProcessingService"""
+        sentiment = await self.fallback.analyze_sentiment(text)
+        intent = await self.fallback.extract_intent(text)
+        text_lower = text.lower()
+        
+        return MessageAnalysis(
+            sentiment=sentiment["sentiment"],
+            sentiment_confidence=sentiment["confidence"],
+            emotions=sentiment["emotions"],
+            intent=intent["intent"],
+            intent_confidence=intent["confidence"],
+            entities=intent["entities"],
+            should_escalate=any(keyword in text_lower for keyword in self.fallback.escalation_keywords)
+        )
@@ -0,0 +1,69 @@
+"""
+Schema da análise combinada de mensagem (sentimento + intenção + escalação)
+"""
+import re
+from typing import List, Literal, Optional
+from pydantic import BaseModel, Field, field_validator
+
+ANALYSIS_PROMPT = """
+Analise a mensagem do cliente e retorne apenas um JSON com os campos:
+- sentiment: positive, negative ou neutral
+- sentiment_confidence: número entre 0 e 1
+- emotions: lista de emoções detectadas (happy, angry, sad, excited, frustrated)
+- intent: greeting, question, complaint, compliment, goodbye, help ou other
+- intent_confidence: número entre 0 e 1
+- entities: lista de entidades mencionadas no formato "tipo:valor"
+- should_escalate: true se o cliente precisa de um atendente humano
+- escalation_reason: motivo curto da escalação ou null
+"""
+
+_CODE_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+class MessageAnalysis(BaseModel):
+    """Resultado validado de uma única chamada de NLU"""
+    sentiment: Literal["positive", "negative", "neutral"] = "neutral"
+    sentiment_confidence: float = Field(0.5, ge=0, le=1)
+    emotions: List[str] = Field(default_factory=list)
+    intent: str = "other"
+    intent_confidence: float = Field(0.5, ge=0, le=1)
+    entities: List[str] = Field(default_factory=list)
+    should_escalate: bool = False
+    escalation_reason: Optional[str] = None
+
+    @field_validator("sentiment", "intent", mode="before")
+    @classmethod
+    def _normalize_label(cls, value):
+        return value.strip().lower() if isinstance(value, str) else value
+
+    @field_validator("entities", mode="before")
+    @classmethod
+    def _stringify_entities(cls, value):
+        # Alguns modelos devolvem objetos {"type": ..., "value": ...}
+        if isinstance(value, list):
+            return [
+                f"{item.get('type')}:{item.get('value')}" if isinstance(item, dict) else str(item)
+                for item in value
+            ]
+        return value
+
+    @classmethod
+    def parse_completion(cls, content: str) -> "MessageAnalysis":
+        """Valida o JSON devolvido pelo modelo (aceita bloco ```json)"""
+        return cls.model_validate_json(_CODE_FENCE.sub("", content.strip()))
+
+    def sentiment_view(self) -> dict:
+        """Formato de analyze_sentiment"""
+        return {
+            "sentiment": self.sentiment,
+            "confidence": self.sentiment_confidence,
+            "emotions": self.emotions
+        }
+
+    def intent_view(self) -> dict:
+        """Formato de extract_intent"""
+        return {
+            "intent": self.intent,
+            "entities": self.entities,
+            "confidence": self.intent_confidence
+        }
@@ -0,0 +1,184 @@
+"""
+Cache de respostas geradas pela IA
+"""
+import hashlib
+import re
+import time
+import unicodedata
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, Iterable, Optional, Set, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# (hash do prompt, digest do histórico recente, texto normalizado)
+CacheKey = Tuple[str, str, str]
+
+_NON_WORD = re.compile(r"[^\w\s]")
+_SPACES = re.compile(r"\s+")
+_NUMBERS = re.compile(r"\d+")
+
+
+@dataclass
+class _CachedResponse:
+    response: str
+    latency: float
+    created_at: float
+    ngrams: FrozenSet[str] = field(default_factory=frozenset)
+    numbers: Tuple[str, ...] = ()
+
+
+class ResponseCache:
+    """
+    Cache LRU/TTL de respostas, por texto normalizado + hash do prompt do sistema
+    + digest das últimas mensagens da conversa (vazio fora de uma conversa).
+
+    A camada exata compara o texto normalizado (minúsculo, sem acentos e sem
+    pontuação). A camada de similaridade, opcional, compara trigramas de
+    caracteres (Jaccard) com as entradas do mesmo prompt e histórico e aceita a melhor a
+    partir de `similarity_threshold`; um índice invertido de trigramas limita
+    a comparação às entradas que compartilham algum trigrama. Textos com números
+    diferentes (pedidos, valores) nunca são considerados similares.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 5_000,
+        ttl_seconds: float = 3_600,
+        similarity_threshold: Optional[float] = None,
+        ngram_size: int = 3
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.ngram_size = ngram_size
+        self._entries: "OrderedDict[CacheKey, _CachedResponse]" = OrderedDict()
+        self._index: Dict[Tuple[str, str, str], Set[CacheKey]] = defaultdict(set)
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.saved_latency = 0.0
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Minúsculo, sem acentos, sem pontuação e com espaços únicos"""
+        text = unicodedata.normalize("NFKD", text.lower())
+        text = "".join(char for char in text if not unicodedata.combining(char))
+        return _SPACES.sub(" ", _NON_WORD.sub(" ", text)).strip()
+
+    @classmethod
+    def history_digest(cls, messages: Iterable[Tuple[str, str]]) -> str:
+        """Digest de pares (direção, texto) normalizados; vazio sem mensagens"""
+        lines = [f"{direction}:{cls.normalize(text)}" for direction, text in messages]
+        return hashlib.sha1("\n".join(lines).encode("utf-8")).hexdigest() if lines else ""
+
+    def get(self, text: str, prompt_hash: str, history: str = "") -> Optional[str]:
+        """Retorna a resposta em cache para o texto (no histórico dado), ou None"""
+        normalized = self.normalize(text)
+        key = (prompt_hash, history, normalized)
+        now = time.monotonic()
+
+        entry = self._entries.get(key)
+        if entry is not None and self._expired(entry, now):
+            self._remove(key)
+            entry = None
+
+        if entry is not None:
+            self.exact_hits += 1
+        elif self.similarity_threshold:
+            key, entry = self._find_similar(prompt_hash, history, normalized, now)
+            if entry is not None:
+                self.similar_hits += 1
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.saved_latency += entry.latency
+        return entry.response
+
+    def put(self, text: str, prompt_hash: str, response: str, latency: float = 0.0, history: str = "") -> None:
+        """Guarda a resposta e a latência que ela custou"""
+        normalized = self.normalize(text)
+        key = (prompt_hash, history, normalized)
+        if key in self._entries:
+            self._remove(key)
+
+        ngrams = self._ngrams(normalized) if self.similarity_threshold else frozenset()
+        self._entries[key] = _CachedResponse(
+            response, latency, time.monotonic(), ngrams, tuple(_NUMBERS.findall(normalized))
+        )
+        for ngram in ngrams:
+            self._index[(prompt_hash, history, ngram)].add(key)
+
+        while len(self._entries) > self.max_size:
+            self._remove(next(iter(self._entries)))
+
+    def invalidate(self, prompt_hash: Optional[str] = None) -> int:
+        """Remove as respostas de um prompt (ou todas); retorna quantas saíram"""
+        keys = [key for key in self._entries if prompt_hash is None or key[0] == prompt_hash]
+        for key in keys:
+            self._remove(key)
+        if keys:
+            logger.info(f"🧹 {len(keys)} respostas removidas do cache")
+        return len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        """Acertos por camada, taxa de acerto e latência economizada"""
+        lookups = self.exact_hits + self.similar_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "exact_hits": self.exact_hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.exact_hits + self.similar_hits) / lookups, 4) if lookups else 0.0,
+            "saved_latency_seconds": round(self.saved_latency, 3)
+        }
+
+    def _find_similar(
+        self, prompt_hash: str, history: str, normalized: str, now: float
+    ) -> Tuple[Optional[CacheKey], Optional[_CachedResponse]]:
+        ngrams = self._ngrams(normalized)
+        numbers = tuple(_NUMBERS.findall(normalized))
+        overlaps: Dict[CacheKey, int] = defaultdict(int)
+        for ngram in ngrams:
+            for key in self._index.get((prompt_hash, history, ngram), ()):
+                overlaps[key] += 1
+
+        best_key, best_score = None, 0.0
+        for key, overlap in overlaps.items():
+            entry = self._entries[key]
+            if entry.numbers != numbers:
+                continue
+            score = overlap / (len(ngrams) + len(entry.ngrams) - overlap)
+            if score > best_score:
+                best_key, best_score = key, score
+
+        if best_key is None or best_score < self.similarity_threshold:
+            return None, None
+
+        entry = self._entries[best_key]
+        if self._expired(entry, now):
+            self._remove(best_key)
+            return None, None
+        return best_key, entry
+
+    def _ngrams(self, normalized: str) -> FrozenSet[str]:
+        padded = f" {normalized} "
+        size = self.ngram_size
+        return frozenset(padded[i:i + size] for i in range(max(1, len(padded) - size + 1)))
+
+    def _expired(self, entry: _CachedResponse, now: float) -> bool:
+        return now - entry.created_at >= self.ttl_seconds
+
+    def _remove(self, key: CacheKey) -> None:
+        entry = self._entries.pop(key)
+        for ngram in entry.ngrams:
+            index_key = (key[0], key[1], ngram)
+            keys = self._index.get(index_key)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._index[index_key]
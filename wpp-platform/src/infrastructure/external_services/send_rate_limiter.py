@@ -0,0 +1,202 @@
+"""
+Limitador de taxa para envios à Graph API do WhatsApp
+"""
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Prioridades da fila de envio (menor número sai primeiro)
+PRIORITY_CONVERSATIONAL = 0
+PRIORITY_BULK = 1
+
+# Códigos de erro da Graph API que indicam limite de taxa
+RATE_LIMIT_ERROR_CODES = {4, 80007, 130429, 131048, 131056}
+
+
+class TokenBucket:
+    """Token bucket clássico com taxa ajustável"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self, now: float) -> float:
+        """Segundos até haver um token disponível"""
+        self.refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self) -> None:
+        self.tokens -= 1
+
+    def is_full(self, now: float) -> bool:
+        self.refill(now)
+        return self.tokens >= self.capacity
+
+
+class _SenderLane:
+    """Bucket de um phone_number_id com fila de espera por prioridade"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.base_rate = rate
+        self.bucket = TokenBucket(rate, capacity)
+        self.waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self.paused_until = 0.0
+        self.rate_factor = 1.0
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.rate_limited = 0
+
+
+class SendRateLimiter:
+    """
+    Token bucket compartilhado por todos os métodos de envio.
+
+    Há um bucket por phone_number_id (limite de throughput da conta) e um por
+    destinatário (limite por par). Quando o bucket do número está vazio, os
+    envios aguardam em fila de prioridade: respostas de conversa passam na
+    frente de templates em massa. Erros de limite da API reduzem a taxa pela
+    metade e pausam o número; cada sucesso recupera a taxa aos poucos (AIMD).
+    """
+
+    def __init__(
+        self,
+        rate_per_second: float = 80.0,
+        burst: float = 80.0,
+        recipient_rate_per_second: float = 1.0,
+        recipient_burst: float = 5.0,
+        rate_overrides: Optional[Dict[str, float]] = None,
+        min_rate_factor: float = 0.05,
+        recovery_step: float = 0.02,
+        default_backoff: float = 1.0,
+        max_recipients: int = 50_000
+    ):
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.recipient_rate_per_second = recipient_rate_per_second
+        self.recipient_burst = recipient_burst
+        self.rate_overrides = rate_overrides or {}
+        self.min_rate_factor = min_rate_factor
+        self.recovery_step = recovery_step
+        self.default_backoff = default_backoff
+        self.max_recipients = max_recipients
+        self._lanes: Dict[str, _SenderLane] = {}
+        self._recipients: Dict[str, TokenBucket] = {}
+        self._sequence = itertools.count()
+
+    async def acquire(
+        self,
+        phone_number_id: str,
+        recipient: Optional[str] = None,
+        priority: int = PRIORITY_CONVERSATIONAL
+    ) -> None:
+        """Aguarda até que o envio seja permitido"""
+        if recipient:
+            await self._acquire_recipient(recipient)
+
+        lane = self._lane(phone_number_id)
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(lane.waiters, (priority, next(self._sequence), future))
+        self._pump(lane)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                # O token já foi concedido; devolve para o próximo da fila
+                lane.bucket.tokens += 1
+            self._pump(lane)
+            raise
+
+    def report_rate_limited(self, phone_number_id: str, retry_after: Optional[float] = None) -> None:
+        """Reduz a taxa e pausa o número após um erro de limite da API"""
+        lane = self._lane(phone_number_id)
+        lane.rate_limited += 1
+        lane.rate_factor = max(self.min_rate_factor, lane.rate_factor / 2)
+        lane.bucket.rate = lane.base_rate * lane.rate_factor
+        lane.bucket.tokens = min(lane.bucket.tokens, 0)
+        pause = retry_after if retry_after is not None else self.default_backoff / lane.rate_factor
+        lane.paused_until = max(lane.paused_until, time.monotonic() + pause)
+        logger.warning(
+            f"⚠️ Limite de taxa atingido em {phone_number_id}: "
+            f"taxa reduzida para {lane.bucket.rate:.1f}/s, pausa de {pause:.1f}s"
+        )
+
+    def report_success(self, phone_number_id: str) -> None:
+        """Recupera gradualmente a taxa após envios bem-sucedidos"""
+        lane = self._lane(phone_number_id)
+        if lane.rate_factor < 1.0:
+            lane.rate_factor = min(1.0, lane.rate_factor + self.recovery_step)
+            lane.bucket.rate = lane.base_rate * lane.rate_factor
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Estado de cada phone_number_id"""
+        now = time.monotonic()
+        return {
+            phone_number_id: {
+                "rate_per_second": round(lane.bucket.rate, 2),
+                "rate_factor": round(lane.rate_factor, 3),
+                "waiting": sum(1 for _, _, future in lane.waiters if not future.done()),
+                "paused_for": round(max(0.0, lane.paused_until - now), 2),
+                "rate_limited": lane.rate_limited
+            }
+            for phone_number_id, lane in self._lanes.items()
+        }
+
+    def _lane(self, phone_number_id: str) -> _SenderLane:
+        lane = self._lanes.get(phone_number_id)
+        if lane is None:
+            rate = self.rate_overrides.get(phone_number_id, self.rate_per_second)
+            lane = _SenderLane(rate, max(self.burst, 1.0))
+            self._lanes[phone_number_id] = lane
+        return lane
+
+    def _pump(self, lane: _SenderLane) -> None:
+        """Libera os waiters de maior prioridade enquanto houver tokens"""
+        if lane.timer:
+            lane.timer.cancel()
+            lane.timer = None
+
+        while lane.waiters:
+            now = time.monotonic()
+            delay = max(lane.paused_until - now, lane.bucket.wait_time(now))
+            if delay > 0:
+                lane.timer = asyncio.get_running_loop().call_later(delay, self._pump, lane)
+                return
+
+            _, _, future = heapq.heappop(lane.waiters)
+            if future.done():
+                continue
+            lane.bucket.consume()
+            future.set_result(None)
+
+    async def _acquire_recipient(self, recipient: str) -> None:
+        now = time.monotonic()
+        bucket = self._recipients.get(recipient)
+        if bucket is None:
+            if len(self._recipients) >= self.max_recipients:
+                self._prune_recipients(now)
+            bucket = TokenBucket(self.recipient_rate_per_second, max(self.recipient_burst, 1.0))
+            self._recipients[recipient] = bucket
+
+        while True:
+            delay = bucket.wait_time(time.monotonic())
+            if delay <= 0:
+                bucket.consume()
+                return
+            await asyncio.sleep(delay)
+
+    def _prune_recipients(self, now: float) -> None:
+        # Buckets cheios equivalem a um bucket novo e podem ser descartados
+        for recipient in [r for r, bucket in self._recipients.items() if bucket.is_full(now)]:
+            del self._recipients[recipient]
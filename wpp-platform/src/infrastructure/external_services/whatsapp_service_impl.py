@@ -1,13 +1,28 @@
 """
 Implementação do serviço do WhatsApp
 """
+import asyncio
+import hashlib
+import os
+import tempfile
+from contextlib import aclosing, asynccontextmanager
 import httpx
 import json
-from typing import Dict, List, Optional, Any
+from typing import AsyncIterator, Dict, List, Optional, Any
 from config import settings
 import logging
 
-from ...application.interfaces.whatsapp_service import WhatsAppService
+from ...application.interfaces.whatsapp_service import (
+    WhatsAppService,
+    MediaDownload,
+    MediaIntegrityError
+)
+from .send_rate_limiter import (
+    SendRateLimiter,
+    PRIORITY_CONVERSATIONAL,
+    PRIORITY_BULK,
+    RATE_LIMIT_ERROR_CODES
+)
 
 logger = logging.getLogger(__name__)
 
@@ -17,14 +32,127 @@ class WhatsAppServiceImpl(WhatsAppService):
     Implementação do serviço do WhatsApp usando a API oficial
     """
     
-    def __init__(self):
-        self.base_url = "https://graph.facebook.com/v18.0"
+    def __init__(
+        self,
+        client: Optional[httpx.AsyncClient] = None,
+        rate_limiter: Optional[SendRateLimiter] = None
+    ):
+        self.base_url = settings.WHATSAPP_API_BASE_URL
         self.phone_number_id = settings.WHATSAPP_PHONE_NUMBER_ID
         self.access_token = settings.WHATSAPP_TOKEN
         self.headers = {
             "Authorization": f"Bearer {self.access_token}",
             "Content-Type": "application/json"
         }
+        self._client = client
+        self.rate_limiter = rate_limiter or self._build_rate_limiter()
+        self._download_semaphore: Optional[asyncio.Semaphore] = None
+    
+    async def start(self) -> None:
+        """Cria o cliente HTTP compartilhado (chamado no startup da aplicação)"""
+        if self._client is None:
+            self._client = self._build_client()
+    
+    async def aclose(self) -> None:
+        """Fecha o cliente HTTP e suas conexões (chamado no shutdown da aplicação)"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Cliente HTTP compartilhado, com keep-alive entre as chamadas"""
+        if self._client is None:
+            self._client = self._build_client()
+        return self._client
+    
+    @property
+    def download_semaphore(self) -> asyncio.Semaphore:
+        """Limita os downloads de mídia simultâneos"""
+        if self._download_semaphore is None:
+            self._download_semaphore = asyncio.Semaphore(settings.WHATSAPP_MAX_CONCURRENT_DOWNLOADS)
+        return self._download_semaphore
+    
+    def _build_client(self) -> httpx.AsyncClient:
+        """Constrói o cliente com pool de conexões e timeouts configuráveis"""
+        http2 = settings.WHATSAPP_HTTP2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("Pacote h2 não instalado; usando HTTP/1.1 com keep-alive")
+                http2 = False
+        
+        return httpx.AsyncClient(
+            headers=self.headers,
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=settings.WHATSAPP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.WHATSAPP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.WHATSAPP_KEEPALIVE_EXPIRY
+            ),
+            timeout=httpx.Timeout(
+                settings.WHATSAPP_TIMEOUT,
+                connect=settings.WHATSAPP_CONNECT_TIMEOUT,
+                pool=settings.WHATSAPP_POOL_TIMEOUT
+            )
+        )
+    
+    def _build_rate_limiter(self) -> SendRateLimiter:
+        """Constrói o limitador de envio a partir das configurações"""
+        overrides = {}
+        for item in settings.WHATSAPP_SEND_RATE_OVERRIDES.split(","):
+            if ":" in item:
+                phone_number_id, rate = item.split(":", 1)
+                overrides[phone_number_id.strip()] = float(rate)
+        
+        return SendRateLimiter(
+            rate_per_second=settings.WHATSAPP_SEND_RATE,
+            burst=settings.WHATSAPP_SEND_BURST,
+            recipient_rate_per_second=settings.WHATSAPP_RECIPIENT_RATE,
+            recipient_burst=settings.WHATSAPP_RECIPIENT_BURST,
+            rate_overrides=overrides
+        )
+    
+    async def _post_message(
+        self,
+        payload: Dict[str, Any],
+        recipient: Optional[str] = None,
+        priority: int = PRIORITY_CONVERSATIONAL
+    ) -> Dict[str, Any]:
+        """POST em /messages respeitando o limitador de taxa"""
+        await self.rate_limiter.acquire(self.phone_number_id, recipient, priority)
+        
+        url = f"{self.base_url}/{self.phone_number_id}/messages"
+        response = await self.client.post(url, json=payload)
+        
+        if self._is_rate_limited(response):
+            self.rate_limiter.report_rate_limited(self.phone_number_id, self._retry_after(response))
+        elif response.is_success:
+            self.rate_limiter.report_success(self.phone_number_id)
+        
+        response.raise_for_status()
+        return response.json()
+    
+    @staticmethod
+    def _is_rate_limited(response: httpx.Response) -> bool:
+        """Identifica 429 ou códigos de erro de limite da Graph API"""
+        if response.status_code == 429:
+            return True
+        if response.is_success:
+            return False
+        try:
+            error = response.json().get("error", {})
+        except (ValueError, AttributeError):
+            return False
+        return error.get("code") in RATE_LIMIT_ERROR_CODES
+    
+    @staticmethod
+    def _retry_after(response: httpx.Response) -> Optional[float]:
+        try:
+            return float(response.headers["Retry-After"])
+        except (KeyError, ValueError):
+            return None
     
     async def send_message(
         self, 
@@ -33,8 +161,6 @@ class WhatsAppServiceImpl(WhatsAppService):
         message_type: str = "text"
     ) -> Dict[str, Any]:
         """Envia uma mensagem via WhatsApp Business API"""
-        url = f"{self.base_url}/{self.phone_number_id}/messages"
-        
         payload = {
             "messaging_product": "whatsapp",
             "to": phone_number,
@@ -43,10 +169,7 @@ class WhatsAppServiceImpl(WhatsAppService):
         }
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(url, headers=self.headers, json=payload)
-                response.raise_for_status()
-                return response.json()
+            return await self._post_message(payload, phone_number, PRIORITY_CONVERSATIONAL)
         except httpx.HTTPError as e:
             logger.error(f"Erro ao enviar mensagem WhatsApp: {e}")
             raise
@@ -58,9 +181,7 @@ class WhatsAppServiceImpl(WhatsAppService):
         language_code: str = "pt_BR",
         components: Optional[List[Dict]] = None
     ) -> Dict[str, Any]:
-        """Envia uma mensagem de template"""
-        url = f"{self.base_url}/{self.phone_number_id}/messages"
-        
+        """Envia uma mensagem de template (fila de baixa prioridade)"""
         payload = {
             "messaging_product": "whatsapp",
             "to": phone_number,
@@ -73,10 +194,7 @@ class WhatsAppServiceImpl(WhatsAppService):
         }
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(url, headers=self.headers, json=payload)
-                response.raise_for_status()
-                return response.json()
+            return await self._post_message(payload, phone_number, PRIORITY_BULK)
         except httpx.HTTPError as e:
             logger.error(f"Erro ao enviar template WhatsApp: {e}")
             raise
@@ -87,8 +205,6 @@ class WhatsAppServiceImpl(WhatsAppService):
         interactive_data: Dict[str, Any]
     ) -> Dict[str, Any]:
         """Envia uma mensagem interativa"""
-        url = f"{self.base_url}/{self.phone_number_id}/messages"
-        
         payload = {
             "messaging_product": "whatsapp",
             "to": phone_number,
@@ -97,18 +213,13 @@ class WhatsAppServiceImpl(WhatsAppService):
         }
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(url, headers=self.headers, json=payload)
-                response.raise_for_status()
-                return response.json()
+            return await self._post_message(payload, phone_number, PRIORITY_CONVERSATIONAL)
         except httpx.HTTPError as e:
             logger.error(f"Erro ao enviar mensagem interativa WhatsApp: {e}")
             raise
     
     async def mark_message_as_read(self, message_id: str) -> Dict[str, Any]:
         """Marca uma mensagem como lida"""
-        url = f"{self.base_url}/{self.phone_number_id}/messages"
-        
         payload = {
             "messaging_product": "whatsapp",
             "status": "read",
@@ -116,38 +227,144 @@ class WhatsAppServiceImpl(WhatsAppService):
         }
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(url, headers=self.headers, json=payload)
-                response.raise_for_status()
-                return response.json()
+            return await self._post_message(payload)
         except httpx.HTTPError as e:
             logger.error(f"Erro ao marcar mensagem como lida: {e}")
             raise
     
-    async def get_media_url(self, media_id: str) -> str:
-        """Obtém a URL de download de uma mídia"""
+    async def get_media_info(self, media_id: str) -> Dict[str, Any]:
+        """Obtém os metadados de uma mídia (url, mime_type, sha256, file_size)"""
         url = f"{self.base_url}/{media_id}"
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, headers=self.headers)
-                response.raise_for_status()
-                data = response.json()
-                return data.get("url", "")
+            response = await self.client.get(url)
+            response.raise_for_status()
+            return response.json()
         except httpx.HTTPError as e:
             logger.error(f"Erro ao obter URL da mídia: {e}")
             raise
     
+    async def get_media_url(self, media_id: str) -> str:
+        """Obtém a URL de download de uma mídia"""
+        data = await self.get_media_info(media_id)
+        return data.get("url", "")
+    
     async def download_media(self, media_url: str) -> bytes:
-        """Baixa uma mídia do WhatsApp"""
+        """Baixa uma mídia do WhatsApp (em memória; prefira download_media_to_file)"""
+        async with self.open_media(media_url) as chunks:
+            return b"".join([chunk async for chunk in chunks])
+    
+    @asynccontextmanager
+    async def open_media(
+        self,
+        media_url: str,
+        expected_size: Optional[int] = None,
+        expected_sha256: Optional[str] = None
+    ) -> AsyncIterator[AsyncIterator[bytes]]:
+        """
+        Abre o download de uma mídia; o `async with` entrega os blocos para `async for`.
+        
+        No máximo WHATSAPP_MAX_CONCURRENT_DOWNLOADS downloads ficam abertos ao
+        mesmo tempo. A vaga e a conexão pertencem ao bloco `async with`: ao sair
+        dele, mesmo no meio da mídia, as duas são liberadas na hora. Tamanho e
+        hash são verificados incrementalmente; o hash só após o último bloco,
+        então o consumidor deve descartar o que gravou se receber
+        MediaIntegrityError.
+        """
+        async with self._media_stream(media_url, expected_size, expected_sha256, hashlib.sha256()) as chunks:
+            yield chunks
+    
+    @asynccontextmanager
+    async def _media_stream(
+        self,
+        media_url: str,
+        expected_size: Optional[int],
+        expected_sha256: Optional[str],
+        digest: Any
+    ) -> AsyncIterator[AsyncIterator[bytes]]:
+        max_size = expected_size or settings.WHATSAPP_MEDIA_MAX_SIZE
+        
+        async with self.download_semaphore:
+            try:
+                async with self.client.stream("GET", media_url) as response:
+                    response.raise_for_status()
+                    
+                    content_length = response.headers.get("Content-Length")
+                    if content_length and int(content_length) > max_size:
+                        raise MediaIntegrityError(
+                            f"Mídia com {content_length} bytes excede o limite de {max_size}"
+                        )
+                    
+                    async with aclosing(
+                        self._verified_chunks(response, max_size, expected_size, expected_sha256, digest)
+                    ) as chunks:
+                        yield chunks
+            except httpx.HTTPError as e:
+                logger.error(f"Erro ao baixar mídia: {e}")
+                raise
+    
+    @staticmethod
+    async def _verified_chunks(
+        response: httpx.Response,
+        max_size: int,
+        expected_size: Optional[int],
+        expected_sha256: Optional[str],
+        digest: Any
+    ) -> AsyncIterator[bytes]:
+        """Blocos da resposta com limite de tamanho; tamanho e hash conferidos após o último"""
+        size = 0
+        async for chunk in response.aiter_bytes(settings.WHATSAPP_MEDIA_CHUNK_SIZE):
+            size += len(chunk)
+            if size > max_size:
+                raise MediaIntegrityError(f"Mídia excede o limite de {max_size} bytes")
+            digest.update(chunk)
+            yield chunk
+        
+        if expected_size is not None and size != expected_size:
+            raise MediaIntegrityError(f"Tamanho da mídia {size} difere do esperado {expected_size}")
+        if expected_sha256 and digest.hexdigest() != expected_sha256.lower():
+            raise MediaIntegrityError("Hash SHA-256 da mídia não confere")
+    
+    async def download_media_to_file(
+        self,
+        media_url: str,
+        destination: Optional[str] = None,
+        expected_size: Optional[int] = None,
+        expected_sha256: Optional[str] = None
+    ) -> MediaDownload:
+        """Baixa uma mídia direto para um arquivo, sem mantê-la em memória"""
+        if destination:
+            file = open(destination, "wb")
+        else:
+            file = tempfile.NamedTemporaryFile(
+                prefix="wpp-media-", dir=settings.MEDIA_DOWNLOAD_DIR or None, delete=False
+            )
+        
+        digest = hashlib.sha256()
+        size = 0
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(media_url, headers=self.headers)
-                response.raise_for_status()
-                return response.content
-        except httpx.HTTPError as e:
-            logger.error(f"Erro ao baixar mídia: {e}")
+            with file:
+                async with self._media_stream(media_url, expected_size, expected_sha256, digest) as chunks:
+                    async for chunk in chunks:
+                        size += len(chunk)
+                        await asyncio.to_thread(file.write, chunk)
+        except BaseException:
+            os.remove(file.name)
             raise
+        
+        return MediaDownload(path=file.name, size=size, sha256=digest.hexdigest())
+    
+    async def download_media_by_id(self, media_id: str, destination: Optional[str] = None) -> MediaDownload:
+        """Obtém os metadados e baixa a mídia para disco, conferindo sha256 e tamanho"""
+        info = await self.get_media_info(media_id)
+        download = await self.download_media_to_file(
+            info.get("url", ""),
+            destination=destination,
+            expected_size=int(info["file_size"]) if info.get("file_size") else None,
+            expected_sha256=info.get("sha256")
+        )
+        download.mime_type = info.get("mime_type")
+        return download
     
     def create_button_message(self, body_text: str, buttons: List[Dict[str, str]]) -> Dict[str, Any]:
         """Cria uma mensagem com botões"""
@@ -0,0 +1 @@
+# Messaging Infrastructure
@@ -0,0 +1,92 @@
+"""
+Deduplicação de webhooks pelo ID da mensagem do WhatsApp
+"""
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+ExistsLookup = Callable[[str], Awaitable[bool]]
+
+
+class MessageDeduplicator:
+    """
+    Conjunto LRU/TTL dos IDs de mensagem vistos recentemente.
+
+    A consulta em memória é O(1); quando o ID não está no cache, a verificação
+    cai para o índice único de `messages.whatsapp_message_id` (se configurado).
+    O ID é registrado antes da consulta ao banco, então reentregas simultâneas
+    da mesma mensagem também são descartadas.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 100_000,
+        ttl_seconds: float = 86_400,
+        fallback: Optional[ExistsLookup] = None
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._fallback = fallback
+        self._seen: "OrderedDict[str, float]" = OrderedDict()
+        self.hits = 0
+        self.fallback_hits = 0
+        self.misses = 0
+
+    async def is_duplicate(self, message_id: Optional[str]) -> bool:
+        """Retorna True se a mensagem já foi recebida"""
+        if not message_id:
+            return False
+
+        now = time.monotonic()
+        self._evict_expired(now)
+
+        if message_id in self._seen:
+            self._seen[message_id] = now
+            self._seen.move_to_end(message_id)
+            self.hits += 1
+            return True
+
+        self._remember(message_id, now)
+
+        if self._fallback:
+            try:
+                if await self._fallback(message_id):
+                    self.fallback_hits += 1
+                    return True
+            except Exception as e:
+                logger.error(f"❌ Erro ao consultar mensagem {message_id} no banco: {e}")
+
+        self.misses += 1
+        return False
+
+    def forget(self, message_id: Optional[str]) -> None:
+        """Remove o ID para que uma reentrega possa ser processada novamente"""
+        if message_id:
+            self._seen.pop(message_id, None)
+
+    def stats(self) -> Dict[str, float]:
+        """Contadores de acerto/erro do cache"""
+        lookups = self.hits + self.fallback_hits + self.misses
+        return {
+            "size": len(self._seen),
+            "hits": self.hits,
+            "fallback_hits": self.fallback_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.hits + self.fallback_hits) / lookups, 4) if lookups else 0.0
+        }
+
+    def _remember(self, message_id: str, now: float) -> None:
+        self._seen[message_id] = now
+        while len(self._seen) > self.max_size:
+            self._seen.popitem(last=False)
+
+    def _evict_expired(self, now: float) -> None:
+        # Os IDs mais antigos ficam no início; para na primeira entrada ainda válida
+        while self._seen:
+            message_id, seen_at = next(iter(self._seen.items()))
+            if now - seen_at < self.ttl_seconds:
+                break
+            self._seen.popitem(last=False)
@@ -0,0 +1,107 @@
+"""
+Dispatcher de mensagens com shards ordenados por cliente
+"""
+import asyncio
+import time
+import zlib
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+MessageJob = Callable[[], Awaitable[Any]]
+
+
+class _Shard:
+    """Fila FIFO consumida por uma única task"""
+
+    def __init__(self, index: int, max_queue_size: int):
+        self.index = index
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self.enqueued_at: deque = deque()
+        self.task: Optional[asyncio.Task] = None
+        self.processed = 0
+        self.failed = 0
+        self.last_lag = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        oldest_lag = time.monotonic() - self.enqueued_at[0] if self.enqueued_at else 0.0
+        return {
+            "shard": self.index,
+            "depth": self.queue.qsize(),
+            "lag_ms": round(oldest_lag * 1000, 2),
+            "last_lag_ms": round(self.last_lag * 1000, 2),
+            "processed": self.processed,
+            "failed": self.failed
+        }
+
+
+class ShardedMessageDispatcher:
+    """
+    Distribui mensagens entre N shards pelo hash do número do cliente.
+
+    Mensagens do mesmo cliente caem sempre no mesmo shard e são processadas em
+    ordem; clientes diferentes são processados em paralelo.
+    """
+
+    def __init__(self, shards: int = 8, max_queue_size: int = 0):
+        self._shards = [_Shard(index, max_queue_size) for index in range(max(1, shards))]
+
+    async def start(self) -> None:
+        """Inicia um consumidor por shard"""
+        for shard in self._shards:
+            shard.task = asyncio.create_task(self._run(shard), name=f"message-shard-{shard.index}")
+        logger.info(f"🚀 Dispatcher iniciado com {len(self._shards)} shards")
+
+    async def stop(self) -> None:
+        """Interrompe os consumidores"""
+        tasks = [shard.task for shard in self._shards if shard.task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for shard in self._shards:
+            shard.task = None
+
+    def shard_for(self, key: str) -> int:
+        """Retorna o shard responsável pela chave (hash estável entre processos)"""
+        return zlib.crc32(key.encode("utf-8")) % len(self._shards)
+
+    def dispatch(self, key: str, job: MessageJob) -> asyncio.Future:
+        """
+        Enfileira o job no shard da chave; o future resolve com o resultado do job.
+
+        Não cede o event loop: a ordem das chamadas é a ordem de execução no
+        shard, então quem despacha antes de qualquer await mantém a ordem de
+        chegada. Com max_queue_size, um shard cheio levanta asyncio.QueueFull.
+        """
+        shard = self._shards[self.shard_for(key)]
+        future = asyncio.get_running_loop().create_future()
+        shard.queue.put_nowait((job, future))
+        shard.enqueued_at.append(time.monotonic())
+        return future
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Profundidade e atraso de cada shard"""
+        return [shard.stats() for shard in self._shards]
+
+    async def _run(self, shard: _Shard) -> None:
+        while True:
+            job, future = await shard.queue.get()
+            shard.last_lag = time.monotonic() - shard.enqueued_at.popleft()
+            try:
+                result = await job()
+                shard.processed += 1
+                if not future.done():
+                    future.set_result(result)
+            except asyncio.CancelledError:
+                if not future.done():
+                    future.cancel()
+                raise
+            except Exception as e:
+                shard.failed += 1
+                logger.error(f"❌ Erro no shard {shard.index}: {e}")
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                shard.queue.task_done()
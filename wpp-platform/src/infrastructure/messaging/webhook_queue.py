@@ -0,0 +1,177 @@
+"""
+Fila durável local para webhooks do WhatsApp
+"""
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Any, Iterable, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QueuedWebhook:
+    """Item retirado da fila de webhooks"""
+    id: int
+    payload: Dict[str, Any]
+    attempts: int
+    enqueued_at: float
+
+
+class DurableWebhookQueue:
+    """
+    Fila de webhooks persistida em SQLite (WAL).
+
+    O payload bruto é gravado antes de responder ao Meta, então uma queda do
+    processo não perde mensagens: itens que estavam em processamento voltam
+    para a fila na próxima abertura.
+
+    Cada item pode ter chaves de ordenação (o número do cliente). Um item só é
+    reivindicado quando nenhum item anterior com a mesma chave está pendente ou
+    em processamento, inclusive aguardando uma nova tentativa: mensagens do
+    mesmo cliente são processadas uma de cada vez, na ordem de chegada, mesmo
+    com falhas; só um item que esgotou as tentativas (failed) deixa de
+    segurar os seguintes.
+    """
+
+    def __init__(self, path: str, max_attempts: int = 5):
+        self.path = path
+        self.max_attempts = max_attempts
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def open(self) -> None:
+        """Abre a fila e recupera itens que ficaram em processamento"""
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS webhook_queue (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                enqueued_at REAL NOT NULL,
+                available_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_webhook_queue_status ON webhook_queue (status, available_at, id)"
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS webhook_queue_keys (
+                item_id INTEGER NOT NULL,
+                key TEXT NOT NULL,
+                PRIMARY KEY (item_id, key)
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_webhook_queue_keys_key ON webhook_queue_keys (key, item_id)"
+        )
+        recovered = self._conn.execute(
+            "UPDATE webhook_queue SET status = 'pending' WHERE status = 'processing'"
+        ).rowcount
+        if recovered:
+            logger.info(f"♻️ {recovered} webhooks recuperados para reprocessamento")
+
+    def close(self) -> None:
+        """Fecha a conexão com a fila"""
+        if self._conn:
+            self._conn.close()
+            self._conn = None
+
+    async def put(self, payload: Dict[str, Any], keys: Iterable[str] = ()) -> int:
+        """Persiste um payload na fila, com as chaves de ordenação do item"""
+        return await asyncio.to_thread(self._put, json.dumps(payload, ensure_ascii=False), sorted(set(keys)))
+
+    async def claim(self) -> Optional[QueuedWebhook]:
+        """Reserva o próximo item pendente da fila"""
+        return await asyncio.to_thread(self._claim)
+
+    async def ack(self, item_id: int) -> None:
+        """Remove um item processado com sucesso (libera os seguintes com as mesmas chaves)"""
+        await asyncio.to_thread(self._ack, item_id)
+
+    async def nack(self, item_id: int, error: str, delay: float = 0.0) -> bool:
+        """Devolve um item para a fila após `delay` segundos; retorna False quando esgotou as tentativas"""
+        return await asyncio.to_thread(self._nack, item_id, error, delay)
+
+    def stats(self) -> Dict[str, int]:
+        """Contagem de itens por status"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) FROM webhook_queue GROUP BY status"
+            ).fetchall()
+        counts = {"pending": 0, "processing": 0, "failed": 0}
+        counts.update(dict(rows))
+        return counts
+
+    def _put(self, payload: str, keys: list) -> int:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            cursor = self._conn.execute(
+                "INSERT INTO webhook_queue (payload, enqueued_at, available_at) VALUES (?, ?, ?)",
+                (payload, now, now)
+            )
+            self._conn.executemany(
+                "INSERT INTO webhook_queue_keys (item_id, key) VALUES (?, ?)",
+                [(cursor.lastrowid, key) for key in keys]
+            )
+            self._conn.execute("COMMIT")
+            return cursor.lastrowid
+
+    def _claim(self) -> Optional[QueuedWebhook]:
+        with self._lock:
+            # Pula itens com chave ainda ocupada por um item anterior não concluído
+            row = self._conn.execute(
+                """
+                SELECT q.id, q.payload, q.attempts, q.enqueued_at FROM webhook_queue q
+                WHERE q.status = 'pending' AND q.available_at <= ?
+                  AND NOT EXISTS (
+                      SELECT 1 FROM webhook_queue_keys k
+                      JOIN webhook_queue_keys earlier ON earlier.key = k.key AND earlier.item_id < k.item_id
+                      JOIN webhook_queue e ON e.id = earlier.item_id AND e.status IN ('pending', 'processing')
+                      WHERE k.item_id = q.id
+                  )
+                ORDER BY q.id LIMIT 1
+                """,
+                (time.time(),)
+            ).fetchone()
+            if not row:
+                return None
+            self._conn.execute(
+                "UPDATE webhook_queue SET status = 'processing', attempts = attempts + 1 WHERE id = ?",
+                (row[0],)
+            )
+        return QueuedWebhook(id=row[0], payload=json.loads(row[1]), attempts=row[2] + 1, enqueued_at=row[3])
+
+    def _nack(self, item_id: int, error: str, delay: float) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT attempts FROM webhook_queue WHERE id = ?", (item_id,)
+            ).fetchone()
+            if not row:
+                return False
+            retry = row[0] < self.max_attempts
+            self._conn.execute(
+                "UPDATE webhook_queue SET status = ?, last_error = ?, available_at = ? WHERE id = ?",
+                ("pending" if retry else "failed", error, time.time() + delay, item_id)
+            )
+            return retry
+
+    def _ack(self, item_id: int) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.execute("DELETE FROM webhook_queue WHERE id = ?", (item_id,))
+            self._conn.execute("DELETE FROM webhook_queue_keys WHERE item_id = ?", (item_id,))
+            self._conn.execute("COMMIT")
@@ -0,0 +1,106 @@
+"""
+Pool de workers assíncronos para processar webhooks enfileirados
+"""
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Any, Iterable, List, Optional
+import logging
+
+from .webhook_queue import DurableWebhookQueue, QueuedWebhook
+
+logger = logging.getLogger(__name__)
+
+WebhookHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+OrderingKeys = Callable[[Dict[str, Any]], Iterable[str]]
+
+
+class WebhookWorkerPool:
+    """
+    Consome a fila durável de webhooks com concorrência configurável.
+
+    Cada `put` na fila gera um sinal que acorda um worker; o polling periódico
+    cobre itens recuperados na inicialização e reenvios após falha.
+
+    `ordering_keys` extrai as chaves de ordenação de cada payload (os números
+    dos clientes). A fila não entrega um item enquanto um anterior com a mesma
+    chave não foi concluído, então itens do mesmo cliente são processados em
+    ordem mesmo com vários workers e com novas tentativas; clientes diferentes
+    seguem em paralelo.
+    """
+
+    def __init__(
+        self,
+        queue: DurableWebhookQueue,
+        handler: WebhookHandler,
+        concurrency: int = 4,
+        poll_interval: float = 1.0,
+        retry_delay: float = 2.0,
+        ordering_keys: Optional[OrderingKeys] = None
+    ):
+        self._queue = queue
+        self._handler = handler
+        self._concurrency = max(1, concurrency)
+        self._poll_interval = poll_interval
+        self._retry_delay = retry_delay
+        self._ordering_keys = ordering_keys
+        self._signals: asyncio.Queue = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+        self.processed = 0
+        self.failed = 0
+        self.last_queue_delay = 0.0
+
+    async def start(self) -> None:
+        """Inicia os workers"""
+        for index in range(self._concurrency):
+            self._tasks.append(asyncio.create_task(self._run(), name=f"webhook-worker-{index}"))
+        logger.info(f"🚀 {self._concurrency} workers de webhook iniciados")
+
+    async def stop(self) -> None:
+        """Interrompe os workers; itens em andamento voltam para a fila na próxima abertura"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    async def submit(self, payload: Dict[str, Any]) -> int:
+        """Persiste o payload (com as chaves de ordenação) e acorda um worker"""
+        keys = self._ordering_keys(payload) if self._ordering_keys else ()
+        item_id = await self._queue.put(payload, keys)
+        self._signals.put_nowait(None)
+        return item_id
+
+    def stats(self) -> Dict[str, Any]:
+        """Métricas do pool e da fila"""
+        return {
+            "workers": len(self._tasks),
+            "processed": self.processed,
+            "failed": self.failed,
+            "last_queue_delay_ms": round(self.last_queue_delay * 1000, 2),
+            "queue": self._queue.stats()
+        }
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._signals.get(), timeout=self._poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+            # Drena a fila enquanto houver itens pendentes
+            while True:
+                item = await self._queue.claim()
+                if not item:
+                    break
+                await self._process(item)
+
+    async def _process(self, item: QueuedWebhook) -> None:
+        self.last_queue_delay = time.time() - item.enqueued_at
+        try:
+            await self._handler(item.payload)
+            await self._queue.ack(item.id)
+            self.processed += 1
+        except Exception as e:
+            logger.error(f"❌ Erro ao processar webhook {item.id} (tentativa {item.attempts}): {e}")
+            retry = await self._queue.nack(item.id, str(e), delay=self._retry_delay * item.attempts)
+            if not retry:
+                self.failed += 1
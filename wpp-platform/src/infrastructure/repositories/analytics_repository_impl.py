@@ -0,0 +1,298 @@
+"""
+Implementação do repositório de analytics
+"""
+from datetime import date, datetime
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import distinct, exists, extract, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ...domain.repositories.analytics_repository import AnalyticsRepository
+from ...domain.repositories.summaries import (
+    AnalyticsOverview,
+    ConversationMetrics,
+    MessageTrend,
+    ResponseTimeStats,
+    RollupPoint,
+    UserActivity
+)
+from ...domain.value_objects.message_content import MessageDirection
+from ..database.models import (
+    AnalyticsActiveUserModel,
+    AnalyticsRollupModel,
+    ConversationModel,
+    MessageModel,
+    ResponseTimeBinModel,
+    ResponseTimeHourModel,
+    UserModel
+)
+from . import rollups
+from .base_repository import AsyncRepository
+from .sketches import DDSketch
+
+# Percentis devolvidos por get_response_times
+RESPONSE_TIME_PERCENTILES = (0.5, 0.75, 0.9, 0.95, 0.99)
+
+
+class AnalyticsRepositoryImpl(AsyncRepository, AnalyticsRepository):
+    """
+    Analytics calculados no banco (COUNT/SUM com FILTER e GROUP BY por dia).
+
+    Cada consulta devolve no máximo uma linha por dia ou por status, então a
+    memória não cresce com o tamanho das tabelas. Totais de mensagens vêm dos
+    contadores das conversas (counters.py), sem varrer messages.
+
+    Tendências e atividade leem os rollups diários (rollups.py) até o
+    high-water mark do job e agregam ao vivo só as linhas mais novas que ele.
+    """
+
+    def __init__(self, db_session: AsyncSession):
+        super().__init__(db_session)
+
+    async def get_overview(self, today: datetime) -> AnalyticsOverview:
+        """Totais de usuários, conversas e mensagens; messages_today conta a partir de `today`"""
+        def count(model, *conditions):
+            return select(func.count()).select_from(model).where(*conditions).scalar_subquery()
+
+        row = (await self._rows(select(
+            count(UserModel),
+            count(UserModel, UserModel.is_active == True),
+            count(ConversationModel),
+            count(ConversationModel, ConversationModel.status == "active"),
+            select(func.coalesce(func.sum(ConversationModel.message_count), 0)).scalar_subquery(),
+            count(MessageModel, MessageModel.created_at >= today)
+        )))[0]
+        return AnalyticsOverview(*row)
+
+    async def get_message_trends(self, start: datetime, end: datetime) -> List[MessageTrend]:
+        """Mensagens por dia e direção em [start, end) (limites no início do dia); só os dias com mensagens"""
+        mark = await self._high_water_mark()
+        trends: Dict[date, MessageTrend] = {}
+
+        metrics = [rollups.MESSAGES_INCOMING, rollups.MESSAGES_OUTGOING]
+        for point in await self._rollup_points(metrics, start, end, mark):
+            trend = trends.setdefault(self._as_date(point.bucket), MessageTrend(self._as_date(point.bucket)))
+            if point.metric == rollups.MESSAGES_INCOMING:
+                trend.inbound_messages += point.value
+            else:
+                trend.outbound_messages += point.value
+
+        tail = self._tail_start(start, end, mark)
+        if tail:
+            day = self._day(MessageModel.created_at)
+            rows = await self._rows(
+                select(
+                    day,
+                    func.count().filter(MessageModel.direction == MessageDirection.INCOMING.value),
+                    func.count().filter(MessageModel.direction == MessageDirection.OUTGOING.value)
+                )
+                .where(MessageModel.created_at >= self._bound(tail), MessageModel.created_at < self._bound(end))
+                .group_by(day)
+            )
+            for bucket, inbound, outbound in rows:
+                trend = trends.setdefault(self._as_date(bucket), MessageTrend(self._as_date(bucket)))
+                trend.inbound_messages += inbound
+                trend.outbound_messages += outbound
+        return [trends[day] for day in sorted(trends)]
+
+    async def get_user_activity(self, start: datetime, end: datetime) -> List[UserActivity]:
+        """
+        Usuários novos, ativos e recorrentes por dia em [start, end) (limites no início do dia).
+
+        Ativo = enviou mensagem no dia; recorrente = ativo criado antes daquele dia.
+        Só os dias com atividade.
+        """
+        mark = await self._high_water_mark()
+        activity: Dict[date, UserActivity] = {}
+
+        def entry(bucket) -> UserActivity:
+            return activity.setdefault(self._as_date(bucket), UserActivity(self._as_date(bucket)))
+
+        metrics = [rollups.NEW_USERS, rollups.ACTIVE_USERS, rollups.RETURNING_USERS]
+        for point in await self._rollup_points(metrics, start, end, mark):
+            counts = entry(point.bucket)
+            if point.metric == rollups.NEW_USERS:
+                counts.new_users += point.value
+            elif point.metric == rollups.ACTIVE_USERS:
+                counts.active_users += point.value
+            else:
+                counts.returning_users += point.value
+
+        tail = self._tail_start(start, end, mark)
+        if tail:
+            created_day = self._day(UserModel.created_at)
+            new_users = await self._rows(
+                select(created_day, func.count())
+                .where(UserModel.created_at >= self._bound(tail), UserModel.created_at < self._bound(end))
+                .group_by(created_day)
+            )
+            for bucket, count in new_users:
+                entry(bucket).new_users += count
+
+            # Só quem ainda não está no conjunto do dia (esses já contam no rollup)
+            message_day = self._day(MessageModel.created_at)
+            already_active = exists().where(
+                AnalyticsActiveUserModel.day == message_day,
+                AnalyticsActiveUserModel.user_id == MessageModel.user_id
+            )
+            active_users = await self._rows(
+                select(
+                    message_day,
+                    func.count(distinct(MessageModel.user_id)),
+                    func.count(distinct(MessageModel.user_id)).filter(UserModel.created_at < message_day)
+                )
+                .join(UserModel, UserModel.id == MessageModel.user_id)
+                .where(
+                    MessageModel.created_at >= self._bound(tail),
+                    MessageModel.created_at < self._bound(end),
+                    MessageModel.direction == MessageDirection.INCOMING.value,
+                    ~already_active
+                )
+                .group_by(message_day)
+            )
+            for bucket, active, returning in active_users:
+                counts = entry(bucket)
+                counts.active_users += active
+                counts.returning_users += returning
+        return [activity[day] for day in sorted(activity)]
+
+    async def get_response_times(self, start: datetime, end: datetime) -> ResponseTimeStats:
+        """
+        Tempos de resposta das horas em [start, end) (limites arredondados para a hora).
+
+        Contagem, média, mínimo e máximo vêm dos totais por hora; os percentis,
+        dos sketches por hora somados bin a bin (erro relativo de até 1%).
+        """
+        start, end = rollups.floor(start, "hour"), rollups.floor(end, "hour")
+        hours = ResponseTimeHourModel
+        count, total, fastest, slowest = (await self._rows(
+            select(func.sum(hours.count), func.sum(hours.total_seconds), func.min(hours.min_seconds),
+                   func.max(hours.max_seconds))
+            .where(hours.bucket >= self._bound(start), hours.bucket < self._bound(end))
+        ))[0]
+        if not count:
+            return ResponseTimeStats()
+
+        bins = ResponseTimeBinModel
+        sketch = DDSketch.from_rows(await self._rows(
+            select(bins.bin, func.sum(bins.count))
+            .where(bins.bucket >= self._bound(start), bins.bucket < self._bound(end))
+            .group_by(bins.bin)
+        ))
+        return ResponseTimeStats(
+            count=count,
+            avg_seconds=total / count,
+            min_seconds=fastest,
+            max_seconds=slowest,
+            percentiles={f"p{round(q * 100)}": sketch.quantile(q) for q in RESPONSE_TIME_PERCENTILES}
+        )
+
+    async def get_rollup_series(
+        self,
+        metrics: Sequence[str],
+        granularity: str,
+        start: datetime,
+        end: datetime
+    ) -> List[RollupPoint]:
+        """Buckets gravados das métricas em [start, end), em ordem; só vão até o high-water mark"""
+        return await self._rollup_points(metrics, start, end, granularity=granularity)
+
+    async def get_high_water_mark(self) -> Optional[datetime]:
+        """Até onde o job de rollup já processou (None antes da primeira rodada)"""
+        return await self._high_water_mark()
+
+    async def record_escalations(self, at: datetime, count: int = 1) -> None:
+        """Soma escalações aos buckets de minuto, hora e dia de `at`"""
+        if count <= 0:
+            return
+        for statement in rollups.increment_statements(self._dialect, rollups.ESCALATIONS, at, count):
+            await self._execute(statement)
+        await self._commit()
+
+    async def get_conversation_metrics(self) -> ConversationMetrics:
+        """Conversas por status, duração média (primeira à última mensagem) e mensagens por conversa"""
+        has_messages = ConversationModel.last_message_at.isnot(None)
+        rows = await self._rows(
+            select(
+                ConversationModel.status,
+                func.count(),
+                func.coalesce(func.sum(ConversationModel.message_count), 0),
+                func.coalesce(
+                    func.sum(self._minutes_between(ConversationModel.created_at, ConversationModel.last_message_at))
+                    .filter(has_messages),
+                    0
+                ),
+                func.count().filter(has_messages)
+            )
+            .group_by(ConversationModel.status)
+        )
+
+        total = sum(count for _, count, _, _, _ in rows)
+        messages = sum(count for _, _, count, _, _ in rows)
+        minutes = sum(float(value) for _, _, _, value, _ in rows)
+        with_messages = sum(count for _, _, _, _, count in rows)
+        return ConversationMetrics(
+            by_status={status: count for status, count, _, _, _ in rows},
+            avg_duration_minutes=minutes / with_messages if with_messages else 0.0,
+            avg_messages_per_conversation=messages / total if total else 0.0
+        )
+
+    async def _high_water_mark(self) -> Optional[datetime]:
+        return rollups.as_utc(await self._scalar(rollups.HIGH_WATER_MARK))
+
+    async def _rollup_points(
+        self,
+        metrics: Sequence[str],
+        start: datetime,
+        end: datetime,
+        mark: Optional[datetime] = None,
+        granularity: str = "day"
+    ) -> List[RollupPoint]:
+        """Buckets das métricas em [start, end); com `mark`, só os anteriores a ele (o resto vem ao vivo)"""
+        if mark is not None:
+            end = min(end, mark)
+        if end <= start:
+            return []
+        rows = await self._rows(
+            select(AnalyticsRollupModel.bucket, AnalyticsRollupModel.metric, AnalyticsRollupModel.value)
+            .where(
+                AnalyticsRollupModel.granularity == granularity,
+                AnalyticsRollupModel.metric.in_(list(metrics)),
+                AnalyticsRollupModel.bucket >= self._bound(start),
+                AnalyticsRollupModel.bucket < self._bound(end)
+            )
+            .order_by(AnalyticsRollupModel.bucket, AnalyticsRollupModel.metric)
+        )
+        return [RollupPoint(rollups.as_utc(bucket), metric, value) for bucket, metric, value in rows]
+
+    @staticmethod
+    def _tail_start(start: datetime, end: datetime, mark: Optional[datetime]) -> Optional[datetime]:
+        """Início do trecho ainda fora dos rollups (do mark em diante), ou None se não houver"""
+        tail = max(start, mark) if mark is not None else start
+        return tail if tail < end else None
+
+    @property
+    def _dialect(self) -> str:
+        return self._db.get_bind().dialect.name
+
+    def _day(self, column):
+        """Dia do timestamp (cast no PostgreSQL, date() no SQLite)"""
+        return rollups.day_of(column, self._dialect)
+
+    def _bound(self, value: datetime):
+        return rollups.bound(value, self._dialect)
+
+    def _minutes_between(self, start, end):
+        """Minutos entre dois timestamps, calculados no banco"""
+        if self._dialect == "postgresql":
+            return extract("epoch", end - start) / 60
+        return (func.julianday(end) - func.julianday(start)) * 1440
+
+    @staticmethod
+    def _as_date(value) -> date:
+        """O dia como date (o PostgreSQL devolve timestamp, o SQLite texto 'AAAA-MM-DD')"""
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        return date.fromisoformat(str(value)[:10])
@@ -0,0 +1,187 @@
+"""
+Base dos repositórios SQLAlchemy assíncronos
+"""
+import asyncio
+import json
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import JSON, and_, insert, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import settings
+from ...domain.repositories.pagination import decode_cursor, encode_cursor
+
+
+def chunked(items: Sequence[Any], size: int):
+    """Divide a sequência em blocos de até `size` itens"""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class AsyncRepository:
+    """
+    Acesso à AsyncSession compartilhado pelos repositórios.
+
+    A AsyncSession não aceita operações simultâneas, mas os use cases rodam etapas
+    em paralelo com repositórios que dividem a mesma sessão da requisição. Cada
+    chamada ao banco passa por um lock guardado na própria sessão, então as
+    operações de repositórios diferentes se alternam em vez de colidir.
+
+    Dentro de uma unidade de trabalho (SqlAlchemyUnitOfWork) as gravações só
+    fazem flush; o commit único fica para o fim do use case.
+    """
+
+    def __init__(self, db_session: AsyncSession):
+        self._db = db_session
+        self._lock: asyncio.Lock = db_session.info.setdefault("repository_lock", asyncio.Lock())
+
+    async def _first(self, statement) -> Optional[Any]:
+        """Primeiro objeto do SELECT, ou None"""
+        async with self._lock:
+            return (await self._db.scalars(statement.limit(1))).first()
+
+    async def _all(self, statement) -> List[Any]:
+        """Todos os objetos do SELECT"""
+        async with self._lock:
+            return list((await self._db.scalars(statement)).all())
+
+    async def _rows(self, statement) -> List[Any]:
+        """Todas as linhas do SELECT com várias colunas (entidades e agregados)"""
+        async with self._lock:
+            return list((await self._db.execute(statement)).all())
+
+    async def _page(self, statement, model, cursor: Optional[str], limit: int) -> Tuple[List[Any], Optional[str]]:
+        """Página do SELECT ordenada por (created_at, id), a partir do cursor"""
+        items = await self._all(self._keyset(statement, model, cursor, limit))
+        return self._cut_page(items, limit)
+
+    def _keyset(self, statement, model, cursor: Optional[str], limit: int):
+        """
+        SELECT da página seguinte ao cursor, ordenado por (created_at, id).
+
+        Em vez de OFFSET (que lê e descarta todas as linhas anteriores), filtra
+        pela chave do último item já entregue e usa os índices que começam por
+        created_at. Busca um item a mais só para saber se há próxima página.
+        """
+        if cursor:
+            created_at, item_id = decode_cursor(cursor)
+            statement = statement.where(
+                model.created_at >= created_at,
+                or_(model.created_at > created_at, and_(model.created_at == created_at, model.id > item_id))
+            )
+        return statement.order_by(model.created_at, model.id).limit(limit + 1)
+
+    @staticmethod
+    def _cut_page(
+        items: List[Any],
+        limit: int,
+        key: Callable[[Any], Any] = lambda item: item
+    ) -> Tuple[List[Any], Optional[str]]:
+        """Descarta o item a mais do _keyset; o cursor vem do último (`key` tira o modelo da linha)"""
+        if len(items) <= limit:
+            return items, None
+        items = items[:limit]
+        last = key(items[-1])
+        return items, encode_cursor(last.created_at, last.id)
+
+    async def _scalar(self, statement) -> Any:
+        """Valor único do SELECT (contagens, existência)"""
+        async with self._lock:
+            return await self._db.scalar(statement)
+
+    async def _execute(self, statement, params: Optional[Dict[str, Any]] = None):
+        """Executa um comando (UPDATE, DELETE, texto) e devolve o resultado"""
+        async with self._lock:
+            return await self._db.execute(statement, params)
+
+    async def _execute_many(self, statement, params: List[Dict[str, Any]]) -> None:
+        """Executa o comando uma vez por conjunto de parâmetros (executemany, em blocos)"""
+        async with self._lock:
+            for chunk in chunked(params, settings.DATABASE_BULK_CHUNK_SIZE):
+                await self._db.execute(statement, chunk)
+
+    @property
+    def _in_unit_of_work(self) -> bool:
+        return self._db.info.get("unit_of_work_depth", 0) > 0
+
+    async def _flush(self) -> None:
+        """Envia as alterações pendentes sem confirmar a transação"""
+        async with self._lock:
+            await self._db.flush()
+
+    async def _save(self) -> None:
+        """
+        Envia as alterações pendentes ao banco.
+
+        Os valores gerados pelo banco voltam no próprio INSERT/UPDATE (RETURNING,
+        via eager_defaults dos modelos), sem SELECT de refresh. Fora de uma
+        unidade de trabalho a transação é confirmada em seguida.
+        """
+        async with self._lock:
+            await self._db.flush()
+            if not self._in_unit_of_work:
+                await self._db.commit()
+
+    async def _commit(self) -> None:
+        """Confirma a transação (a menos que uma unidade de trabalho esteja aberta)"""
+        async with self._lock:
+            if not self._in_unit_of_work:
+                await self._db.commit()
+
+    async def _insert_many(self, model, rows: List[Dict[str, Any]], commit: bool = True) -> int:
+        """
+        Insere as linhas em blocos de DATABASE_BULK_CHUNK_SIZE, sem passar pelo ORM.
+
+        No PostgreSQL (asyncpg) cada bloco vai por COPY; nos demais bancos por
+        executemany, que o SQLAlchemy agrupa em INSERTs de várias linhas. Todas as
+        linhas devem ter as mesmas chaves (nomes das colunas). Com commit=False a
+        transação fica aberta para outros comandos antes do _commit.
+        """
+        if not rows:
+            return 0
+
+        async with self._lock:
+            connection = await self._db.connection()
+            if connection.dialect.name == "postgresql" and connection.dialect.driver == "asyncpg":
+                await self._copy_records(connection, model.__table__, rows)
+            else:
+                for chunk in chunked(rows, settings.DATABASE_BULK_CHUNK_SIZE):
+                    await self._db.execute(insert(model), chunk)
+
+        if commit:
+            await self._commit()
+        return len(rows)
+
+    @staticmethod
+    async def _copy_records(connection, table, rows: List[Dict[str, Any]]) -> None:
+        """COPY ... FROM STDIN pelo asyncpg, dentro da transação da sessão"""
+        columns = list(rows[0])
+        json_columns = {name for name in columns if isinstance(table.c[name].type, JSON)}
+        raw_connection = await connection.get_raw_connection()
+        driver_connection = raw_connection.driver_connection
+        if not driver_connection.is_in_transaction():
+            # O adaptador só abre a transação no primeiro comando; sem ela o COPY faria autocommit
+            await connection.exec_driver_sql("SELECT 1")
+
+        for chunk in chunked(rows, settings.DATABASE_BULK_CHUNK_SIZE):
+            await driver_connection.copy_records_to_table(
+                table.name,
+                columns=columns,
+                records=[
+                    tuple(
+                        json.dumps(row[name]) if name in json_columns and row[name] is not None else row[name]
+                        for name in columns
+                    )
+                    for row in chunk
+                ]
+            )
+
+    async def _delete(self, instance) -> None:
+        """Remove a instância e confirma a transação"""
+        async with self._lock:
+            await self._db.delete(instance)
+            await self._db.flush()
+            if not self._in_unit_of_work:
+                await self._db.commit()
+
+    async def _rollback(self) -> None:
+        async with self._lock:
+            await self._db.rollback()
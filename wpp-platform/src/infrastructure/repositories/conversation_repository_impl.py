@@ -1,56 +1,64 @@
 """
 Implementação do repositório de conversas
 """
-from typing import List, Optional
-from uuid import UUID
-from sqlalchemy.orm import Session
+from typing import List, Optional, Sequence
+from uuid import UUID, uuid4
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ...domain.entities.conversation import Conversation
 from ...domain.repositories.conversation_repository import ConversationRepository
+from ...domain.repositories.filters import ConversationFilter
+from ...domain.repositories.pagination import Page
+from ...domain.repositories.summaries import ConversationStats, ConversationSummary
 from ...domain.value_objects.conversation_status import ConversationStatus
-from ..database.models import ConversationModel
+from ..database.models import ConversationModel, UserModel
+from . import rollups
+from .base_repository import AsyncRepository
+from .counters import USER_CONVERSATIONS
+from .user_repository_impl import UserRepositoryImpl
 
 
-class ConversationRepositoryImpl(ConversationRepository):
+class ConversationRepositoryImpl(AsyncRepository, ConversationRepository):
     """
-    Implementação do repositório de conversas usando SQLAlchemy
+    Implementação do repositório de conversas usando SQLAlchemy (AsyncSession)
     """
     
-    def __init__(self, db_session: Session):
-        self._db = db_session
+    def __init__(self, db_session: AsyncSession):
+        super().__init__(db_session)
+        self._users = UserRepositoryImpl(db_session)
     
     async def save(self, conversation: Conversation) -> Conversation:
-        """Salva uma conversa"""
-        if conversation.id:
+        """Salva uma conversa (a nova, de Conversation.create_new, vai direto para o INSERT)"""
+        db_conversation = None if conversation.is_new or not conversation.id else await self._get_by_id(conversation.id)
+        
+        if db_conversation:
             # Atualização
-            db_conversation = await self._get_by_id(conversation.id)
-            if db_conversation:
-                db_conversation.status = conversation.status.status.value
-                db_conversation.status_reason = conversation.status.reason
-                db_conversation.agent_id = conversation.agent_id
-                db_conversation.context = conversation.context
-                db_conversation.updated_at = conversation.updated_at
-            else:
-                raise ValueError("Conversa não encontrada")
+            previous = db_conversation.status
+            db_conversation.status = conversation.status.value
+            db_conversation.updated_at = conversation.updated_at
+            if previous and previous != db_conversation.status:
+                await self._move_status_rollups(db_conversation, previous)
         else:
-            # Criação
-            db_conversation = ConversationModel(
-                user_id=conversation.user_id,
-                whatsapp_conversation_id=conversation.whatsapp_conversation_id,
-                status=conversation.status.status.value,
-                status_reason=conversation.status.reason,
-                agent_id=conversation.agent_id,
-                context=conversation.context,
-                created_at=conversation.created_at,
-                updated_at=conversation.updated_at
-            )
+            # Criação (Conversation.create_new já traz o ID)
+            db_conversation = ConversationModel(**self._to_row(conversation))
             self._db.add(db_conversation)
+            await self._count_conversations([conversation.user_id])
         
-        self._db.commit()
-        self._db.refresh(db_conversation)
+        await self._save()
+        conversation.is_new = False
         
         return self._to_entity(db_conversation)
     
+    async def save_many(self, conversations: Sequence[Conversation]) -> int:
+        """Insere várias conversas novas em lote (COPY no PostgreSQL, INSERT multi-linha no SQLite)"""
+        inserted = await self._insert_many(
+            ConversationModel, [self._to_row(conversation) for conversation in conversations], commit=False
+        )
+        await self._count_conversations([conversation.user_id for conversation in conversations])
+        await self._commit()
+        return inserted
+    
     async def find_by_id(self, conversation_id: UUID) -> Optional[Conversation]:
         """Busca conversa por ID"""
         db_conversation = await self._get_by_id(conversation_id)
@@ -58,26 +66,30 @@ class ConversationRepositoryImpl(ConversationRepository):
     
     async def find_by_whatsapp_id(self, whatsapp_conversation_id: str) -> Optional[Conversation]:
         """Busca conversa por ID do WhatsApp"""
-        db_conversation = self._db.query(ConversationModel).filter(
-            ConversationModel.whatsapp_conversation_id == whatsapp_conversation_id
-        ).first()
+        db_conversation = await self._first(
+            select(ConversationModel).where(
+                ConversationModel.whatsapp_conversation_id == whatsapp_conversation_id
+            )
+        )
         
         return self._to_entity(db_conversation) if db_conversation else None
     
     async def find_by_user_id(self, user_id: UUID) -> List[Conversation]:
         """Busca conversas de um usuário"""
-        db_conversations = self._db.query(ConversationModel).filter(
-            ConversationModel.user_id == user_id
-        ).all()
+        db_conversations = await self._all(
+            select(ConversationModel).where(ConversationModel.user_id == user_id)
+        )
         
         return [self._to_entity(db_conversation) for db_conversation in db_conversations]
     
     async def find_active_by_user_id(self, user_id: UUID) -> Optional[Conversation]:
         """Busca conversa ativa de um usuário"""
-        db_conversation = self._db.query(ConversationModel).filter(
-            ConversationModel.user_id == user_id,
-            ConversationModel.status == ConversationStatus.ACTIVE.value
-        ).first()
+        db_conversation = await self._first(
+            select(ConversationModel).where(
+                ConversationModel.user_id == user_id,
+                ConversationModel.status == "active"
+            )
+        )
         
         return self._to_entity(db_conversation) if db_conversation else None
     
@@ -88,43 +100,169 @@ class ConversationRepositoryImpl(ConversationRepository):
         limit: int = 100
     ) -> List[Conversation]:
         """Busca conversas por status"""
-        db_conversations = self._db.query(ConversationModel).filter(
-            ConversationModel.status == status.value
-        ).offset(skip).limit(limit).all()
+        db_conversations = await self._all(
+            select(ConversationModel).where(
+                ConversationModel.status == status.value
+            ).offset(skip).limit(limit)
+        )
         
         return [self._to_entity(db_conversation) for db_conversation in db_conversations]
     
+    async def find_page(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        filters: Optional[ConversationFilter] = None
+    ) -> Page[Conversation]:
+        """Lista conversas por cursor (created_at, id), com filtros opcionais"""
+        query = select(ConversationModel).where(*self._where(filters))
+        db_conversations, next_cursor = await self._page(query, ConversationModel, cursor, limit)
+        return Page([self._to_entity(db_conversation) for db_conversation in db_conversations], next_cursor)
+    
+    async def find_summaries_page(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        filters: Optional[ConversationFilter] = None
+    ) -> Page[ConversationSummary]:
+        """Como find_page, mas com usuário e contagens de mensagens (uma consulta)"""
+        page = self._keyset(select(ConversationModel).where(*self._where(filters)), ConversationModel, cursor, limit)
+        rows, next_cursor = self._cut_page(await self._rows(self._summaries_query(page)), limit, key=lambda row: row[0])
+        return Page([self._to_summary(row) for row in rows], next_cursor)
+    
+    async def find_summaries(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        filters: Optional[ConversationFilter] = None
+    ) -> List[ConversationSummary]:
+        """Como find_all, mas com usuário e contagens de mensagens (uma consulta)"""
+        page = (
+            select(ConversationModel).where(*self._where(filters))
+            .order_by(ConversationModel.created_at, ConversationModel.id).offset(skip).limit(limit)
+        )
+        return [self._to_summary(row) for row in await self._rows(self._summaries_query(page))]
+    
     async def find_by_agent_id(self, agent_id: UUID) -> List[Conversation]:
         """Busca conversas de um agente"""
-        db_conversations = self._db.query(ConversationModel).filter(
-            ConversationModel.agent_id == agent_id
-        ).all()
+        db_conversations = await self._all(
+            select(ConversationModel).where(ConversationModel.agent_id == agent_id)
+        )
         
         return [self._to_entity(db_conversation) for db_conversation in db_conversations]
     
-    async def find_all(self, skip: int = 0, limit: int = 100) -> List[Conversation]:
-        """Lista todas as conversas"""
-        db_conversations = self._db.query(ConversationModel).offset(skip).limit(limit).all()
+    async def find_all(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        filters: Optional[ConversationFilter] = None
+    ) -> List[Conversation]:
+        """Lista conversas por offset, com filtros opcionais"""
+        db_conversations = await self._all(
+            select(ConversationModel).where(*self._where(filters))
+            .order_by(ConversationModel.created_at, ConversationModel.id).offset(skip).limit(limit)
+        )
         return [self._to_entity(db_conversation) for db_conversation in db_conversations]
     
     async def delete(self, conversation_id: UUID) -> bool:
         """Remove uma conversa"""
         db_conversation = await self._get_by_id(conversation_id)
         if db_conversation:
-            self._db.delete(db_conversation)
-            self._db.commit()
+            await self._count_conversations([db_conversation.user_id], sign=-1)
+            await self._delete(db_conversation)
             return True
         return False
     
     async def count_by_user_id(self, user_id: UUID) -> int:
         """Conta conversas de um usuário"""
-        return self._db.query(ConversationModel).filter(
-            ConversationModel.user_id == user_id
-        ).count()
+        return await self._scalar(
+            select(func.count()).select_from(ConversationModel).where(ConversationModel.user_id == user_id)
+        )
+    
+    async def get_stats(self) -> ConversationStats:
+        """Conversas por status e total de mensagens (somando os contadores), em uma consulta"""
+        rows = await self._rows(
+            select(ConversationModel.status, func.count(), func.coalesce(func.sum(ConversationModel.message_count), 0))
+            .group_by(ConversationModel.status)
+        )
+        return ConversationStats(
+            by_status={status: count for status, count, _ in rows},
+            total_messages=sum(messages for _, _, messages in rows)
+        )
+    
+    async def _move_status_rollups(self, db_conversation: ConversationModel, previous: str) -> None:
+        """
+        Move a conversa entre os buckets conversations_<status> se o job de
+        rollup já processou o minuto em que ela foi criada (rollups.py).
+
+        O UPDATE da conversa vai antes da leitura do mark, que trava a linha do
+        estado até o commit.
+        """
+        await self._flush()
+        mark = rollups.as_utc(await self._scalar(rollups.LOCKED_HIGH_WATER_MARK))
+        created_at = rollups.as_utc(db_conversation.created_at)
+        if mark is None or created_at is None or created_at >= mark:
+            return
+        dialect = self._db.get_bind().dialect.name
+        for statement in rollups.status_change_statements(dialect, created_at, previous, db_conversation.status):
+            await self._execute(statement)
     
     async def _get_by_id(self, conversation_id: UUID) -> Optional[ConversationModel]:
         """Busca conversa por ID no banco"""
-        return self._db.query(ConversationModel).filter(ConversationModel.id == conversation_id).first()
+        return await self._first(select(ConversationModel).where(ConversationModel.id == conversation_id))
+    
+    def _where(self, filters: Optional[ConversationFilter]) -> list:
+        """
+        Condições do WHERE para os filtros.
+
+        Usuário (com ou sem status) usa (user_id, status), agente usa
+        (agent_id, status) e só status usa (status, created_at, id).
+        """
+        if filters is None:
+            return []
+        conditions = []
+        if filters.user_id:
+            conditions.append(ConversationModel.user_id == filters.user_id)
+        if filters.agent_id:
+            conditions.append(ConversationModel.agent_id == filters.agent_id)
+        if filters.status:
+            conditions.append(ConversationModel.status == filters.status.value)
+        return conditions
+    
+    def _summaries_query(self, page):
+        """
+        SELECT das conversas da página com o usuário (LEFT JOIN), em uma ida ao banco.
+
+        As contagens de mensagens já estão nas colunas da conversa (counters.py).
+        """
+        return page.add_columns(UserModel).outerjoin(UserModel, UserModel.id == ConversationModel.user_id)
+    
+    def _to_summary(self, row) -> ConversationSummary:
+        """Converte uma linha de _summaries_query para a visão de listagem"""
+        db_conversation, db_user = row
+        return ConversationSummary(
+            conversation=self._to_entity(db_conversation),
+            user=self._users._to_entity(db_user) if db_user else None
+        )
+    
+    async def _count_conversations(self, user_ids: List[UUID], sign: int = 1) -> None:
+        """Soma (ou desconta) as conversas em users.conversation_count"""
+        by_user: dict = {}
+        for user_id in user_ids:
+            by_user[user_id] = by_user.get(user_id, 0) + sign
+        await self._execute_many(
+            USER_CONVERSATIONS, [{"b_id": user_id, "b_conversations": count} for user_id, count in by_user.items()]
+        )
+    
+    def _to_row(self, conversation: Conversation) -> dict:
+        """Converte entidade do domínio para as colunas da tabela"""
+        return {
+            "id": conversation.id or uuid4(),
+            "user_id": conversation.user_id,
+            "status": conversation.status.value,
+            "created_at": conversation.created_at,
+            "updated_at": conversation.updated_at
+        }
     
     def _to_entity(self, db_conversation: ConversationModel) -> Conversation:
         """Converte modelo do banco para entidade do domínio"""
@@ -134,5 +272,7 @@ class ConversationRepositoryImpl(ConversationRepository):
             status=ConversationStatus(db_conversation.status),
             created_at=db_conversation.created_at,
             updated_at=db_conversation.updated_at,
-            last_message_at=db_conversation.last_message_at
+            last_message_at=db_conversation.last_message_at,
+            message_count=db_conversation.message_count or 0,
+            unread_count=db_conversation.unread_count or 0
         )
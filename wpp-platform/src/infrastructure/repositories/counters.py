@@ -0,0 +1,145 @@
+"""
+Contadores desnormalizados de conversas e usuários
+
+message_count, unread_count e last_message_at (conversas) e conversation_count
+e total_messages (usuários) são mantidos pelos repositórios na mesma transação
+que grava a mensagem ou a conversa, com UPDATE ... SET coluna = coluna + n: o
+banco aplica o incremento de forma atômica, mesmo com gravações simultâneas.
+Desvios (SQL manual, falhas antigas) são corrigidos por reconcile_counters.
+"""
+from typing import Any, Dict, Iterable, List, Tuple
+from uuid import UUID
+
+from sqlalchemy import bindparam, case, false, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ...domain.value_objects.message_content import MessageDirection
+from ..database.models import ConversationModel, MessageModel, UserModel
+
+conversations = ConversationModel.__table__
+users = UserModel.__table__
+
+# Tabelas (não os modelos): com uma lista de parâmetros o UPDATE vira executemany
+CONVERSATION_MESSAGES = (
+    update(conversations)
+    .where(conversations.c.id == bindparam("b_id"))
+    .values(
+        message_count=conversations.c.message_count + bindparam("b_messages"),
+        unread_count=conversations.c.unread_count + bindparam("b_unread"),
+        last_message_at=case(
+            (
+                or_(
+                    conversations.c.last_message_at.is_(None),
+                    conversations.c.last_message_at < bindparam("b_last", type_=conversations.c.last_message_at.type)
+                ),
+                bindparam("b_last", type_=conversations.c.last_message_at.type)
+            ),
+            else_=conversations.c.last_message_at
+        )
+    )
+)
+
+CONVERSATION_UNREAD = (
+    update(conversations)
+    .where(conversations.c.id == bindparam("b_id"))
+    .values(unread_count=conversations.c.unread_count + bindparam("b_unread"))
+)
+
+USER_MESSAGES = (
+    update(users)
+    .where(users.c.id == bindparam("b_id"))
+    .values(total_messages=users.c.total_messages + bindparam("b_messages"))
+)
+
+USER_CONVERSATIONS = (
+    update(users)
+    .where(users.c.id == bindparam("b_id"))
+    .values(conversation_count=users.c.conversation_count + bindparam("b_conversations"))
+)
+
+
+def is_unread(direction: str, is_processed: bool) -> bool:
+    """Não lida = recebida e ainda não processada (o "pending" da API)"""
+    return direction == MessageDirection.INCOMING.value and not is_processed
+
+
+def message_deltas(rows: Iterable[Dict[str, Any]], sign: int = 1) -> Tuple[List[dict], List[dict]]:
+    """
+    Parâmetros de CONVERSATION_MESSAGES e USER_MESSAGES para mensagens gravadas
+    (sign=1) ou removidas (sign=-1), somados por conversa e por usuário.
+    """
+    by_conversation: Dict[UUID, dict] = {}
+    by_user: Dict[UUID, int] = {}
+    for row in rows:
+        delta = by_conversation.setdefault(
+            row["conversation_id"],
+            {"b_id": row["conversation_id"], "b_messages": 0, "b_unread": 0, "b_last": None}
+        )
+        delta["b_messages"] += sign
+        delta["b_unread"] += sign * is_unread(row["direction"], row["is_processed"])
+        created_at = row.get("created_at")
+        if sign > 0 and created_at and (delta["b_last"] is None or created_at > delta["b_last"]):
+            delta["b_last"] = created_at
+        by_user[row["user_id"]] = by_user.get(row["user_id"], 0) + sign
+    return (
+        list(by_conversation.values()),
+        [{"b_id": user_id, "b_messages": count} for user_id, count in by_user.items()]
+    )
+
+
+def unread_deltas(rows: Iterable[Tuple[UUID, int]]) -> List[dict]:
+    """Parâmetros de CONVERSATION_UNREAD a partir de pares (conversation_id, delta)"""
+    by_conversation: Dict[UUID, int] = {}
+    for conversation_id, delta in rows:
+        by_conversation[conversation_id] = by_conversation.get(conversation_id, 0) + delta
+    return [
+        {"b_id": conversation_id, "b_unread": delta}
+        for conversation_id, delta in by_conversation.items() if delta
+    ]
+
+
+def reconcile_statements() -> list:
+    """
+    UPDATEs que recalculam todos os contadores a partir de messages e conversations.
+
+    Cada contador vem de uma subconsulta correlacionada que usa os índices por
+    conversa/usuário; só as linhas com valor divergente são reescritas, então o
+    rowcount de cada UPDATE é o número de linhas corrigidas.
+    """
+    messages = MessageModel.__table__
+    of_conversation = messages.c.conversation_id == conversations.c.id
+    message_count = select(func.count()).where(of_conversation).scalar_subquery()
+    unread_count = select(func.count()).where(
+        of_conversation,
+        messages.c.direction == MessageDirection.INCOMING.value,
+        messages.c.is_processed == false()
+    ).scalar_subquery()
+    last_message_at = select(func.max(messages.c.created_at)).where(of_conversation).scalar_subquery()
+
+    conversation_count = select(func.count()).where(conversations.c.user_id == users.c.id).scalar_subquery()
+    total_messages = select(func.count()).where(messages.c.user_id == users.c.id).scalar_subquery()
+
+    return [
+        update(conversations)
+        .where(or_(
+            conversations.c.message_count != message_count,
+            conversations.c.unread_count != unread_count,
+            conversations.c.last_message_at.is_distinct_from(last_message_at)
+        ))
+        .values(message_count=message_count, unread_count=unread_count, last_message_at=last_message_at),
+        update(users)
+        .where(or_(
+            users.c.conversation_count != conversation_count,
+            users.c.total_messages != total_messages
+        ))
+        .values(conversation_count=conversation_count, total_messages=total_messages),
+    ]
+
+
+async def reconcile_counters(session: AsyncSession) -> Dict[str, int]:
+    """Reconstrói os contadores em uma transação; retorna quantas linhas foram corrigidas por tabela"""
+    conversation_update, user_update = reconcile_statements()
+    fixed_conversations = (await session.execute(conversation_update)).rowcount
+    fixed_users = (await session.execute(user_update)).rowcount
+    await session.commit()
+    return {"conversations": fixed_conversations, "users": fixed_users}
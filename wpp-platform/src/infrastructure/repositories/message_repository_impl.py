@@ -1,76 +1,362 @@
 """
 Implementação do repositório de mensagens
 """
-from typing import List, Optional
-from sqlalchemy.orm import Session
-from src.domain.entities.message import Message
-from src.domain.repositories.message_repository import MessageRepository
-from src.infrastructure.database.models import MessageModel
-
-
-class MessageRepositoryImpl(MessageRepository):
-    """Implementação do repositório de mensagens"""
-    
-    def __init__(self, db: Session):
-        self.db = db
-    
-    def save(self, message: Message) -> Message:
-        """Salva uma mensagem"""
-        message_model = MessageModel(
-            id=message.id,
-            conversation_id=message.conversation_id,
-            sender_phone=message.sender_phone.value,
-            content=message.content.value,
-            message_type=message.message_type,
-            timestamp=message.timestamp,
-            is_from_bot=message.is_from_bot,
-            metadata=message.metadata
-        )
-        
-        self.db.add(message_model)
-        self.db.commit()
-        self.db.refresh(message_model)
-        
-        return self._to_domain(message_model)
-    
-    def find_by_id(self, message_id: str) -> Optional[Message]:
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Sequence
+from uuid import UUID, uuid4
+from sqlalchemy import func, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ...domain.entities.message import Message
+from ...domain.repositories.filters import MessageFilter
+from ...domain.repositories.message_repository import MessageRepository
+from ...domain.repositories.pagination import Page
+from ...domain.value_objects.message_content import MessageContent, MessageType, MessageDirection
+from ..database.models import ConversationModel, MessageModel
+from .base_repository import AsyncRepository
+from .counters import (
+    CONVERSATION_MESSAGES, CONVERSATION_UNREAD, USER_MESSAGES, is_unread, message_deltas, unread_deltas
+)
+from .rollups import as_utc
+from .response_times import AWAIT_REPLY, answer_statement, record_statements, replies, sketch_params
+
+
+class MessageRepositoryImpl(AsyncRepository, MessageRepository):
+    """
+    Implementação do repositório de mensagens usando SQLAlchemy (AsyncSession)
+    """
+
+    def __init__(self, db_session: AsyncSession):
+        super().__init__(db_session)
+
+    async def save(self, message: Message) -> Message:
+        """
+        Salva uma mensagem.
+
+        Na criação, os contadores da conversa e do usuário e o tempo de resposta
+        (response_times.py) são atualizados na mesma transação. Mensagem nova
+        (`is_new`, de Message.create_new) vai direto para o INSERT, sem o SELECT
+        pelo ID.
+        """
+        db_message = None if message.is_new or not message.id else await self._get_by_id(message.id)
+
+        if db_message:
+            # Atualização
+            was_unread = is_unread(db_message.direction, db_message.is_processed)
+            db_message.is_processed = message.is_processed
+            db_message.message_metadata = message.content.metadata
+            await self._update_unread([
+                (db_message.conversation_id, is_unread(db_message.direction, db_message.is_processed) - was_unread)
+            ])
+        else:
+            # Criação
+            row = self._to_row(message)
+            db_message = MessageModel(**row)
+            self._db.add(db_message)
+            seen = await self._count_message(row)
+            await self._track_replies([row], seen)
+
+        await self._save()
+        message.is_new = False
+
+        return self._to_entity(db_message)
+
+    async def save_many(self, messages: Sequence[Message]) -> int:
+        """Insere várias mensagens novas em lote (COPY no PostgreSQL, INSERT multi-linha no SQLite)"""
+        rows = [self._to_row(message) for message in messages]
+        inserted = await self._insert_many(MessageModel, rows, commit=False)
+        await self._count_messages(rows)
+        await self._track_replies(rows)
+        await self._commit()
+        return inserted
+
+    async def find_by_id(self, message_id: UUID) -> Optional[Message]:
         """Busca mensagem por ID"""
-        message_model = self.db.query(MessageModel).filter(
-            MessageModel.id == message_id
-        ).first()
-        
-        if message_model:
-            return self._to_domain(message_model)
-        return None
-    
-    def find_by_conversation_id(self, conversation_id: str) -> List[Message]:
-        """Busca mensagens por ID da conversa"""
-        message_models = self.db.query(MessageModel).filter(
-            MessageModel.conversation_id == conversation_id
-        ).order_by(MessageModel.timestamp).all()
-        
-        return [self._to_domain(model) for model in message_models]
-    
-    def find_by_sender_phone(self, phone: str) -> List[Message]:
-        """Busca mensagens por telefone do remetente"""
-        message_models = self.db.query(MessageModel).filter(
-            MessageModel.sender_phone == phone
-        ).order_by(MessageModel.timestamp).all()
-        
-        return [self._to_domain(model) for model in message_models]
-    
-    def _to_domain(self, model: MessageModel) -> Message:
-        """Converte modelo para entidade de domínio"""
-        from src.domain.value_objects.phone_number import PhoneNumber
-        from src.domain.value_objects.message_content import MessageContent
-        
+        db_message = await self._get_by_id(message_id)
+        return self._to_entity(db_message) if db_message else None
+
+    async def find_by_whatsapp_id(self, whatsapp_message_id: str) -> Optional[Message]:
+        """Busca mensagem por ID do WhatsApp"""
+        db_message = await self._first(
+            select(MessageModel).where(MessageModel.whatsapp_message_id == whatsapp_message_id)
+        )
+
+        return self._to_entity(db_message) if db_message else None
+
+    async def find_by_conversation_id(
+        self,
+        conversation_id: UUID,
+        skip: int = 0,
+        limit: int = 50
+    ) -> List[Message]:
+        """Busca mensagens de uma conversa"""
+        db_messages = await self._all(
+            select(MessageModel).where(
+                MessageModel.conversation_id == conversation_id
+            ).order_by(MessageModel.created_at).offset(skip).limit(limit)
+        )
+
+        return [self._to_entity(db_message) for db_message in db_messages]
+
+    async def find_all(
+        self,
+        skip: int = 0,
+        limit: int = 50,
+        filters: Optional[MessageFilter] = None
+    ) -> List[Message]:
+        """Lista mensagens por offset, com filtros opcionais"""
+        db_messages = await self._all(
+            select(MessageModel).where(*self._where(filters))
+            .order_by(MessageModel.created_at, MessageModel.id).offset(skip).limit(limit)
+        )
+        return [self._to_entity(db_message) for db_message in db_messages]
+
+    async def find_page(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+        filters: Optional[MessageFilter] = None
+    ) -> Page[Message]:
+        """Lista mensagens por cursor (created_at, id), com filtros opcionais"""
+        query = select(MessageModel).where(*self._where(filters))
+        db_messages, next_cursor = await self._page(query, MessageModel, cursor, limit)
+        return Page([self._to_entity(db_message) for db_message in db_messages], next_cursor)
+
+    async def find_by_user_id(
+        self,
+        user_id: UUID,
+        skip: int = 0,
+        limit: int = 50
+    ) -> List[Message]:
+        """Busca mensagens de um usuário"""
+        db_messages = await self._all(
+            select(MessageModel).where(
+                MessageModel.user_id == user_id
+            ).order_by(MessageModel.created_at).offset(skip).limit(limit)
+        )
+
+        return [self._to_entity(db_message) for db_message in db_messages]
+
+    async def find_unprocessed_messages(self) -> List[Message]:
+        """Busca mensagens não processadas"""
+        db_messages = await self._all(
+            select(MessageModel).where(
+                MessageModel.is_processed == False
+            ).order_by(MessageModel.created_at)
+        )
+
+        return [self._to_entity(db_message) for db_message in db_messages]
+
+    @asynccontextmanager
+    async def claim_unprocessed_batch(self, limit: int) -> AsyncIterator[List[Message]]:
+        """
+        Reivindica uma página de mensagens não processadas.
+
+        No PostgreSQL usa SELECT ... FOR UPDATE SKIP LOCKED: cada worker recebe
+        linhas diferentes e não espera pelos outros. O SQLite não tem travas por
+        linha; lá a transação começa com BEGIN IMMEDIATE, que serializa os workers
+        no lock de escrita do banco, e o próximo só lê depois do commit do anterior.
+        """
+        query = select(MessageModel).where(
+            MessageModel.is_processed == False
+        ).order_by(MessageModel.created_at).limit(limit)
+
+        if self._db.get_bind().dialect.name == "sqlite":
+            await self._execute(text("BEGIN IMMEDIATE"))
+        else:
+            query = query.with_for_update(skip_locked=True)
+
+        try:
+            yield [self._to_entity(db_message) for db_message in await self._all(query)]
+        except BaseException:
+            await self._rollback()
+            raise
+        await self._commit()
+
+    async def mark_as_processed_bulk(self, message_ids: Sequence[UUID]) -> int:
+        """
+        Marca as mensagens como processadas em um único UPDATE; o commit fica com claim_unprocessed_batch.
+
+        O RETURNING devolve as que mudaram de fato, para descontar as não lidas das conversas.
+        """
+        if not message_ids:
+            return 0
+        result = await self._execute(
+            update(MessageModel)
+            .where(MessageModel.id.in_(message_ids), MessageModel.is_processed == False)
+            .values(is_processed=True)
+            .returning(MessageModel.conversation_id, MessageModel.direction)
+            .execution_options(synchronize_session=False)
+        )
+        marked = result.all()
+        await self._update_unread([
+            (conversation_id, -1) for conversation_id, direction in marked if is_unread(direction, False)
+        ])
+        return len(marked)
+
+    async def find_by_direction(
+        self,
+        direction: MessageDirection,
+        skip: int = 0,
+        limit: int = 50
+    ) -> List[Message]:
+        """Busca mensagens por direção"""
+        db_messages = await self._all(
+            select(MessageModel).where(
+                MessageModel.direction == direction.value
+            ).order_by(MessageModel.created_at).offset(skip).limit(limit)
+        )
+
+        return [self._to_entity(db_message) for db_message in db_messages]
+
+    async def count_by_conversation_id(self, conversation_id: UUID) -> int:
+        """Conta mensagens de uma conversa"""
+        return await self._scalar(
+            select(func.count()).select_from(MessageModel).where(MessageModel.conversation_id == conversation_id)
+        )
+
+    async def delete(self, message_id: UUID) -> bool:
+        """Remove uma mensagem (last_message_at da conversa só é recalculado pela reconciliação)"""
+        db_message = await self._get_by_id(message_id)
+        if db_message:
+            await self._count_messages([{
+                "conversation_id": db_message.conversation_id,
+                "user_id": db_message.user_id,
+                "direction": db_message.direction,
+                "is_processed": db_message.is_processed
+            }], sign=-1)
+            await self._delete(db_message)
+            return True
+        return False
+
+    async def exists_by_whatsapp_id(self, whatsapp_message_id: str, is_processed: Optional[bool] = None) -> bool:
+        """Verifica se mensagem existe pelo ID do WhatsApp (usa o índice único)"""
+        query = select(MessageModel.id).where(MessageModel.whatsapp_message_id == whatsapp_message_id)
+        if is_processed is not None:
+            query = query.where(MessageModel.is_processed == is_processed)
+        return await self._first(query) is not None
+
+    async def _count_messages(self, rows: List[dict], sign: int = 1) -> None:
+        """Soma (ou desconta) as mensagens nos contadores das conversas e dos usuários"""
+        conversation_params, user_params = message_deltas(rows, sign)
+        await self._execute_many(CONVERSATION_MESSAGES, conversation_params)
+        await self._execute_many(USER_MESSAGES, user_params)
+
+    async def _count_message(self, row: dict) -> Dict[UUID, Optional[datetime]]:
+        """
+        _count_messages de uma única mensagem, um UPDATE por tabela.
+
+        O UPDATE da conversa devolve (RETURNING) o início da espera por resposta,
+        que não muda com os contadores: _track_replies não precisa do SELECT.
+        """
+        (conversation_params,), (user_params,) = message_deltas([row])
+        conversations = ConversationModel.__table__
+        result = await self._execute(
+            CONVERSATION_MESSAGES.returning(conversations.c.id, conversations.c.awaiting_reply_since),
+            conversation_params
+        )
+        seen = dict(result.all())
+        await self._execute(USER_MESSAGES, user_params)
+        return seen
+
+    async def _track_replies(self, rows: List[dict], seen: Optional[Dict[UUID, Optional[datetime]]] = None) -> None:
+        """
+        Atualiza a espera por resposta das conversas e grava os tempos de resposta.
+
+        Só as conversas com mensagem enviada no lote precisam do estado atual
+        (um SELECT, a menos que `seen` já o traga); a troca é um compare-and-set,
+        e se outra gravação mudou a espera antes, as amostras dessa conversa são
+        descartadas em vez de contadas em dobro. Sem mudança na espera (nada
+        pendente para responder) não há troca. As que só receberam mensagens
+        usam o COALESCE.
+        """
+        replying = {row["conversation_id"] for row in rows if row["direction"] == MessageDirection.OUTGOING.value}
+        if seen is None:
+            seen = dict(await self._rows(
+                select(ConversationModel.id, ConversationModel.awaiting_reply_since)
+                .where(ConversationModel.id.in_(replying))
+            )) if replying else {}
+
+        waiting = {conversation_id: as_utc(since) for conversation_id, since in seen.items() if since is not None}
+        found = replies(rows, waiting)
+
+        await self._execute_many(AWAIT_REPLY, [
+            {"b_id": conversation_id, "b_since": since}
+            for conversation_id, since in waiting.items() if conversation_id not in replying
+        ])
+        lost = set()
+        for conversation_id in replying:
+            current = seen.get(conversation_id)
+            if (as_utc(current) if current is not None else None) == waiting.get(conversation_id):
+                continue
+            result = await self._execute(
+                answer_statement(conversation_id, seen.get(conversation_id), waiting.get(conversation_id))
+            )
+            if result.rowcount == 0:
+                lost.add(conversation_id)
+
+        bin_params, hour_params = sketch_params(reply for reply in found if reply[0] not in lost)
+        bin_statement, hour_statement = record_statements(self._db.get_bind().dialect.name)
+        await self._execute_many(bin_statement, bin_params)
+        await self._execute_many(hour_statement, hour_params)
+
+    async def _update_unread(self, changes: List[tuple]) -> None:
+        """Aplica as variações (conversation_id, delta) de unread_count"""
+        await self._execute_many(CONVERSATION_UNREAD, unread_deltas(changes))
+
+    async def _get_by_id(self, message_id: UUID) -> Optional[MessageModel]:
+        """Busca mensagem por ID no banco"""
+        return await self._first(select(MessageModel).where(MessageModel.id == message_id))
+
+    def _where(self, filters: Optional[MessageFilter]) -> list:
+        """
+        Condições do WHERE para os filtros.
+
+        Com conversa o índice (conversation_id, created_at) atende; sem ela,
+        a direção usa (direction, created_at, id) e as pendentes o índice parcial.
+        """
+        if filters is None:
+            return []
+        conditions = []
+        if filters.conversation_id:
+            conditions.append(MessageModel.conversation_id == filters.conversation_id)
+        if filters.user_id:
+            conditions.append(MessageModel.user_id == filters.user_id)
+        if filters.direction:
+            conditions.append(MessageModel.direction == filters.direction.value)
+        if filters.is_processed is not None:
+            conditions.append(MessageModel.is_processed == filters.is_processed)
+        return conditions
+
+    def _to_row(self, message: Message) -> dict:
+        """Converte entidade do domínio para as colunas da tabela"""
+        return {
+            "id": message.id or uuid4(),
+            "conversation_id": message.conversation_id,
+            "user_id": message.user_id,
+            "whatsapp_message_id": message.whatsapp_message_id,
+            "content": message.content.text,
+            "message_type": message.content.message_type.value,
+            "direction": message.content.direction.value,
+            "is_processed": message.is_processed,
+            "message_metadata": message.content.metadata,
+            "created_at": message.created_at
+        }
+
+    def _to_entity(self, db_message: MessageModel) -> Message:
+        """Converte modelo do banco para entidade do domínio"""
         return Message(
-            id=model.id,
-            conversation_id=model.conversation_id,
-            sender_phone=PhoneNumber(model.sender_phone),
-            content=MessageContent(model.content),
-            message_type=model.message_type,
-            timestamp=model.timestamp,
-            is_from_bot=model.is_from_bot,
-            metadata=model.metadata or {}
+            id=db_message.id,
+            conversation_id=db_message.conversation_id,
+            user_id=db_message.user_id,
+            whatsapp_message_id=db_message.whatsapp_message_id,
+            content=MessageContent(
+                text=db_message.content,
+                message_type=MessageType(db_message.message_type),
+                direction=MessageDirection(db_message.direction),
+                metadata=db_message.message_metadata
+            ),
+            is_processed=db_message.is_processed,
+            created_at=db_message.created_at
         )
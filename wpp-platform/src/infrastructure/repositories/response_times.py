@@ -0,0 +1,175 @@
+"""
+Tempo de resposta: da primeira mensagem recebida sem resposta até a próxima enviada
+
+conversations.awaiting_reply_since guarda a primeira mensagem recebida que
+ainda não teve resposta. O repositório de mensagens atualiza esse estado na
+mesma transação que grava a mensagem: uma recebida só preenche o campo se ele
+estiver vazio (COALESCE); uma enviada o limpa com compare-and-set, e a
+diferença entre as duas vira uma amostra de tempo de resposta.
+
+As amostras vão para sketches por hora (DDSketch, sketches.py) gravados como
+linhas (hora, bin, contagem) em response_time_bins, mais os totais exatos da
+hora em response_time_hours. Os UPSERTs somam às linhas existentes, então
+gravações simultâneas não se perdem e os percentis de qualquer intervalo saem
+do SUM por bin, sem ler as mensagens.
+"""
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import bindparam, case, delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ...domain.value_objects.message_content import MessageDirection
+from ..database.models import ConversationModel, MessageModel, ResponseTimeBinModel, ResponseTimeHourModel
+from .rollups import as_utc, floor
+from .sketches import DDSketch
+
+conversations = ConversationModel.__table__
+bins = ResponseTimeBinModel.__table__
+hours = ResponseTimeHourModel.__table__
+
+# Recebida: só marca o início da espera se nenhuma outra estiver pendente
+AWAIT_REPLY = (
+    update(conversations)
+    .where(conversations.c.id == bindparam("b_id"))
+    .values(awaiting_reply_since=func.coalesce(
+        conversations.c.awaiting_reply_since,
+        bindparam("b_since", type_=conversations.c.awaiting_reply_since.type)
+    ))
+)
+
+# (conversation_id, respondida em, segundos)
+Reply = Tuple[UUID, datetime, float]
+
+
+def replies(rows: Iterable[Dict[str, Any]], waiting: Dict[UUID, datetime]) -> List[Reply]:
+    """
+    Tempos de resposta das mensagens, em ordem de envio.
+
+    `waiting` é o estado de cada conversa (início da espera) e é atualizado:
+    recebida sem espera pendente abre uma; enviada depois dela fecha e gera
+    uma amostra. Enviadas anteriores à espera não a respondem.
+    """
+    found: List[Reply] = []
+    for row in sorted(rows, key=lambda row: row["created_at"]):
+        conversation_id, created_at = row["conversation_id"], row["created_at"]
+        if row["direction"] == MessageDirection.INCOMING.value:
+            waiting.setdefault(conversation_id, created_at)
+        elif conversation_id in waiting and created_at >= waiting[conversation_id]:
+            since = waiting.pop(conversation_id)
+            found.append((conversation_id, created_at, (created_at - since).total_seconds()))
+    return found
+
+
+def answer_statement(conversation_id: UUID, seen: Optional[datetime], pending: Optional[datetime]):
+    """Troca o início da espera de `seen` (o valor lido) para `pending`; 0 linhas = outra gravação chegou antes"""
+    return (
+        update(conversations)
+        .where(
+            conversations.c.id == conversation_id,
+            conversations.c.awaiting_reply_since.is_not_distinct_from(seen)
+        )
+        .values(awaiting_reply_since=pending)
+    )
+
+
+def sketch_params(found: Iterable[Reply]) -> Tuple[List[dict], List[dict]]:
+    """Parâmetros de record_statements: contagem por (hora, bin) e totais por hora"""
+    sketch = DDSketch()
+    by_bin: Dict[Tuple[datetime, int], int] = {}
+    by_hour: Dict[datetime, dict] = {}
+    for _, answered_at, seconds in found:
+        hour = floor(answered_at, "hour")
+        key = (hour, sketch.index(seconds))
+        by_bin[key] = by_bin.get(key, 0) + 1
+        totals = by_hour.setdefault(
+            hour, {"b_bucket": hour, "b_count": 0, "b_total": 0.0, "b_min": seconds, "b_max": seconds}
+        )
+        totals["b_count"] += 1
+        totals["b_total"] += seconds
+        totals["b_min"] = min(totals["b_min"], seconds)
+        totals["b_max"] = max(totals["b_max"], seconds)
+    return (
+        [{"b_bucket": hour, "b_bin": index, "b_count": count} for (hour, index), count in by_bin.items()],
+        list(by_hour.values())
+    )
+
+
+def record_statements(dialect: str) -> Tuple[Any, Any]:
+    """UPSERTs (executemany) que somam as amostras aos sketches e aos totais de cada hora"""
+    upsert = postgresql_insert if dialect == "postgresql" else sqlite_insert
+
+    bin_statement = upsert(bins).values(
+        bucket=bindparam("b_bucket", type_=bins.c.bucket.type), bin=bindparam("b_bin"), count=bindparam("b_count")
+    )
+    bin_statement = bin_statement.on_conflict_do_update(
+        index_elements=[bins.c.bucket, bins.c.bin],
+        set_={"count": bins.c.count + bin_statement.excluded.count}
+    )
+
+    hour_statement = upsert(hours).values(
+        bucket=bindparam("b_bucket", type_=hours.c.bucket.type),
+        count=bindparam("b_count"),
+        total_seconds=bindparam("b_total"),
+        min_seconds=bindparam("b_min"),
+        max_seconds=bindparam("b_max")
+    )
+    excluded = hour_statement.excluded
+    hour_statement = hour_statement.on_conflict_do_update(
+        index_elements=[hours.c.bucket],
+        set_={
+            "count": hours.c.count + excluded.count,
+            "total_seconds": hours.c.total_seconds + excluded.total_seconds,
+            "min_seconds": case((excluded.min_seconds < hours.c.min_seconds, excluded.min_seconds),
+                                else_=hours.c.min_seconds),
+            "max_seconds": case((excluded.max_seconds > hours.c.max_seconds, excluded.max_seconds),
+                                else_=hours.c.max_seconds),
+        }
+    )
+    return bin_statement, hour_statement
+
+
+async def rebuild_response_times(session: AsyncSession, batch_size: int = 10_000) -> Dict[str, int]:
+    """
+    Recalcula sketches e esperas pendentes a partir de todas as mensagens.
+
+    Para a primeira carga (bancos com histórico) ou correções; lê as mensagens
+    em ordem de conversa pelo índice (conversation_id, created_at), em blocos,
+    e grava só os agregados de cada bloco. Deve rodar sem gravações de
+    mensagens em paralelo.
+    """
+    dialect = session.get_bind().dialect.name
+    await session.execute(delete(bins))
+    await session.execute(delete(hours))
+    await session.execute(update(conversations).values(awaiting_reply_since=None))
+
+    bin_statement, hour_statement = record_statements(dialect)
+    waiting: Dict[UUID, datetime] = {}
+    total = 0
+    result = await session.stream(
+        select(MessageModel.conversation_id, MessageModel.direction, MessageModel.created_at)
+        .order_by(MessageModel.conversation_id, MessageModel.created_at)
+        .execution_options(yield_per=batch_size)
+    )
+    async for chunk in result.partitions(batch_size):
+        found = replies(
+            ({"conversation_id": conversation_id, "direction": direction, "created_at": as_utc(created_at)}
+             for conversation_id, direction, created_at in chunk),
+            waiting
+        )
+        total += len(found)
+        # Os UPSERTs somam, então cada bloco grava só as próprias amostras
+        bin_params, hour_params = sketch_params(found)
+        for statement, params in ((bin_statement, bin_params), (hour_statement, hour_params)):
+            if params:
+                await session.execute(statement, params)
+
+    if waiting:
+        await session.execute(AWAIT_REPLY, [
+            {"b_id": conversation_id, "b_since": since} for conversation_id, since in waiting.items()
+        ])
+    await session.commit()
+    return {"replies": total, "awaiting": len(waiting)}
@@ -0,0 +1,323 @@
+"""
+Tabelas de rollup do analytics
+
+analytics_rollups guarda contagens por bucket de minuto, hora e dia, para que
+as tendências de 30 dias leiam algumas dezenas de linhas em vez de varrer
+messages. As métricas que vêm das tabelas (mensagens por direção, usuários
+novos, conversas abertas por status, usuários ativos e recorrentes) são
+preenchidas pelo job de catch-up: a partir do high-water mark, cada janela de
+minutos completos é recalculada (DELETE + INSERT ... SELECT), as horas e os
+dias tocados são somados dos minutos e o mark avança na mesma transação. Como
+a janela é sempre recalculada inteira, repetir uma rodada ou voltar o mark
+(`since`) não duplica contagens.
+
+Conversas entram em conversations_<status> pelo minuto de criação, com o
+status do momento em que o minuto foi processado. Como o job não volta a um
+minuto já processado, a troca de status de uma conversa anterior ao mark é
+aplicada na gravação (ConversationRepositoryImpl.save): status_change_statements
+tira a conversa do bucket do status antigo e soma no novo, na mesma transação
+do UPDATE. A leitura do mark nessa transação trava a linha do estado, que o job
+também trava no início de cada janela: ou a troca vê o mark já avançado e move
+a contagem, ou o job espera e lê o status novo.
+
+Escalações não ficam gravadas em nenhuma tabela: record_escalations soma nos
+três buckets no momento em que o processamento decide escalar, e o job não
+mexe nelas.
+
+Ativos e recorrentes não somam entre buckets (o mesmo usuário em duas horas é
+um ativo no dia), então só existem por dia, contados a partir do conjunto
+(dia, usuário) em analytics_active_users.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Date, and_, cast, delete, func, literal, literal_column, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from ...domain.value_objects.message_content import MessageDirection
+from ..database.models import (
+    AnalyticsActiveUserModel,
+    AnalyticsRollupModel,
+    AnalyticsRollupStateModel,
+    ConversationModel,
+    MessageModel,
+    UserModel,
+    utcnow
+)
+
+rollups = AnalyticsRollupModel.__table__
+active_users = AnalyticsActiveUserModel.__table__
+state = AnalyticsRollupStateModel.__table__
+
+GRANULARITIES = ("minute", "hour", "day")
+
+# Métricas (as de mensagens e conversas levam a direção/status gravados no sufixo)
+MESSAGES_INCOMING = f"messages_{MessageDirection.INCOMING.value}"
+MESSAGES_OUTGOING = f"messages_{MessageDirection.OUTGOING.value}"
+NEW_USERS = "new_users"
+CONVERSATIONS_PREFIX = "conversations_"
+ACTIVE_USERS = "active_users"
+RETURNING_USERS = "returning_users"
+ESCALATIONS = "escalations"
+
+# Somadas na gravação (record_escalations), fora do recálculo do job
+WRITE_PATH_METRICS = (ESCALATIONS,)
+# Contagens distintas: só por dia, a partir de analytics_active_users
+DAY_ONLY_METRICS = (ACTIVE_USERS, RETURNING_USERS)
+
+STATE_NAME = "rollups"
+# Cada janela do catch-up vira uma transação (a primeira rodada pode cobrir meses)
+WINDOW = timedelta(days=1)
+
+HIGH_WATER_MARK = select(state.c.high_water_mark).where(state.c.name == STATE_NAME)
+# FOR UPDATE no PostgreSQL; no SQLite quem serializa é o lock de escrita já obtido
+LOCKED_HIGH_WATER_MARK = HIGH_WATER_MARK.with_for_update()
+
+# Formato em que o SQLAlchemy grava DateTime no SQLite, truncado no bucket
+SQLITE_BUCKET_FORMATS = {
+    "minute": "%Y-%m-%d %H:%M:00.000000",
+    "hour": "%Y-%m-%d %H:00:00.000000",
+    "day": "%Y-%m-%d 00:00:00.000000",
+}
+
+
+def floor(value: datetime, granularity: str) -> datetime:
+    """Início do bucket que contém `value`"""
+    value = value.replace(second=0, microsecond=0)
+    if granularity in ("hour", "day"):
+        value = value.replace(minute=0)
+    if granularity == "day":
+        value = value.replace(hour=0)
+    return value
+
+
+def as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Timestamp sem fuso, em UTC (o PostgreSQL devolve timestamptz, o SQLite texto sem fuso)"""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def truncate(column, granularity: str, dialect: str):
+    """
+    Início do bucket do timestamp, calculado no banco.
+
+    O granularity/formato vai como texto fixo, não parâmetro: no PostgreSQL
+    date_trunc($1, ...) no SELECT e date_trunc($2, ...) no GROUP BY não são
+    reconhecidos como a mesma expressão.
+    """
+    if dialect == "postgresql":
+        return func.date_trunc(literal_column(f"'{granularity}'"), column)
+    return func.strftime(literal_column(f"'{SQLITE_BUCKET_FORMATS[granularity]}'"), column)
+
+
+def day_of(column, dialect: str):
+    """Dia (date) do timestamp: cast no PostgreSQL, date() ('AAAA-MM-DD', como Date é gravado) no SQLite"""
+    if dialect == "postgresql":
+        return cast(column, Date)
+    return func.date(column)
+
+
+def bound(value: datetime, dialect: str):
+    """
+    Limite de intervalo (alinhado ao segundo) comparável aos timestamps gravados.
+
+    No SQLite datas são texto: o limite vai sem fração de segundo, que ordena
+    antes tanto de 'AAAA-MM-DD HH:MM:SS' (CURRENT_TIMESTAMP) quanto do formato
+    com microssegundos do SQLAlchemy para o mesmo instante.
+    """
+    if dialect == "sqlite":
+        return literal(value.strftime("%Y-%m-%d %H:%M:%S"))
+    return value
+
+
+def _upsert(dialect: str):
+    return postgresql_insert if dialect == "postgresql" else sqlite_insert
+
+
+def _rollup(statement):
+    return rollups.insert().from_select(["granularity", "metric", "bucket", "value"], statement)
+
+
+def window_statements(dialect: str, start: datetime, end: datetime) -> List[Any]:
+    """
+    Comandos que recalculam os buckets a partir das tabelas para [start, end).
+
+    start e end são alinhados ao minuto, então cada bucket por minuto da janela
+    é completo. Horas e dias que tocam a janela são refeitos somando os minutos
+    e as horas já gravados (inclusive os anteriores a start).
+    """
+    messages = MessageModel.__table__
+    users = UserModel.__table__
+    conversations = ConversationModel.__table__
+    lower, upper = bound(start, dialect), bound(end, dialect)
+
+    def in_window(column):
+        return and_(column >= lower, column < upper)
+
+    derived = rollups.c.metric.notin_(WRITE_PATH_METRICS)
+    message_minute = truncate(messages.c.created_at, "minute", dialect)
+    user_minute = truncate(users.c.created_at, "minute", dialect)
+    conversation_minute = truncate(conversations.c.created_at, "minute", dialect)
+
+    statements = [
+        delete(rollups).where(rollups.c.granularity == "minute", derived, in_window(rollups.c.bucket)),
+        _rollup(
+            select(literal("minute"), literal("messages_") + messages.c.direction, message_minute, func.count())
+            .where(in_window(messages.c.created_at))
+            .group_by(messages.c.direction, message_minute)
+        ),
+        _rollup(
+            select(literal("minute"), literal(NEW_USERS), user_minute, func.count())
+            .where(in_window(users.c.created_at))
+            .group_by(user_minute)
+        ),
+        # Status no momento do rollup (para a distribuição atual, get_conversation_metrics)
+        _rollup(
+            select(
+                literal("minute"), literal(CONVERSATIONS_PREFIX) + conversations.c.status,
+                conversation_minute, func.count()
+            )
+            .where(in_window(conversations.c.created_at), conversations.c.status.isnot(None))
+            .group_by(conversations.c.status, conversation_minute)
+        ),
+    ]
+
+    for granularity, finer in (("hour", "minute"), ("day", "hour")):
+        first = bound(floor(start, granularity), dialect)
+        bucket = truncate(rollups.c.bucket, granularity, dialect)
+        statements += [
+            delete(rollups).where(
+                rollups.c.granularity == granularity,
+                derived,
+                rollups.c.metric.notin_(DAY_ONLY_METRICS),
+                rollups.c.bucket >= first,
+                rollups.c.bucket < upper
+            ),
+            _rollup(
+                select(literal(granularity), rollups.c.metric, bucket, func.sum(rollups.c.value))
+                .where(
+                    rollups.c.granularity == finer,
+                    derived,
+                    rollups.c.bucket >= first,
+                    rollups.c.bucket < upper
+                )
+                .group_by(rollups.c.metric, bucket)
+            ),
+        ]
+
+    # Quem enviou mensagem na janela entra no conjunto do dia (uma vez por dia)
+    message_day = day_of(messages.c.created_at, dialect)
+    upsert = _upsert(dialect)
+    statements.append(
+        upsert(active_users).from_select(
+            ["day", "user_id", "is_returning"],
+            select(message_day, messages.c.user_id, users.c.created_at < message_day)
+            .select_from(messages.join(users, users.c.id == messages.c.user_id))
+            .where(in_window(messages.c.created_at), messages.c.direction == MessageDirection.INCOMING.value)
+            .distinct()
+        ).on_conflict_do_nothing()
+    )
+
+    # Dias que tocam a janela (end é exclusivo: à meia-noite, o dia de end fica de fora)
+    first_day, last_day = start.date(), (end - timedelta(minutes=1)).date()
+    day_bucket = truncate(active_users.c.day, "day", dialect)
+    statements.append(delete(rollups).where(
+        rollups.c.granularity == "day",
+        rollups.c.metric.in_(DAY_ONLY_METRICS),
+        rollups.c.bucket >= bound(floor(start, "day"), dialect),
+        rollups.c.bucket < upper
+    ))
+    counts = {ACTIVE_USERS: func.count(), RETURNING_USERS: func.count().filter(active_users.c.is_returning)}
+    for metric, counted in counts.items():
+        statements.append(_rollup(
+            select(literal("day"), literal(metric), day_bucket, counted)
+            .where(active_users.c.day >= first_day, active_users.c.day <= last_day)
+            .group_by(active_users.c.day)
+        ))
+    return statements
+
+
+def increment_statements(dialect: str, metric: str, at: datetime, amount: int) -> List[Any]:
+    """UPSERTs que somam `amount` à métrica nos buckets de minuto, hora e dia de `at`"""
+    upsert = _upsert(dialect)
+    statements = []
+    for granularity in GRANULARITIES:
+        statement = upsert(rollups).values(
+            granularity=granularity, metric=metric, bucket=floor(at, granularity), value=amount
+        )
+        statements.append(statement.on_conflict_do_update(
+            index_elements=[rollups.c.granularity, rollups.c.metric, rollups.c.bucket],
+            set_={"value": rollups.c.value + statement.excluded.value}
+        ))
+    return statements
+
+
+def status_change_statements(dialect: str, created_at: datetime, old: str, new: str) -> List[Any]:
+    """UPSERTs que movem uma conversa já processada de conversations_<old> para conversations_<new>"""
+    return (
+        increment_statements(dialect, CONVERSATIONS_PREFIX + old, created_at, -1)
+        + increment_statements(dialect, CONVERSATIONS_PREFIX + new, created_at, 1)
+    )
+
+
+def mark_statement(dialect: str, mark: datetime):
+    """Grava o high-water mark"""
+    statement = _upsert(dialect)(state).values(name=STATE_NAME, high_water_mark=mark)
+    return statement.on_conflict_do_update(
+        index_elements=[state.c.name],
+        set_={"high_water_mark": statement.excluded.high_water_mark, "updated_at": utcnow()}
+    )
+
+
+async def _first_timestamp(session: AsyncSession) -> Optional[datetime]:
+    """Registro mais antigo entre mensagens, usuários e conversas (ponto de partida da primeira rodada)"""
+    found = [
+        as_utc(await session.scalar(select(func.min(model.created_at))))
+        for model in (MessageModel, UserModel, ConversationModel)
+    ]
+    found = [value for value in found if value is not None]
+    return min(found) if found else None
+
+
+async def refresh_rollups(
+    session: AsyncSession,
+    now: Optional[datetime] = None,
+    since: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """
+    Leva os rollups do high-water mark até agora menos ANALYTICS_ROLLUP_LAG_SECONDS.
+
+    O atraso deixa de fora transações ainda abertas (created_at é definido
+    antes do commit). `since` volta o mark e refaz tudo a partir dele (correção
+    de importações ou linhas gravadas com atraso maior que o lag). Retorna o
+    novo mark e quantas janelas foram processadas.
+    """
+    dialect = session.get_bind().dialect.name
+    cutoff = floor((now or datetime.utcnow()) - timedelta(seconds=settings.ANALYTICS_ROLLUP_LAG_SECONDS), "minute")
+    mark = since or as_utc(await session.scalar(HIGH_WATER_MARK)) or await _first_timestamp(session) or cutoff
+    mark = floor(mark, "minute")
+
+    windows = 0
+    while mark < cutoff:
+        end = min(mark + WINDOW, cutoff)
+        # Regrava o mark atual antes de ler as tabelas: trava a linha do estado
+        # (e o lock de escrita no SQLite) contra trocas de status simultâneas
+        await session.execute(mark_statement(dialect, mark))
+        for statement in window_statements(dialect, mark, end):
+            await session.execute(statement)
+        await session.execute(mark_statement(dialect, end))
+        await session.commit()
+        mark, windows = end, windows + 1
+
+    # Minutos e conjuntos de ativos antigos: as horas e os dias já guardam as contagens
+    oldest = floor(cutoff - timedelta(days=settings.ANALYTICS_ROLLUP_RETENTION_DAYS), "day")
+    await session.execute(delete(rollups).where(
+        rollups.c.granularity == "minute", rollups.c.bucket < bound(oldest, dialect)
+    ))
+    await session.execute(delete(active_users).where(active_users.c.day < oldest.date()))
+    await session.commit()
+    return {"high_water_mark": mark, "windows": windows}
@@ -0,0 +1,68 @@
+"""
+Sketch de quantis mesclável (DDSketch)
+"""
+import math
+from typing import Dict, Iterable, Optional, Tuple
+
+# Erro relativo máximo dos quantis estimados (1%)
+RELATIVE_ACCURACY = 0.01
+# Valores menores (em segundos) caem no mesmo bin que este
+MIN_VALUE = 0.001
+
+
+class DDSketch:
+    """
+    Sketch de quantis com erro relativo garantido (DDSketch, Masson et al. 2019).
+
+    O valor x cai no bin ceil(log_gamma(x)), com gamma = (1 + a) / (1 - a); o
+    quantil estimado a partir do bin fica a no máximo `a` do valor real, seja
+    qual for a distribuição. Dois sketches se combinam somando as contagens de
+    cada bin, então os sketches por hora gravados no banco viram o de qualquer
+    intervalo com um SUM(count) ... GROUP BY bin, sem ordenar valores.
+    """
+
+    def __init__(self, bins: Optional[Dict[int, int]] = None, relative_accuracy: float = RELATIVE_ACCURACY):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins: Dict[int, int] = dict(bins or {})
+
+    @property
+    def count(self) -> int:
+        return sum(self.bins.values())
+
+    def index(self, value: float) -> int:
+        """Bin do valor"""
+        return math.ceil(math.log(max(value, MIN_VALUE)) / self._log_gamma)
+
+    def value(self, index: int) -> float:
+        """Representante do bin (a meio caminho, em erro relativo, entre os limites)"""
+        return 2 * self.gamma ** index / (self.gamma + 1)
+
+    def add(self, value: float, count: int = 1) -> None:
+        index = self.index(value)
+        self.bins[index] = self.bins.get(index, 0) + count
+
+    def merge(self, other: "DDSketch") -> None:
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Valor estimado do quantil q (0 a 1), ou None se o sketch estiver vazio"""
+        total = self.count
+        if not total:
+            return None
+        rank = q * (total - 1)
+        seen = 0
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if seen > rank:
+                return self.value(index)
+        return self.value(max(self.bins))
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[int, int]]) -> "DDSketch":
+        """Sketch a partir de pares (bin, contagem), como vêm do banco"""
+        sketch = cls()
+        for index, count in rows:
+            sketch.bins[index] = sketch.bins.get(index, 0) + count
+        return sketch
@@ -0,0 +1,40 @@
+"""
+Implementação da unidade de trabalho sobre a AsyncSession
+"""
+import asyncio
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ...domain.repositories.unit_of_work import UnitOfWork
+
+
+class SqlAlchemyUnitOfWork(UnitOfWork):
+    """
+    Unidade de trabalho que compartilha a AsyncSession com os repositórios.
+
+    A profundidade fica em `session.info`: enquanto for maior que zero, os
+    repositórios da mesma sessão só fazem flush. Apenas o bloco mais externo
+    confirma ou desfaz a transação.
+    """
+    
+    def __init__(self, db_session: AsyncSession):
+        self._db = db_session
+        self._lock: asyncio.Lock = db_session.info.setdefault("repository_lock", asyncio.Lock())
+    
+    @property
+    def _depth(self) -> int:
+        return self._db.info.get("unit_of_work_depth", 0)
+    
+    async def begin(self) -> None:
+        self._db.info["unit_of_work_depth"] = self._depth + 1
+    
+    async def commit(self) -> None:
+        self._db.info["unit_of_work_depth"] = self._depth - 1
+        if self._depth == 0:
+            async with self._lock:
+                await self._db.commit()
+    
+    async def rollback(self) -> None:
+        self._db.info["unit_of_work_depth"] = self._depth - 1
+        if self._depth == 0:
+            async with self._lock:
+                await self._db.rollback()
@@ -1,53 +1,81 @@
 """
 Implementação do repositório de usuários
 """
-from typing import List, Optional
-from uuid import UUID
-from sqlalchemy.orm import Session
+from typing import Dict, List, Optional, Sequence
+from uuid import UUID, uuid4
+from sqlalchemy import func, or_, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import settings
 
 from ...domain.entities.user import User
+from ...domain.repositories.filters import UserFilter
+from ...domain.repositories.pagination import Page
+from ...domain.repositories.summaries import UserStats
 from ...domain.repositories.user_repository import UserRepository
 from ...domain.value_objects.phone_number import PhoneNumber
 from ..database.models import UserModel
+from .base_repository import AsyncRepository, chunked
 
 
-class UserRepositoryImpl(UserRepository):
+class UserRepositoryImpl(AsyncRepository, UserRepository):
     """
-    Implementação do repositório de usuários usando SQLAlchemy
+    Implementação do repositório de usuários usando SQLAlchemy (AsyncSession)
     """
     
-    def __init__(self, db_session: Session):
-        self._db = db_session
+    def __init__(self, db_session: AsyncSession):
+        super().__init__(db_session)
     
     async def save(self, user: User) -> User:
-        """Salva um usuário"""
-        if user.id:
+        """Salva um usuário (o novo, de User.create_new, vai direto para o INSERT)"""
+        db_user = None if user.is_new or not user.id else await self._get_by_id(user.id)
+        
+        if db_user:
             # Atualização
-            db_user = await self._get_by_id(user.id)
-            if db_user:
-                db_user.name = user.name
-                db_user.email = user.email
-                db_user.is_active = user.is_active
-                db_user.updated_at = user.updated_atnpm install http-proxy-middleware --save-dev
-            else:
-                raise ValueError("Usuário não encontrado")
+            db_user.name = user.name
+            db_user.email = user.email
+            db_user.is_active = user.is_active
+            db_user.updated_at = user.updated_at
         else:
-            # Criação
-            db_user = UserModel(
-                phone_number=str(user.phone_number),
-                name=user.name,
-                email=user.email,
-                is_active=user.is_active,
-                created_at=user.created_at,
-                updated_at=user.updated_at
-            )
+            # Criação (User.create_new já traz o ID)
+            db_user = UserModel(**self._to_row(user))
             self._db.add(db_user)
         
-        self._db.commit()
-        self._db.refresh(db_user)
+        await self._save()
+        user.is_new = False
         
         return self._to_entity(db_user)
     
+    async def save_many(self, users: Sequence[User]) -> int:
+        """Insere vários usuários novos em lote (COPY no PostgreSQL, INSERT multi-linha no SQLite)"""
+        return await self._insert_many(UserModel, [self._to_row(user) for user in users])
+    
+    async def find_or_create_many(self, users: Sequence[User]) -> Dict[str, User]:
+        """
+        Busca ou cria usuários pelo telefone, um comando por bloco.
+
+        INSERT ... ON CONFLICT (phone_number) DO UPDATE ... RETURNING devolve tanto
+        as linhas criadas quanto as que já existiam; o UPDATE só regrava o próprio
+        telefone, então nome e email de quem já existia não mudam.
+        """
+        rows = list({user.phone_number.value: self._to_row(user) for user in users}.values())
+        upsert = postgresql_insert if self._db.get_bind().dialect.name == "postgresql" else sqlite_insert
+        found: Dict[str, User] = {}
+        
+        async with self._lock:
+            for chunk in chunked(rows, settings.DATABASE_BULK_CHUNK_SIZE):
+                statement = upsert(UserModel).values(chunk)
+                statement = statement.on_conflict_do_update(
+                    index_elements=[UserModel.phone_number],
+                    set_={"phone_number": statement.excluded.phone_number}
+                ).returning(*UserModel.__table__.c)
+                for row in await self._db.execute(statement):
+                    found[row.phone_number] = self._to_entity(row)
+        
+        await self._commit()
+        return found
+    
     async def find_by_id(self, user_id: UUID) -> Optional[User]:
         """Busca usuário por ID"""
         db_user = await self._get_by_id(user_id)
@@ -55,22 +83,41 @@ class UserRepositoryImpl(UserRepository):
     
     async def find_by_phone_number(self, phone_number: PhoneNumber) -> Optional[User]:
         """Busca usuário por número de telefone"""
-        db_user = self._db.query(UserModel).filter(
-            UserModel.phone_number == str(phone_number)
-        ).first()
+        db_user = await self._first(
+            select(UserModel).where(UserModel.phone_number == phone_number.value)
+        )
         
         return self._to_entity(db_user) if db_user else None
     
-    async def find_all(self, skip: int = 0, limit: int = 100) -> List[User]:
-        """Lista todos os usuários"""
-        db_users = self._db.query(UserModel).offset(skip).limit(limit).all()
+    async def find_all(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        filters: Optional[UserFilter] = None
+    ) -> List[User]:
+        """Lista usuários por offset, com filtros opcionais"""
+        db_users = await self._all(
+            select(UserModel).where(*self._where(filters))
+            .order_by(UserModel.created_at, UserModel.id).offset(skip).limit(limit)
+        )
         return [self._to_entity(db_user) for db_user in db_users]
     
+    async def find_page(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        filters: Optional[UserFilter] = None
+    ) -> Page[User]:
+        """Lista usuários por cursor (created_at, id), com filtros opcionais"""
+        query = select(UserModel).where(*self._where(filters))
+        db_users, next_cursor = await self._page(query, UserModel, cursor, limit)
+        return Page([self._to_entity(db_user) for db_user in db_users], next_cursor)
+    
     async def find_active_users(self, skip: int = 0, limit: int = 100) -> List[User]:
         """Lista usuários ativos"""
-        db_users = self._db.query(UserModel).filter(
-            UserModel.is_active == True
-        ).offset(skip).limit(limit).all()
+        db_users = await self._all(
+            select(UserModel).where(UserModel.is_active == True).offset(skip).limit(limit)
+        )
         
         return [self._to_entity(db_user) for db_user in db_users]
     
@@ -78,21 +125,70 @@ class UserRepositoryImpl(UserRepository):
         """Remove um usuário"""
         db_user = await self._get_by_id(user_id)
         if db_user:
-            self._db.delete(db_user)
-            self._db.commit()
+            await self._delete(db_user)
             return True
         return False
     
     async def exists_by_phone_number(self, phone_number: PhoneNumber) -> bool:
         """Verifica se usuário existe pelo número de telefone"""
-        count = self._db.query(UserModel).filter(
-            UserModel.phone_number == str(phone_number)
-        ).count()
+        count = await self._scalar(
+            select(func.count()).select_from(UserModel).where(UserModel.phone_number == phone_number.value)
+        )
         return count > 0
     
     async def _get_by_id(self, user_id: UUID) -> Optional[UserModel]:
         """Busca usuário por ID no banco"""
-        return self._db.query(UserModel).filter(UserModel.id == user_id).first()
+        return await self._first(select(UserModel).where(UserModel.id == user_id))
+    
+    async def get_stats(self) -> UserStats:
+        """Usuários, ativos e totais de conversas e mensagens (somando os contadores), em uma consulta"""
+        total_users, active_users, total_conversations, total_messages = (await self._rows(
+            select(
+                func.count(),
+                func.count().filter(UserModel.is_active == True),
+                func.coalesce(func.sum(UserModel.conversation_count), 0),
+                func.coalesce(func.sum(UserModel.total_messages), 0)
+            ).select_from(UserModel)
+        ))[0]
+        return UserStats(
+            total_users=total_users,
+            active_users=active_users,
+            total_conversations=total_conversations,
+            total_messages=total_messages
+        )
+    
+    def _where(self, filters: Optional[UserFilter]) -> list:
+        """
+        Condições do WHERE para os filtros.
+
+        A busca é por trecho (ILIKE '%...%', com % e _ escapados): no PostgreSQL
+        usa os índices trigram (pg_trgm) de nome, email e telefone; no SQLite
+        percorre a tabela na ordem do cursor até completar a página.
+        """
+        if filters is None:
+            return []
+        conditions = []
+        if filters.search:
+            conditions.append(or_(
+                UserModel.name.icontains(filters.search, autoescape=True),
+                UserModel.email.icontains(filters.search, autoescape=True),
+                UserModel.phone_number.contains(filters.search, autoescape=True)
+            ))
+        if filters.is_active is not None:
+            conditions.append(UserModel.is_active == filters.is_active)
+        return conditions
+    
+    def _to_row(self, user: User) -> dict:
+        """Converte entidade do domínio para as colunas da tabela"""
+        return {
+            "id": user.id or uuid4(),
+            "phone_number": user.phone_number.value,
+            "name": user.name,
+            "email": user.email,
+            "is_active": user.is_active,
+            "created_at": user.created_at,
+            "updated_at": user.updated_at
+        }
     
     def _to_entity(self, db_user: UserModel) -> User:
         """Converte modelo do banco para entidade do domínio"""
@@ -103,5 +199,7 @@ class UserRepositoryImpl(UserRepository):
             email=db_user.email,
             is_active=db_user.is_active,
             created_at=db_user.created_at,
-            updated_at=db_user.updated_at
+            updated_at=db_user.updated_at,
+            conversation_count=db_user.conversation_count or 0,
+            total_messages=db_user.total_messages or 0
         )
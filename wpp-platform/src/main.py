@@ -16,8 +16,10 @@ sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 from config import settings
 from src.infrastructure.database.database import get_db
+from src.infrastructure.database.async_database import async_engine
 from src.presentation.controllers.user_controller import router as user_router
 from src.presentation.controllers.message_controller import router as message_router
+from src.presentation.dependencies import get_whatsapp_service, get_ai_service
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
@@ -37,6 +39,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Security
@@ -46,6 +49,27 @@ security = HTTPBearer()
 app.include_router(user_router)
 app.include_router(message_router)
 
+# Cliente HTTP compartilhado do WhatsApp
+@app.on_event("startup")
+async def start_whatsapp_client():
+    """Abre o pool de conexões com a Graph API"""
+    await get_whatsapp_service().start()
+
+@app.on_event("shutdown")
+async def stop_whatsapp_client():
+    """Fecha o pool de conexões com a Graph API"""
+    await get_whatsapp_service().aclose()
+
+@app.on_event("shutdown")
+async def stop_ai_client():
+    """Fecha o pool de conexões com a API da OpenAI"""
+    await get_ai_service().aclose()
+
+@app.on_event("shutdown")
+async def stop_database():
+    """Fecha as conexões do engine assíncrono"""
+    await async_engine.dispose()
+
 # Função de autenticação simples
 async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     if credentials.credentials != "admin-token-example":
@@ -2,18 +2,16 @@
 Endpoints de analytics
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional, Tuple
 from pydantic import BaseModel
-from datetime import datetime, timedelta
+from datetime import date, datetime, time, timedelta
 from uuid import UUID
 
-from src.infrastructure.database.database import get_db
+from src.infrastructure.database.async_database import get_async_db
 from src.infrastructure.database.auth_models import AuthUser
 from src.presentation.controllers.auth_controller import get_current_user
-from src.infrastructure.repositories.user_repository_impl import UserRepositoryImpl
-from src.infrastructure.repositories.conversation_repository_impl import ConversationRepositoryImpl
-from src.infrastructure.repositories.message_repository_impl import MessageRepositoryImpl
+from src.infrastructure.repositories.analytics_repository_impl import AnalyticsRepositoryImpl
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 
@@ -48,60 +46,61 @@ class ConversationMetricsResponse(BaseModel):
     avg_conversation_duration: float
     avg_messages_per_conversation: float
 
+class RollupPointResponse(BaseModel):
+    bucket: datetime
+    value: int
+
+class RollupSeriesResponse(BaseModel):
+    metric: str
+    granularity: str
+    high_water_mark: Optional[datetime]
+    points: List[RollupPointResponse]
+
 class ResponseTimeResponse(BaseModel):
+    responses: int
     avg_response_time: float
     min_response_time: float
     max_response_time: float
     response_time_percentiles: dict
 
 # Dependências
-def get_user_repository(db: Session = Depends(get_db)) -> UserRepositoryImpl:
-    return UserRepositoryImpl(db)
+def get_analytics_repository(db: AsyncSession = Depends(get_async_db)) -> AnalyticsRepositoryImpl:
+    return AnalyticsRepositoryImpl(db)
 
-def get_conversation_repository(db: Session = Depends(get_db)) -> ConversationRepositoryImpl:
-    return ConversationRepositoryImpl(db)
+def minutes(seconds: float) -> float:
+    return round(seconds / 60, 2)
 
-def get_message_repository(db: Session = Depends(get_db)) -> MessageRepositoryImpl:
-    return MessageRepositoryImpl(db)
+def day_range(days: int) -> Tuple[datetime, datetime, List[date]]:
+    """Intervalo [início, fim) dos últimos `days` dias (UTC, como os timestamps gravados) e os dias dele"""
+    today = datetime.utcnow().date()
+    dates = [today - timedelta(days=offset) for offset in range(days - 1, -1, -1)]
+    start = datetime.combine(dates[0], time.min)
+    return start, datetime.combine(today + timedelta(days=1), time.min), dates
 
 # Endpoints
 @router.get("/overview", response_model=AnalyticsOverviewResponse)
 async def get_analytics_overview(
-    user_repo: UserRepositoryImpl = Depends(get_user_repository),
-    conversation_repo: ConversationRepositoryImpl = Depends(get_conversation_repository),
-    message_repo: MessageRepositoryImpl = Depends(get_message_repository),
+    analytics_repo: AnalyticsRepositoryImpl = Depends(get_analytics_repository),
     current_user: AuthUser = Depends(get_current_user)
 ):
     """Obtém visão geral das métricas"""
     try:
-        # Buscar dados básicos
-        users = user_repo.get_all()
-        conversations = conversation_repo.get_all()
-        messages = message_repo.get_all()
-        
-        # Calcular métricas
-        total_users = len(users)
-        active_users = len([u for u in users if u.is_active])
-        total_conversations = len(conversations)
-        active_conversations = len([c for c in conversations if c.status.value == "active"])
-        total_messages = len(messages)
-        
-        # Mensagens de hoje
-        today = datetime.now().date()
-        messages_today = len([m for m in messages if m.timestamp.date() == today])
+        now = datetime.utcnow()
+        overview = await analytics_repo.get_overview(today=datetime.combine(now.date(), time.min))
+        # Média das últimas 24 horas (as horas são fechadas, então inclui a atual)
+        response_times = await analytics_repo.get_response_times(now - timedelta(hours=23), now + timedelta(hours=1))
         
-        # Métricas calculadas (mockadas por enquanto)
-        response_time_avg = 2.5  # minutos
+        # Satisfação ainda não é coletada (mockada por enquanto)
         satisfaction_score = 4.2  # de 5
         
         return AnalyticsOverviewResponse(
-            total_users=total_users,
-            active_users=active_users,
-            total_conversations=total_conversations,
-            active_conversations=active_conversations,
-            total_messages=total_messages,
-            messages_today=messages_today,
-            response_time_avg=response_time_avg,
+            total_users=overview.total_users,
+            active_users=overview.active_users,
+            total_conversations=overview.total_conversations,
+            active_conversations=overview.active_conversations,
+            total_messages=overview.total_messages,
+            messages_today=overview.messages_today,
+            response_time_avg=minutes(response_times.avg_seconds),
             satisfaction_score=satisfaction_score
         )
     except Exception as e:
@@ -113,52 +112,24 @@ async def get_analytics_overview(
 @router.get("/message-trends", response_model=List[MessageTrendResponse])
 async def get_message_trends(
     days: int = Query(7, ge=1, le=30),
-    message_repo: MessageRepositoryImpl = Depends(get_message_repository),
+    analytics_repo: AnalyticsRepositoryImpl = Depends(get_analytics_repository),
     current_user: AuthUser = Depends(get_current_user)
 ):
     """Obtém tendências de mensagens por período"""
     try:
-        messages = message_repo.get_all()
-        
-        # Agrupar mensagens por data
-        trends = {}
-        end_date = datetime.now().date()
-        start_date = end_date - timedelta(days=days-1)
-        
-        # Inicializar todas as datas no período
-        current_date = start_date
-        while current_date <= end_date:
-            date_str = current_date.isoformat()
-            trends[date_str] = {
-                'inbound_messages': 0,
-                'outbound_messages': 0,
-                'total_messages': 0
-            }
-            current_date += timedelta(days=1)
-        
-        # Contar mensagens por data
-        for message in messages:
-            message_date = message.timestamp.date()
-            if start_date <= message_date <= end_date:
-                date_str = message_date.isoformat()
-                if date_str in trends:
-                    if message.direction.value == "inbound":
-                        trends[date_str]['inbound_messages'] += 1
-                    else:
-                        trends[date_str]['outbound_messages'] += 1
-                    trends[date_str]['total_messages'] += 1
-        
-        # Converter para lista ordenada
-        result = []
-        for date_str in sorted(trends.keys()):
-            result.append(MessageTrendResponse(
-                date=date_str,
-                inbound_messages=trends[date_str]['inbound_messages'],
-                outbound_messages=trends[date_str]['outbound_messages'],
-                total_messages=trends[date_str]['total_messages']
-            ))
-        
-        return result
+        start, end, dates = day_range(days)
+        trends = {trend.day: trend for trend in await analytics_repo.get_message_trends(start, end)}
+        
+        # Dias sem mensagens entram zerados
+        return [
+            MessageTrendResponse(
+                date=day.isoformat(),
+                inbound_messages=trends[day].inbound_messages if day in trends else 0,
+                outbound_messages=trends[day].outbound_messages if day in trends else 0,
+                total_messages=trends[day].total_messages if day in trends else 0
+            )
+            for day in dates
+        ]
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -168,57 +139,24 @@ async def get_message_trends(
 @router.get("/user-activity", response_model=List[UserActivityResponse])
 async def get_user_activity(
     days: int = Query(7, ge=1, le=30),
-    user_repo: UserRepositoryImpl = Depends(get_user_repository),
+    analytics_repo: AnalyticsRepositoryImpl = Depends(get_analytics_repository),
     current_user: AuthUser = Depends(get_current_user)
 ):
     """Obtém atividade dos usuários por período"""
     try:
-        users = user_repo.get_all()
-        
-        # Agrupar usuários por data de criação
-        activity = {}
-        end_date = datetime.now().date()
-        start_date = end_date - timedelta(days=days-1)
-        
-        # Inicializar todas as datas no período
-        current_date = start_date
-        while current_date <= end_date:
-            date_str = current_date.isoformat()
-            activity[date_str] = {
-                'new_users': 0,
-                'active_users': 0,
-                'returning_users': 0
-            }
-            current_date += timedelta(days=1)
-        
-        # Contar usuários por data
-        for user in users:
-            user_date = user.created_at.date()
-            if start_date <= user_date <= end_date:
-                date_str = user_date.isoformat()
-                if date_str in activity:
-                    activity[date_str]['new_users'] += 1
-            
-            # Usuários ativos (mockado por enquanto)
-            if user.is_active:
-                # Simular atividade recente
-                activity_date = (datetime.now() - timedelta(days=1)).date()
-                if start_date <= activity_date <= end_date:
-                    date_str = activity_date.isoformat()
-                    if date_str in activity:
-                        activity[date_str]['active_users'] += 1
-        
-        # Converter para lista ordenada
-        result = []
-        for date_str in sorted(activity.keys()):
-            result.append(UserActivityResponse(
-                date=date_str,
-                new_users=activity[date_str]['new_users'],
-                active_users=activity[date_str]['active_users'],
-                returning_users=activity[date_str]['returning_users']
-            ))
-        
-        return result
+        start, end, dates = day_range(days)
+        activity = {entry.day: entry for entry in await analytics_repo.get_user_activity(start, end)}
+        
+        # Dias sem atividade entram zerados
+        return [
+            UserActivityResponse(
+                date=day.isoformat(),
+                new_users=activity[day].new_users if day in activity else 0,
+                active_users=activity[day].active_users if day in activity else 0,
+                returning_users=activity[day].returning_users if day in activity else 0
+            )
+            for day in dates
+        ]
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -227,31 +165,20 @@ async def get_user_activity(
 
 @router.get("/conversation-metrics", response_model=ConversationMetricsResponse)
 async def get_conversation_metrics(
-    conversation_repo: ConversationRepositoryImpl = Depends(get_conversation_repository),
-    message_repo: MessageRepositoryImpl = Depends(get_message_repository),
+    analytics_repo: AnalyticsRepositoryImpl = Depends(get_analytics_repository),
     current_user: AuthUser = Depends(get_current_user)
 ):
     """Obtém métricas das conversas"""
     try:
-        conversations = conversation_repo.get_all()
-        messages = message_repo.get_all()
-        
-        total_conversations = len(conversations)
-        active_conversations = len([c for c in conversations if c.status.value == "active"])
-        closed_conversations = len([c for c in conversations if c.status.value == "closed"])
-        pending_conversations = len([c for c in conversations if c.status.value == "pending"])
-        
-        # Calcular métricas (mockadas por enquanto)
-        avg_conversation_duration = 15.5  # minutos
-        avg_messages_per_conversation = total_messages / total_conversations if total_conversations > 0 else 0
+        metrics = await analytics_repo.get_conversation_metrics()
         
         return ConversationMetricsResponse(
-            total_conversations=total_conversations,
-            active_conversations=active_conversations,
-            closed_conversations=closed_conversations,
-            pending_conversations=pending_conversations,
-            avg_conversation_duration=avg_conversation_duration,
-            avg_messages_per_conversation=avg_messages_per_conversation
+            total_conversations=metrics.total_conversations,
+            active_conversations=metrics.by_status.get("active", 0),
+            closed_conversations=metrics.by_status.get("closed", 0),
+            pending_conversations=metrics.by_status.get("pending", 0),
+            avg_conversation_duration=metrics.avg_duration_minutes,
+            avg_messages_per_conversation=metrics.avg_messages_per_conversation
         )
     except Exception as e:
         raise HTTPException(
@@ -259,27 +186,48 @@ async def get_conversation_metrics(
             detail=f"Erro ao buscar métricas: {str(e)}"
         )
 
+@router.get("/rollups", response_model=RollupSeriesResponse)
+async def get_rollup_series(
+    metric: str = Query(..., description="Ex.: messages_incoming, new_users, conversations_active, escalations"),
+    granularity: Literal["minute", "hour", "day"] = "hour",
+    hours: int = Query(24, ge=1, le=24 * 30),
+    analytics_repo: AnalyticsRepositoryImpl = Depends(get_analytics_repository),
+    current_user: AuthUser = Depends(get_current_user)
+):
+    """Série pré-agregada de uma métrica nas últimas `hours` horas (até o high-water mark do job)"""
+    try:
+        end = datetime.utcnow()
+        points = await analytics_repo.get_rollup_series([metric], granularity, end - timedelta(hours=hours), end)
+        
+        return RollupSeriesResponse(
+            metric=metric,
+            granularity=granularity,
+            high_water_mark=await analytics_repo.get_high_water_mark(),
+            points=[RollupPointResponse(bucket=point.bucket, value=point.value) for point in points]
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao buscar série: {str(e)}"
+        )
+
 @router.get("/response-times", response_model=ResponseTimeResponse)
 async def get_response_times(
-    message_repo: MessageRepositoryImpl = Depends(get_message_repository),
+    hours: int = Query(24, ge=1, le=24 * 90),
+    analytics_repo: AnalyticsRepositoryImpl = Depends(get_analytics_repository),
     current_user: AuthUser = Depends(get_current_user)
 ):
-    """Obtém métricas de tempo de resposta"""
+    """Tempo (minutos) entre a primeira mensagem recebida sem resposta e a resposta, nas últimas `hours` horas"""
     try:
-        # Por enquanto, retornar dados mockados
-        # TODO: Implementar cálculo real de tempo de resposta
+        end = datetime.utcnow() + timedelta(hours=1)
+        stats = await analytics_repo.get_response_times(end - timedelta(hours=hours), end)
         
         return ResponseTimeResponse(
-            avg_response_time=2.5,
-            min_response_time=0.5,
-            max_response_time=15.0,
-            response_time_percentiles={
-                "p50": 2.0,
-                "p75": 3.5,
-                "p90": 5.0,
-                "p95": 7.0,
-                "p99": 12.0
-            }
+            responses=stats.count,
+            avg_response_time=minutes(stats.avg_seconds),
+            min_response_time=minutes(stats.min_seconds),
+            max_response_time=minutes(stats.max_seconds),
+            response_time_percentiles={name: minutes(value) for name, value in stats.percentiles.items()}
         )
     except Exception as e:
         raise HTTPException(
@@ -1,16 +1,18 @@
 """
 Endpoints de conversas
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime
 from uuid import UUID
 
-from src.infrastructure.database.database import get_db
+from src.infrastructure.database.async_database import get_async_db
 from src.infrastructure.database.auth_models import AuthUser
 from src.presentation.controllers.auth_controller import get_current_user
+from src.presentation.pagination import set_next_cursor
+from src.domain.repositories.filters import ConversationFilter
 from src.infrastructure.repositories.conversation_repository_impl import ConversationRepositoryImpl
 from src.infrastructure.repositories.user_repository_impl import UserRepositoryImpl
 from src.domain.entities.conversation import Conversation
@@ -46,55 +48,66 @@ class ConversationStatsResponse(BaseModel):
     total_messages: int
 
 # Dependências
-def get_conversation_repository(db: Session = Depends(get_db)) -> ConversationRepositoryImpl:
+def get_conversation_repository(db: AsyncSession = Depends(get_async_db)) -> ConversationRepositoryImpl:
     return ConversationRepositoryImpl(db)
 
-def get_user_repository(db: Session = Depends(get_db)) -> UserRepositoryImpl:
+def get_user_repository(db: AsyncSession = Depends(get_async_db)) -> UserRepositoryImpl:
     return UserRepositoryImpl(db)
 
 # Endpoints
 @router.get("/", response_model=List[ConversationResponse])
 async def get_conversations(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    status: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None, description="Cursor recebido no header X-Next-Cursor"),
+    status_filter: Optional[str] = Query(None, alias="status"),
     user_id: Optional[str] = Query(None),
     conversation_repo: ConversationRepositoryImpl = Depends(get_conversation_repository),
-    user_repo: UserRepositoryImpl = Depends(get_user_repository),
     current_user: AuthUser = Depends(get_current_user)
 ):
-    """Lista todas as conversas com filtros"""
+    """
+    Lista todas as conversas com filtros.
+
+    Pagina por cursor (created_at, id) com o header X-Next-Cursor; `skip`
+    (offset) continua aceito por compatibilidade.
+    """
     try:
-        conversations = conversation_repo.get_all(skip=skip, limit=limit)
-        
-        # Aplicar filtros
-        if status:
-            conversations = [c for c in conversations if c.status.value == status]
+        filters = ConversationFilter(
+            status=ConversationStatus(status_filter) if status_filter else None,
+            user_id=UUID(user_id) if user_id else None
+        )
         
-        if user_id:
-            conversations = [c for c in conversations if str(c.user_id) == user_id]
+        # Usuário na mesma consulta das conversas; contagens vêm das colunas de contadores
+        if skip:
+            summaries = await conversation_repo.find_summaries(skip=skip, limit=limit, filters=filters)
+        else:
+            page = await conversation_repo.find_summaries_page(cursor=cursor, limit=limit, filters=filters)
+            summaries = page.items
+            set_next_cursor(response, page)
         
-        # Buscar dados dos usuários
         response_conversations = []
-        for conv in conversations:
-            user = user_repo.get_by_id(conv.user_id)
-            user_name = user.name.value if user else "Usuário não encontrado"
-            user_phone = user.phone.value if user else "N/A"
-            
+        for summary in summaries:
+            conv, user = summary.conversation, summary.user
             response_conversations.append(ConversationResponse(
                 id=str(conv.id),
                 user_id=str(conv.user_id),
-                user_name=user_name,
-                user_phone=user_phone,
+                user_name=user.name if user else "Usuário não encontrado",
+                user_phone=user.phone_number.value if user else "N/A",
                 status=conv.status.value,
                 created_at=conv.created_at.isoformat(),
-                updated_at=conv.updated_at.isoformat(),
+                updated_at=(conv.updated_at or conv.created_at).isoformat(),
                 last_message_at=conv.last_message_at.isoformat() if conv.last_message_at else None,
-                message_count=0,  # TODO: Implementar contagem real
-                unread_count=0  # TODO: Implementar contagem real
+                message_count=conv.message_count,
+                unread_count=conv.unread_count
             ))
         
         return response_conversations
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -108,19 +121,14 @@ async def get_conversation_stats(
 ):
     """Obtém estatísticas das conversas"""
     try:
-        conversations = conversation_repo.get_all()
-        total_conversations = len(conversations)
-        
-        active_conversations = len([c for c in conversations if c.status.value == "active"])
-        closed_conversations = len([c for c in conversations if c.status.value == "closed"])
-        pending_conversations = len([c for c in conversations if c.status.value == "pending"])
+        stats = await conversation_repo.get_stats()
         
         return ConversationStatsResponse(
-            total_conversations=total_conversations,
-            active_conversations=active_conversations,
-            closed_conversations=closed_conversations,
-            pending_conversations=pending_conversations,
-            total_messages=0  # TODO: Implementar contagem real
+            total_conversations=stats.total_conversations,
+            active_conversations=stats.by_status.get("active", 0),
+            closed_conversations=stats.by_status.get("closed", 0),
+            pending_conversations=stats.by_status.get("pending", 0),
+            total_messages=stats.total_messages
         )
     except Exception as e:
         raise HTTPException(
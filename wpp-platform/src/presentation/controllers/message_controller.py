@@ -1,8 +1,8 @@
 """
 Controller para mensagens
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from typing import List, Optional
 from uuid import UUID
 
 from ...application.use_cases.message_use_cases import (
@@ -10,7 +10,8 @@ from ...application.use_cases.message_use_cases import (
     ProcessIncomingMessageUseCase,
     SendMessageUseCase,
     GetMessagesByConversationUseCase,
-    GetUnprocessedMessagesUseCase
+    GetUnprocessedMessagesUseCase,
+    ProcessUnprocessedMessagesBatchUseCase
 )
 from ...application.dtos.message_dto import (
     CreateMessageDTO,
@@ -21,14 +22,18 @@ from ..schemas.message_schemas import (
     SendMessageRequest,
     MessageResponse,
     MessageListResponse,
-    ProcessMessageResponse
+    ProcessMessageResponse,
+    BatchProcessResponse
 )
 from ..dependencies import (
     get_message_repository,
     get_conversation_repository,
     get_user_repository,
-    get_message_processing_service
+    get_message_processing_service,
+    get_unit_of_work,
+    get_analytics_repository
 )
+from ..pagination import NEXT_CURSOR_HEADER
 
 router = APIRouter(prefix="/messages", tags=["messages"])
 
@@ -65,7 +70,8 @@ async def send_message(
     request: SendMessageRequest,
     message_repository = Depends(get_message_repository),
     conversation_repository = Depends(get_conversation_repository),
-    user_repository = Depends(get_user_repository)
+    user_repository = Depends(get_user_repository),
+    unit_of_work = Depends(get_unit_of_work)
 ):
     """Envia uma mensagem via WhatsApp"""
     try:
@@ -78,7 +84,8 @@ async def send_message(
         use_case = SendMessageUseCase(
             message_repository,
             conversation_repository,
-            user_repository
+            user_repository,
+            unit_of_work
         )
         result = await use_case.execute(dto)
         
@@ -89,13 +96,34 @@ async def send_message(
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Erro interno")
 
 
+@router.post("/process-batch", response_model=BatchProcessResponse)
+async def process_unprocessed_batch(
+    batch_size: int = Query(100, ge=1, le=1000),
+    max_batches: int = Query(1, ge=1, le=100),
+    message_repository = Depends(get_message_repository),
+    message_processing_service = Depends(get_message_processing_service),
+    analytics_repository = Depends(get_analytics_repository)
+):
+    """
+    Analisa em lote as mensagens pendentes (seguro com vários workers).
+
+    Só NLU: as mensagens são marcadas como processadas sem resposta gerada ou
+    enviada; para responder use /messages/process/{message_id}.
+    """
+    use_case = ProcessUnprocessedMessagesBatchUseCase(
+        message_repository, message_processing_service, analytics_repository=analytics_repository
+    )
+    return await use_case.execute(batch_size=batch_size, max_batches=max_batches)
+
+
 @router.post("/process/{message_id}", response_model=ProcessMessageResponse)
 async def process_message(
     message_id: UUID,
     message_repository = Depends(get_message_repository),
     conversation_repository = Depends(get_conversation_repository),
     user_repository = Depends(get_user_repository),
-    message_processing_service = Depends(get_message_processing_service)
+    message_processing_service = Depends(get_message_processing_service),
+    analytics_repository = Depends(get_analytics_repository)
 ):
     """Processa uma mensagem recebida"""
     try:
@@ -119,7 +147,8 @@ async def process_message(
             message_repository,
             conversation_repository,
             user_repository,
-            message_processing_service
+            message_processing_service,
+            analytics_repository=analytics_repository
         )
         result = await use_case.execute(dto)
         
@@ -133,14 +162,21 @@ async def process_message(
 @router.get("/conversation/{conversation_id}", response_model=MessageListResponse)
 async def get_messages_by_conversation(
     conversation_id: UUID,
+    response: Response,
     skip: int = 0,
     limit: int = 50,
+    cursor: Optional[str] = None,
     message_repository = Depends(get_message_repository)
 ):
-    """Lista mensagens de uma conversa"""
+    """Lista mensagens de uma conversa (cursor em `next_cursor` e no header X-Next-Cursor)"""
     use_case = GetMessagesByConversationUseCase(message_repository)
-    result = await use_case.execute(conversation_id, skip=skip, limit=limit)
+    try:
+        result = await use_case.execute(conversation_id, skip=skip, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     
+    if result.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = result.next_cursor
     return result
 
 
@@ -1,21 +1,23 @@
 """
 Endpoints de mensagens
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime
 from uuid import UUID
 
-from src.infrastructure.database.database import get_db
+from src.infrastructure.database.async_database import get_async_db
 from src.infrastructure.database.auth_models import AuthUser
 from src.presentation.controllers.auth_controller import get_current_user
+from src.presentation.pagination import set_next_cursor
+from src.domain.repositories.filters import MessageFilter
 from src.infrastructure.repositories.message_repository_impl import MessageRepositoryImpl
 from src.infrastructure.repositories.conversation_repository_impl import ConversationRepositoryImpl
 from src.domain.entities.message import Message
 from src.domain.entities.conversation import Conversation
-from src.domain.value_objects.message_content import MessageContent
+from src.domain.value_objects.message_content import MessageContent, MessageDirection as StoredDirection
 from src.domain.value_objects.phone_number import PhoneNumber
 from src.domain.value_objects.message_direction import MessageDirection
 from src.domain.value_objects.message_status import MessageStatus
@@ -53,56 +55,88 @@ class MessageStatsResponse(BaseModel):
     pending_messages: int
 
 # Dependências
-def get_message_repository(db: Session = Depends(get_db)) -> MessageRepositoryImpl:
+def get_message_repository(db: AsyncSession = Depends(get_async_db)) -> MessageRepositoryImpl:
     return MessageRepositoryImpl(db)
 
-def get_conversation_repository(db: Session = Depends(get_db)) -> ConversationRepositoryImpl:
+def get_conversation_repository(db: AsyncSession = Depends(get_async_db)) -> ConversationRepositoryImpl:
     return ConversationRepositoryImpl(db)
 
+# Direção gravada no banco -> direção exposta pela API
+API_DIRECTIONS = {"incoming": "inbound", "outgoing": "outbound"}
+STORED_DIRECTIONS = {api: stored for stored, api in API_DIRECTIONS.items()}
+
+# Status exposto pela API -> is_processed
+API_STATUSES = {"read": True, "pending": False}
+
+def to_message_response(message: Message) -> MessageResponse:
+    """Converte a entidade para o formato da API"""
+    direction = message.content.direction.value
+    return MessageResponse(
+        id=str(message.id),
+        conversation_id=str(message.conversation_id),
+        sender_id=str(message.user_id) if direction == "incoming" else None,
+        recipient_id=str(message.user_id) if direction == "outgoing" else None,
+        content=message.content.text,
+        direction=API_DIRECTIONS.get(direction, direction),
+        status="read" if message.is_processed else "pending",
+        timestamp=message.created_at.isoformat(),
+        metadata=message.content.metadata
+    )
+
 # Endpoints
 @router.get("/", response_model=List[MessageResponse])
 async def get_messages(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Cursor recebido no header X-Next-Cursor"),
     conversation_id: Optional[str] = Query(None),
     direction: Optional[str] = Query(None),
-    status: Optional[str] = Query(None),
+    status_filter: Optional[str] = Query(None, alias="status"),
     message_repo: MessageRepositoryImpl = Depends(get_message_repository),
     current_user: AuthUser = Depends(get_current_user)
 ):
-    """Lista todas as mensagens com filtros"""
+    """
+    Lista todas as mensagens com filtros.
+
+    Pagina por cursor (created_at, id): enquanto houver mais mensagens a resposta
+    traz o header X-Next-Cursor, a ser enviado como `cursor` na próxima chamada.
+    `skip` (offset) continua aceito por compatibilidade, mas fica lento nas
+    páginas profundas.
+    """
     try:
-        if conversation_id:
-            messages = message_repo.get_by_conversation_id(UUID(conversation_id))
-        else:
-            messages = message_repo.get_all(skip=skip, limit=limit)
-        
-        # Aplicar filtros
-        if direction:
-            messages = [m for m in messages if m.direction.value == direction]
-        
-        if status:
-            messages = [m for m in messages if m.status.value == status]
-        
-        return [
-            MessageResponse(
-                id=str(message.id),
-                conversation_id=str(message.conversation_id),
-                sender_id=str(message.sender_id) if message.sender_id else None,
-                recipient_id=str(message.recipient_id) if message.recipient_id else None,
-                content=message.content.value,
-                direction=message.direction.value,
-                status=message.status.value,
-                timestamp=message.timestamp.isoformat(),
-                metadata=message.message_metadata
-            )
-            for message in messages
-        ]
+        conversation_uuid = UUID(conversation_id) if conversation_id else None
     except ValueError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="ID de conversa inválido"
         )
+    
+    # direction/status fora do que a API devolve não casam com nenhuma mensagem
+    stored_direction = STORED_DIRECTIONS.get(direction, direction) if direction else None
+    if (stored_direction and stored_direction not in API_DIRECTIONS) or (status_filter and status_filter not in API_STATUSES):
+        return []
+    
+    filters = MessageFilter(
+        conversation_id=conversation_uuid,
+        direction=StoredDirection(stored_direction) if stored_direction else None,
+        is_processed=API_STATUSES.get(status_filter)
+    )
+    
+    try:
+        if skip:
+            messages = await message_repo.find_all(skip=skip, limit=limit, filters=filters)
+        else:
+            page = await message_repo.find_page(cursor=cursor, limit=limit, filters=filters)
+            messages = page.items
+            set_next_cursor(response, page)
+        
+        return [to_message_response(message) for message in messages]
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -10,6 +10,7 @@ from datetime import datetime
 from src.infrastructure.database.database import get_db
 from src.infrastructure.database.auth_models import AuthUser
 from src.presentation.controllers.auth_controller import get_current_user
+from src.presentation.dependencies import get_ai_service
 from config import settings
 
 router = APIRouter(prefix="/settings", tags=["settings"])
@@ -56,6 +57,10 @@ class AITestResponse(BaseModel):
     model_used: str
     tokens_used: int
 
+class AICacheInvalidateRequest(BaseModel):
+    context: Optional[dict] = None
+    all_prompts: bool = True
+
 class WhatsAppTestRequest(BaseModel):
     phone_number: str
     message: str
@@ -151,6 +156,34 @@ async def test_ai(
             detail=f"Erro ao testar IA: {str(e)}"
         )
 
+@router.get("/ai-cache")
+async def get_ai_cache_stats(
+    current_user: AuthUser = Depends(get_current_user)
+):
+    """Taxa de acerto e latência economizada pelo cache de respostas da IA"""
+    return {
+        "timestamp": datetime.now().isoformat(),
+        **get_ai_service().response_cache.stats()
+    }
+
+@router.post("/ai-cache/invalidate")
+async def invalidate_ai_cache(
+    request: AICacheInvalidateRequest,
+    current_user: AuthUser = Depends(get_current_user)
+):
+    """Descarta respostas em cache (use após alterar prompts)"""
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Apenas administradores podem limpar o cache da IA"
+        )
+    
+    removed = get_ai_service().invalidate_responses(request.context, request.all_prompts)
+    return {
+        "removed": removed,
+        "timestamp": datetime.now().isoformat()
+    }
+
 @router.post("/test-whatsapp", response_model=WhatsAppTestResponse)
 async def test_whatsapp(
     test_data: WhatsAppTestRequest,
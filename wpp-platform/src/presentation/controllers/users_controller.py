@@ -1,15 +1,17 @@
 """
 Endpoints de usuários
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from pydantic import BaseModel, EmailStr
 from datetime import datetime
 
-from src.infrastructure.database.database import get_db
+from src.infrastructure.database.async_database import get_async_db
 from src.infrastructure.database.auth_models import AuthUser
 from src.presentation.controllers.auth_controller import get_current_user
+from src.presentation.pagination import set_next_cursor
+from src.domain.repositories.filters import UserFilter
 from src.infrastructure.repositories.user_repository_impl import UserRepositoryImpl
 from src.domain.entities.user import User
 from src.domain.value_objects.phone_number import PhoneNumber
@@ -50,49 +52,58 @@ class UserStatsResponse(BaseModel):
     total_messages: int
 
 # Dependências
-def get_user_repository(db: Session = Depends(get_db)) -> UserRepositoryImpl:
+def get_user_repository(db: AsyncSession = Depends(get_async_db)) -> UserRepositoryImpl:
     return UserRepositoryImpl(db)
 
 # Endpoints
 @router.get("/", response_model=List[UserResponse])
 async def get_users(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Cursor recebido no header X-Next-Cursor"),
     search: Optional[str] = Query(None),
     is_active: Optional[bool] = Query(None),
     user_repo: UserRepositoryImpl = Depends(get_user_repository),
     current_user: AuthUser = Depends(get_current_user)
 ):
-    """Lista todos os usuários com filtros"""
+    """
+    Lista todos os usuários com filtros.
+
+    Pagina por cursor (created_at, id) com o header X-Next-Cursor; `skip`
+    (offset) continua aceito por compatibilidade.
+    """
     try:
-        users = user_repo.get_all(skip=skip, limit=limit)
-        
-        # Aplicar filtros
-        if search:
-            users = [u for u in users if 
-                    search.lower() in u.name.value.lower() or 
-                    search in u.phone.value or 
-                    search.lower() in u.email.value.lower()]
+        filters = UserFilter(search=search or None, is_active=is_active)
         
-        if is_active is not None:
-            users = [u for u in users if u.is_active == is_active]
+        if skip:
+            users = await user_repo.find_all(skip=skip, limit=limit, filters=filters)
+        else:
+            page = await user_repo.find_page(cursor=cursor, limit=limit, filters=filters)
+            users = page.items
+            set_next_cursor(response, page)
         
         # Converter para response
         return [
             UserResponse(
                 id=str(user.id),
-                name=user.name.value,
-                phone=user.phone.value,
-                email=user.email.value,
+                name=user.name,
+                phone=user.phone_number.value,
+                email=user.email or "",
                 is_active=user.is_active,
                 created_at=user.created_at.isoformat(),
-                updated_at=user.updated_at.isoformat(),
-                last_activity=user.last_activity.isoformat() if user.last_activity else None,
-                conversation_count=0,  # TODO: Implementar contagem real
-                total_messages=0  # TODO: Implementar contagem real
+                updated_at=(user.updated_at or user.created_at).isoformat(),
+                last_activity=None,
+                conversation_count=user.conversation_count,
+                total_messages=user.total_messages
             )
             for user in users
         ]
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -106,15 +117,13 @@ async def get_user_stats(
 ):
     """Obtém estatísticas dos usuários"""
     try:
-        users = user_repo.get_all()
-        total_users = len(users)
-        active_users = len([u for u in users if u.is_active])
+        stats = await user_repo.get_stats()
         
         return UserStatsResponse(
-            total_users=total_users,
-            active_users=active_users,
-            total_conversations=0,  # TODO: Implementar contagem real
-            total_messages=0  # TODO: Implementar contagem real
+            total_users=stats.total_users,
+            active_users=stats.active_users,
+            total_conversations=stats.total_conversations,
+            total_messages=stats.total_messages
         )
     except Exception as e:
         raise HTTPException(
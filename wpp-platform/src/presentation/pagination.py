@@ -0,0 +1,15 @@
+"""
+Paginação por cursor nas respostas da API
+"""
+from fastapi import Response
+
+from ..domain.repositories.pagination import Page
+
+# Header com o cursor da próxima página (exposto no CORS para o frontend)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def set_next_cursor(response: Response, page: Page) -> None:
+    """Informa o cursor da próxima página no header; ausente na última página"""
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
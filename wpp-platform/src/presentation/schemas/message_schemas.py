@@ -49,6 +49,7 @@ class MessageListResponse(BaseModel):
     total: int
     skip: int
     limit: int
+    next_cursor: Optional[str] = None
 
 
 class ProcessMessageResponse(BaseModel):
@@ -58,3 +59,10 @@ class ProcessMessageResponse(BaseModel):
     ai_response: Optional[str]
     sentiment: Optional[Dict[str, Any]]
     intent: Optional[Dict[str, Any]]
+
+
+class BatchProcessResponse(BaseModel):
+    """Schema de resposta para processamento em lote"""
+    processed: int
+    batches: int
+    results: list[ProcessMessageResponse]
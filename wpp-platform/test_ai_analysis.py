@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Teste da análise combinada (sentimento + intenção + escalação) do AIServiceImpl
+
+Chamadas simultâneas para o mesmo texto compartilham uma requisição; o
+cancelamento de um chamador não pode cancelar a requisição dos demais.
+
+Uso:
+    python -m pytest test_ai_analysis.py
+"""
+import asyncio
+import json
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+# Adicionar o diretório raiz ao path
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(ROOT)
+
+from src.infrastructure.external_services.ai_service_impl import AIServiceImpl
+
+ANALYSIS = {
+    "sentiment": "negative", "sentiment_confidence": 0.9, "emotions": ["angry"],
+    "intent": "complaint", "intent_confidence": 0.8, "entities": [], "should_escalate": False
+}
+
+
+class SlowCompletions:
+    """Responde a análise só depois de `release` ser sinalizado"""
+
+    def __init__(self, error: Exception = None):
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.error = error
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        await self.release.wait()
+        if self.error:
+            raise self.error
+        message = SimpleNamespace(content=json.dumps(ANALYSIS))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def build_service(completions: SlowCompletions) -> AIServiceImpl:
+    return AIServiceImpl(client=SimpleNamespace(chat=SimpleNamespace(completions=completions)))
+
+
+def test_cancelled_caller_does_not_cancel_the_other_waiters():
+    async def scenario():
+        completions = SlowCompletions()
+        service = build_service(completions)
+        text = "O pedido chegou quebrado"
+
+        # O primeiro chamador dispara a requisição e estoura o timeout da sua etapa
+        first = asyncio.create_task(asyncio.wait_for(service.analyze_sentiment(text), 0.01))
+        await asyncio.sleep(0)
+        others = [
+            asyncio.create_task(service.extract_intent(text)),
+            asyncio.create_task(service.should_escalate_to_human([], text))
+        ]
+        with pytest.raises(asyncio.TimeoutError):
+            await first
+
+        completions.release.set()
+        intent, escalate = await asyncio.gather(*others)
+        cached = await service.analyze_sentiment(text)
+        return completions.calls, intent, escalate, cached, service.stats()
+
+    calls, intent, escalate, cached, stats = asyncio.run(scenario())
+    assert calls == 1
+    assert intent["intent"] == "complaint"
+    assert escalate is True  # negativo com confiança 0.9
+    assert cached["sentiment"] == "negative"
+    assert stats["analysis_misses"] == 1 and stats["analysis_hits"] == 3
+
+
+def test_failed_request_is_not_cached():
+    """Erro fora do schema cai no fallback para todos os chamadores e não fica em cache"""
+    async def scenario():
+        completions = SlowCompletions(error=RuntimeError("falha na API"))
+        service = build_service(completions)
+        waiters = [asyncio.create_task(service.extract_intent("Oi")) for _ in range(3)]
+        await asyncio.sleep(0)
+        completions.release.set()
+        results = await asyncio.gather(*waiters)
+        return completions.calls, results, service.stats()
+
+    calls, results, stats = asyncio.run(scenario())
+    assert calls == 1
+    assert all(result == results[0] for result in results)
+    assert stats["analysis_cache_size"] == 0
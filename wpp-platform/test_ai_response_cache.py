@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Teste do cache de respostas do AIServiceImpl
+
+Usa um cliente OpenAI falso que devolve uma resposta diferente por chamada,
+para distinguir resposta em cache de resposta gerada.
+
+Uso:
+    python -m pytest test_ai_response_cache.py
+"""
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+# Adicionar o diretório raiz ao path
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(ROOT)
+
+from config import settings
+from src.infrastructure.external_services.ai_service_impl import AIServiceImpl
+from src.infrastructure.external_services.response_cache import ResponseCache
+
+
+class FakeCompletions:
+    def __init__(self):
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        message = SimpleNamespace(content=f"resposta {self.calls}")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def build_service():
+    completions = FakeCompletions()
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return AIServiceImpl(client=client, response_cache=ResponseCache()), completions
+
+
+def test_message_without_history_is_cached():
+    service, completions = build_service()
+
+    async def scenario():
+        return [await service.generate_response("Qual o horário?", []) for _ in range(2)]
+
+    assert asyncio.run(scenario()) == ["resposta 1", "resposta 1"]
+    assert completions.calls == 1
+
+
+def test_same_question_after_different_messages_is_not_shared():
+    """A mesma pergunta depois de trechos de conversa diferentes não reaproveita a resposta"""
+    service, completions = build_service()
+    first = [{"direction": "incoming", "content": "Quero cancelar o pedido 10"}]
+    second = [{"direction": "incoming", "content": "Quero comprar um presente"}]
+
+    async def scenario():
+        await service.generate_response("Qual o horário?", [])
+        return [
+            await service.generate_response("Qual o horário?", first),
+            await service.generate_response("Qual o horário?", second)
+        ]
+
+    assert asyncio.run(scenario()) == ["resposta 2", "resposta 3"]
+    assert completions.calls == 3
+    assert service.response_cache.stats()["size"] == 3
+
+
+def test_question_inside_a_conversation_hits_the_cache():
+    """Conversas que chegam à pergunta pelo mesmo trecho recente dividem a resposta"""
+    service, completions = build_service()
+    greeting = [
+        {"direction": "incoming", "content": "Oi"},
+        {"direction": "outgoing", "content": "Olá! Como posso ajudar?"},
+    ]
+    earlier = [{"direction": "incoming", "content": "Bom dia"}, {"direction": "outgoing", "content": "Bom dia!"}]
+
+    same_greeting = [{"direction": "incoming", "content": "oi!"}] + greeting[1:]
+
+    async def scenario():
+        return [
+            await service.generate_response("Qual o horário?", greeting),
+            # Texto normalizado: pontuação, acentos e caixa não mudam a chave
+            await service.generate_response("qual o horario", same_greeting),
+            # Mensagens mais antigas que a janela não mudam a chave
+            await service.generate_response("Qual o horário?", earlier + greeting),
+        ]
+
+    assert asyncio.run(scenario()) == ["resposta 1"] * 3
+    assert completions.calls == 1
+    assert service.response_cache.stats()["exact_hits"] == 2
+
+
+def test_history_window_zero_keeps_conversations_out_of_the_cache(monkeypatch):
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_HISTORY_MESSAGES", 0)
+    service, completions = build_service()
+    history = [{"direction": "incoming", "content": "Oi"}]
+
+    async def scenario():
+        return [await service.generate_response("Qual o horário?", history) for _ in range(2)]
+
+    assert asyncio.run(scenario()) == ["resposta 1", "resposta 2"]
+    assert service.response_cache.stats()["size"] == 0
+
+
+def test_similarity_layer_is_off_by_default():
+    assert not settings.RESPONSE_CACHE_SIMILARITY
+    assert AIServiceImpl(client=object()).response_cache.similarity_threshold is None
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Teste das consultas de analytics contra o cálculo anterior em Python
+
+O fluxo antigo carregava usuários, conversas e mensagens e contava em laços;
+aqui os mesmos laços rodam sobre as linhas de um banco semeado e o resultado é
+comparado com o AnalyticsRepositoryImpl: antes da primeira rodada dos rollups
+(tudo ao vivo), com o high-water mark no meio do período (rollups + trecho ao
+vivo) e depois da rodada completa.
+
+Uso:
+    python -m pytest test_analytics_queries.py
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import uuid
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+import pytest
+
+# Adicionar o diretório raiz ao path
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(ROOT)
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from config import settings
+from src.domain.repositories.summaries import MessageTrend, UserActivity
+from src.infrastructure.database.engine_config import create_async_database_engine
+from src.infrastructure.database.models import Base, ConversationModel, MessageModel, UserModel
+from src.infrastructure.repositories.analytics_repository_impl import AnalyticsRepositoryImpl
+from src.infrastructure.repositories.counters import reconcile_counters
+from src.infrastructure.repositories.rollups import refresh_rollups
+
+DAYS = 10
+END = datetime.combine(datetime.utcnow().date(), time.min)
+START = END - timedelta(days=DAYS)
+STATUSES = ("active", "pending", "closed")
+
+
+async def seed(session) -> None:
+    """Usuários, conversas e mensagens espalhados pelo período (e alguns antes dele)"""
+    generator = random.Random(23)
+    users, conversations, messages = [], [], []
+    for index in range(15):
+        user_id = uuid.uuid4()
+        created_at = START + timedelta(days=generator.uniform(-3, DAYS), seconds=generator.randint(0, 59))
+        users.append({
+            "id": user_id, "phone_number": f"55859{index:08d}", "name": f"Contato {index}",
+            "is_active": index % 4 != 0, "created_at": created_at
+        })
+        for _ in range(generator.randint(0, 2)):
+            conversations.append({
+                "id": uuid.uuid4(), "user_id": user_id, "status": generator.choice(STATUSES),
+                "created_at": created_at + timedelta(minutes=generator.randint(0, 90))
+            })
+    for index in range(400):
+        conversation = generator.choice(conversations)
+        messages.append({
+            "id": uuid.uuid4(),
+            "conversation_id": conversation["id"],
+            "user_id": conversation["user_id"],
+            "whatsapp_message_id": f"wamid.a{index}",
+            "content": f"Mensagem {index}",
+            "direction": generator.choice(("incoming", "outgoing")),
+            "created_at": max(
+                conversation["created_at"] + timedelta(seconds=1),
+                START + timedelta(seconds=generator.randint(-86400, DAYS * 86400 - 1))
+            )
+        })
+    for model, rows in ((UserModel, users), (ConversationModel, conversations), (MessageModel, messages)):
+        await session.execute(insert(model), rows)
+    await session.commit()
+    await reconcile_counters(session)
+
+
+async def load(session) -> tuple:
+    """Todas as linhas, como o fluxo anterior carregava"""
+    loaded = []
+    for model in (UserModel, ConversationModel, MessageModel):
+        loaded.append(list((await session.scalars(select(model))).all()))
+    return tuple(loaded)
+
+
+def expected_overview(users, conversations, messages, today: datetime) -> dict:
+    return {
+        "total_users": len(users),
+        "active_users": len([user for user in users if user.is_active]),
+        "total_conversations": len(conversations),
+        "active_conversations": len([
+            conversation for conversation in conversations if conversation.status == "active"
+        ]),
+        "total_messages": len(messages),
+        "messages_today": len([message for message in messages if message.created_at >= today]),
+    }
+
+
+def expected_trends(messages) -> list:
+    trends = {}
+    for message in messages:
+        if START <= message.created_at < END:
+            trend = trends.setdefault(message.created_at.date(), MessageTrend(message.created_at.date()))
+            if message.direction == "incoming":
+                trend.inbound_messages += 1
+            else:
+                trend.outbound_messages += 1
+    return [trends[day] for day in sorted(trends)]
+
+
+def expected_activity(users, messages) -> list:
+    created = {user.id: user.created_at for user in users}
+    activity = {}
+    for user in users:
+        if START <= user.created_at < END:
+            activity.setdefault(user.created_at.date(), UserActivity(user.created_at.date())).new_users += 1
+    senders = defaultdict(set)
+    for message in messages:
+        if START <= message.created_at < END and message.direction == "incoming":
+            senders[message.created_at.date()].add(message.user_id)
+    for day, user_ids in senders.items():
+        counts = activity.setdefault(day, UserActivity(day))
+        counts.active_users = len(user_ids)
+        counts.returning_users = len([
+            user_id for user_id in user_ids if created[user_id] < datetime.combine(day, time.min)
+        ])
+    return [activity[day] for day in sorted(activity)]
+
+
+def expected_conversation_metrics(conversations, messages) -> dict:
+    by_status = defaultdict(int)
+    for conversation in conversations:
+        by_status[conversation.status] += 1
+    last_message = {}
+    for message in messages:
+        last_message[message.conversation_id] = max(
+            last_message.get(message.conversation_id, message.created_at), message.created_at
+        )
+    durations = [
+        (last_message[conversation.id] - conversation.created_at).total_seconds() / 60
+        for conversation in conversations if conversation.id in last_message
+    ]
+    return {
+        "by_status": dict(by_status),
+        "avg_duration_minutes": sum(durations) / len(durations),
+        "avg_messages_per_conversation": len(messages) / len(conversations),
+    }
+
+
+async def compare(session) -> None:
+    users, conversations, messages = await load(session)
+    repository = AnalyticsRepositoryImpl(session)
+    today = END - timedelta(days=1)
+
+    assert vars(await repository.get_overview(today)) == expected_overview(users, conversations, messages, today)
+    assert await repository.get_message_trends(START, END) == expected_trends(messages)
+    assert await repository.get_user_activity(START, END) == expected_activity(users, messages)
+
+    metrics = await repository.get_conversation_metrics()
+    expected = expected_conversation_metrics(conversations, messages)
+    assert metrics.by_status == expected["by_status"]
+    assert metrics.avg_duration_minutes == pytest.approx(expected["avg_duration_minutes"], rel=1e-6)
+    assert metrics.avg_messages_per_conversation == pytest.approx(expected["avg_messages_per_conversation"])
+
+
+def test_aggregates_match_python_counts():
+    """Mesmo banco, mesmos números: ao vivo, com o mark no meio do período e com os rollups completos"""
+    async def main(path: str):
+        engine = create_async_database_engine(f"sqlite+aiosqlite:///{path}")
+        try:
+            async with engine.begin() as connection:
+                await connection.run_sync(Base.metadata.create_all)
+            sessions = async_sessionmaker(engine, expire_on_commit=False)
+            async with sessions() as session:
+                await seed(session)
+                await compare(session)
+
+                lag = timedelta(seconds=settings.ANALYTICS_ROLLUP_LAG_SECONDS)
+                middle = START + timedelta(days=DAYS // 2, hours=13, minutes=17)
+                await refresh_rollups(session, now=middle + lag)
+                await compare(session)
+
+                await refresh_rollups(session, now=END + lag)
+                await compare(session)
+        finally:
+            await engine.dispose()
+
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(main(os.path.join(directory, "analytics.db")))
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Teste das listagens paginadas pela API real (production_server e src.main)
+
+Sobe as aplicações com TestClient sobre um banco SQLite temporário (só o
+get_async_db e a autenticação são trocados) e percorre /messages,
+/conversations, /users e /messages/conversation/{id} pelo cursor do header
+X-Next-Cursor, conferindo com a listagem por `skip`.
+
+Uso:
+    python -m pytest test_list_endpoints.py
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+# Adicionar o diretório raiz ao path
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(ROOT)
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+import production_server
+import src.main
+from src.infrastructure.database.async_database import get_async_db
+from src.infrastructure.database.engine_config import create_async_database_engine
+from src.infrastructure.database.models import Base, ConversationModel, MessageModel, UserModel
+from src.presentation.controllers.auth_controller import get_current_user
+
+USERS = 5
+# Usuários gravados sem created_at: o valor vem do DEFAULT do banco, todos no mesmo segundo
+DEFAULT_USERS = 3
+MESSAGES = 11
+START = datetime(2024, 1, 1)
+
+
+def seed(path: str) -> dict:
+    """USERS usuários com uma conversa cada (mais DEFAULT_USERS sem conversa); MESSAGES mensagens na primeira"""
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    users = [uuid.uuid4() for _ in range(USERS)]
+    conversations = [uuid.uuid4() for _ in range(USERS)]
+    with engine.begin() as connection:
+        connection.execute(insert(UserModel), [
+            {"id": user_id, "phone_number": f"55859999900{index:02d}", "name": f"Cliente {index}",
+             "created_at": START + timedelta(minutes=index)}
+            for index, user_id in enumerate(users)
+        ])
+        connection.execute(insert(UserModel), [
+            {"id": uuid.uuid4(), "phone_number": f"55859999901{index:02d}", "name": f"Cliente padrão {index}"}
+            for index in range(DEFAULT_USERS)
+        ])
+        connection.execute(insert(ConversationModel), [
+            {"id": conversation_id, "user_id": user_id, "status": "active" if index % 2 else "closed",
+             "created_at": START + timedelta(minutes=index)}
+            for index, (conversation_id, user_id) in enumerate(zip(conversations, users))
+        ])
+        connection.execute(insert(MessageModel), [
+            {"id": uuid.uuid4(), "conversation_id": conversations[0], "user_id": users[0],
+             "whatsapp_message_id": f"wamid.{index}", "content": f"Mensagem {index}",
+             "direction": "incoming" if index % 2 else "outgoing", "is_processed": index % 3 == 0,
+             # Pares com o mesmo created_at: o desempate é pelo id
+             "created_at": START + timedelta(seconds=index // 2)}
+            for index in range(MESSAGES)
+        ])
+    engine.dispose()
+    return {"conversation_id": conversations[0]}
+
+
+@pytest.fixture(scope="module")
+def clients():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "endpoints.db")
+        data = seed(path)
+        engine = create_async_database_engine(f"sqlite+aiosqlite:///{path}")
+        sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+        async def test_db():
+            async with sessions() as session:
+                yield session
+
+        apps = (production_server.app, src.main.app)
+        for app in apps:
+            app.dependency_overrides[get_async_db] = test_db
+            app.dependency_overrides[get_current_user] = lambda: None
+        # Sem `with`: os eventos de startup (fila de webhooks, Graph API) não rodam
+        yield TestClient(production_server.app), TestClient(src.main.app), data
+        for app in apps:
+            app.dependency_overrides.clear()
+        asyncio.run(engine.dispose())
+
+
+def walk(client: TestClient, url: str, limit: int, **params) -> list:
+    """Todas as páginas pelo header X-Next-Cursor"""
+    items, cursor = [], None
+    while True:
+        response = client.get(url, params={**params, "limit": limit, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200, response.text
+        body = response.json()
+        items.extend(body["messages"] if isinstance(body, dict) else body)
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return items
+
+
+@pytest.mark.parametrize("url, params, total", [
+    ("/messages/", {}, MESSAGES),
+    ("/messages/", {"direction": "inbound"}, MESSAGES // 2),
+    ("/messages/", {"status": "read"}, (MESSAGES + 2) // 3),
+    ("/conversations/", {}, USERS),
+    ("/conversations/", {"status": "active"}, USERS // 2),
+    ("/users/", {}, USERS + DEFAULT_USERS),
+])
+def test_cursor_pages_match_offset(clients, url, params, total):
+    client, _, _ = clients
+    paged = walk(client, url, limit=2, **params)
+    assert len(paged) == total
+    assert len({item["id"] for item in paged}) == total
+
+    listed = client.get(url, params={**params, "skip": 1, "limit": 100})
+    assert listed.status_code == 200, listed.text
+    assert [item["id"] for item in listed.json()] == [item["id"] for item in paged][1:]
+
+
+def test_conversation_messages_cursor(clients):
+    _, client, data = clients
+    url = f"/messages/conversation/{data['conversation_id']}"
+    first = client.get(url, params={"limit": 4})
+    assert first.status_code == 200, first.text
+    assert first.json()["next_cursor"] == first.headers["X-Next-Cursor"]
+
+    paged = walk(client, url, limit=4)
+    assert [message["content"] for message in paged] == [
+        message["content"] for message in client.get(url, params={"skip": 0, "limit": 100}).json()["messages"]
+    ]
+    assert len(paged) == MESSAGES
+
+
+def test_invalid_cursor_is_rejected(clients):
+    client, main_client, data = clients
+    for url in ("/messages/", "/conversations/", "/users/"):
+        assert client.get(url, params={"cursor": "inválido"}).status_code == 400
+    response = main_client.get(f"/messages/conversation/{data['conversation_id']}", params={"cursor": "inválido"})
+    assert response.status_code == 400
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Teste do download de mídia em blocos do WhatsAppServiceImpl
+
+A vaga de download (WHATSAPP_MAX_CONCURRENT_DOWNLOADS) deve voltar assim que
+o consumidor sai do `async with` de open_media, mesmo no meio da mídia ou com
+erro de integridade; o servidor é um httpx.MockTransport com corpo em blocos.
+
+Uso:
+    python -m pytest test_media_download.py
+"""
+import asyncio
+import hashlib
+import os
+import sys
+
+import httpx
+import pytest
+
+# Adicionar o diretório raiz ao path
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(ROOT)
+
+from config import settings
+from src.application.interfaces.whatsapp_service import MediaIntegrityError
+from src.infrastructure.external_services.whatsapp_service_impl import WhatsAppServiceImpl
+
+CHUNK = b"x" * 65536
+CHUNKS = 50
+MEDIA_URL = "https://media.example/file"
+
+
+def service() -> WhatsAppServiceImpl:
+    """Serviço com uma vaga de download e um servidor que entrega a mídia em CHUNKS blocos"""
+    async def body():
+        for _ in range(CHUNKS):
+            await asyncio.sleep(0)
+            yield CHUNK
+
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, content=body()))
+    return WhatsAppServiceImpl(client=httpx.AsyncClient(transport=transport))
+
+
+@pytest.fixture(autouse=True)
+def one_download_slot(monkeypatch):
+    monkeypatch.setattr(settings, "WHATSAPP_MAX_CONCURRENT_DOWNLOADS", 1)
+
+
+def test_stopping_early_releases_the_slot():
+    """Consumidor que para no primeiro bloco devolve a vaga; o download seguinte não espera"""
+    async def main():
+        whatsapp = service()
+        async with whatsapp.open_media(MEDIA_URL) as chunks:
+            async for chunk in chunks:
+                assert whatsapp.download_semaphore.locked()
+                break
+        assert not whatsapp.download_semaphore.locked()
+
+        data = await asyncio.wait_for(whatsapp.download_media(MEDIA_URL), timeout=5)
+        assert len(data) == len(CHUNK) * CHUNKS
+        await whatsapp.aclose()
+
+    asyncio.run(main())
+
+
+def test_integrity_error_releases_the_slot():
+    """Hash divergente levanta MediaIntegrityError no fim da mídia e também devolve a vaga"""
+    async def main():
+        whatsapp = service()
+        with pytest.raises(MediaIntegrityError):
+            async with whatsapp.open_media(MEDIA_URL, expected_sha256="0" * 64) as chunks:
+                async for _ in chunks:
+                    pass
+        assert not whatsapp.download_semaphore.locked()
+        await whatsapp.aclose()
+
+    asyncio.run(main())
+
+
+def test_download_to_file_checks_size_and_hash(tmp_path):
+    async def main():
+        whatsapp = service()
+        expected = hashlib.sha256(CHUNK * CHUNKS).hexdigest()
+        download = await whatsapp.download_media_to_file(
+            MEDIA_URL, destination=str(tmp_path / "media.bin"),
+            expected_size=len(CHUNK) * CHUNKS, expected_sha256=expected
+        )
+        assert (download.size, download.sha256) == (len(CHUNK) * CHUNKS, expected)
+
+        with pytest.raises(MediaIntegrityError):
+            await whatsapp.download_media_to_file(MEDIA_URL, destination=str(tmp_path / "short.bin"), expected_size=10)
+        assert not (tmp_path / "short.bin").exists()
+        assert not whatsapp.download_semaphore.locked()
+        await whatsapp.aclose()
+
+    asyncio.run(main())
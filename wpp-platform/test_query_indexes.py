@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Teste dos índices das consultas mais frequentes (EXPLAIN QUERY PLAN no SQLite)
+
+Cria um banco temporário sem os índices novos, aplica a migração do Alembic e
+confere, pelo plano de execução, que cada consulta dos repositórios usa o
+índice esperado em vez de varrer a tabela.
+
+Uso:
+    python -m pytest test_query_indexes.py
+    python test_query_indexes.py
+"""
+import os
+import sys
+import tempfile
+import uuid
+
+from alembic import command
+from alembic.config import Config
+from datetime import datetime
+
+from sqlalchemy import and_, create_engine, func, or_, select
+from sqlalchemy.dialects import sqlite
+
+# Adicionar o diretório raiz ao path
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(ROOT)
+
+from src.infrastructure.database.models import Base, ConversationModel, MessageModel, UserModel
+
+NEW_INDEXES = {
+    "messages": [
+        "ix_messages_conversation_id_created_at",
+        "ix_messages_user_id_created_at",
+        "ix_messages_unprocessed_created_at",
+        "ix_messages_created_at_id",
+        "ix_messages_direction_created_at_id",
+    ],
+    "conversations": [
+        "ix_conversations_user_id_status",
+        "ix_conversations_agent_id_status",
+        "ix_conversations_created_at_id",
+        "ix_conversations_status_created_at_id",
+    ],
+    "users": ["ix_users_created_at_id"],
+}
+
+conversation_id = uuid.uuid4()
+user_id = uuid.uuid4()
+agent_id = uuid.uuid4()
+after_created_at, after_id = datetime(2024, 1, 1), uuid.uuid4()
+
+
+def keyset(statement, model, limit: int = 100):
+    """Página seguinte ao cursor, como AsyncRepository._page"""
+    return statement.where(
+        model.created_at >= after_created_at,
+        or_(model.created_at > after_created_at, and_(model.created_at == after_created_at, model.id > after_id))
+    ).order_by(model.created_at, model.id).limit(limit + 1)
+
+
+# Mesmas consultas dos repositórios (message/conversation_repository_impl.py)
+QUERIES = {
+    "find_by_conversation_id": (
+        select(MessageModel).where(MessageModel.conversation_id == conversation_id)
+        .order_by(MessageModel.created_at).offset(0).limit(50),
+        "ix_messages_conversation_id_created_at"
+    ),
+    "count_by_conversation_id": (
+        select(func.count()).select_from(MessageModel).where(MessageModel.conversation_id == conversation_id),
+        "ix_messages_conversation_id_created_at"
+    ),
+    "find_by_user_id (mensagens)": (
+        select(MessageModel).where(MessageModel.user_id == user_id)
+        .order_by(MessageModel.created_at).offset(0).limit(50),
+        "ix_messages_user_id_created_at"
+    ),
+    "find_unprocessed_messages": (
+        select(MessageModel).where(MessageModel.is_processed == False).order_by(MessageModel.created_at),
+        "ix_messages_unprocessed_created_at"
+    ),
+    "claim_unprocessed_batch": (
+        select(MessageModel).where(MessageModel.is_processed == False)
+        .order_by(MessageModel.created_at).limit(100),
+        "ix_messages_unprocessed_created_at"
+    ),
+    "find_active_by_user_id": (
+        select(ConversationModel).where(
+            ConversationModel.user_id == user_id,
+            ConversationModel.status == "active"
+        ).limit(1),
+        "ix_conversations_user_id_status"
+    ),
+    "find_by_user_id": (
+        select(ConversationModel).where(ConversationModel.user_id == user_id),
+        "ix_conversations_user_id_status"
+    ),
+    "find_by_agent_id": (
+        select(ConversationModel).where(ConversationModel.agent_id == agent_id),
+        "ix_conversations_agent_id_status"
+    ),
+    "find_page (mensagens)": (keyset(select(MessageModel), MessageModel), "ix_messages_created_at_id"),
+    "find_page (mensagens da conversa)": (
+        keyset(select(MessageModel).where(MessageModel.conversation_id == conversation_id), MessageModel),
+        "ix_messages_conversation_id_created_at"
+    ),
+    "find_page (mensagens por direção)": (
+        keyset(select(MessageModel).where(MessageModel.direction == "incoming"), MessageModel),
+        "ix_messages_direction_created_at_id"
+    ),
+    "find_page (conversas)": (keyset(select(ConversationModel), ConversationModel), "ix_conversations_created_at_id"),
+    "find_page (conversas por status)": (
+        keyset(select(ConversationModel).where(ConversationModel.status == "active"), ConversationModel),
+        "ix_conversations_status_created_at_id"
+    ),
+    "find_page (usuários)": (keyset(select(UserModel), UserModel), "ix_users_created_at_id"),
+}
+
+
+def migrated_engine(path: str):
+    """Banco com o schema anterior (sem os índices) e a migração aplicada"""
+    url = f"sqlite:///{path}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        for names in NEW_INDEXES.values():
+            for name in names:
+                connection.exec_driver_sql(f"DROP INDEX {name}")
+    # Conexões novas depois da migração: o EXPLAIN não recarrega o schema da conexão antiga
+    engine.dispose()
+
+    config = Config(os.path.join(ROOT, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(ROOT, "migrations"))
+    config.set_main_option("sqlalchemy.url", url)
+    command.upgrade(config, "head")
+    return engine
+
+
+def query_plan(engine, statement) -> str:
+    """Plano do SQLite para a consulta (valores literais, como o planner vê)"""
+    sql = statement.compile(dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True})
+    with engine.connect() as connection:
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+    return "\n".join(row[-1] for row in rows)
+
+
+def test_migration_creates_indexes():
+    with tempfile.TemporaryDirectory() as directory:
+        engine = migrated_engine(os.path.join(directory, "indexes.db"))
+        with engine.connect() as connection:
+            for table, names in NEW_INDEXES.items():
+                existing = {row[1] for row in connection.exec_driver_sql(f"PRAGMA index_list({table})")}
+                for name in names:
+                    assert name in existing, f"{name} não foi criado em {table}"
+        engine.dispose()
+
+
+def test_hot_queries_use_indexes():
+    with tempfile.TemporaryDirectory() as directory:
+        engine = migrated_engine(os.path.join(directory, "indexes.db"))
+        for query_name, (statement, index) in QUERIES.items():
+            plan = query_plan(engine, statement)
+            assert index in plan, f"{query_name} não usa {index}:\n{plan}"
+            assert "USE TEMP B-TREE FOR ORDER BY" not in plan, f"{query_name} ordena fora do índice:\n{plan}"
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        engine = migrated_engine(os.path.join(directory, "indexes.db"))
+        for query_name, (statement, index) in QUERIES.items():
+            plan = query_plan(engine, statement)
+            print(f"{'✅' if index in plan else '❌'} {query_name}: {plan}")
+        engine.dispose()
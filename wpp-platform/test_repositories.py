@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""
+Teste dos repositórios contra uma AsyncSession real (SQLite temporário)
+
+Cada cenário cria um banco novo com o schema dos modelos e roda as consultas
+dos repositórios como a API roda, sem mocks.
+
+Uso:
+    python -m pytest test_repositories.py
+"""
+import asyncio
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+# Adicionar o diretório raiz ao path
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(ROOT)
+
+from sqlalchemy import event, select, update
+
+from config import settings
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.application.dtos.message_dto import SendMessageDTO
+from src.application.use_cases.message_use_cases import (
+    ProcessUnprocessedMessagesBatchUseCase, SendMessageUseCase
+)
+from src.domain.entities.conversation import Conversation
+from src.domain.entities.message import Message
+from src.domain.entities.user import User
+from src.domain.repositories.filters import ConversationFilter, MessageFilter, UserFilter
+from src.domain.value_objects.conversation_status import ConversationStatus
+from src.domain.value_objects.message_content import MessageContent, MessageDirection
+from src.domain.value_objects.phone_number import PhoneNumber
+from src.infrastructure.database.engine_config import create_async_database_engine
+from src.infrastructure.database.models import (
+    AnalyticsRollupModel, Base, ConversationModel, ResponseTimeHourModel, UserModel
+)
+from src.infrastructure.repositories.conversation_repository_impl import ConversationRepositoryImpl
+from src.infrastructure.repositories.counters import reconcile_counters
+from src.infrastructure.repositories.message_repository_impl import MessageRepositoryImpl
+from src.infrastructure.repositories.rollups import CONVERSATIONS_PREFIX, as_utc, floor, refresh_rollups
+from src.infrastructure.repositories.unit_of_work_impl import SqlAlchemyUnitOfWork
+from src.infrastructure.repositories.user_repository_impl import UserRepositoryImpl
+
+
+def run(scenario):
+    """Roda `scenario(sessions)` em um banco temporário e descarta o engine no fim"""
+    async def main(path: str):
+        engine = create_async_database_engine(f"sqlite+aiosqlite:///{path}")
+        try:
+            async with engine.begin() as connection:
+                await connection.run_sync(Base.metadata.create_all)
+            await scenario(async_sessionmaker(engine, expire_on_commit=False))
+        finally:
+            await engine.dispose()
+
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(main(os.path.join(directory, "repositories.db")))
+
+
+async def create_user(session, phone_number: str = "5585999990001") -> User:
+    return await UserRepositoryImpl(session).save(User.create_new(PhoneNumber(phone_number), "Cliente"))
+
+
+def test_find_active_by_user_id():
+    async def scenario(sessions):
+        async with sessions() as session:
+            conversations = ConversationRepositoryImpl(session)
+            user = await create_user(session)
+            assert await conversations.find_active_by_user_id(user.id) is None
+
+            await conversations.save(Conversation.create_new(user.id))
+            assert await conversations.find_active_by_user_id(user.id) is None
+
+            conversation = Conversation.create_new(user.id)
+            conversation.activate()
+            await conversations.save(conversation)
+            active = await conversations.find_active_by_user_id(user.id)
+            assert active is not None and active.id == conversation.id and active.is_active()
+
+    run(scenario)
+
+
+def test_conversation_save_updates_status():
+    async def scenario(sessions):
+        async with sessions() as session:
+            conversations = ConversationRepositoryImpl(session)
+            user = await create_user(session)
+            conversation = await conversations.save(Conversation.create_new(user.id))
+
+            conversation.close()
+            await conversations.save(conversation)
+        async with sessions() as session:
+            stored = await ConversationRepositoryImpl(session).find_by_id(conversation.id)
+            assert stored.is_closed() and stored.updated_at is not None
+
+    run(scenario)
+
+
+def test_send_message_use_case():
+    """Primeiro envio cria usuário e conversa ativa; o segundo reaproveita os dois; um commit por envio"""
+    async def scenario(sessions):
+        commits = []
+        event.listen(sessions.kw["bind"].sync_engine, "commit", lambda connection: commits.append(1))
+
+        async with sessions() as session:
+            use_case = SendMessageUseCase(
+                MessageRepositoryImpl(session),
+                ConversationRepositoryImpl(session),
+                UserRepositoryImpl(session),
+                SqlAlchemyUnitOfWork(session)
+            )
+            first = await use_case.execute(SendMessageDTO(phone_number="5585999990002", message="Olá!"))
+            assert len(commits) == 1
+            second = await use_case.execute(SendMessageDTO(phone_number="5585999990002", message="Tudo certo?"))
+            assert len(commits) == 2
+
+        assert first.direction == "outgoing" and first.content == "Olá!"
+        assert second.conversation_id == first.conversation_id and second.user_id == first.user_id
+        assert second.whatsapp_message_id != first.whatsapp_message_id
+
+        async with sessions() as session:
+            conversation = await ConversationRepositoryImpl(session).find_by_id(first.conversation_id)
+            user = await UserRepositoryImpl(session).find_by_phone_number(PhoneNumber("5585999990002"))
+            assert conversation.is_active() and conversation.message_count == 2
+            assert user.id == first.user_id and user.conversation_count == 1
+
+    run(scenario)
+
+
+def test_new_entities_are_inserted_without_select():
+    """Entidades de create_new vão direto para o INSERT; a partir daí, save é atualização"""
+    async def scenario(sessions):
+        statements = []
+        event.listen(
+            sessions.kw["bind"].sync_engine, "before_cursor_execute",
+            lambda connection, cursor, statement, *args: statements.append(statement.split()[0])
+        )
+        async with sessions() as session:
+            user = User.create_new(PhoneNumber("5585999990030"), "Cliente")
+            conversation = Conversation.create_new(user.id)
+            await UserRepositoryImpl(session).save(user)
+            await ConversationRepositoryImpl(session).save(conversation)
+            assert "SELECT" not in statements
+            assert not user.is_new and not conversation.is_new
+
+            conversation.close()
+            await ConversationRepositoryImpl(session).save(conversation)
+            stored = await ConversationRepositoryImpl(session).find_by_id(conversation.id)
+            assert stored.is_closed() and not stored.is_new
+
+    run(scenario)
+
+
+def test_message_save_records_reply_time_once():
+    """Recebida abre a espera; a enviada seguinte fecha e gera uma única amostra"""
+    async def scenario(sessions):
+        async with sessions() as session:
+            user = await create_user(session)
+            conversation = await ConversationRepositoryImpl(session).save(Conversation.create_new(user.id))
+            repository = MessageRepositoryImpl(session)
+            start = datetime.utcnow()
+            for index, (direction, seconds) in enumerate([
+                (MessageDirection.OUTGOING, 0), (MessageDirection.INCOMING, 10),
+                (MessageDirection.INCOMING, 20), (MessageDirection.OUTGOING, 70), (MessageDirection.OUTGOING, 80)
+            ]):
+                message = Message.create_new(
+                    conversation_id=conversation.id, user_id=user.id, whatsapp_message_id=f"wamid.r{index}",
+                    content=MessageContent(text=f"Mensagem {index}", direction=direction)
+                )
+                message.created_at = start + timedelta(seconds=seconds)
+                await repository.save(message)
+
+            hours = (await session.execute(select(ResponseTimeHourModel))).scalars().all()
+            waiting = await session.scalar(
+                select(ConversationModel.awaiting_reply_since).where(ConversationModel.id == conversation.id)
+            )
+            stored = await ConversationRepositoryImpl(session).find_by_id(conversation.id)
+
+        assert sum(hour.count for hour in hours) == 1
+        assert sum(hour.total_seconds for hour in hours) == 60
+        assert waiting is None
+        assert stored.message_count == 5 and stored.unread_count == 2
+
+    run(scenario)
+
+
+def test_reconcile_counters_repairs_broken_counters():
+    """Contadores corrompidos por SQL manual voltam aos valores das mensagens; a segunda rodada não mexe em nada"""
+    async def scenario(sessions):
+        async with sessions() as session:
+            user = await create_user(session)
+            conversation = await ConversationRepositoryImpl(session).save(Conversation.create_new(user.id))
+            repository = MessageRepositoryImpl(session)
+            directions = [MessageDirection.INCOMING, MessageDirection.OUTGOING, MessageDirection.INCOMING]
+            for index, direction in enumerate(directions):
+                await repository.save(Message.create_new(
+                    conversation_id=conversation.id, user_id=user.id, whatsapp_message_id=f"wamid.c{index}",
+                    content=MessageContent(text=f"Mensagem {index}", direction=direction)
+                ))
+            expected = await ConversationRepositoryImpl(session).find_by_id(conversation.id)
+            assert expected.message_count == 3 and expected.unread_count == 2
+            assert expected.last_message_at is not None
+
+            await session.execute(
+                update(ConversationModel)
+                .where(ConversationModel.id == conversation.id)
+                .values(message_count=40, unread_count=0, last_message_at=None)
+            )
+            await session.execute(
+                update(UserModel).where(UserModel.id == user.id).values(conversation_count=7, total_messages=0)
+            )
+            await session.commit()
+
+        async with sessions() as session:
+            assert await reconcile_counters(session) == {"conversations": 1, "users": 1}
+            assert await reconcile_counters(session) == {"conversations": 0, "users": 0}
+
+        async with sessions() as session:
+            repaired = await ConversationRepositoryImpl(session).find_by_id(conversation.id)
+            stored_user = await session.get(UserModel, user.id)
+
+        assert (repaired.message_count, repaired.unread_count) == (3, 2)
+        assert repaired.last_message_at == expected.last_message_at
+        assert (stored_user.conversation_count, stored_user.total_messages) == (1, 3)
+
+    run(scenario)
+
+
+async def conversation_rollups(session) -> dict:
+    """Buckets conversations_<status> diferentes de zero, por (granularidade, métrica, bucket)"""
+    rows = await session.execute(
+        select(AnalyticsRollupModel.granularity, AnalyticsRollupModel.metric,
+               AnalyticsRollupModel.bucket, AnalyticsRollupModel.value)
+        .where(AnalyticsRollupModel.metric.startswith(CONVERSATIONS_PREFIX), AnalyticsRollupModel.value != 0)
+    )
+    return {(granularity, metric, as_utc(bucket)): value for granularity, metric, bucket, value in rows}
+
+
+def test_status_change_reaches_processed_rollups():
+    """Fechar uma conversa já processada move a contagem; o resultado bate com um recálculo completo"""
+    async def scenario(sessions):
+        start = floor(datetime.utcnow() - timedelta(hours=3), "minute")
+        async with sessions() as session:
+            user = await create_user(session)
+            repository = ConversationRepositoryImpl(session)
+            conversations = []
+            for minutes in (0, 1, 90):
+                conversation = Conversation.create_new(user.id)
+                conversation.activate()
+                conversation.created_at = start + timedelta(minutes=minutes, seconds=5)
+                conversations.append(await repository.save(conversation))
+
+            # A primeira rodada vai até start + 60 min: só as duas primeiras ficam antes do mark
+            await refresh_rollups(session, now=start + timedelta(minutes=60, seconds=settings.ANALYTICS_ROLLUP_LAG_SECONDS))
+            first, _, later = conversations
+            first.close()
+            await repository.save(first)
+            later.close()
+            await repository.save(later)
+            await refresh_rollups(session)
+            incremental = await conversation_rollups(session)
+
+            await refresh_rollups(session, since=start)
+            recomputed = await conversation_rollups(session)
+
+        day = floor(start, "day")
+        assert incremental == recomputed
+        assert incremental[("minute", "conversations_closed", start)] == 1
+        assert ("minute", "conversations_active", start) not in incremental
+        if floor(start + timedelta(minutes=90), "day") == day:
+            assert incremental[("day", "conversations_active", day)] == 1
+            assert incremental[("day", "conversations_closed", day)] == 2
+
+    run(scenario)
+
+
+class SlowAnalysis:
+    """NLU falso que devolve o controle ao loop, para os workers se intercalarem"""
+
+    async def analyze_batch(self, texts):
+        await asyncio.sleep(0.01)
+        return [{"sentiment": "neutral", "intent": "general", "should_escalate": False} for _ in texts]
+
+
+def test_concurrent_batch_claimers_never_share_rows():
+    """Três workers drenam a mesma fila em sessões próprias: cada mensagem é reivindicada uma única vez"""
+    async def scenario(sessions):
+        async with sessions() as session:
+            user = await create_user(session)
+            conversation = await ConversationRepositoryImpl(session).save(Conversation.create_new(user.id))
+            await MessageRepositoryImpl(session).save_many([
+                Message.create_new(
+                    conversation_id=conversation.id, user_id=user.id, whatsapp_message_id=f"wamid.b{index}",
+                    content=MessageContent(text=f"Mensagem {index}", direction=MessageDirection.INCOMING)
+                )
+                for index in range(45)
+            ])
+            await session.commit()
+
+        async def worker():
+            claimed = []
+            async with sessions() as session:
+                use_case = ProcessUnprocessedMessagesBatchUseCase(MessageRepositoryImpl(session), SlowAnalysis())
+                while True:
+                    result = await use_case.execute(batch_size=4)
+                    if not result.processed:
+                        return claimed
+                    claimed.extend(item.message_id for item in result.results)
+                    # Pausa entre páginas: sem ela o busy handler do SQLite quase
+                    # sempre perde para o mesmo worker, que já reabre a transação
+                    await asyncio.sleep(0.03)
+
+        claims = await asyncio.gather(worker(), worker(), worker())
+        ids = [message_id for claimed in claims for message_id in claimed]
+
+        assert len(ids) == len(set(ids)) == 45
+        assert all(claims), "todos os workers deveriam ter recebido alguma página"
+        async with sessions() as session:
+            assert await MessageRepositoryImpl(session).find_unprocessed_messages() == []
+
+    run(scenario)
+
+
+async def all_pages(find_page, limit: int = 3, **kwargs) -> list:
+    """Percorre todas as páginas de um find_page pelo cursor"""
+    items, cursor = [], None
+    while True:
+        page = await find_page(cursor=cursor, limit=limit, **kwargs)
+        items.extend(page.items)
+        if not page.next_cursor:
+            return items
+        cursor = page.next_cursor
+
+
+def test_message_filters():
+    async def scenario(sessions):
+        async with sessions() as session:
+            user = await create_user(session)
+            conversations = ConversationRepositoryImpl(session)
+            first, second = [await conversations.save(Conversation.create_new(user.id)) for _ in range(2)]
+
+            now = datetime.utcnow()
+            messages = []
+            for index in range(12):
+                message = Message.create_new(
+                    conversation_id=(first, second)[index % 2].id,
+                    user_id=user.id,
+                    whatsapp_message_id=f"wamid.{index}",
+                    content=MessageContent(
+                        text=f"Mensagem {index}",
+                        direction=MessageDirection.OUTGOING if index % 3 == 0 else MessageDirection.INCOMING
+                    )
+                )
+                message.created_at = now + timedelta(seconds=index)
+                message.is_processed = index % 4 == 0
+                messages.append(message)
+            repository = MessageRepositoryImpl(session)
+            await repository.save_many(messages)
+
+            cases = [
+                MessageFilter(direction=MessageDirection.INCOMING),
+                MessageFilter(direction=MessageDirection.OUTGOING, conversation_id=first.id),
+                MessageFilter(conversation_id=second.id, is_processed=False),
+                MessageFilter(is_processed=True),
+                MessageFilter(),
+            ]
+            for filters in cases:
+                expected = [
+                    message.whatsapp_message_id for message in messages
+                    if (not filters.direction or message.content.direction == filters.direction)
+                    and (not filters.conversation_id or message.conversation_id == filters.conversation_id)
+                    and (filters.is_processed is None or message.is_processed == filters.is_processed)
+                ]
+                paged = await all_pages(repository.find_page, filters=filters)
+                assert [message.whatsapp_message_id for message in paged] == expected, filters
+                listed = await repository.find_all(skip=1, limit=100, filters=filters)
+                assert [message.whatsapp_message_id for message in listed] == expected[1:], filters
+
+    run(scenario)
+
+
+def test_conversation_and_user_filters():
+    async def scenario(sessions):
+        async with sessions() as session:
+            users = UserRepositoryImpl(session)
+            maria = await users.save(User.create_new(PhoneNumber("5585999990010"), "Maria Souza"))
+            joao = await users.save(User.create_new(PhoneNumber("5585999990020"), "João Lima"))
+            joao.deactivate()
+            await users.save(joao)
+
+            conversations = ConversationRepositoryImpl(session)
+            for user, status in ((maria, "active"), (maria, "closed"), (joao, "active"), (joao, "pending")):
+                conversation = Conversation.create_new(user.id)
+                conversation.update_status(status)
+                await conversations.save(conversation)
+
+            active = await all_pages(
+                conversations.find_page, limit=1, filters=ConversationFilter(status=ConversationStatus("active"))
+            )
+            assert sorted(conversation.user_id for conversation in active) == sorted([maria.id, joao.id])
+            marias = await all_pages(conversations.find_summaries_page, filters=ConversationFilter(user_id=maria.id))
+            assert {summary.conversation.status.value for summary in marias} == {"active", "closed"}
+            assert all(summary.user.name == "Maria Souza" for summary in marias)
+
+            assert [user.name for user in await all_pages(users.find_page, filters=UserFilter(search="souza"))] == [
+                "Maria Souza"
+            ]
+            assert [user.name for user in await all_pages(users.find_page, filters=UserFilter(search="9990020"))] == [
+                "João Lima"
+            ]
+            assert [user.name for user in await all_pages(users.find_page, filters=UserFilter(is_active=True))] == [
+                "Maria Souza"
+            ]
+
+    run(scenario)
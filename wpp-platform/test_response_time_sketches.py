@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Teste da precisão dos percentis de tempo de resposta (DDSketch)
+
+Compara os quantis estimados com os percentis exatos das mesmas amostras:
+cada estimativa deve ficar dentro de RELATIVE_ACCURACY do valor real, no
+sketch isolado, nos sketches por hora somados e no caminho completo
+(response_time_bins gravados e lidos pelo AnalyticsRepositoryImpl).
+
+Uso:
+    python -m pytest test_response_time_sketches.py
+"""
+import asyncio
+import math
+import os
+import random
+import sys
+import tempfile
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+# Adicionar o diretório raiz ao path
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(ROOT)
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.infrastructure.database.engine_config import create_async_database_engine
+from src.infrastructure.database.models import Base
+from src.infrastructure.repositories.analytics_repository_impl import (
+    RESPONSE_TIME_PERCENTILES, AnalyticsRepositoryImpl
+)
+from src.infrastructure.repositories.response_times import record_statements, sketch_params
+from src.infrastructure.repositories.sketches import MIN_VALUE, RELATIVE_ACCURACY, DDSketch
+
+QUANTILES = (0.0, 0.01, 0.25) + RESPONSE_TIME_PERCENTILES + (0.999, 1.0)
+
+
+def samples(distribution: str, count: int = 5000, seed: int = 3) -> list:
+    """Tempos de resposta em segundos (sempre >= MIN_VALUE, como o sketch exige para a garantia)"""
+    generator = random.Random(seed)
+    draw = {
+        "lognormal": lambda: generator.lognormvariate(3, 1.5),
+        "exponential": lambda: generator.expovariate(1 / 45),
+        "pareto": lambda: generator.paretovariate(1.2),
+        "uniform": lambda: generator.uniform(0.5, 600),
+        "bimodal": lambda: generator.gauss(2, 0.3) if generator.random() < 0.7 else generator.gauss(3600, 300),
+        "repeated": lambda: generator.choice((1.0, 30.0, 30.0, 90.0)),
+    }[distribution]
+    return [max(draw(), MIN_VALUE) for _ in range(count)]
+
+
+def exact(values: list, q: float) -> float:
+    """Percentil exato com o mesmo posto do sketch: o elemento floor(q * (n - 1)) em ordem"""
+    return sorted(values)[math.floor(q * (len(values) - 1))]
+
+
+def assert_within_accuracy(estimate: float, value: float) -> None:
+    assert abs(estimate - value) <= RELATIVE_ACCURACY * value * (1 + 1e-9), (estimate, value)
+
+
+@pytest.mark.parametrize("distribution", ["lognormal", "exponential", "pareto", "uniform", "bimodal", "repeated"])
+def test_quantiles_within_relative_accuracy(distribution):
+    values = samples(distribution)
+    sketch = DDSketch()
+    for value in values:
+        sketch.add(value)
+
+    assert sketch.count == len(values)
+    for q in QUANTILES:
+        assert_within_accuracy(sketch.quantile(q), exact(values, q))
+
+
+def test_merged_hourly_sketches_keep_the_accuracy():
+    """Sketches por hora somados bin a bin = o sketch de todas as amostras"""
+    values = samples("lognormal", seed=11)
+    whole, merged = DDSketch(), DDSketch()
+    hourly = [DDSketch() for _ in range(24)]
+    for index, value in enumerate(values):
+        whole.add(value)
+        hourly[index % 24].add(value)
+    for sketch in hourly:
+        merged.merge(sketch)
+
+    assert merged.bins == whole.bins
+    for q in QUANTILES:
+        assert_within_accuracy(merged.quantile(q), exact(values, q))
+
+
+def test_stored_response_times_match_exact_percentiles():
+    """Amostras gravadas em várias horas e lidas pelo repositório: totais exatos, percentis dentro do erro"""
+    values = samples("exponential", count=2000, seed=5)
+    start = datetime(2024, 3, 1, 8)
+    found = [
+        (uuid.uuid4(), start + timedelta(minutes=7 * index), value)
+        for index, value in enumerate(values)
+    ]
+
+    async def main(path: str):
+        engine = create_async_database_engine(f"sqlite+aiosqlite:///{path}")
+        try:
+            async with engine.begin() as connection:
+                await connection.run_sync(Base.metadata.create_all)
+            async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+                bin_params, hour_params = sketch_params(found)
+                bin_statement, hour_statement = record_statements("sqlite")
+                await session.execute(bin_statement, bin_params)
+                await session.execute(hour_statement, hour_params)
+                await session.commit()
+                return await AnalyticsRepositoryImpl(session).get_response_times(start, start + timedelta(days=30))
+        finally:
+            await engine.dispose()
+
+    with tempfile.TemporaryDirectory() as directory:
+        stats = asyncio.run(main(os.path.join(directory, "response_times.db")))
+
+    assert stats.count == len(values)
+    assert stats.avg_seconds == pytest.approx(sum(values) / len(values))
+    assert (stats.min_seconds, stats.max_seconds) == (pytest.approx(min(values)), pytest.approx(max(values)))
+    for q in RESPONSE_TIME_PERCENTILES:
+        assert_within_accuracy(stats.percentiles[f"p{round(q * 100)}"], exact(values, q))